@@ -4,9 +4,10 @@
 import logging
 import argparse
 from pathlib import Path
-from typing import Set, Iterable
+from typing import Set, Iterable, Tuple
 
 # installed libraries
+import numpy as np
 from tqdm import tqdm
 
 # local libraries
@@ -17,162 +18,205 @@ from ppanggolin.formats import check_pangenome_info, write_pangenome, erase_pang
 from ppanggolin.utils import restricted_float
 
 
-class MatriceNode:
-    def __init__(self, state, score, prev, gene):
-        self.state = state  # state of the node. 1 for RGP and 0 for not RGP.
-        self.score = score if score > 0 else 0  # current score of the node
-        self.prev = prev  # previous matriceNode
-        self.gene = gene  # gene this node corresponds to
+class ScoreVector:
+    """
+    Score and state of every gene of a contig, stored as arrays.
 
-    def changes(self, score):
-        # state of the node. 1 for RGP and 0 for not RGP.
-        self.state = 1 if score >= 0 else 0
-        # current score of the node. If the given score is negative, set to 0.
-        self.score = score if score >= 0 else 0
+    The score of a gene is the score of the previous gene plus the gene score modifier, clipped to 0.
+    It is computed for whole stretches of genes at once from the cumulative sum of their modifiers.
+    """
 
+    def __init__(self, contig: Contig, multi: set):
+        """Constructor method
+
+        :param contig: Contig the vector is computed on
+        :param multi: multigenic persistent families of the pangenome graph.
+        """
+        self.genes = list(contig.genes)
+        # persistent genes are penalized, all the others give a gain
+        self.persistent = np.fromiter(
+            (
+                gene.family.named_partition == "persistent" and gene.family not in multi
+                for gene in self.genes
+            ),
+            dtype=bool,
+            count=len(self.genes),
+        )
+        self.scores = np.zeros(len(self.genes), dtype=np.int64)
+        self.states = np.zeros(len(self.genes), dtype=bool)
+        # True if the gene preceding the first gene is the last gene of the contig
+        self.loop = False
+
+    def __len__(self) -> int:
+        return len(self.genes)
+
+    def modifiers(
+        self, positions: np.ndarray, persistent_penalty: int = 3, variable_gain: int = 1
+    ) -> np.ndarray:
+        """
+        Get the score modifiers of a stretch of consecutive genes.
+
+        The k-th persistent gene of a run of persistent genes is penalized by persistent_penalty^k,
+        while the other genes are given variable_gain.
+
+        :param positions: Positions of the genes of the stretch, in order
+        :param persistent_penalty: Penalty score to apply to persistent genes
+        :param variable_gain: Gain score to apply to variable genes
+
+        :return: Score modifier of each gene of the stretch
+        """
+        persistent = self.persistent[positions]
+        idx = np.arange(len(positions))
+        nb_perc = idx - np.maximum.accumulate(np.where(persistent, -1, idx)) - 1
+        # A penalty higher than any possible score behaves the same as an infinite one. Cap it to avoid overflows.
+        cap = len(self) * max(variable_gain, 1) + 1
+        penalties = [1]
+        for _ in range(nb_perc.max(initial=0)):
+            penalties.append(min(penalties[-1] * persistent_penalty, cap))
+        return np.where(
+            persistent, -np.array(penalties, dtype=np.int64)[nb_perc], variable_gain
+        )
 
-def extract_rgp(contig, node, rgp_id, naming) -> Region:
+    def compute(
+        self,
+        positions: np.ndarray,
+        prev_score: int = 0,
+        persistent_penalty: int = 3,
+        variable_gain: int = 1,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Compute the scores and states of a stretch of consecutive genes without modifying the vector.
+
+        :param positions: Positions of the genes of the stretch, in order
+        :param prev_score: Score of the gene preceding the stretch
+        :param persistent_penalty: Penalty score to apply to persistent genes
+        :param variable_gain: Gain score to apply to variable genes
+
+        :return: Scores and states of the genes of the stretch. A gene is in a RGP state if its unclipped score is positive.
+        """
+        cumsum = np.cumsum(self.modifiers(positions, persistent_penalty, variable_gain))
+        cummin = np.minimum.accumulate(np.minimum(cumsum, -prev_score))
+        unclipped = cumsum - np.concatenate(([-prev_score], cummin[:-1]))
+        return cumsum - cummin, unclipped >= 0
+
+    def max_score(self) -> Tuple[int, int]:
+        """
+        Get the last gene with the highest score
+
+        :return: The highest score and the position of the gene
+        """
+        index = len(self) - 1 - int(np.argmax(self.scores[::-1]))
+        return int(self.scores[index]), index
+
+
+def extract_rgp(
+    contig: Contig, matrix: ScoreVector, index: int, rgp_id: int, naming: str
+) -> Region:
     """
-    Extract the region from the given starting node
+    Extract the region ending at the given gene, going backward while genes are in a RGP state
     """
     new_region = None
     if naming == "contig":
         new_region = Region(contig.name + "_RGP_" + str(rgp_id))
     elif naming == "organism":
         new_region = Region(
-            node.gene.organism.name + "_" + contig.name + "_RGP_" + str(rgp_id)
+            matrix.genes[index].organism.name
+            + "_"
+            + contig.name
+            + "_RGP_"
+            + str(rgp_id)
         )
-    while node.state:
-        new_region.add(node.gene)
-        node.state = 0
-        node.score = 0
-        node = node.prev
-        if node is None:  # it's the end of the contig and the end of the region.
-            break
+    zeros = np.flatnonzero(~matrix.states[: index + 1])
+    positions = np.arange(zeros[-1] + 1 if len(zeros) > 0 else 0, index + 1)
+    if len(zeros) == 0 and matrix.loop:
+        # the region continues from the end of the contig
+        zeros = np.flatnonzero(~matrix.states[index + 1 :])
+        start = index + 2 + zeros[-1] if len(zeros) > 0 else index + 1
+        positions = np.concatenate((np.arange(start, len(matrix)), positions))
+    for position in positions[::-1]:
+        new_region.add(matrix.genes[position])
+    matrix.states[positions] = False
+    matrix.scores[positions] = 0
     return new_region
 
 
-def rewrite_matrix(contig, matrix, index, persistent, continuity, multi):
+def rewrite_matrix(
+    contig: Contig,
+    matrix: ScoreVector,
+    index: int,
+    persistent: int,
+    continuity: int,
+    multi: set,
+):
     """
-    ReWrite the matrice from the given index of the node that started a region.
+    ReWrite the scores following the given index of the gene that ended a region.
     """
-    prev = matrix[index]
     index += 1
-    if index > len(matrix) and contig.is_circular:
-        index = 0
-    # else the node was the last one of the contig, and there is nothing to do
+    # else the gene was the last one of the contig, and there is nothing to do
     if index < len(matrix):
-        next_node = matrix[index]
-        nb_perc = 0
-        while next_node.state:  # while the old state is not 0, recompute the scores.
-            if (
-                next_node.gene.family.named_partition == "persistent"
-                and next_node.gene.family not in multi
-            ):
-                modif = -pow(persistent, nb_perc)
-                nb_perc += 1
-            else:
-                modif = continuity
-                nb_perc = 0
-
-            curr_score = modif + prev.score
-            # scores can't be negative. If they are, they'll be set to 0.
-            matrix[index].changes(curr_score)
-            index += 1
-            if index >= len(matrix):
-                if contig.is_circular:
-                    index = 0
-                else:
-                    # else we're at the end of the contig, so there are no more computations. Get out of the loop
-                    break
-
-            prev = next_node
-            next_node = matrix[index]
+        # recompute the scores of the genes while their old state is not 0
+        zeros = np.flatnonzero(~matrix.states[index:])
+        if len(zeros) > 0:
+            positions = np.arange(index, index + zeros[0])
+        else:
+            positions = np.arange(index, len(matrix))
+            if contig.is_circular:
+                zeros = np.flatnonzero(~matrix.states[:index])
+                end = zeros[0] if len(zeros) > 0 else index
+                positions = np.concatenate((positions, np.arange(0, end)))
+        if len(positions) > 0:
+            # the gene that ended the region has been reset to 0
+            scores, states = matrix.compute(positions, 0, persistent, continuity)
+            matrix.scores[positions] = scores
+            matrix.states[positions] = states
 
 
 def init_matrices(
     contig: Contig, multi: set, persistent_penalty: int = 3, variable_gain: int = 1
-) -> list:
+) -> ScoreVector:
     """
-    Initialize the vector of score/state nodes
+    Initialize the vector of score/state of the genes
 
     :param contig: Current contig from one organism
     :param persistent_penalty: Penalty score to apply to persistent genes
     :param variable_gain: Gain score to apply to variable genes
     :param multi: multigenic persistent families of the pangenome graph.
 
-    :return: Initialized matrice
+    :return: Initialized score vector
     """
-    mat = []
-    prev = None
-    nb_perc = 0
-    zero_ind = None
-    curr_state = None
-    for gene in contig.genes:
-        if gene.family.named_partition == "persistent" and gene.family not in multi:
-            modif = -pow(persistent_penalty, nb_perc)
-            nb_perc += 1
-        else:
-            modif = variable_gain
-            nb_perc = 0
-
-        curr_score = modif + prev.score if prev is not None else modif
-        if curr_score >= 0:
-            curr_state = 1
-        else:
-            curr_state = 0
-            zero_ind = True
-        prev = MatriceNode(curr_state, curr_score, prev, gene)
-        if prev.state == 0:
-            zero_ind = prev
-        mat.append(prev)
-        logging.getLogger("PPanGGOLiN").debug(
-            f"gene:{gene.ID};zero_ind:{zero_ind};curr_state:{curr_state};curr_score:{curr_score}."
-        )
-
-    if zero_ind is None:
-        zero_ind = prev  # don't go further than the current node, if no node were at 0.
+    mat = ScoreVector(contig, multi)
+    positions = np.arange(len(mat))
+    mat.scores, mat.states = mat.compute(
+        positions, 0, persistent_penalty, variable_gain
+    )
 
     # if the contig is circular, and we're in a rgp state,
     # we need to continue from the "starting" gene until we leave rgp state.
-    if contig.is_circular and curr_state and zero_ind is not None:
-        # the previous node of the first processed gene is the last node.
-        mat[0].prev = prev
-        c = 0
-        nb_perc = 0
-        while curr_state:  # while state is rgp.
-            mat_node = mat[c]
-            if mat_node == zero_ind:
-                # then we've parsed the entire contig twice.
-                logging.getLogger("PPanGGOLiN").debug(
-                    f"{contig.name} was parsed entirely twice."
-                )
-                # The whole sequence is a rgp, so we're stopping the iteration now, otherwise we'll loop indefinitely
-                break
-
-            if (
-                mat_node.gene.family.named_partition == "persistent"
-                and mat_node.gene.family not in multi
-            ):
-                modif = -pow(persistent_penalty, nb_perc)
-                nb_perc += 1
-            else:
-                modif = variable_gain
-                nb_perc = 0
-
-            curr_score = modif + mat_node.prev.score
-            curr_state = 1 if curr_score >= 0 else 0
-            mat_node.changes(curr_score)
+    if contig.is_circular and mat.states[-1]:
+        # the previous gene of the first processed gene is the last gene.
+        mat.loop = True
+        # don't go further than the last gene at 0, or than the last gene if no gene were at 0.
+        zeros = np.flatnonzero(~mat.states)
+        if len(zeros) == 0:
+            # The whole sequence is a rgp, we're stopping before parsing it entirely twice
             logging.getLogger("PPanGGOLiN").debug(
-                f"gene:{mat_node.gene.ID};curr_state:{curr_state};curr_score:{curr_score}."
+                f"{contig.name} was parsed entirely twice."
             )
-            c += 1
+        positions = positions[: zeros[-1] if len(zeros) > 0 else len(mat) - 1]
+        scores, states = mat.compute(
+            positions, mat.scores[-1], persistent_penalty, variable_gain
+        )
+        # stop after the first gene leaving the rgp state
+        leaving = np.flatnonzero(~states)
+        end = leaving[0] + 1 if len(leaving) > 0 else len(positions)
+        mat.scores[positions[:end]] = scores[:end]
+        mat.states[positions[:end]] = states[:end]
     return mat
 
 
 def mk_regions(
     contig: Contig,
-    matrix: list,
+    matrix: ScoreVector,
     multi: set,
     min_length: int = 3000,
     min_score: int = 4,
@@ -184,7 +228,7 @@ def mk_regions(
     Processing matrix and 'emptying' it to get the regions.
 
     :param contig: Current contig from one organism
-    :param matrix: Initialized matrix
+    :param matrix: Initialized score vector
     :param multi: multigenic persistent families of the pangenome graph.
     :param min_length: Minimum length (bp) of a region to be considered RGP
     :param min_score: Minimal score wanted for considering a region as being RGP
@@ -194,27 +238,10 @@ def mk_regions(
 
     :return:
     """
-
-    def max_index_node(lst):
-        """gets the last node with the highest score from a list of matriceNode"""
-        if isinstance(lst, list):
-            # init with the first element of the list
-            max_score = lst[0].score
-            max_index = 0
-            for idx, node in enumerate(lst):
-                if node.score >= max_score:
-                    max_score = node.score
-                    max_index = idx
-            return max_score, max_index
-        else:
-            raise TypeError(
-                f"List of matriceNode is expected. The detected type was {type(lst)}"
-            )
-
     contig_regions = set()
-    val, index = max_index_node(matrix)
+    val, index = matrix.max_score()
     while val >= min_score:
-        new_region = extract_rgp(contig, matrix[index], len(contig_regions), naming)
+        new_region = extract_rgp(contig, matrix, index, len(contig_regions), naming)
         new_region.score = val
         if new_region.length > min_length:
             contig_regions.add(new_region)
@@ -224,7 +251,7 @@ def mk_regions(
                 gene._RGP = None
 
         rewrite_matrix(contig, matrix, index, persistent, continuity, multi)
-        val, index = max_index_node(matrix)
+        val, index = matrix.max_score()
     return contig_regions
 
 
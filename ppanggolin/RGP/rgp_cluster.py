@@ -4,6 +4,8 @@
 import logging
 import argparse
 import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
 from itertools import combinations
 from collections.abc import Callable
 from collections import defaultdict
@@ -13,7 +15,9 @@ from pathlib import Path
 # installed libraries
 from tqdm import tqdm
 import networkx as nx
+import numpy as np
 import pandas as pd
+from scipy.sparse import csr_matrix
 
 # local libraries
 from ppanggolin.pangenome import Pangenome
@@ -492,6 +496,175 @@ def compute_rgp_metric(
         return rgp_a.ID, rgp_b.ID, edge_metrics
 
 
+def get_rgp_family_matrix(
+    rgps: List[Union[Region, IdenticalRegions]],
+) -> csr_matrix:
+    """
+    Build the sparse incidence matrix of RGPs (rows) and their gene families (columns).
+
+    :param rgps: RGPs in the order of the matrix rows
+
+    :return: Matrix with 1 where the family is in the RGP
+    """
+    family_index = {}
+    rows, cols = [], []
+    for row, rgp in enumerate(rgps):
+        for family in set(rgp.families):
+            rows.append(row)
+            cols.append(family_index.setdefault(family, len(family_index)))
+    return csr_matrix(
+        (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+        shape=(len(rgps), len(family_index)),
+    )
+
+
+def compute_grr_of_block(
+    rgp_families: csr_matrix,
+    incomplete: np.ndarray,
+    start: int,
+    stop: int,
+    grr_cutoff: float,
+    grr_metric: str,
+) -> Dict[str, np.ndarray]:
+    """
+    Compute the GRR metrics between the RGPs of a block of rows and the following RGPs sharing at least one family.
+
+    Shared families of all pairs are counted at once with the product of the incidence matrix by its transpose,
+    and only pairs with the chosen metric above the cutoff are returned.
+
+    :param rgp_families: Incidence matrix of RGPs and gene families
+    :param incomplete: Whether each RGP is at a contig border
+    :param start: First row of the block
+    :param stop: Row following the last row of the block
+    :param grr_cutoff: Cutoff filter
+    :param grr_metric: grr mode between min_grr, max_grr and incomplete_aware_grr
+
+    :return: Row indices of the two RGPs of each pair with their metrics
+    """
+    shared = (rgp_families[start:stop] @ rgp_families.T).tocoo()
+    rows = shared.row + start
+    # each pair is computed once, by the block of its first RGP
+    upper = shared.col > rows
+    rows, cols, shared_family = rows[upper], shared.col[upper], shared.data[upper]
+
+    sizes = np.diff(rgp_families.indptr)
+    min_grr = shared_family / np.minimum(sizes[rows], sizes[cols])
+    max_grr = shared_family / np.maximum(sizes[rows], sizes[cols])
+    # RGP at a contig border are seen as incomplete and min GRR is used instead of max GRR
+    metrics = {
+        "incomplete_aware_grr": np.where(
+            incomplete[rows] | incomplete[cols], min_grr, max_grr
+        ),
+        "max_grr": max_grr,
+        "min_grr": min_grr,
+        "shared_family": shared_family,
+    }
+    kept = metrics[grr_metric] >= grr_cutoff
+    return {
+        "rgp_a": rows[kept],
+        "rgp_b": cols[kept],
+        **{metric: values[kept] for metric, values in metrics.items()},
+    }
+
+
+def init_grr_worker(
+    rgp_families: csr_matrix, incomplete: np.ndarray, grr_cutoff: float, grr_metric: str
+):
+    """
+    Store the data shared by all blocks in the worker process
+
+    :param rgp_families: Incidence matrix of RGPs and gene families
+    :param incomplete: Whether each RGP is at a contig border
+    :param grr_cutoff: Cutoff filter
+    :param grr_metric: grr mode between min_grr, max_grr and incomplete_aware_grr
+    """
+    global grr_worker_data
+    grr_worker_data = (rgp_families, incomplete, grr_cutoff, grr_metric)
+
+
+def compute_grr_of_block_in_worker(start: int, stop: int) -> Dict[str, np.ndarray]:
+    """
+    Compute the GRR metrics of a block of rows with the data stored by :func:`init_grr_worker`
+
+    :param start: First row of the block
+    :param stop: Row following the last row of the block
+
+    :return: Row indices of the two RGPs of each pair with their metrics
+    """
+    rgp_families, incomplete, grr_cutoff, grr_metric = grr_worker_data
+    return compute_grr_of_block(
+        rgp_families, incomplete, start, stop, grr_cutoff, grr_metric
+    )
+
+
+def compute_grr_edges(
+    rgps: List[Union[Region, IdenticalRegions]],
+    grr_cutoff: float,
+    grr_metric: str,
+    cpu: int = 1,
+    block_size: int = 1000,
+    disable_bar: bool = False,
+) -> List[Tuple[int, int, dict]]:
+    """
+    Compute GRR metrics between all pairs of RGPs sharing at least one family, and keep those above the cutoff.
+
+    :param rgps: RGPs to compare
+    :param grr_cutoff: Cutoff filter
+    :param grr_metric: grr mode between min_grr, max_grr and incomplete_aware_grr
+    :param cpu: Number of blocks of RGPs processed in parallel
+    :param block_size: Number of RGPs compared to all the others at once
+    :param disable_bar: Whether to disable the progress bar
+
+    :return: IDs of the two RGPs of each kept pair and their metrics
+    """
+    rgp_families = get_rgp_family_matrix(rgps)
+    incomplete = np.array([rgp.is_contig_border for rgp in rgps], dtype=bool)
+    ids = np.array([rgp.ID for rgp in rgps], dtype=np.int64)
+    blocks = [
+        (start, min(start + block_size, len(rgps)))
+        for start in range(0, len(rgps), block_size)
+    ]
+
+    if cpu > 1:
+        with ProcessPoolExecutor(
+            max_workers=cpu,
+            mp_context=get_context("fork"),
+            initializer=init_grr_worker,
+            initargs=(rgp_families, incomplete, grr_cutoff, grr_metric),
+        ) as executor:
+            futures = [
+                executor.submit(compute_grr_of_block_in_worker, start, stop)
+                for start, stop in blocks
+            ]
+            results = [
+                future.result()
+                for future in tqdm(
+                    futures, total=len(blocks), unit="block", disable=disable_bar
+                )
+            ]
+    else:
+        results = [
+            compute_grr_of_block(
+                rgp_families, incomplete, start, stop, grr_cutoff, grr_metric
+            )
+            for start, stop in tqdm(
+                blocks, total=len(blocks), unit="block", disable=disable_bar
+            )
+        ]
+
+    metric_names = ["incomplete_aware_grr", "max_grr", "min_grr", "shared_family"]
+    edges = []
+    for result in results:
+        id_a, id_b = ids[result["rgp_a"]], ids[result["rgp_b"]]
+        for rgp_a, rgp_b, *values in zip(
+            np.minimum(id_a, id_b).tolist(),
+            np.maximum(id_a, id_b).tolist(),
+            *(result[metric].tolist() for metric in metric_names),
+        ):
+            edges.append((rgp_a, rgp_b, dict(zip(metric_names, values))))
+    return edges
+
+
 def cluster_rgp_on_grr(graph: nx.Graph, clustering_attribute: str = "grr"):
     """
     Cluster rgp based on grr using louvain communities clustering.
@@ -582,6 +755,7 @@ def cluster_rgp(
     add_metadata: bool = False,
     metadata_sep: str = "|",
     metadata_sources: List[str] = None,
+    cpu: int = 1,
 ):
     """
     Main function to cluster regions of genomic plasticity based on their GRR
@@ -598,6 +772,7 @@ def cluster_rgp(
     :param add_metadata: Add metadata to cluster files
     :param metadata_sep: The separator used to join multiple metadata values
     :param metadata_sources: Sources of the metadata to use and write in the outputs. None means all sources are used.
+    :param cpu: Number of available cpus
     """
 
     metatypes = set()
@@ -675,31 +850,17 @@ def cluster_rgp(
     grr_graph = nx.Graph()
     grr_graph.add_nodes_from(rgp.ID for rgp in dereplicated_rgps)
 
-    # Get all pairs of RGP that share at least one family
-
-    family2rgp = defaultdict(set)
-    for rgp in dereplicated_rgps:
-        for fam in rgp.families:
-            family2rgp[fam].add(rgp)
-
-    rgp_pairs = set()
-    for rgps in family2rgp.values():
-        rgp_pairs |= {tuple(sorted(rgp_pair)) for rgp_pair in combinations(rgps, 2)}
-
-    pairs_count = len(rgp_pairs)
-
     logging.getLogger("PPanGGOLiN").info(
-        f"Computing GRR metric for {pairs_count:,} pairs of RGP."
+        "Computing GRR metric for pairs of RGP sharing at least one family."
     )
 
-    pairs_of_rgps_metrics = []
-
-    for rgp_a, rgp_b in rgp_pairs:
-
-        pair_metrics = compute_rgp_metric(rgp_a, rgp_b, grr_cutoff, grr_metric)
+    pairs_of_rgps_metrics = compute_grr_edges(
+        dereplicated_rgps, grr_cutoff, grr_metric, cpu=cpu, disable_bar=disable_bar
+    )
 
-        if pair_metrics:
-            pairs_of_rgps_metrics.append(pair_metrics)
+    logging.getLogger("PPanGGOLiN").info(
+        f"{len(pairs_of_rgps_metrics):,} pairs of RGP have a {grr_metric} above {grr_cutoff}."
+    )
 
     grr_graph.add_edges_from(pairs_of_rgps_metrics)
 
@@ -789,6 +950,7 @@ def launch(args: argparse.Namespace):
         add_metadata=args.add_metadata,
         metadata_sep=args.metadata_sep,
         metadata_sources=args.metadata_sources,
+        cpu=args.cpu,
     )
 
 
@@ -915,3 +1077,12 @@ def parser_cluster_rgp(parser: argparse.ArgumentParser):
         help="The separator used to join multiple metadata values for elements with multiple metadata"
         " values from the same source. This character should not appear in metadata values.",
     )
+
+    optional.add_argument(
+        "-c",
+        "--cpu",
+        required=False,
+        default=1,
+        type=int,
+        help="Number of available cpus",
+    )
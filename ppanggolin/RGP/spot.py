@@ -6,8 +6,9 @@ import logging
 import argparse
 import time
 import os
+from collections import defaultdict
 from pathlib import Path
-from typing import List
+from typing import Hashable, List, Set
 
 # installed libraries
 import networkx as nx
@@ -81,16 +82,135 @@ def check_sim(
     return False
 
 
-def add_new_node_in_spot_graph(g: nx.Graph, region: Region, borders: list) -> str:
+class BorderIndex:
     """
-    Add bordering region as node to graph
+    Index of the flanking gene families of the spot graph nodes.
 
-    :param g: spot graph
-    :param region: region in spot
-    :param borders: bordering families in spot
-    :return blocks: name of the node that has been added
+    Borders are indexed by their first exact_match families and by their ordered prefixes and suffixes of the sizes
+    allowed to overlap, so that the nodes having a border satisfying comp_border with a given border are found
+    with dictionary lookups instead of comparing it to every node.
+    """
+
+    def __init__(
+        self, overlapping_match: int = 2, set_size: int = 3, exact_match: int = 1
+    ):
+        """Constructor method
+
+        :param overlapping_match: Number of missing persistent genes allowed when comparing flanking genes
+        :param set_size: Number of single copy markers to use as flanking genes for RGP during hotspot computation
+        :param exact_match: Number of perfectly matching flanking single copy markers required to associate RGPs
+        """
+        self.overlapping_match = overlapping_match
+        self.set_size = set_size
+        self.exact_match = exact_match
+        # sizes of the ordered overlaps tested by comp_border
+        self.overlap_sizes = sorted(
+            {
+                max(set_size - shift, 0)
+                for shift in range(1, set_size - overlapping_match + 1)
+            }
+        )
+        self.rank = {}
+        self.borders = {}
+        self._exact = defaultdict(set)
+        self._prefix = defaultdict(set)
+        self._suffix = defaultdict(set)
+
+    @classmethod
+    def from_spot_graph(
+        cls,
+        graph_spot: nx.Graph,
+        overlapping_match: int = 2,
+        set_size: int = 3,
+        exact_match: int = 1,
+    ) -> "BorderIndex":
+        """
+        Index all the nodes of a spot graph
+
+        :param graph_spot: spot graph
+        :param overlapping_match: Number of missing persistent genes allowed when comparing flanking genes
+        :param set_size: Number of single copy markers to use as flanking genes for RGP during hotspot computation
+        :param exact_match: Number of perfectly matching flanking single copy markers required to associate RGPs
+
+        :return: Index of the spot graph nodes
+        """
+        index = cls(overlapping_match, set_size, exact_match)
+        for node, data in graph_spot.nodes(data=True):
+            index.add(node, [data["border0"], data["border1"]])
+        return index
+
+    def __len__(self) -> int:
+        return len(self.rank)
+
+    def __contains__(self, node: Hashable) -> bool:
+        return node in self.rank
+
+    def add(self, node: Hashable, borders: List[list]):
+        """
+        Add a node to the index
+
+        :param node: Node of the spot graph
+        :param borders: The two flanking gene families lists of the node
+        """
+        if node in self.rank:
+            return
+        self.rank[node] = len(self.rank)
+        self.borders[node] = borders
+        for border in borders:
+            self._exact[tuple(border[0 : self.exact_match])].add(node)
+            if len(border) == self.set_size:
+                for size in self.overlap_sizes:
+                    self._prefix[size, tuple(border[0:size])].add(node)
+                    self._suffix[size, tuple(border[self.set_size - size :])].add(node)
+
+    def matching_nodes(self, border: list) -> Set[Hashable]:
+        """
+        Get the indexed nodes having at least one border matching the given border according to comp_border
+
+        :param border: Flanking gene families
+
+        :return: Nodes with a matching border
+        """
+        nodes = set(self._exact.get(tuple(border[0 : self.exact_match]), ()))
+        if len(border) == self.set_size:
+            for size in self.overlap_sizes:
+                nodes |= self._suffix.get((size, tuple(border[0:size])), set())
+                nodes |= self._prefix.get(
+                    (size, tuple(border[self.set_size - size :])), set()
+                )
+        return nodes
+
+    def similar_nodes(self, borders: List[list]) -> List[Hashable]:
+        """
+        Get the indexed nodes similar to a pair of borders according to check_sim, in the order they were indexed
+
+        :param borders: The two flanking gene families lists of a node
+
+        :return: Similar nodes
+        """
+        # check_sim requires both borders to match, so the candidates are the nodes matching the first one
+        candidates = sorted(self.matching_nodes(borders[0]), key=self.rank.get)
+        return [
+            node
+            for node in candidates
+            if check_sim(
+                borders,
+                self.borders[node],
+                self.overlapping_match,
+                self.set_size,
+                self.exact_match,
+            )
+        ]
+
+
+def get_border_node_name(borders: list) -> str:
+    """
+    Get the name of the spot graph node of the given bordering genes
+
+    :param borders: bordering genes of a region
+    :return: name of the node
     """
-    blocks = str(
+    return str(
         sorted(
             [
                 [gene.family.ID for gene in borders[0]],
@@ -99,6 +219,18 @@ def add_new_node_in_spot_graph(g: nx.Graph, region: Region, borders: list) -> st
             key=lambda x: x[0],
         )
     )
+
+
+def add_new_node_in_spot_graph(g: nx.Graph, region: Region, borders: list) -> str:
+    """
+    Add bordering region as node to graph
+
+    :param g: spot graph
+    :param region: region in spot
+    :param borders: bordering families in spot
+    :return blocks: name of the node that has been added
+    """
+    blocks = get_border_node_name(borders)
     g.add_node(blocks)
     try:
         g.nodes[blocks]["nb_rgp"] += 1
@@ -152,17 +284,13 @@ def make_spot_graph(
     logging.getLogger("PPanGGOLiN").info(
         f"{len(node_list)} number of different pairs of flanking gene families"
     )
-    for i, nodei in enumerate(node_list[:-1]):
-        for nodej in node_list[i + 1 :]:
-            node_obj_i = graph_spot.nodes[nodei]
-            node_obj_j = graph_spot.nodes[nodej]
-            if check_sim(
-                [node_obj_i["border0"], node_obj_i["border1"]],
-                [node_obj_j["border0"], node_obj_j["border1"]],
-                overlapping_match,
-                set_size,
-                exact_match,
-            ):
+    # only compare nodes sharing flanking families, in the same order as an all-pairs comparison
+    index = BorderIndex.from_spot_graph(
+        graph_spot, overlapping_match, set_size, exact_match
+    )
+    for nodei in node_list:
+        for nodej in index.similar_nodes(index.borders[nodei]):
+            if index.rank[nodej] > index.rank[nodei]:
                 graph_spot.add_edge(nodei, nodej)
 
     return graph_spot
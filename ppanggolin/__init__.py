@@ -13,6 +13,7 @@ import ppanggolin.mod
 import ppanggolin.context
 import ppanggolin.workflow
 import ppanggolin.projection
+import ppanggolin.update
 import ppanggolin.meta
 import ppanggolin.info
 
@@ -34,12 +35,14 @@ SUBCOMMAND_TO_SUBPARSER = {
     "msa": ppanggolin.formats.writeMSA.subparser,
     "metrics": ppanggolin.metrics.metrics.subparser,
     "align": ppanggolin.align.subparser,
+    "align_server": ppanggolin.align.alignServer.subparser,
     "info": ppanggolin.info.subparser,
     "rgp": ppanggolin.RGP.genomicIsland.subparser,
     "spot": ppanggolin.RGP.spot.subparser,
     "module": ppanggolin.mod.subparser,
     "context": ppanggolin.context.subparser,
     "projection": ppanggolin.projection.subparser,
+    "update": ppanggolin.update.subparser,
     "rgp_cluster": ppanggolin.RGP.rgp_cluster.subparser,
     "metadata": ppanggolin.meta.subparser,
 }
@@ -1 +1,2 @@
 from .alignOnPang import subparser, launch
+from . import alignServer
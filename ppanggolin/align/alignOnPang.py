@@ -6,8 +6,14 @@ from _io import TextIOWrapper
 import logging
 import tempfile
 import argparse
-from collections import defaultdict, Counter
-from typing import List, Tuple, Set, Dict, Union, Iterable, Any
+import contextlib
+import hashlib
+import json
+import os
+import shutil
+from collections import defaultdict, Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple, Set, Dict, Union, Iterable, Any, Callable, Generator
 from pathlib import Path
 
 from tqdm import tqdm
@@ -19,6 +25,7 @@ from ppanggolin.utils import (
     mk_outdir,
     read_compressed_or_not,
     create_tmpdir,
+    min_one,
     run_subprocess,
     check_tools_availability,
     check_translation_table_to_use,
@@ -26,12 +33,32 @@ from ppanggolin.utils import (
 from ppanggolin.pangenome import Pangenome
 from ppanggolin.region import Spot
 from ppanggolin.figures.draw_spot import draw_selected_spots, subgraph
-from ppanggolin.formats.readBinaries import get_non_redundant_gene_sequences_from_file
-from ppanggolin.formats.writeSequences import translate_genes, create_mmseqs_db
+from ppanggolin.formats.readBinaries import read_non_redundant_gene_sequences_from_file
+from ppanggolin.formats.writeSequences import (
+    translate_genes,
+    create_mmseqs_db,
+    write_mmseqs_db,
+    translate_mmseqs_db,
+)
+
+# version of the cached target databases, to increase whenever the way they are built changes
+TARGET_DB_CACHE_VERSION = 1
+
+# k-mer prefilter parameters of mmseqs search, which the index of the target database must share
+mmseqs_prefilter_args = [
+    "--seed-sub-mat",
+    "VTML40.out",
+    "-s",
+    "2",
+    "--comp-bias-corr",
+    "0",
+    "--mask",
+    "0",
+]
 
 
 def align_seq_to_pang(
-    target_seq_file: Union[Path, Iterable[Path]],
+    target_db: Path,
     query_seq_files: Union[Path, Iterable[Path]],
     tmpdir: Path,
     cpu: int = 1,
@@ -40,14 +67,12 @@ def align_seq_to_pang(
     coverage: float = 0.8,
     query_type: str = "unknow",
     is_query_slf: bool = False,
-    target_type: str = "unknow",
-    is_target_slf: bool = False,
     translation_table: int = None,
 ) -> Path:
     """
     Align fasta sequence to pangenome sequences.
 
-    :param target_seq_file: File with sequences of pangenome (target)
+    :param target_db: MMSeqs2 amino acid database of pangenome sequences (target)
     :param query_seq_files: Iterable of files with sequences from input file (query)
     :param tmpdir: Temporary directory to align sequences
     :param cpu: Number of available cpu
@@ -56,35 +81,11 @@ def align_seq_to_pang(
     :param coverage: minimal identity threshold for the alignment
     :param query_type: Sequences type of the file (query). [nucleotide, protein, unknow]
     :param is_query_slf: Is the sequence file (query) with single line fasta. If True, MMSeqs2 database will be with soft link
-    :param target_type: Sequences type of pangenome (target). [nucleotide, aminoacid, protein]
-    :param is_target_slf: Is the sequences of pangenome (target) with single line fasta. If True, MMSeqs2 database will be with soft link
     :param translation_table: Translation table to use, if sequences are nucleotide and need to be translated.
 
     :return: Alignment result file
     """
 
-    if target_type == "nucleotide":
-        logging.getLogger("PPanGGOLiN").debug(
-            "Target sequences will be translated by mmseqs with "
-            f"translation table {translation_table}"
-        )
-        with create_tmpdir(
-            tmpdir, basename="target_db", keep_tmp=True
-        ) as target_db_dir:
-            #  Keep is set as true because whether tmpdir is deleted or not target_db_dir will be the same
-            target_db = translate_genes(
-                target_seq_file, target_db_dir, cpu, is_target_slf, translation_table
-            )
-    else:
-        db_type = 1 if target_type == "protein" else 0
-        target_db = create_mmseqs_db(
-            [target_seq_file] if isinstance(target_seq_file, Path) else target_seq_file,
-            "target_db",
-            tmpdir,
-            db_mode=1 if is_target_slf else 0,
-            db_type=db_type,
-        )
-
     if query_type == "nucleotide":
         logging.getLogger("PPanGGOLiN").debug(
             "Query sequences will be translated by mmseqs "
@@ -136,14 +137,7 @@ def align_seq_to_pang(
             cov_mode,
             "--threads",
             str(cpu),
-            "--seed-sub-mat",
-            "VTML40.out",
-            "-s",
-            "2",
-            "--comp-bias-corr",
-            "0",
-            "--mask",
-            "0",
+            *mmseqs_prefilter_args,
             "-e",
             "1",
         ]
@@ -181,27 +175,21 @@ def align_seq_to_pang(
     return Path(outfile.name)
 
 
-def map_input_gene_to_family_all_aln(
-    aln_res: Path, outdir: Path, pangenome: Pangenome
-) -> Tuple[Dict[str, GeneFamily], Path]:
+def parse_alignment_hits(
+    aln_res: Path, aln_outfl: TextIOWrapper, get_family: Callable[[str], GeneFamily]
+) -> Dict[str, GeneFamily]:
     """
-    Read alignment result to link input sequences to pangenome gene family.
-    Alignment have been made against all genes of the pangenome.
+    Read alignment result line per line to link input sequences to the gene family of their best hit,
+    and write the cleaned alignment lines.
 
     :param aln_res: Alignment result file
-    :param outdir: Output directory
-    :param pangenome: Input pangenome
+    :param aln_outfl: File object where the cleaned alignment lines are written
+    :param get_family: Function giving the gene family of a target sequence identifier
 
-    :return: Dictionary with sequence link to pangenome gene families and actual path to the cleaned alignment file
+    :return: Dictionary with sequence link to pangenome gene families
     """
-
     seq2pang = {}
-    aln_file_clean = (
-        outdir / "alignment_input_seqs_to_all_pangenome_genes.tsv"
-    )  # write the actual result file
-    logging.getLogger("PPanGGOLiN").debug(f"Writing alignment file in {aln_file_clean}")
-
-    with open(aln_res) as alnFile, open(aln_file_clean, "w") as aln_outfl:
+    with open(aln_res) as alnFile:
         for line in alnFile:
             line_splitted = line.split()
             if not line_splitted:
@@ -212,15 +200,39 @@ def map_input_gene_to_family_all_aln(
             )  # remove the 'ppanggolin_' bit of the id
             line_splitted[0] = line_splitted[0].replace("ppanggolin_", "")
 
-            input_seq_id, gene_id = line_splitted[0:2]
+            input_seq_id, target_id = line_splitted[0:2]
 
             aln_outfl.write("\t".join(line_splitted) + "\n")
 
             if seq2pang.get(input_seq_id) is None:  # if no results were found yet
-                family = pangenome.get_gene(gene_id).family
-                seq2pang[input_seq_id] = (
-                    family  # then the best hit is the first one we see.
-                )
+                seq2pang[input_seq_id] = get_family(
+                    target_id
+                )  # then the best hit is the first one we see.
+    return seq2pang
+
+
+def map_input_gene_to_family_all_aln(
+    aln_res: Path, outdir: Path, pangenome: Pangenome
+) -> Tuple[Dict[str, GeneFamily], Path]:
+    """
+    Read alignment result to link input sequences to pangenome gene family.
+    Alignment have been made against all genes of the pangenome.
+
+    :param aln_res: Alignment result file
+    :param outdir: Output directory
+    :param pangenome: Input pangenome
+
+    :return: Dictionary with sequence link to pangenome gene families and actual path to the cleaned alignment file
+    """
+    aln_file_clean = (
+        outdir / "alignment_input_seqs_to_all_pangenome_genes.tsv"
+    )  # write the actual result file
+    logging.getLogger("PPanGGOLiN").debug(f"Writing alignment file in {aln_file_clean}")
+
+    with open(aln_file_clean, "w") as aln_outfl:
+        seq2pang = parse_alignment_hits(
+            aln_res, aln_outfl, lambda gene_id: pangenome.get_gene(gene_id).family
+        )
 
     return seq2pang, aln_file_clean
 
@@ -238,33 +250,14 @@ def map_input_gene_to_family_rep_aln(
 
     :return: Dictionary with sequence link to pangenome gene families and actual path to the cleaned alignment file
     """
-    seq2pang = {}
     aln_file_clean = (
         outdir / "alignment_input_seqs_to_pangenome_gene_families.tsv"
     )  # write the actual result file
 
     logging.getLogger("PPanGGOLiN").debug(f"Writing alignment file in {aln_file_clean}")
 
-    with open(aln_res) as alnFile, open(aln_file_clean, "w") as aln_outfl:
-        for line in alnFile:
-            line_splitted = line.split()
-            if not line_splitted:
-                continue
-
-            line_splitted[1] = line_splitted[1].replace(
-                "ppanggolin_", ""
-            )  # remove the 'ppanggolin_' bit of the id
-            line_splitted[0] = line_splitted[0].replace("ppanggolin_", "")
-
-            aln_outfl.write("\t".join(line_splitted) + "\n")
-
-            input_seq_id, gene_family_id = line_splitted[0:2]
-
-            if seq2pang.get(input_seq_id) is None:  # if no results were found yet
-                family = pangenome.get_gene_family(
-                    gene_family_id
-                )  # then the best hit is the first one we see.
-                seq2pang[input_seq_id] = family
+    with open(aln_file_clean, "w") as aln_outfl:
+        seq2pang = parse_alignment_hits(aln_res, aln_outfl, pangenome.get_gene_family)
 
     return seq2pang, aln_file_clean
 
@@ -303,47 +296,264 @@ def get_seq_ids(seq_file: TextIOWrapper) -> Tuple[Set[str], bool, bool]:
     return seq_set, is_nucleotide, single_line_fasta
 
 
-def write_gene_fam_sequences(
-    pangenome: Pangenome, output: Path, add: str = "", disable_bar: bool = False
-):
+def create_gene_fam_db(
+    pangenome: Pangenome, tmpdir: Path, add: str = "", disable_bar: bool = False
+) -> Path:
     """
-    Export the sequence of gene families
+    Write the sequence of gene families in a MMSeqs2 amino acid database
 
     :param pangenome: Pangenome containing families
-    :param output: Path to file where sequences will be written
+    :param tmpdir: Directory where the database will be written
     :param add: Add prefix to sequence name
     :param disable_bar: disable progress bar
+
+    :return: Path to the MMSeqs2 database
     """
-    with open(output, "w") as file_obj:
-        for fam in tqdm(
-            pangenome.gene_families,
-            unit="families",
-            disable=disable_bar,
-            total=pangenome.number_of_gene_families,
-        ):
-            file_obj.write(">" + add + fam.name + "\n")
-            file_obj.write(fam.sequence + "\n")
+    return write_mmseqs_db(
+        (
+            (add + fam.name, fam.sequence)
+            for fam in tqdm(
+                pangenome.gene_families,
+                unit="families",
+                disable=disable_bar,
+                total=pangenome.number_of_gene_families,
+            )
+        ),
+        "target_db",
+        tmpdir,
+        db_type=1,
+    )
 
 
-def write_all_gene_sequences(
-    pangenome: Pangenome, output: Path, add: str = "", disable_bar: bool = False
-):
+def create_all_genes_db(
+    pangenome: Pangenome,
+    tmpdir: Path,
+    cpu: int = 1,
+    translation_table: int = 11,
+    add: str = "",
+    disable_bar: bool = False,
+) -> Path:
     """
-    Export the sequence of pangenome genes
+    Write the non-redundant sequences of pangenome genes in a MMSeqs2 database and translate them
 
     :param pangenome: Pangenome containing genes
-    :param output: Path to file where sequences will be written
+    :param tmpdir: Directory where the database will be written
+    :param cpu: Number of available threads to translate sequences
+    :param translation_table: Translation table to use
     :param add: Add prefix to sequence name
     :param disable_bar: disable progress bar
+
+    :return: Path to the MMSeqs2 amino acid database
     """
 
     if pangenome.status["geneSequences"] == "inFile":
-        get_non_redundant_gene_sequences_from_file(
-            pangenome.file, output, add=add, disable_bar=disable_bar
+        seq_nucdb = write_mmseqs_db(
+            read_non_redundant_gene_sequences_from_file(
+                pangenome.file, add=add, disable_bar=disable_bar
+            ),
+            "target_nucleotides_db",
+            tmpdir,
+            db_type=2,
         )
     else:
         # this should never happen if the pangenome has been properly checked before launching this function.
         raise Exception("The pangenome does not include gene sequences")
+    logging.getLogger("PPanGGOLiN").debug(
+        "Target sequences will be translated by mmseqs with "
+        f"translation table {translation_table}"
+    )
+    with create_tmpdir(tmpdir, basename="target_db", keep_tmp=True) as target_db_dir:
+        #  Keep is set as true because whether tmpdir is deleted or not target_db_dir will be the same
+        return translate_mmseqs_db(seq_nucdb, target_db_dir, cpu, translation_table)
+
+
+def create_target_db(
+    pangenome: Pangenome,
+    tmpdir: Path,
+    use_representatives: bool = False,
+    cpu: int = 1,
+    translation_table: int = 11,
+    disable_bar: bool = False,
+) -> Path:
+    """
+    Write the MMSeqs2 amino acid database of the pangenome sequences to align input sequences against
+
+    :param pangenome: Pangenome containing families and genes
+    :param tmpdir: Directory where the database will be written
+    :param use_representatives: Use representative sequences of gene families rather than all genes
+    :param cpu: Number of available threads to translate sequences
+    :param translation_table: Translation table to use for gene sequences
+    :param disable_bar: disable progress bar
+
+    :return: Path to the MMSeqs2 database
+    """
+    if use_representatives:
+        return create_gene_fam_db(
+            pangenome, tmpdir, add="ppanggolin_", disable_bar=disable_bar
+        )
+    return create_all_genes_db(
+        pangenome,
+        tmpdir,
+        cpu=cpu,
+        translation_table=translation_table,
+        add="ppanggolin_",
+        disable_bar=disable_bar,
+    )
+
+
+def create_target_db_index(target_db: Path, tmpdir: Path, cpu: int = 1):
+    """
+    Precompute the k-mer index of a MMSeqs2 target database, used by mmseqs search when it is compatible
+
+    :param target_db: MMSeqs2 amino acid database
+    :param tmpdir: Temporary directory
+    :param cpu: Number of available threads
+    """
+    logging.getLogger("PPanGGOLiN").info(f"Indexing the target database {target_db}")
+    cmd = list(
+        map(
+            str,
+            [
+                "mmseqs",
+                "createindex",
+                target_db,
+                tmpdir,
+                "--threads",
+                cpu,
+                *mmseqs_prefilter_args,
+            ],
+        )
+    )
+    run_subprocess(cmd, msg="MMSeqs createindex failed with the following error:\n")
+
+
+def get_file_hash(file_path: Path, chunk_size: int = 2**20) -> str:
+    """
+    Compute the SHA-256 hash of a file, read chunk per chunk
+
+    :param file_path: Path to the file
+    :param chunk_size: Number of bytes read at once
+
+    :return: Hexadecimal digest of the file content
+    """
+    file_hash = hashlib.sha256()
+    with open(file_path, "rb") as file_obj:
+        for chunk in iter(lambda: file_obj.read(chunk_size), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+def write_target_db_metadata(metadata: Dict[str, Any], metadata_file: Path):
+    """
+    Write the description of a cached target database, replacing the file at once
+    so that other processes never read it partially written
+
+    :param metadata: Description of the cached target database
+    :param metadata_file: Path to the description file
+    """
+    tmp_file = metadata_file.with_name(f"{metadata_file.name}.{os.getpid()}")
+    with open(tmp_file, "w") as file_obj:
+        json.dump(metadata, file_obj, indent=4)
+    os.replace(tmp_file, metadata_file)
+
+
+def get_target_db(
+    pangenome: Pangenome,
+    tmpdir: Path,
+    use_representatives: bool = False,
+    cpu: int = 1,
+    translation_table: int = 11,
+    target_db_cache: Path = None,
+    index_target_db: bool = False,
+    disable_bar: bool = False,
+) -> Path:
+    """
+    Get the MMSeqs2 database of the pangenome sequences to align input sequences against.
+
+    With a cache directory, the database is looked up with a key made of the hash of the pangenome file
+    and the parameters used to build it. It is built in the cache directory when it is not found,
+    so that later runs on the same pangenome can reuse it.
+
+    :param pangenome: Pangenome containing families and genes
+    :param tmpdir: Temporary directory
+    :param use_representatives: Use representative sequences of gene families rather than all genes
+    :param cpu: Number of available threads
+    :param translation_table: Translation table to use for gene sequences
+    :param target_db_cache: Directory where target databases are cached. No cache is used if None.
+    :param index_target_db: Precompute the index of the cached target database
+    :param disable_bar: disable progress bar
+
+    :return: Path to the MMSeqs2 database
+    """
+    if target_db_cache is None:
+        return create_target_db(
+            pangenome, tmpdir, use_representatives, cpu, translation_table, disable_bar
+        )
+
+    cache_key = {
+        "version": TARGET_DB_CACHE_VERSION,
+        "pangenome_hash": get_file_hash(pangenome.file),
+        "target": "representatives" if use_representatives else "all_genes",
+        # representative sequences of families are already translated
+        "translation_table": None if use_representatives else translation_table,
+    }
+    entry_name = hashlib.sha256(
+        json.dumps(cache_key, sort_keys=True).encode()
+    ).hexdigest()
+    entry_dir = target_db_cache / entry_name
+    metadata_file = entry_dir / "target_db.json"
+    target_db_cache.mkdir(parents=True, exist_ok=True)
+
+    if metadata_file.exists():
+        with open(metadata_file) as file_obj:
+            metadata = json.load(file_obj)
+        target_db = entry_dir / metadata["database"]
+        logging.getLogger("PPanGGOLiN").info(
+            f"Reusing the cached target database {target_db}"
+        )
+        if index_target_db and not metadata["indexed"]:
+            create_target_db_index(target_db, tmpdir, cpu)
+            metadata["indexed"] = True
+            write_target_db_metadata(metadata, metadata_file)
+        return target_db
+
+    try:
+        entry_dir.mkdir()
+    except FileExistsError:
+        logging.getLogger("PPanGGOLiN").warning(
+            f"The cached target database in {entry_dir} is incomplete. It is either being built by another process, "
+            "or a previous run was interrupted, in which case this directory should be removed. "
+            "The target database is built without using the cache."
+        )
+        return create_target_db(
+            pangenome, tmpdir, use_representatives, cpu, translation_table, disable_bar
+        )
+
+    logging.getLogger("PPanGGOLiN").info(
+        f"Building the target database in the cache directory {entry_dir}"
+    )
+    try:
+        target_db = create_target_db(
+            pangenome,
+            entry_dir,
+            use_representatives,
+            cpu,
+            translation_table,
+            disable_bar,
+        )
+        if index_target_db:
+            create_target_db_index(target_db, tmpdir, cpu)
+        metadata = dict(
+            cache_key,
+            pangenome=pangenome.file,
+            database=target_db.relative_to(entry_dir).as_posix(),
+            indexed=index_target_db,
+        )
+        write_target_db_metadata(metadata, metadata_file)
+    except BaseException:
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        raise
+    return target_db
 
 
 def project_and_write_partition(
@@ -479,6 +689,88 @@ def draw_spot_gexf(
         )
 
 
+def write_seq_info(
+    finfo: TextIOWrapper,
+    seq_to_pang: Dict[str, GeneFamily],
+    fam2rgp: Dict[GeneFamily, Set[str]],
+    fam2spot: Dict[GeneFamily, Set[Spot]],
+    fam2border: Dict[GeneFamily, Set[Spot]],
+) -> Set[Spot]:
+    """
+    Write the partition, spots and RGP of the gene family of each aligned sequence
+
+    :param finfo: File object of the information file
+    :param seq_to_pang: Alignment result
+    :param fam2rgp: Dictionary which link gene families to the RGP they belong to
+    :param fam2spot: Dictionary which link gene families to the spots they belong to
+    :param fam2border: Dictionary which link gene families to the spots they are bordering
+
+    :return: Spots related to the aligned sequences
+    """
+    spot_list = set()
+    for seq, panfam in seq_to_pang.items():
+        finfo.write(
+            seq
+            + "\t"
+            + panfam.name
+            + "\t"
+            + panfam.named_partition
+            + "\t"
+            + ",".join(map(str, fam2spot[panfam]))
+            + "\t"
+            + ",".join(map(str, fam2border[panfam]))
+            + "\t"
+            + ",".join(fam2rgp[panfam])
+            + "\n"
+        )
+        spot_list |= set(fam2spot[panfam])
+        spot_list |= set(fam2border[panfam])
+    return spot_list
+
+
+def draw_related_spots(
+    spot_list: Set[Spot],
+    pangenome: Pangenome,
+    output: Path,
+    multigenics: Set[GeneFamily],
+    disable_bar: bool = False,
+):
+    """
+    Draw figures and graphs in a gexf format of the spots related to the input sequences
+
+    :param spot_list: Spots related to the input sequences
+    :param pangenome: Pangenome which contain information
+    :param output: Path of the output directory
+    :param multigenics: multigenic families
+    :param disable_bar: disable progress bar
+    """
+    drawn_spots = set()
+    for spot in spot_list:
+        if len(spot.get_uniq_ordered_set()) > 1:
+            drawn_spots.add(spot)
+    logging.getLogger("PPanGGOLiN").info(
+        f"Drawing the {len(drawn_spots)} spots with more than 1 organization "
+        f"related to hits of the input sequences..."
+    )
+    draw_selected_spots(
+        drawn_spots,
+        pangenome,
+        output,
+        pangenome.parameters["spot"]["overlapping_match"],
+        pangenome.parameters["spot"]["exact_match_size"],
+        pangenome.parameters["spot"]["set_size"],
+        disable_bar=disable_bar,
+    )
+
+    fam2mod = {}  # fam2module
+    if pangenome.status["modules"] != "No":
+        for mod in pangenome.modules:
+            for fam in mod.families:
+                fam2mod[fam] = f"module_{mod.ID}"
+
+    draw_spot_gexf(drawn_spots, output, multigenics=multigenics, fam_to_mod=fam2mod)
+
+
 def get_seq_info(
     seq_to_pang: dict,
     pangenome: Pangenome,
@@ -507,51 +799,10 @@ def get_seq_info(
         )
         fam2rgp = get_fam_to_rgp(pangenome, multigenics)
         fam2spot, fam2border = get_fam_to_spot(pangenome, multigenics)
-        spot_list = set()
-        for seq, panfam in seq_to_pang.items():
-            finfo.write(
-                seq
-                + "\t"
-                + panfam.name
-                + "\t"
-                + panfam.named_partition
-                + "\t"
-                + ",".join(map(str, fam2spot[panfam]))
-                + "\t"
-                + ",".join(map(str, fam2border[panfam]))
-                + "\t"
-                + ",".join(fam2rgp[panfam])
-                + "\n"
-            )
-            spot_list |= set(fam2spot[panfam])
-            spot_list |= set(fam2border[panfam])
+        spot_list = write_seq_info(finfo, seq_to_pang, fam2rgp, fam2spot, fam2border)
 
     if draw_related:
-        drawn_spots = set()
-        for spot in spot_list:
-            if len(spot.get_uniq_ordered_set()) > 1:
-                drawn_spots.add(spot)
-        logging.getLogger("PPanGGOLiN").info(
-            f"Drawing the {len(drawn_spots)} spots with more than 1 organization "
-            f"related to hits of the input sequences..."
-        )
-        draw_selected_spots(
-            drawn_spots,
-            pangenome,
-            output,
-            pangenome.parameters["spot"]["overlapping_match"],
-            pangenome.parameters["spot"]["exact_match_size"],
-            pangenome.parameters["spot"]["set_size"],
-            disable_bar=disable_bar,
-        )
-
-        fam2mod = {}  # fam2module
-        if pangenome.status["modules"] != "No":
-            for mod in pangenome.modules:
-                for fam in mod.families:
-                    fam2mod[fam] = f"module_{mod.ID}"
-
-        draw_spot_gexf(drawn_spots, output, multigenics=multigenics, fam_to_mod=fam2mod)
+        draw_related_spots(spot_list, pangenome, output, multigenics, disable_bar)
 
     logging.getLogger("PPanGGOLiN").info(
         f"File listing RGP and spots where sequences of interest are located : "
@@ -571,6 +822,8 @@ def get_input_seq_to_family_with_rep(
     identity: float = 0.8,
     coverage: float = 0.8,
     translation_table: int = 11,
+    target_db_cache: Path = None,
+    index_target_db: bool = False,
     disable_bar: bool = False,
 ) -> Tuple[Path, Dict[str, GeneFamily]]:
     """
@@ -590,22 +843,27 @@ def get_input_seq_to_family_with_rep(
     :param identity: Minimum identity threshold for the alignment (default: 0.8).
     :param coverage: Minimum coverage threshold for the alignment (default: 0.8).
     :param translation_table: Translation table to use if sequences need to be translated (default: 11).
+    :param target_db_cache: Directory where the database of pangenome sequences is cached (default: no cache).
+    :param index_target_db: If True, precompute the index of the cached database of pangenome sequences.
     :param disable_bar: If True, disable the progress bar.
 
     :return: A tuple containing the path to the alignment result file,
              and a dictionary mapping input sequences to gene families.
 
     """
-    pangenome_sequences = tmpdir / "proteins_families.faa"
-    logging.getLogger("PPanGGOLiN").debug(
-        f"Write gene family sequences in {pangenome_sequences.absolute()}"
-    )
-    write_gene_fam_sequences(
-        pangenome, pangenome_sequences, add="ppanggolin_", disable_bar=disable_bar
+    target_db = get_target_db(
+        pangenome,
+        tmpdir,
+        use_representatives=True,
+        cpu=cpu,
+        translation_table=translation_table,
+        target_db_cache=target_db_cache,
+        index_target_db=index_target_db,
+        disable_bar=disable_bar,
     )
 
     align_file = align_seq_to_pang(
-        target_seq_file=pangenome_sequences,
+        target_db=target_db,
         query_seq_files=sequence_files,
         tmpdir=tmpdir,
         cpu=cpu,
@@ -614,8 +872,6 @@ def get_input_seq_to_family_with_rep(
         coverage=coverage,
         query_type=input_type,
         is_query_slf=is_input_slf,
-        is_target_slf=True,
-        target_type="protein",
         translation_table=translation_table,
     )
 
@@ -638,6 +894,8 @@ def get_input_seq_to_family_with_all(
     identity: float = 0.8,
     coverage: float = 0.8,
     translation_table: int = 11,
+    target_db_cache: Path = None,
+    index_target_db: bool = False,
     disable_bar: bool = False,
 ) -> Tuple[Path, Dict[str, GeneFamily]]:
     """
@@ -657,21 +915,26 @@ def get_input_seq_to_family_with_all(
     :param identity: Minimum identity threshold for the alignment (default: 0.8).
     :param coverage: Minimum coverage threshold for the alignment (default: 0.8).
     :param translation_table: Translation table to use if sequences need to be translated (default: 11).
+    :param target_db_cache: Directory where the database of pangenome sequences is cached (default: no cache).
+    :param index_target_db: If True, precompute the index of the cached database of pangenome sequences.
     :param disable_bar: If True, disable the progress bar.
 
     :return: A tuple containing the path to the alignment result file,
              and a dictionary mapping input sequences to gene families.
     """
-    pangenome_sequences = tmpdir / "nucleotide_genes.fna"
-    logging.getLogger("PPanGGOLiN").debug(
-        f"Write all pangenome gene sequences in {pangenome_sequences.absolute()}"
-    )
-    write_all_gene_sequences(
-        pangenome, pangenome_sequences, add="ppanggolin_", disable_bar=disable_bar
+    target_db = get_target_db(
+        pangenome,
+        tmpdir,
+        use_representatives=False,
+        cpu=cpu,
+        translation_table=translation_table,
+        target_db_cache=target_db_cache,
+        index_target_db=index_target_db,
+        disable_bar=disable_bar,
     )
 
     align_file = align_seq_to_pang(
-        target_seq_file=pangenome_sequences,
+        target_db=target_db,
         query_seq_files=sequence_files,
         tmpdir=tmpdir,
         cpu=cpu,
@@ -680,8 +943,6 @@ def get_input_seq_to_family_with_all(
         coverage=coverage,
         query_type=input_type,
         is_query_slf=is_input_slf,
-        is_target_slf=True,
-        target_type="nucleotide",
         translation_table=translation_table,
     )
 
@@ -692,6 +953,235 @@ def get_input_seq_to_family_with_all(
     return align_file, seq2pang
 
 
+def split_sequence_file(
+    sequence_file: Path, chunk_size: int, outdir: Path
+) -> Generator[Path, None, None]:
+    """
+    Split a FASTA file in chunks of sequences, each written with single line sequences in its own directory.
+    The file is read as chunks are requested, so that only a few of them exist on disk at once.
+
+    :param sequence_file: FASTA file to split, compressed or not
+    :param chunk_size: Number of sequences of each chunk
+    :param outdir: Directory where the chunk directories are created
+
+    :return: Generator of the FASTA file of each chunk
+    """
+
+    def write_chunk(chunk_idx: int, records: List[Tuple[str, List[str]]]) -> Path:
+        chunk_dir = outdir / f"chunk_{chunk_idx}"
+        chunk_dir.mkdir()
+        chunk_file = chunk_dir / "sequences.fasta"
+        with open(chunk_file, "w") as chunk_obj:
+            for header, seq_lines in records:
+                chunk_obj.write(f"{header}\n{''.join(seq_lines)}\n")
+        return chunk_file
+
+    chunk_idx = 0
+    records = []
+    with read_compressed_or_not(sequence_file) as seq_file_obj:
+        for line in seq_file_obj:
+            line = line.strip()
+            if line.startswith(">"):
+                if len(records) == chunk_size:
+                    yield write_chunk(chunk_idx, records)
+                    chunk_idx += 1
+                    records = []
+                records.append((line, []))
+            elif line and records:
+                records[-1][1].append(line)
+    if records:
+        yield write_chunk(chunk_idx, records)
+
+
+def search_chunks(
+    chunk_files: Iterable[Path],
+    search: Callable[[Path, str], Path],
+    search_jobs: int = 1,
+) -> Generator[Tuple[Set[str], Path], None, None]:
+    """
+    Search each chunk of input sequences, with a bounded number of searches running at the same time,
+    and give their results in the order of the chunks.
+
+    :param chunk_files: FASTA file of each chunk
+    :param search: Function searching a chunk file given the type of its sequences, and giving the alignment result
+    :param search_jobs: Number of searches running at the same time
+
+    :return: Generator of the sequence identifiers and alignment result of each chunk
+    """
+    input_type = None
+    running_searches = deque()
+    with ThreadPoolExecutor(max_workers=search_jobs) as executor:
+        for chunk_file in chunk_files:
+            with open(chunk_file) as chunk_obj:
+                seq_set, is_nucleotide, _ = get_seq_ids(chunk_obj)
+            if input_type is None:
+                # the sequence type is guessed once from the first sequences, as for a single search
+                input_type = "nucleotide" if is_nucleotide else "unknow"
+            running_searches.append(
+                (seq_set, executor.submit(search, chunk_file, input_type))
+            )
+            # one more chunk is prepared while searches run, to start it as soon as one is done
+            if len(running_searches) > search_jobs:
+                seq_set, aln_res = running_searches.popleft()
+                yield seq_set, aln_res.result()
+        while running_searches:
+            seq_set, aln_res = running_searches.popleft()
+            yield seq_set, aln_res.result()
+
+
+def align_by_chunks(
+    pangenome: Pangenome,
+    sequence_file: Path,
+    output: Path,
+    tmpdir: Path,
+    chunk_size: int,
+    search_jobs: int = 1,
+    identity: float = 0.8,
+    coverage: float = 0.8,
+    no_defrag: bool = False,
+    cpu: int = 1,
+    getinfo: bool = False,
+    use_representatives: bool = False,
+    draw_related: bool = False,
+    translation_table: int = 11,
+    target_db_cache: Path = None,
+    index_target_db: bool = False,
+    keep_tmp: bool = False,
+    disable_bar: bool = False,
+) -> Tuple[int, int, Path]:
+    """
+    Align input sequences chunk per chunk, searches of several chunks running at the same time,
+    and write the results of each chunk as soon as its search is done so that hits are never all kept in memory.
+
+    :param pangenome: Pangenome object containing gene families to align with the input sequences.
+    :param sequence_file: Path to a FASTA file containing sequences to align with the pangenome.
+    :param output: Path to the output directory.
+    :param tmpdir: Temporary directory for intermediate files.
+    :param chunk_size: Number of input sequences aligned by each search.
+    :param search_jobs: Number of searches running at the same time, sharing the available cpus.
+    :param identity: Minimum identity threshold for the alignment.
+    :param coverage: Minimum coverage threshold for the alignment.
+    :param no_defrag: If True, the defrag workflow will not be used.
+    :param cpu: Number of CPU cores to use.
+    :param getinfo: If True, extract information related to the best hit of each query, such as the RGP it is in or the spots.
+    :param use_representatives: If True, use representative sequences of gene families rather than all sequences to align input genes.
+    :param draw_related: If True, draw figures and graphs in a gexf format of spots associated with the input sequences.
+    :param translation_table: Translation table ID for nucleotide sequences.
+    :param target_db_cache: Directory where the database of pangenome sequences is cached, to be reused by later runs.
+    :param index_target_db: If True, precompute the index of the cached database of pangenome sequences.
+    :param keep_tmp: If True, keep the search directory of each chunk.
+    :param disable_bar: If True, disable the progress bar.
+
+    :return: Number of input sequences with a hit, number of input sequences and path to the alignment file
+    """
+    target_db = get_target_db(
+        pangenome,
+        tmpdir,
+        use_representatives=use_representatives,
+        cpu=cpu,
+        translation_table=translation_table,
+        target_db_cache=target_db_cache,
+        index_target_db=index_target_db,
+        disable_bar=disable_bar,
+    )
+    if use_representatives:
+        aln_file_clean = output / "alignment_input_seqs_to_pangenome_gene_families.tsv"
+        get_family = pangenome.get_gene_family
+    else:
+        aln_file_clean = output / "alignment_input_seqs_to_all_pangenome_genes.tsv"
+
+        def get_family(gene_id: str) -> GeneFamily:
+            return pangenome.get_gene(gene_id).family
+
+    search_cpu = max(1, cpu // search_jobs)
+
+    def search_chunk(chunk_file: Path, input_type: str) -> Path:
+        return align_seq_to_pang(
+            target_db=target_db,
+            query_seq_files=chunk_file,
+            tmpdir=chunk_file.parent,
+            cpu=search_cpu,
+            no_defrag=no_defrag,
+            identity=identity,
+            coverage=coverage,
+            query_type=input_type,
+            is_query_slf=True,
+            translation_table=translation_table,
+        )
+
+    spot_list = set()
+    nb_hits, nb_seqs = 0, 0
+    with contextlib.ExitStack() as stack:
+        aln_outfl = stack.enter_context(open(aln_file_clean, "w"))
+        part_proj_file = stack.enter_context(
+            open(output / "sequences_partition_projection.tsv", "w")
+        )
+        if getinfo or draw_related:
+            logging.getLogger("PPanGGOLiN").info(
+                "Writing RGP and spot information related to hits in the pangenome"
+            )
+            multigenics = pangenome.get_multigenics(
+                pangenome.parameters["rgp"]["dup_margin"]
+            )
+            fam2rgp = get_fam_to_rgp(pangenome, multigenics)
+            fam2spot, fam2border = get_fam_to_spot(pangenome, multigenics)
+            finfo = stack.enter_context(open(output / "info_input_seq.tsv", "w"))
+            finfo.write(
+                "input\tfamily\tpartition\tspot_list_as_member\tspot_list_as_border\trgp_list\n"
+            )
+
+        for seq_set, aln_res in tqdm(
+            search_chunks(
+                split_sequence_file(sequence_file, chunk_size, tmpdir),
+                search_chunk,
+                search_jobs,
+            ),
+            unit="chunk",
+            disable=disable_bar,
+        ):
+            seq2pang = parse_alignment_hits(aln_res, aln_outfl, get_family)
+            for input_seq, gene_fam in seq2pang.items():
+                part_proj_file.write(f"{input_seq}\t{gene_fam.named_partition}\n")
+            for remaining_seq in seq_set - seq2pang.keys():
+                # if there is no hit, it's going to be cloud genes.
+                part_proj_file.write(f"{remaining_seq}\tcloud\n")
+            if getinfo or draw_related:
+                spot_list |= write_seq_info(
+                    finfo, seq2pang, fam2rgp, fam2spot, fam2border
+                )
+            nb_hits += len(seq2pang)
+            nb_seqs += len(seq_set)
+            if not keep_tmp:
+                # the alignment result is written in the chunk directory, with all the files of its search
+                shutil.rmtree(aln_res.parent)
+
+    if getinfo or draw_related:
+        if draw_related:
+            draw_related_spots(spot_list, pangenome, output, multigenics, disable_bar)
+        logging.getLogger("PPanGGOLiN").info(
+            f"File listing RGP and spots where sequences of interest are located : "
+            f"{output / 'info_input_seq.tsv'}"
+        )
+    return nb_hits, nb_seqs, aln_file_clean
+
+
+def check_pangenome_for_alignment(pangenome: Pangenome):
+    """
+    Check that sequences can be aligned to the gene families of the pangenome
+
+    :param pangenome: Pangenome object
+
+    :raises Exception: If the gene families of the pangenome have no representative sequences
+    """
+    if pangenome.status["geneFamilySequences"] not in ["inFile", "Loaded", "Computed"]:
+        raise Exception(
+            "Cannot use this function as your pangenome does not have gene families representatives "
+            "associated to it. For now this works only if the clustering is realised by PPanGGOLiN."
+        )
+    # could be possible either by picking a representative somehow, or by aligning on genes rather than on
+    # families, if they are in the pangenome.
+
+
 def align(
     pangenome: Pangenome,
     sequence_file: Path,
@@ -705,6 +1195,10 @@ def align(
     draw_related: bool = False,
     translation_table: int = 11,
     tmpdir: Path = None,
+    target_db_cache: Path = None,
+    index_target_db: bool = False,
+    chunk_size: int = None,
+    search_jobs: int = 1,
     disable_bar: bool = False,
     keep_tmp=False,
 ):
@@ -723,6 +1217,10 @@ def align(
     :param draw_related: If True, draw figures and graphs in a gexf format of spots associated with the input sequences.
     :param translation_table: Translation table ID for nucleotide sequences.
     :param tmpdir: Temporary directory for intermediate files.
+    :param target_db_cache: Directory where the database of pangenome sequences is cached, to be reused by later runs.
+    :param index_target_db: If True, precompute the index of the cached database of pangenome sequences.
+    :param chunk_size: Number of input sequences aligned by each search. All sequences are aligned at once if None.
+    :param search_jobs: Number of searches of chunks running at the same time, sharing the available cpus.
     :param disable_bar: If True, disable the progress bar.
     :param keep_tmp: If True, keep temporary files.
     """
@@ -730,13 +1228,7 @@ def align(
     check_tools_availability(["mmseqs"])
 
     tmpdir = Path(tempfile.gettempdir()) if tmpdir is None else tmpdir
-    if pangenome.status["geneFamilySequences"] not in ["inFile", "Loaded", "Computed"]:
-        raise Exception(
-            "Cannot use this function as your pangenome does not have gene families representatives "
-            "associated to it. For now this works only if the clustering is realised by PPanGGOLiN."
-        )
-    # could be possible either by picking a representative somehow, or by aligning on genes rather than on
-    # families, if they are in the pangenome.
+    check_pangenome_for_alignment(pangenome)
 
     if getinfo or draw_related:
         need_mod = False
@@ -756,55 +1248,89 @@ def align(
     else:
         check_pangenome_info(pangenome, need_families=True, disable_bar=disable_bar)
 
-    with read_compressed_or_not(sequence_file) as seqFileObj:
-        seq_set, is_nucleotide, single_line_fasta = get_seq_ids(seqFileObj)
-
-    with create_tmpdir(
-        main_dir=tmpdir, basename="align_input_seq_tmpdir", keep_tmp=keep_tmp
-    ) as new_tmpdir:
-        input_type = "nucleotide" if is_nucleotide else "unknow"
-        if use_representatives:
-            align_file, seq2pang = get_input_seq_to_family_with_rep(
+    if chunk_size is not None:
+        with create_tmpdir(
+            main_dir=tmpdir, basename="align_input_seq_tmpdir", keep_tmp=keep_tmp
+        ) as new_tmpdir:
+            nb_hits, nb_seqs, align_file = align_by_chunks(
                 pangenome,
                 sequence_file,
                 output,
                 new_tmpdir,
-                input_type=input_type,
-                is_input_slf=single_line_fasta,
-                cpu=cpu,
-                no_defrag=no_defrag,
+                chunk_size,
+                search_jobs=search_jobs,
                 identity=identity,
                 coverage=coverage,
-                translation_table=translation_table,
-                disable_bar=disable_bar,
-            )
-        else:
-            align_file, seq2pang = get_input_seq_to_family_with_all(
-                pangenome=pangenome,
-                sequence_files=sequence_file,
-                output=output,
-                tmpdir=new_tmpdir,
-                input_type=input_type,
-                is_input_slf=single_line_fasta,
-                cpu=cpu,
                 no_defrag=no_defrag,
-                identity=identity,
-                coverage=coverage,
+                cpu=cpu,
+                getinfo=getinfo,
+                use_representatives=use_representatives,
+                draw_related=draw_related,
                 translation_table=translation_table,
+                target_db_cache=target_db_cache,
+                index_target_db=index_target_db,
+                keep_tmp=keep_tmp,
                 disable_bar=disable_bar,
             )
+        part_proj = output.absolute() / "sequences_partition_projection.tsv"
+    else:
+        with read_compressed_or_not(sequence_file) as seqFileObj:
+            seq_set, is_nucleotide, single_line_fasta = get_seq_ids(seqFileObj)
 
-    if getinfo or draw_related:  # TODO Add getinfo to function and remove if
-        get_seq_info(seq2pang, pangenome, output, draw_related, disable_bar=disable_bar)
+        with create_tmpdir(
+            main_dir=tmpdir, basename="align_input_seq_tmpdir", keep_tmp=keep_tmp
+        ) as new_tmpdir:
+            input_type = "nucleotide" if is_nucleotide else "unknow"
+            if use_representatives:
+                align_file, seq2pang = get_input_seq_to_family_with_rep(
+                    pangenome,
+                    sequence_file,
+                    output,
+                    new_tmpdir,
+                    input_type=input_type,
+                    is_input_slf=single_line_fasta,
+                    cpu=cpu,
+                    no_defrag=no_defrag,
+                    identity=identity,
+                    coverage=coverage,
+                    translation_table=translation_table,
+                    target_db_cache=target_db_cache,
+                    index_target_db=index_target_db,
+                    disable_bar=disable_bar,
+                )
+            else:
+                align_file, seq2pang = get_input_seq_to_family_with_all(
+                    pangenome=pangenome,
+                    sequence_files=sequence_file,
+                    output=output,
+                    tmpdir=new_tmpdir,
+                    input_type=input_type,
+                    is_input_slf=single_line_fasta,
+                    cpu=cpu,
+                    no_defrag=no_defrag,
+                    identity=identity,
+                    coverage=coverage,
+                    translation_table=translation_table,
+                    target_db_cache=target_db_cache,
+                    index_target_db=index_target_db,
+                    disable_bar=disable_bar,
+                )
+
+        if getinfo or draw_related:  # TODO Add getinfo to function and remove if
+            get_seq_info(
+                seq2pang, pangenome, output, draw_related, disable_bar=disable_bar
+            )
+
+        part_proj = project_and_write_partition(
+            seq2pang, seq_set, output
+        )  # write the partition assignation only
+        nb_hits, nb_seqs = len(seq2pang), len(seq_set)
 
-    part_proj = project_and_write_partition(
-        seq2pang, seq_set, output
-    )  # write the partition assignation only
     logging.getLogger("PPanGGOLiN").info(
         f"sequences partition projection : '{part_proj}'"
     )
     logging.getLogger("PPanGGOLiN").info(
-        f"{len(seq2pang)} sequences over {len(seq_set)} have at least one hit in the pangenome."
+        f"{nb_hits} sequences over {nb_seqs} have at least one hit in the pangenome."
     )
     logging.getLogger("PPanGGOLiN").info(
         f"Blast-tab file of the alignment : '{align_file}'"
@@ -843,6 +1369,10 @@ def launch(args: argparse.Namespace):
         use_representatives=args.fast,
         draw_related=args.draw_related,
         translation_table=translation_table,
+        target_db_cache=args.target_db_cache,
+        index_target_db=args.index_target_db,
+        chunk_size=args.chunk_size,
+        search_jobs=args.search_jobs,
         disable_bar=args.disable_prog_bar,
         keep_tmp=args.keep_tmp,
     )
@@ -976,6 +1506,35 @@ def parser_align(parser: argparse.ArgumentParser):
         action="store_true",
         help="Keeping temporary files (useful for debugging).",
     )
+    optional.add_argument(
+        "--target_db_cache",
+        required=False,
+        type=Path,
+        default=None,
+        help="Directory where the MMseqs2 database of the pangenome sequences is cached, "
+        "to be reused by later runs on the same pangenome.",
+    )
+    optional.add_argument(
+        "--index_target_db",
+        required=False,
+        action="store_true",
+        help="Precompute the MMseqs2 index of the cached pangenome sequences database (see --target_db_cache).",
+    )
+    optional.add_argument(
+        "--chunk_size",
+        required=False,
+        type=min_one,
+        default=None,
+        help="Align the input sequences by chunks of this number of sequences, writing results as each chunk is done. "
+        "This limits the disk and memory used with very large sets of sequences. By default, all sequences are aligned at once.",
+    )
+    optional.add_argument(
+        "--search_jobs",
+        required=False,
+        type=min_one,
+        default=1,
+        help="Number of chunks aligned at the same time, sharing the available cpus (see --chunk_size).",
+    )
 
 
 if __name__ == "__main__":
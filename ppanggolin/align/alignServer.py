@@ -0,0 +1,446 @@
+#!/usr/bin/env python3
+
+# default libraries
+import argparse
+import json
+import logging
+import os
+import tempfile
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+# local libraries
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.geneFamily import GeneFamily
+from ppanggolin.utils import (
+    create_tmpdir,
+    check_tools_availability,
+    check_translation_table_to_use,
+)
+from ppanggolin.formats.readBinaries import check_pangenome_info
+from ppanggolin.align.alignOnPang import (
+    check_pangenome_for_alignment,
+    get_target_db,
+    align_seq_to_pang,
+    parse_alignment_hits,
+    get_seq_ids,
+    get_fam_to_rgp,
+    get_fam_to_spot,
+)
+
+
+class AlignmentService:
+    """
+    Keeps a pangenome, the database of its sequences and the context of its gene families loaded,
+    to align batches of query sequences without paying their loading each time.
+
+    :param pangenome: Pangenome with families, partitions and eventually RGPs, spots and modules loaded
+    :param tmpdir: Directory where the target database and the files of each alignment are written
+    :param use_representatives: Align to the representative sequences of gene families rather than to all genes
+    :param identity: Minimum identity threshold for the alignment
+    :param coverage: Minimum coverage threshold for the alignment
+    :param no_defrag: If True, the defrag workflow will not be used
+    :param cpu: Number of CPU cores used by each alignment
+    :param translation_table: Translation table ID for nucleotide sequences
+    :param target_db_cache: Directory where the database of pangenome sequences is cached
+    :param index_target_db: If True, precompute the index of the cached database of pangenome sequences
+    :param disable_bar: If True, disable the progress bar
+    """
+
+    def __init__(
+        self,
+        pangenome: Pangenome,
+        tmpdir: Path,
+        use_representatives: bool = False,
+        identity: float = 0.5,
+        coverage: float = 0.8,
+        no_defrag: bool = False,
+        cpu: int = 1,
+        translation_table: int = 11,
+        target_db_cache: Path = None,
+        index_target_db: bool = False,
+        disable_bar: bool = False,
+    ):
+        """Constructor method"""
+        self.pangenome = pangenome
+        self.tmpdir = tmpdir
+        self.use_representatives = use_representatives
+        self.identity = identity
+        self.coverage = coverage
+        self.no_defrag = no_defrag
+        self.cpu = cpu
+        self.translation_table = translation_table
+        self.target_db = get_target_db(
+            pangenome,
+            tmpdir,
+            use_representatives=use_representatives,
+            cpu=cpu,
+            translation_table=translation_table,
+            target_db_cache=target_db_cache,
+            index_target_db=index_target_db,
+            disable_bar=disable_bar,
+        )
+
+        self.fam2rgp, self.fam2spot, self.fam2border = {}, {}, {}
+        if pangenome.status["spots"] != "No":
+            multigenics = pangenome.get_multigenics(
+                pangenome.parameters["rgp"]["dup_margin"]
+            )
+            self.fam2rgp = get_fam_to_rgp(pangenome, multigenics)
+            self.fam2spot, self.fam2border = get_fam_to_spot(pangenome, multigenics)
+        self.fam2mod = {}
+        if pangenome.status["modules"] != "No":
+            for mod in pangenome.modules:
+                for fam in mod.families:
+                    self.fam2mod[fam] = f"module_{mod.ID}"
+
+    def get_family(self, target_id: str) -> GeneFamily:
+        """
+        Get the gene family of a target sequence of the alignment
+
+        :param target_id: Identifier of a gene family, or of a gene when aligning to all genes
+
+        :return: Gene family of the target sequence
+        """
+        if self.use_representatives:
+            return self.pangenome.get_gene_family(target_id)
+        return self.pangenome.get_gene(target_id).family
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Describe the pangenome and the alignment parameters used by the service
+
+        :return: Description of the service
+        """
+        return {
+            "pangenome": self.pangenome.file,
+            "gene_families": self.pangenome.number_of_gene_families,
+            "target": "representatives" if self.use_representatives else "all_genes",
+            "identity": self.identity,
+            "coverage": self.coverage,
+            "no_defrag": self.no_defrag,
+            "translation_table": self.translation_table,
+        }
+
+    def describe(self, seq_id: str, family: Optional[GeneFamily]) -> Dict[str, Any]:
+        """
+        Describe the gene family assigned to an input sequence and its genomic context in the pangenome
+
+        :param seq_id: Identifier of the input sequence
+        :param family: Gene family of the best hit of the sequence, None if it has no hit
+
+        :return: Description of the assignment of the sequence
+        """
+        if family is None:
+            # if there is no hit, it's going to be a cloud gene.
+            return {
+                "input": seq_id,
+                "family": None,
+                "partition": "cloud",
+                "spots_as_member": [],
+                "spots_as_border": [],
+                "rgps": [],
+                "modules": [],
+            }
+        return {
+            "input": seq_id,
+            "family": family.name,
+            "partition": family.named_partition,
+            "spots_as_member": [str(spot) for spot in self.fam2spot.get(family, [])],
+            "spots_as_border": [str(spot) for spot in self.fam2border.get(family, [])],
+            "rgps": list(self.fam2rgp.get(family, [])),
+            "modules": [self.fam2mod[family]] if family in self.fam2mod else [],
+        }
+
+    def align(self, sequences: str) -> Dict[str, Any]:
+        """
+        Align a batch of sequences to the pangenome and assign them to gene families
+
+        :param sequences: Sequences in FASTA format
+
+        :return: Description of the assignment of each sequence, and number of sequences with a hit
+        """
+        with create_tmpdir(self.tmpdir, basename="align_request") as request_dir:
+            query_file = request_dir / "sequences.fasta"
+            query_file.write_text(sequences)
+            with open(query_file) as seq_file_obj:
+                seq_set, is_nucleotide, single_line_fasta = get_seq_ids(seq_file_obj)
+            if not seq_set:
+                raise ValueError("No sequence was found in the FASTA content.")
+            aln_res = align_seq_to_pang(
+                target_db=self.target_db,
+                query_seq_files=query_file,
+                tmpdir=request_dir,
+                cpu=self.cpu,
+                no_defrag=self.no_defrag,
+                identity=self.identity,
+                coverage=self.coverage,
+                query_type="nucleotide" if is_nucleotide else "unknow",
+                is_query_slf=single_line_fasta,
+                translation_table=self.translation_table,
+            )
+            with open(os.devnull, "w") as devnull:
+                seq2pang = parse_alignment_hits(aln_res, devnull, self.get_family)
+        return {
+            "hits": len(seq2pang),
+            "sequences": [
+                self.describe(seq_id, seq2pang.get(seq_id))
+                for seq_id in sorted(seq_set)
+            ],
+        }
+
+
+class AlignmentRequestHandler(BaseHTTPRequestHandler):
+    """
+    Answer the requests to an alignment server.
+    GET /status describes the service, and POST /align aligns the sequences given in FASTA format in the request body.
+    """
+
+    def send_json(self, code: int, content: Dict[str, Any]):
+        """
+        Send a JSON response
+
+        :param code: HTTP status code
+        :param content: Content of the response
+        """
+        body = json.dumps(content).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/status":
+            self.send_json(200, self.server.service.status())
+        else:
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+
+    def do_POST(self):
+        if self.path != "/align":
+            self.send_json(404, {"error": f"Unknown path {self.path}"})
+            return
+        sequences = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        try:
+            result = self.server.service.align(sequences.decode())
+        except ValueError as error:
+            self.send_json(400, {"error": str(error)})
+        except Exception as error:
+            logging.getLogger("PPanGGOLiN").exception("Alignment request failed")
+            self.send_json(500, {"error": str(error)})
+        else:
+            self.send_json(200, result)
+
+    def log_message(self, format: str, *args):
+        logging.getLogger("PPanGGOLiN").debug(
+            f"{self.address_string()} - {format % args}"
+        )
+
+
+def make_server(
+    service: AlignmentService, host: str = "127.0.0.1", port: int = 8765
+) -> ThreadingHTTPServer:
+    """
+    Create an HTTP server answering alignment requests with the given service. Requests are handled in threads.
+
+    :param service: Alignment service
+    :param host: Address the server listens to
+    :param port: Port the server listens to, 0 to pick a free one
+
+    :return: HTTP server, to be started with its serve_forever method
+    """
+    server = ThreadingHTTPServer((host, port), AlignmentRequestHandler)
+    server.service = service
+    return server
+
+
+def launch(args: argparse.Namespace):
+    """
+    Command launcher
+
+    :param args: All arguments provide by user
+    """
+    check_tools_availability(["mmseqs"])
+    pangenome = Pangenome()
+    pangenome.add_file(args.pangenome)
+    check_pangenome_for_alignment(pangenome)
+
+    translation_table = check_translation_table_to_use(
+        pangenome,
+        "translation_table" in getattr(args, "specified_args", set()),
+        args.translation_table,
+    )
+    check_pangenome_info(
+        pangenome,
+        need_annotations=True,
+        need_families=True,
+        need_partitions=True,
+        need_rgp=pangenome.status["spots"] != "No",
+        need_spots=pangenome.status["spots"] != "No",
+        need_modules=pangenome.status["modules"] != "No",
+        disable_bar=args.disable_prog_bar,
+    )
+
+    with create_tmpdir(
+        args.tmpdir, basename="align_server", keep_tmp=args.keep_tmp
+    ) as tmpdir:
+        service = AlignmentService(
+            pangenome,
+            tmpdir,
+            use_representatives=args.fast,
+            identity=args.identity,
+            coverage=args.coverage,
+            no_defrag=args.no_defrag,
+            cpu=args.cpu,
+            translation_table=translation_table,
+            target_db_cache=args.target_db_cache,
+            index_target_db=args.index_target_db,
+            disable_bar=args.disable_prog_bar,
+        )
+        server = make_server(service, args.host, args.port)
+        logging.getLogger("PPanGGOLiN").info(
+            f"Alignment server listening on http://{args.host}:{server.server_port}. "
+            "POST sequences in FASTA format to /align."
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            logging.getLogger("PPanGGOLiN").info("Stopping the alignment server.")
+        finally:
+            server.server_close()
+
+
+def subparser(sub_parser: argparse._SubParsersAction) -> argparse.ArgumentParser:
+    """
+    Subparser to launch PPanGGOLiN in Command line
+
+    :param sub_parser : sub_parser for align_server command
+
+    :return : parser arguments for align_server command
+    """
+    parser = sub_parser.add_parser(
+        "align_server", formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.description = "Keeps a pangenome loaded to align batches of sequences sent to a local HTTP server."
+    parser.category = "Analysis using reference pangenomes"
+    parser_align_server(parser)
+    return parser
+
+
+def parser_align_server(parser: argparse.ArgumentParser):
+    """
+    Parser for specific argument of align_server command
+
+    :param parser: parser for align_server argument
+    """
+    required = parser.add_argument_group(
+        title="Required arguments",
+        description="All of the following arguments are required :",
+    )
+    required.add_argument(
+        "-p", "--pangenome", required=False, type=Path, help="The pangenome .h5 file"
+    )
+
+    optional = parser.add_argument_group(title="Optional arguments")
+    optional.add_argument(
+        "--host",
+        required=False,
+        type=str,
+        default="127.0.0.1",
+        help="Address the server listens to",
+    )
+    optional.add_argument(
+        "--port",
+        required=False,
+        type=int,
+        default=8765,
+        help="Port the server listens to",
+    )
+    optional.add_argument(
+        "--no_defrag",
+        required=False,
+        action="store_true",
+        help="DO NOT Realign gene families to link fragments with"
+        "their non-fragmented gene family. (default: False)",
+    )
+    optional.add_argument(
+        "--identity",
+        required=False,
+        type=float,
+        default=0.5,
+        help="min identity percentage threshold",
+    )
+    optional.add_argument(
+        "--coverage",
+        required=False,
+        type=float,
+        default=0.8,
+        help="min coverage percentage threshold",
+    )
+    optional.add_argument(
+        "--fast",
+        required=False,
+        action="store_true",
+        help="Use representative sequences of gene families for input gene alignment. "
+        "This option is faster but may be less sensitive. By default, all pangenome genes are used.",
+    )
+    optional.add_argument(
+        "--translation_table",
+        required=False,
+        type=int,
+        default=11,
+        help="Translation table (genetic code) to use. "
+        "If not specified, the translation table used when building the pangenome will be used. "
+        "This can be accessed using 'ppanggolin info'.",
+    )
+    optional.add_argument(
+        "-c",
+        "--cpu",
+        required=False,
+        default=1,
+        type=int,
+        help="Number of available cpus for each alignment",
+    )
+    optional.add_argument(
+        "--tmpdir",
+        required=False,
+        type=Path,
+        default=Path(tempfile.gettempdir()),
+        help="directory for storing temporary files",
+    )
+    optional.add_argument(
+        "--keep_tmp",
+        required=False,
+        default=False,
+        action="store_true",
+        help="Keeping temporary files (useful for debugging).",
+    )
+    optional.add_argument(
+        "--target_db_cache",
+        required=False,
+        type=Path,
+        default=None,
+        help="Directory where the MMseqs2 database of the pangenome sequences is cached, "
+        "to be reused by later runs on the same pangenome.",
+    )
+    optional.add_argument(
+        "--index_target_db",
+        required=False,
+        action="store_true",
+        help="Precompute the MMseqs2 index of the cached pangenome sequences database (see --target_db_cache).",
+    )
+
+
+if __name__ == "__main__":
+    """To test local change and allow using debugger"""
+    from ppanggolin.utils import set_verbosity_level, add_common_arguments
+
+    main_parser = argparse.ArgumentParser(
+        description="Depicting microbial species diversity via a Partitioned PanGenome Graph Of Linked Neighbors",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser_align_server(main_parser)
+    add_common_arguments(main_parser)
+    set_verbosity_level(main_parser.parse_args())
+    launch(main_parser.parse_args())
@@ -2,8 +2,9 @@
 
 # default libraries
 import argparse
+import gc
 import logging
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import Executor, ProcessPoolExecutor, as_completed
 from itertools import chain
 
 from multiprocessing import get_context
@@ -11,12 +12,13 @@ import os
 from pathlib import Path
 import tempfile
 import time
-from typing import List, Set, Tuple, Iterable, Dict, Generator, Union
+from typing import Any, Callable, List, Set, Tuple, Iterable, Dict, Generator, Union
 import re
 from collections import defaultdict, Counter
 import warnings
 
 # installed libraries
+import numpy as np
 from tqdm import tqdm
 from tables.path import check_name_validity, NaturalNameWarning
 
@@ -25,8 +27,15 @@ from ppanggolin.annotate.synta import (
     annotate_organism,
     get_contigs_from_fasta_file,
     get_dna_sequence,
+    get_dna_sequences,
     init_contig_counter,
     contig_counter,
+    annotate_rna_batch,
+    parse_fasta,
+    read_fasta_buffer,
+    read_training_info,
+    train_prodigal,
+    write_training_info,
 )
 from ppanggolin.pangenome import Pangenome
 from ppanggolin.genome import Organism, Gene, RNA, Contig
@@ -37,6 +46,7 @@ from ppanggolin.utils import (
     check_input_files,
     has_non_ascii,
     replace_non_ascii,
+    restricted_float,
 )
 from ppanggolin.formats import write_pangenome
 from ppanggolin.metadata import Metadata
@@ -67,6 +77,15 @@ def check_annotate_args(args: argparse.Namespace):
     if hasattr(args, "anno") and args.anno is not None:
         check_input_files(args.anno, True)
 
+    if getattr(args, "training_genomes", None) is not None:
+        if getattr(args, "training_info", None) is None:
+            raise argparse.ArgumentError(
+                argument=None,
+                message="--training_genomes is used to create the prodigal training file "
+                "given with --training_info, which is missing.",
+            )
+        check_input_files(args.training_genomes, True)
+
 
 def create_gene(
     org: Organism,
@@ -245,85 +264,200 @@ def extract_positions(string: str) -> Tuple[List[Tuple[int, int]], bool, bool, b
     return coordinates, complement, has_partial_start, has_partial_end
 
 
-def parse_gbff_by_contig(
-    gbff_file_path: Path,
-) -> Generator[
-    Tuple[Dict[str, str], Generator[Dict[str, Union[str, Set[str]]], None, None], str],
-    None,
-    None,
-]:
+# Qualifiers of CDS and RNA features read by read_org_gbff. Other qualifiers, like the translation, are not parsed.
+GBFF_GENE_QUALIFIERS = {
+    "locus_tag",
+    "db_xref",
+    "gene",
+    "product",
+    "protein_id",
+    "transl_table",
+    "codon_start",
+    "pseudo",
+    "transl_except",
+}
+
+GBFF_FEATURE_START = re.compile(r"\n {0,20}[^ \n]")
+GBFF_QUALIFIER_START = re.compile(r"\n[ \t]*/([^=\n]*)(=?)")
+GBFF_SEQUENCE_DELETED_CHARS = b"0123456789 \t\n"
+
+
+def read_gbff_records(
+    gbff_file_path: Path, block_size: int = 2**24
+) -> Generator[bytes, None, None]:
     """
-    Parse a GBFF file by contig and yield tuples containing header, feature, and sequence info for each contig.
+    Read a GBFF file by large blocks and yield the content of each of its records, without the // end line.
 
     :param gbff_file_path: Path to the GBFF file.
-    :return: A generator that yields tuples containing header lines, feature lines, and sequence info for each contig.
+    :param block_size: Number of bytes read at once.
+
+    :return: A generator that yields the content of each record of the file.
     """
-    header_lines = []
-    feature_lines = []
-    sequence_lines = []
+    remainder = b""
+    with read_compressed_or_not(gbff_file_path, binary=True) as fl:
+        while True:
+            block = fl.read(block_size)
+            buffer = remainder + block
+            record_start = 0
+            end_line_start = buffer.find(b"\n//")
+            while end_line_start != -1:
+                end_line_end = buffer.find(b"\n", end_line_start + 1)
+                if end_line_end == -1:
+                    if block:  # the end line may continue in the next block
+                        break
+                    end_line_end = len(buffer)
+                if not buffer[end_line_start + 3 : end_line_end].strip():
+                    yield buffer[record_start:end_line_start]
+                    record_start = end_line_end
+                end_line_start = buffer.find(b"\n//", end_line_end)
+            remainder = buffer[record_start:]
+            if not block:
+                break
 
-    current_section = None
+    # In case the last // is missing, return the last record
+    if remainder.strip():
+        yield remainder
 
-    with read_compressed_or_not(gbff_file_path) as fl:
-        for i, line in enumerate(fl):
-            # Skip blank lines
-            if not line.strip():
-                continue
 
-            if line.startswith("LOCUS") or line.startswith("CONTIG"):
-                # CONTIG line are found between FEATURES and ORIGIN and are put in header section here for simplicity
-                current_section = "header"
+def parse_feature_block(
+    block: str, qualifiers: Set[str] = None
+) -> Dict[str, Union[str, Set[str]]]:
+    """
+    Parse the lines of a single feature from a GBFF file.
+
+    :param block: Lines of the feature, from the new line character before its first line to the one before the next feature.
+    :param qualifiers: Qualifiers to parse. If None, all qualifiers are parsed.
 
-            elif line.startswith("FEATURES"):
-                current_section = "feature"
-                continue
+    :return: A dictionary representing the feature with its type, location, and qualifiers.
+    """
+    qualifier_matches = list(GBFF_QUALIFIER_START.finditer(block))
+    location_end = qualifier_matches[0].start() if qualifier_matches else len(block)
+    location_lines = block[1:location_end].split("\n")
+
+    feature = {
+        "feature_type": location_lines[0][:21].strip(),
+        "location": " ".join(
+            line.strip()
+            for line in [location_lines[0][21:]] + location_lines[1:]
+            if line.strip()
+        ),
+    }
+    db_xref = set()
+    qualifier_ends = [match.start() for match in qualifier_matches[1:]] + [len(block)]
+    for match, qualifier_end in zip(qualifier_matches, qualifier_ends):
+        qualifier, has_value = match.groups()
+        if not has_value:
+            qualifier = qualifier.rstrip()
+        if qualifiers is not None and qualifier not in qualifiers:
+            continue
+        if qualifier in feature and qualifier != "db_xref":
+            # When multiple values exist for the same tag only the first one is kept.
+            continue
 
-            elif line.startswith("ORIGIN"):
-                current_section = "sequence"
-                continue
+        line_end = block.find("\n", match.end(), qualifier_end)
+        line_end = qualifier_end if line_end == -1 else line_end
+        value = block[match.end() : line_end].rstrip() if has_value else qualifier
+        # clean value from quote
+        value = value[1:] if value.startswith('"') else value
+        value = value[:-1] if value.endswith('"') else value
+        for line in block[line_end:qualifier_end].split("\n"):
+            # the line does not start a qualifier so it's the continuation of the last qualifier value.
+            line = line.strip()
+            if line:
+                line = line[:-1] if line.endswith('"') else line
+                value += f" {line}"
+
+        if qualifier == "db_xref":
+            db_xref.add(value)
+            feature[qualifier] = db_xref
+        else:
+            feature[qualifier] = value
+    return defaultdict(str, feature)
 
-            if line.strip() == "//":
-                # Check that each section has some lines
-                assert header_lines and feature_lines and sequence_lines, (
-                    "Missing section in GBFF file. "
-                    f"Contig ending at line {i + 1} has an empty section. It has "
-                    f"{len(header_lines)} header lines, "
-                    f"{len(header_lines)} feature lines, "
-                    f"and {len(sequence_lines)} sequence lines."
-                )
-                yield (
-                    parse_contig_header_lines(header_lines),
-                    parse_feature_lines(feature_lines),
-                    parse_dna_seq_lines(sequence_lines),
-                )
 
-                header_lines = []
-                feature_lines = []
-                sequence_lines = []
-                current_section = None
-                continue
+def parse_gbff_record(
+    record: bytes, features_to_parse: Dict[str, Set[str]] = None
+) -> Tuple[Dict[str, str], Generator[Dict[str, Union[str, Set[str]]], None, None], str]:
+    """
+    Locate the header, features and sequence sections of a GBFF record and parse them.
 
-            if current_section == "header":
-                header_lines.append(line)
+    Features are parsed lazily, when the returned generator is consumed.
 
-            elif current_section == "feature":
-                feature_lines.append(line)
+    :param record: Content of the GBFF record.
+    :param features_to_parse: Feature types to parse, with the qualifiers to parse for each of them (None for all).
+                              If None, all features are parsed with all their qualifiers.
 
-            elif current_section == "sequence":
-                sequence_lines.append(line)
+    :return: A tuple containing the header info, the features and the DNA sequence of the record.
+    """
+    record = b"\n" + record  # so that every line starts after a new line character
+    if b"\r" in record:
+        record = record.replace(b"\r\n", b"\n")
+    features_start = record.find(b"\nFEATURES")
+    origin_start = record.find(b"\nORIGIN")
+    if features_start == -1 or origin_start == -1:
+        raise AssertionError(
+            "Missing section in GBFF file. "
+            f"Contig starting with '{record.lstrip()[:80].decode()}' has no "
+            f"{'FEATURES' if features_start == -1 else 'ORIGIN'} section."
+        )
+    # CONTIG line are found between FEATURES and ORIGIN and are put in header section
+    contig_start = record.find(b"\nCONTIG", features_start, origin_start)
+    features_end = origin_start if contig_start == -1 else contig_start
+    header = record[:features_start]
+    if contig_start != -1:
+        header += record[contig_start:origin_start]
+    header_lines = [line for line in header.decode().split("\n") if line.strip()]
+    if not header_lines[0].startswith("LOCUS"):
+        raise ValueError(f"Unexpected structure in GBFF file. {header_lines[0]}")
+
+    # keep the new line character ending the FEATURES line, that starts the first feature
+    features = record[record.find(b"\n", features_start + 1) : features_end].decode()
+    sequence = record[record.find(b"\n", origin_start + 1) :]
+    sequence = sequence.translate(None, GBFF_SEQUENCE_DELETED_CHARS).upper().decode()
+    if not features.strip() or not sequence:
+        raise AssertionError(
+            "Missing section in GBFF file. "
+            f"Contig '{header_lines[0]}' has an empty "
+            f"{'feature' if not features.strip() else 'sequence'} section."
+        )
 
-            else:
-                raise ValueError(
-                    f"Unexpected structure in GBFF file: {gbff_file_path}. {line}"
+    def parse_features() -> Generator[Dict[str, Union[str, Set[str]]], None, None]:
+        feature_starts = [
+            match.start() for match in GBFF_FEATURE_START.finditer(features)
+        ]
+        for feature_start, feature_end in zip(
+            feature_starts, feature_starts[1:] + [len(features)]
+        ):
+            if features_to_parse is None:
+                yield parse_feature_block(features[feature_start:feature_end])
+                continue
+            feature_type = features[feature_start + 1 : feature_start + 22].strip()
+            if feature_type in features_to_parse:
+                yield parse_feature_block(
+                    features[feature_start:feature_end],
+                    features_to_parse[feature_type],
                 )
 
-    # In case the last // is missing, return the last contig
-    if header_lines or feature_lines or sequence_lines:
-        yield (
-            parse_contig_header_lines(header_lines),
-            parse_feature_lines(feature_lines),
-            parse_dna_seq_lines(sequence_lines),
-        )
+    return parse_contig_header_lines(header_lines), parse_features(), sequence
+
+
+def parse_gbff_by_contig(
+    gbff_file_path: Path, features_to_parse: Dict[str, Set[str]] = None
+) -> Generator[
+    Tuple[Dict[str, str], Generator[Dict[str, Union[str, Set[str]]], None, None], str],
+    None,
+    None,
+]:
+    """
+    Parse a GBFF file by contig and yield tuples containing header, feature, and sequence info for each contig.
+
+    :param gbff_file_path: Path to the GBFF file.
+    :param features_to_parse: Feature types to parse, with the qualifiers to parse for each of them (None for all).
+                              If None, all features are parsed with all their qualifiers.
+    :return: A generator that yields tuples containing header lines, feature lines, and sequence info for each contig.
+    """
+    for record in read_gbff_records(gbff_file_path):
+        yield parse_gbff_record(record, features_to_parse)
 
 
 def parse_contig_header_lines(header_lines: List[str]) -> Dict[str, str]:
@@ -454,7 +588,7 @@ def combine_contigs_metadata(
     ]
 
     # Filter tags that would have a / as it is forbidden when writing the table in HDF5. Such tag can appear with db_xref formatting
-    invalid_tag_names = []
+    invalid_tag_names = set()
     for tag, value in set(all_tag_to_value):
         try:
             with warnings.catch_warnings():
@@ -464,13 +598,13 @@ def combine_contigs_metadata(
             logging.getLogger("PPanGGOLiN").debug(
                 f"{err}. The tag {tag} is ignored for metadata."
             )
-            invalid_tag_names.append(tag)
+            invalid_tag_names.add(tag)
 
         if value == "":
             logging.getLogger("PPanGGOLiN").debug(
                 f"Ignoring tag '{tag}' for metadata due to an empty value."
             )
-            invalid_tag_names.append(tag)
+            invalid_tag_names.add(tag)
 
     all_tag_to_value = [
         (tag, value) for tag, value in all_tag_to_value if tag not in invalid_tag_names
@@ -481,21 +615,21 @@ def combine_contigs_metadata(
     # Identify tags and values shared by all contigs
     shared_tag_and_values = {
         tag_and_value
-        for tag_and_value in all_tag_to_value
-        if all_tag_to_value.count(tag_and_value) == contig_count
+        for tag_and_value, count in Counter(all_tag_to_value).items()
+        if count == contig_count
     }
 
     # Create a dictionary for shared metadata
     genome_metadata = dict(shared_tag_and_values)
 
+    excluded_tags = set(genome_metadata) | invalid_tag_names
     contig_to_uniq_metadata = {}
     for contig, tag_to_value in contig_to_metadata.items():
         # Identify unique metadata for each contig
         uniq_tag_to_value = {
             tag: value
             for tag, value in tag_to_value.items()
-            if tag not in list(genome_metadata) + invalid_tag_names
-            and isinstance(value, str)
+            if tag not in excluded_tags and isinstance(value, str)
         }
         if uniq_tag_to_value:
             contig_to_uniq_metadata[contig] = uniq_tag_to_value
@@ -667,7 +801,15 @@ def read_org_gbff(
     rna_counter = 0
     contig_to_metadata = {}
 
-    for header, features, sequence in parse_gbff_by_contig(gbff_file_path):
+    features_to_parse = {
+        "source": None,
+        "CDS": GBFF_GENE_QUALIFIERS,
+        "rRNA": GBFF_GENE_QUALIFIERS,
+        "tRNA": GBFF_GENE_QUALIFIERS,
+    }
+    for header, features, sequence in parse_gbff_by_contig(
+        gbff_file_path, features_to_parse
+    ):
         if "LOCUS" not in header:
             raise ValueError("Missing LOCUS line in GBFF header.")
 
@@ -852,6 +994,41 @@ def parse_db_xref_metadata(
     return db_xref_for_metadata
 
 
+# Attributes of CDS and RNA features read by read_org_gff. Attributes with a value containing '=' are ignored.
+GFF_GENE_ATTRIBUTES = re.compile(
+    r"(?:^|;)\s*(ID|LOCUS_TAG|PROTEIN_ID|NAME|GENE|PSEUDO|PSEUDOGENE|PARTIAL|PRODUCT|TRANSL_TABLE|DB_XREF|DBXREF)"
+    r"=([^;=]*)(?=;|$)",
+    re.IGNORECASE,
+)
+
+
+def read_gff_sections(gff_file_path: Path) -> Tuple[List[str], List[str]]:
+    """
+    Read a GFF file at once and split it into its annotation lines and the lines of its ##FASTA section.
+
+    :param gff_file_path: Path to the GFF file
+
+    :return: Lines of the annotation part, and lines of the FASTA part (empty if the file has no sequences)
+    """
+    with read_compressed_or_not(gff_file_path) as gff_file:
+        content = gff_file.read()
+
+    if content.startswith("##FASTA"):
+        fasta_pragma_start = 0
+    else:
+        fasta_pragma_start = content.find("\n##FASTA") + 1
+    if fasta_pragma_start == 0 and not content.startswith("##FASTA"):
+        return content.split("\n"), []
+
+    fasta_start = content.find("\n", fasta_pragma_start)
+    fasta_lines = (
+        content[fasta_start + 1 :].split("\n")
+        if fasta_start != -1 and content[fasta_start + 1 :].strip()
+        else []
+    )
+    return content[:fasta_pragma_start].split("\n"), fasta_lines
+
+
 def read_org_gff(
     organism: str,
     gff_file_path: Path,
@@ -885,13 +1062,21 @@ def read_org_gff(
     ) = range(0, 9)
 
     # Missing values: source, score. They are unused.
-    def get_gff_attributes(gff_fields: list) -> dict:
+    def get_gff_attributes(
+        gff_fields: list, attributes_pattern: re.Pattern = None
+    ) -> dict:
         """Parses the gff attribute's line and outputs the attributes_get in a dict structure.
 
         :param gff_fields: A gff line stored as a list. Each element of the list is a column of the gff.
+        :param attributes_pattern: Pattern matching the only attributes to get. If None, all attributes are parsed.
 
         :return: Attributes get
         """
+        if attributes_pattern is not None:
+            return {
+                key.upper(): value.rstrip()
+                for key, value in attributes_pattern.findall(gff_fields[gff_attribute])
+            }
         attributes_field = [
             f for f in gff_fields[gff_attribute].strip().split(";") if len(f) > 0
         ]
@@ -945,8 +1130,6 @@ def read_org_gff(
         return start, stop, chevrons_present
 
     contig = None  # initialize contig
-    has_fasta = False
-    fasta_string = ""
     org = Organism(organism)
     gene_counter = 0
     rna_counter = 0
@@ -955,230 +1138,229 @@ def read_org_gff(
 
     id_attr_to_gene_id = {}
 
-    with read_compressed_or_not(gff_file_path) as gff_file:
-        for line in gff_file:
-            if has_fasta:
-                fasta_string += line
-
-            elif line.startswith("##", 0, 2):
-                if line.startswith("FASTA", 2, 7):
-                    has_fasta = True
-                elif line.startswith("sequence-region", 2, 17):
-                    fields = [el.strip() for el in line.split()]
-                    if len(fields) != 4:
-                        raise Exception(
-                            "Pragma '##sequence-region' has an unexpected format. "
-                            f"Expecting the format '##sequence-region seqid start stop', and got the following: '{line.strip()}'"
-                        )
-                    with contig_counter.get_lock():
-                        contig = Contig(
-                            contig_counter.value,
-                            fields[1],
-                            True if fields[1] in circular_contigs else False,
-                        )
-                        contig_counter.value += 1
-                    org.add(contig)
-                    contig.length = int(fields[-1]) - int(fields[2]) + 1
-                else:
-                    continue
-
-            elif line.startswith("#"):
-                if line.startswith("Sequence Data", 2, 15):  # GFF from prodigal
-                    fields_prodigal = [
-                        el.strip() for el in line.split(": ")[1].split(";")
-                    ]
-                    attr_prodigal = {
-                        field.split("=")[0]: field.split("=")[1]
-                        for field in fields_prodigal
-                    }
-                else:  # comment lines to be ignores by parsers
-                    continue
-
-            elif (
-                line.rstrip() == ""
-            ):  # empty lines are not expected, but they do not carry information, so we'll ignore them
+    gff_lines, fasta_lines = read_gff_sections(gff_file_path)
+    has_fasta = len(fasta_lines) > 0
+    for line in gff_lines:
+        if line.startswith("##", 0, 2):
+            if line.startswith("sequence-region", 2, 17):
+                fields = [el.strip() for el in line.split()]
+                if len(fields) != 4:
+                    raise Exception(
+                        "Pragma '##sequence-region' has an unexpected format. "
+                        f"Expecting the format '##sequence-region seqid start stop', and got the following: '{line.strip()}'"
+                    )
+                with contig_counter.get_lock():
+                    contig = Contig(
+                        contig_counter.value,
+                        fields[1],
+                        True if fields[1] in circular_contigs else False,
+                    )
+                    contig_counter.value += 1
+                org.add(contig)
+                contig.length = int(fields[-1]) - int(fields[2]) + 1
+            else:
                 continue
 
-            else:
-                fields_gff = [el.strip() for el in line.split("\t")]
-                attributes = get_gff_attributes(fields_gff)
+        elif line.startswith("#"):
+            if line.startswith("Sequence Data", 2, 15):  # GFF from prodigal
+                fields_prodigal = [el.strip() for el in line.split(": ")[1].split(";")]
+                attr_prodigal = {
+                    field.split("=")[0]: field.split("=")[1]
+                    for field in fields_prodigal
+                }
+            else:  # comment lines to be ignores by parsers
+                continue
 
-                pseudogene = False
+        elif (
+            line.rstrip() == ""
+        ):  # empty lines are not expected, but they do not carry information, so we'll ignore them
+            continue
 
-                gene_start, gene_stop, has_chevron = check_chevrons_in_start_and_stop(
-                    start=fields_gff[gff_start], stop=fields_gff[gff_end]
-                )
+        else:
+            fields_gff = line.split("\t")
+            feature_type = fields_gff[gff_type].strip()
+            if (
+                feature_type != "region"
+                and feature_type != "CDS"
+                and "RNA" not in feature_type
+            ):
+                # other features are not used, so their columns and attributes are not parsed
+                continue
+            fields_gff = [el.strip() for el in fields_gff]
+            attributes = get_gff_attributes(
+                fields_gff, None if feature_type == "region" else GFF_GENE_ATTRIBUTES
+            )
 
-                for field in ["PRODUCT", "NAME", "DB_XREF", "DBXREF"]:
-                    if field in attributes and has_non_ascii(attributes[field]):
-                        logging.getLogger("PPanGGOLiN").warning(
-                            f"In genome '{organism}', the '{field}' field of feature '{attributes['locus_tag']}' contains non-ASCII characters: '{attributes[field]}'. "
-                            "These characters cannot be stored in the HDF5 file and will be replaced by underscores."
-                        )
-                        attributes[field] = replace_non_ascii(attributes[field])
+            pseudogene = False
 
-                if fields_gff[gff_type] == "region":
-                    # keep region attributes to add them as metadata of genome and contigs
-                    # excluding some info as they are already contained in contig object.
+            gene_start, gene_stop, has_chevron = check_chevrons_in_start_and_stop(
+                start=fields_gff[gff_start], stop=fields_gff[gff_end]
+            )
 
-                    contig_name_to_region_info[fields_gff[gff_seqname]] = {
-                        tag.lower(): value
-                        for tag, value in attributes.items()
-                        if tag not in ["ID", "NAME", "IS_CIRCULAR", "DB_XREF", "DBXREF"]
-                    }
+            for field in ["PRODUCT", "NAME", "DB_XREF", "DBXREF"]:
+                if field in attributes and has_non_ascii(attributes[field]):
+                    logging.getLogger("PPanGGOLiN").warning(
+                        f"In genome '{organism}', the '{field}' field of feature '{attributes['locus_tag']}' contains non-ASCII characters: '{attributes[field]}'. "
+                        "These characters cannot be stored in the HDF5 file and will be replaced by underscores."
+                    )
+                    attributes[field] = replace_non_ascii(attributes[field])
 
-                    if (
-                        "DB_XREF" in attributes or "DBXREF" in attributes
-                    ):  # db_xref can be written Dbxref and db_ref
-                        dbxref_tag = "DB_XREF" if "DB_XREF" in attributes else "DBXREF"
-                        dbxref_metadata = parse_db_xref_metadata(
-                            attributes[dbxref_tag].split(","), gff_file_path
-                        )
-                        contig_name_to_region_info[fields_gff[gff_seqname]].update(
-                            dbxref_metadata
+            if fields_gff[gff_type] == "region":
+                # keep region attributes to add them as metadata of genome and contigs
+                # excluding some info as they are already contained in contig object.
+
+                contig_name_to_region_info[fields_gff[gff_seqname]] = {
+                    tag.lower(): value
+                    for tag, value in attributes.items()
+                    if tag not in ["ID", "NAME", "IS_CIRCULAR", "DB_XREF", "DBXREF"]
+                }
+
+                if (
+                    "DB_XREF" in attributes or "DBXREF" in attributes
+                ):  # db_xref can be written Dbxref and db_ref
+                    dbxref_tag = "DB_XREF" if "DB_XREF" in attributes else "DBXREF"
+                    dbxref_metadata = parse_db_xref_metadata(
+                        attributes[dbxref_tag].split(","), gff_file_path
+                    )
+                    contig_name_to_region_info[fields_gff[gff_seqname]].update(
+                        dbxref_metadata
+                    )
+
+                if "IS_CIRCULAR" in attributes and attributes["IS_CIRCULAR"] == "true":
+                    contig_name = fields_gff[gff_seqname]
+
+                    if contig is not None:
+                        logging.getLogger("PPanGGOLiN").debug(
+                            f"Contig {contig.name} is circular."
                         )
+                        contig.is_circular = True
+                        assert contig.name == contig_name
+                    else:
+                        # contig object has not been initialized yet.
+                        # let's keep the circularity info in the circular_contigs list
+                        circular_contigs.append(contig_name)
 
-                    if (
-                        "IS_CIRCULAR" in attributes
-                        and attributes["IS_CIRCULAR"] == "true"
-                    ):
-                        contig_name = fields_gff[gff_seqname]
+            elif fields_gff[gff_type] == "CDS" or "RNA" in fields_gff[gff_type]:
 
-                        if contig is not None:
-                            logging.getLogger("PPanGGOLiN").debug(
-                                f"Contig {contig.name} is circular."
-                            )
-                            contig.is_circular = True
-                            assert contig.name == contig_name
-                        else:
-                            # contig object has not been initialized yet.
-                            # let's keep the circularity info in the circular_contigs list
-                            circular_contigs.append(contig_name)
+                id_attribute = get_id_attribute(attributes)
+                locus_tag = attributes.get("LOCUS_TAG")
+                protein_id = attributes.get("PROTEIN_ID")
 
-                elif fields_gff[gff_type] == "CDS" or "RNA" in fields_gff[gff_type]:
+                if locus_tag is not None:
+                    gene_id = locus_tag
 
-                    id_attribute = get_id_attribute(attributes)
-                    locus_tag = attributes.get("LOCUS_TAG")
-                    protein_id = attributes.get("PROTEIN_ID")
+                elif protein_id is not None:
+                    gene_id = protein_id
 
-                    if locus_tag is not None:
-                        gene_id = locus_tag
+                else:
+                    gene_id = id_attribute
 
-                    elif protein_id is not None:
-                        gene_id = protein_id
+                name = attributes.pop("NAME", attributes.pop("GENE", ""))
 
-                    else:
-                        gene_id = id_attribute
+                if "PSEUDO" in attributes or "PSEUDOGENE" in attributes:
+                    pseudogene = True
+
+                if (
+                    "PARTIAL" in attributes and attributes["PARTIAL"].upper() == "TRUE"
+                ) or has_chevron:
+                    is_partial = True
+                else:
+                    is_partial = False
 
-                    name = attributes.pop("NAME", attributes.pop("GENE", ""))
+                product = attributes.pop("PRODUCT", "")
 
-                    if "PSEUDO" in attributes or "PSEUDOGENE" in attributes:
-                        pseudogene = True
+                if contig is None or contig.name != fields_gff[gff_seqname]:
+                    # get the current contig
+                    try:
+                        contig = org.get(fields_gff[gff_seqname])
+                    except KeyError:
+                        with contig_counter.get_lock():
+                            contig = Contig(
+                                contig_counter.value,
+                                fields_gff[gff_seqname],
+                                (
+                                    True
+                                    if fields_gff[gff_seqname] in circular_contigs
+                                    else False
+                                ),
+                            )
+                            contig_counter.value += 1
+                        org.add(contig)
+                        if attr_prodigal is not None:
+                            contig.length = int(attr_prodigal["seqlen"])
+
+                if fields_gff[gff_type] == "CDS" and (
+                    not pseudogene or (pseudogene and pseudo)
+                ):
+                    genetic_code = 0
+                    if "TRANSL_TABLE" in attributes:
+                        genetic_code = int(attributes["TRANSL_TABLE"])
+
+                    gene_frame = 0
+                    #  Get value of frame if valid
+                    if fields_gff[frame] in ["1", "2", "0"]:
+                        gene_frame = int(fields_gff[frame])
 
                     if (
-                        "PARTIAL" in attributes
-                        and attributes["PARTIAL"].upper() == "TRUE"
-                    ) or has_chevron:
-                        is_partial = True
-                    else:
-                        is_partial = False
-
-                    product = attributes.pop("PRODUCT", "")
-
-                    if contig is None or contig.name != fields_gff[gff_seqname]:
-                        # get the current contig
-                        try:
-                            contig = org.get(fields_gff[gff_seqname])
-                        except KeyError:
-                            with contig_counter.get_lock():
-                                contig = Contig(
-                                    contig_counter.value,
-                                    fields_gff[gff_seqname],
-                                    (
-                                        True
-                                        if fields_gff[gff_seqname] in circular_contigs
-                                        else False
-                                    ),
-                                )
-                                contig_counter.value += 1
-                            org.add(contig)
-                            if attr_prodigal is not None:
-                                contig.length = int(attr_prodigal["seqlen"])
-
-                    if fields_gff[gff_type] == "CDS" and (
-                        not pseudogene or (pseudogene and pseudo)
-                    ):
-                        genetic_code = 0
-                        if "TRANSL_TABLE" in attributes:
-                            genetic_code = int(attributes["TRANSL_TABLE"])
-
-                        gene_frame = 0
-                        #  Get value of frame if valid
-                        if fields_gff[frame] in ["1", "2", "0"]:
-                            gene_frame = int(fields_gff[frame])
-
-                        if (
-                            id_attribute in id_attr_to_gene_id
-                        ):  # the ID has already been seen at least once in this genome
-                            existing_gene = id_attr_to_gene_id[id_attribute]
-                            new_gene_info = {
-                                "strand": fields_gff[gff_strand],
-                                "type": fields_gff[gff_type],
-                                "name": name,
-                                "position": contig.number_of_genes,
-                                "product": product,
-                                "local_identifier": gene_id,
-                                "start": gene_start,
-                                "stop": gene_stop,
-                                "frame": gene_frame,
-                            }
-
-                            check_and_add_extra_gene_part(existing_gene, new_gene_info)
-
-                            continue
-
-                        gene = Gene(org.name + "_CDS_" + str(gene_counter).zfill(4))
-
-                        id_attr_to_gene_id[id_attribute] = gene
-
-                        # here contig is filled in order, so position is the number of genes already stored in the contig.
-                        gene.fill_annotations(
-                            start=gene_start,
-                            stop=gene_stop,
-                            strand=fields_gff[gff_strand],
-                            gene_type=fields_gff[gff_type],
-                            name=name,
-                            product=product,
-                            position=contig.number_of_genes,
-                            local_identifier=gene_id,
-                            genetic_code=genetic_code,
-                            is_partial=is_partial,
-                            frame=gene_frame,
-                        )
+                        id_attribute in id_attr_to_gene_id
+                    ):  # the ID has already been seen at least once in this genome
+                        existing_gene = id_attr_to_gene_id[id_attribute]
+                        new_gene_info = {
+                            "strand": fields_gff[gff_strand],
+                            "type": fields_gff[gff_type],
+                            "name": name,
+                            "position": contig.number_of_genes,
+                            "product": product,
+                            "local_identifier": gene_id,
+                            "start": gene_start,
+                            "stop": gene_stop,
+                            "frame": gene_frame,
+                        }
 
-                        gene.fill_parents(org, contig)
-                        gene_counter += 1
-                        contig.add(gene)
+                        check_and_add_extra_gene_part(existing_gene, new_gene_info)
 
-                    elif "RNA" in fields_gff[gff_type]:
+                        continue
 
-                        rna_type = fields_gff[gff_type]
-                        rna = RNA(
-                            org.name + f"_{rna_type}_" + str(rna_counter).zfill(4)
-                        )
+                    gene = Gene(org.name + "_CDS_" + str(gene_counter).zfill(4))
 
-                        rna.fill_annotations(
-                            start=gene_start,
-                            stop=gene_stop,
-                            strand=fields_gff[gff_strand],
-                            gene_type=fields_gff[gff_type],
-                            name=name,
-                            product=product,
-                            local_identifier=gene_id,
-                        )
-                        rna.fill_parents(org, contig)
-                        rna_counter += 1
-                        contig.add_rna(rna)
+                    id_attr_to_gene_id[id_attribute] = gene
+
+                    # here contig is filled in order, so position is the number of genes already stored in the contig.
+                    gene.fill_annotations(
+                        start=gene_start,
+                        stop=gene_stop,
+                        strand=fields_gff[gff_strand],
+                        gene_type=fields_gff[gff_type],
+                        name=name,
+                        product=product,
+                        position=contig.number_of_genes,
+                        local_identifier=gene_id,
+                        genetic_code=genetic_code,
+                        is_partial=is_partial,
+                        frame=gene_frame,
+                    )
+
+                    gene.fill_parents(org, contig)
+                    gene_counter += 1
+                    contig.add(gene)
+
+                elif "RNA" in fields_gff[gff_type]:
+
+                    rna_type = fields_gff[gff_type]
+                    rna = RNA(org.name + f"_{rna_type}_" + str(rna_counter).zfill(4))
+
+                    rna.fill_annotations(
+                        start=gene_start,
+                        stop=gene_stop,
+                        strand=fields_gff[gff_strand],
+                        gene_type=fields_gff[gff_type],
+                        name=name,
+                        product=product,
+                        local_identifier=gene_id,
+                    )
+                    rna.fill_parents(org, contig)
+                    rna_counter += 1
+                    contig.add_rna(rna)
 
     # Fix partial genes coordinates
     for contig in org.contigs:
@@ -1192,20 +1374,17 @@ def read_org_gff(
                 )
 
     # GET THE FASTA SEQUENCES OF THE GENES
-    if fasta_string == "":
-        has_fasta = False
-
     if has_fasta:
-        contig_sequences = get_contigs_from_fasta_file(org, fasta_string.split("\n"))
+        contig_sequences = get_contigs_from_fasta_file(org, fasta_lines)
 
         correct_putative_overlaps(org.contigs)
 
         for contig in org.contigs:
-
-            for gene in contig.genes:
-                gene.add_sequence(get_dna_sequence(contig_sequences[contig.name], gene))
-            for rna in contig.RNAs:
-                rna.add_sequence(get_dna_sequence(contig_sequences[contig.name], rna))
+            features = list(chain(contig.genes, contig.RNAs))
+            for feature, sequence in zip(
+                features, get_dna_sequences(contig_sequences[contig.name], features)
+            ):
+                feature.add_sequence(sequence)
 
     # add metadata to genome and contigs
     if contig_name_to_region_info:
@@ -1597,6 +1776,293 @@ def local_identifiers_are_unique(genes: Iterable[Gene]) -> bool:
     return True
 
 
+def run_timed(func: Callable, *args) -> Tuple[Any, float]:
+    """
+    Call a function and measure the time it took
+
+    :param func: Function to call
+    :param args: Arguments of the function
+
+    :return: Result of the function and the time it took in seconds
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def run_largest_genomes_first(
+    executor: Executor,
+    func: Callable,
+    arguments: List[tuple],
+    genome_files: List[Path],
+    progress: tqdm,
+) -> Generator[Tuple[int, Any, float], None, None]:
+    """
+    Submit one task per genome to the executor, the genomes with the largest files first so that
+    long tasks do not end up running alone at the end.
+    Results are yielded as they complete, as soon as the results of all the genomes before them in the input have been.
+    This way the genomes are given in input order, whatever the order the tasks complete in.
+
+    :param executor: Executor running the tasks
+    :param func: Function processing one genome
+    :param arguments: Arguments of the function for each genome
+    :param genome_files: File of each genome, which size is used to order the tasks
+    :param progress: Progress bar updated when a task completes
+
+    :return: Generator of the index of the genome in the input, the result of the function and the time it took
+    """
+    file_sizes = [genome_file.stat().st_size for genome_file in genome_files]
+    future_to_index = {}
+    for index in sorted(
+        range(len(arguments)), key=lambda i: file_sizes[i], reverse=True
+    ):
+        future = executor.submit(run_timed, func, *arguments[index])
+        future.add_done_callback(lambda p: progress.update())
+        future_to_index[future] = index
+
+    completed = {}
+    next_index = 0
+    for future in as_completed(future_to_index):
+        completed[future_to_index[future]] = future.result()
+        while next_index in completed:
+            result, elapsed_time = completed.pop(next_index)
+            yield next_index, result, elapsed_time
+            next_index += 1
+
+
+GENOME_TEXT_FIELDS = ["ID", "type", "name", "product", "local_identifier"]
+
+
+def pack_genome(genome: Organism) -> Dict[str, Any]:
+    """
+    Pack an annotated genome into a compact set of arrays and strings.
+    Sending it between processes is much cheaper than sending the graph of Gene and RNA objects,
+    which is pickled object by object.
+
+    :param genome: Annotated genome to pack
+
+    :return: Packed genome, to give to unpack_genome
+    """
+    contigs = []
+    features = []
+    feature_contigs = []
+    for contig_index, contig in enumerate(genome.contigs):
+        contigs.append(
+            (
+                contig.ID,
+                contig.name,
+                contig.is_circular,
+                contig.length,
+                list(contig.metadata),
+            )
+        )
+        for feature in chain(contig.genes, contig.RNAs):
+            features.append(feature)
+            feature_contigs.append(contig_index)
+
+    genes = [feature for feature in features if isinstance(feature, Gene)]
+    coordinates = [
+        position
+        for feature in features
+        for coords in feature.coordinates
+        for position in coords
+    ]
+    sequences = ["" if feature.dna is None else feature.dna for feature in features]
+
+    packed = {
+        "genome": genome.name,
+        "genome_metadata": list(genome.metadata),
+        "contigs": contigs,
+        "contig": np.array(feature_contigs, dtype=np.int32),
+        "is_rna": np.array(
+            [isinstance(feature, RNA) for feature in features], dtype=bool
+        ),
+        "start": np.array([feature.start for feature in features], dtype=np.int64),
+        "stop": np.array([feature.stop for feature in features], dtype=np.int64),
+        "forward": np.array(
+            [feature.strand == "+" for feature in features], dtype=bool
+        ),
+        "is_fragment": np.array(
+            [feature.is_fragment for feature in features], dtype=bool
+        ),
+        "position": np.array([gene.position for gene in genes], dtype=np.int32),
+        "genetic_code": np.array([gene.genetic_code for gene in genes], dtype=np.int16),
+        "frame": np.array([gene.frame for gene in genes], dtype=np.int8),
+        "is_partial": np.array([gene.is_partial for gene in genes], dtype=bool),
+        "coordinates": np.array(coordinates, dtype=np.int64),
+        "coordinates_offsets": np.cumsum(
+            [0] + [2 * len(feature.coordinates) for feature in features], dtype=np.int64
+        ),
+        "has_dna": np.array(
+            [feature.dna is not None for feature in features], dtype=bool
+        ),
+        "sequences": "".join(sequences),
+        "sequences_offsets": np.cumsum(
+            [0] + [len(sequence) for sequence in sequences], dtype=np.int64
+        ),
+    }
+    for field in GENOME_TEXT_FIELDS:
+        packed[field] = "\0".join(getattr(feature, field) for feature in features)
+    return packed
+
+
+def unpack_genome(packed: Dict[str, Any]) -> Organism:
+    """
+    Build back the genome packed with pack_genome
+
+    :param packed: Packed genome
+
+    :return: Annotated genome
+    """
+    # All the objects built here are kept in the pangenome,
+    # so there is nothing for the garbage collector to find while they are created.
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        return build_packed_genome(packed)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+
+
+def build_packed_genome(packed: Dict[str, Any]) -> Organism:
+    """
+    Build the genome objects from a packed genome
+
+    :param packed: Packed genome
+
+    :return: Annotated genome
+    """
+    genome = Organism(packed["genome"])
+    for metadata in packed["genome_metadata"]:
+        genome.add_metadata(metadata)
+
+    contigs = []
+    for identifier, name, is_circular, length, metadata_list in packed["contigs"]:
+        contig = Contig(identifier, name, is_circular)
+        if length is not None:
+            contig.length = length
+        for metadata in metadata_list:
+            contig.add_metadata(metadata)
+        genome.add(contig)
+        contigs.append(contig)
+
+    texts = {
+        field: packed[field].split("\0") if len(packed["start"]) else []
+        for field in GENOME_TEXT_FIELDS
+    }
+    coordinates = packed["coordinates"].tolist()
+    coordinates_offsets = packed["coordinates_offsets"].tolist()
+    sequences = packed["sequences"]
+    sequences_offsets = packed["sequences_offsets"].tolist()
+    gene_fields = zip(
+        packed["position"].tolist(),
+        packed["genetic_code"].tolist(),
+        packed["frame"].tolist(),
+        packed["is_partial"].tolist(),
+    )
+    # The features were checked when they were built in the worker,
+    # so their attributes are set directly rather than through fill_annotations.
+    for index, (
+        contig_index,
+        is_rna,
+        start,
+        stop,
+        forward,
+        is_fragment,
+        has_dna,
+    ) in enumerate(
+        zip(
+            packed["contig"].tolist(),
+            packed["is_rna"].tolist(),
+            packed["start"].tolist(),
+            packed["stop"].tolist(),
+            packed["forward"].tolist(),
+            packed["is_fragment"].tolist(),
+            packed["has_dna"].tolist(),
+        )
+    ):
+        contig = contigs[contig_index]
+        feature = RNA(texts["ID"][index]) if is_rna else Gene(texts["ID"][index])
+        feature.start = start
+        feature.stop = stop
+        feature.strand = "+" if forward else "-"
+        feature.type = texts["type"][index]
+        feature.name = texts["name"][index]
+        feature.product = texts["product"][index]
+        feature.local_identifier = texts["local_identifier"][index]
+        feature_coordinates = coordinates[
+            coordinates_offsets[index] : coordinates_offsets[index + 1]
+        ]
+        feature.coordinates = list(
+            zip(feature_coordinates[::2], feature_coordinates[1::2])
+        )
+        feature.is_fragment = is_fragment
+        if has_dna:
+            feature.dna = sequences[
+                sequences_offsets[index] : sequences_offsets[index + 1]
+            ]
+        feature._organism = genome
+        feature._contig = contig
+        if is_rna:
+            contig.add_rna(feature)
+        else:
+            (
+                feature.position,
+                feature.genetic_code,
+                feature.frame,
+                feature.is_partial,
+            ) = next(gene_fields)
+            contig[(start, stop, feature.strand)] = feature
+    return genome
+
+
+def read_anno_file_packed(*args) -> Tuple[Dict[str, Any], bool]:
+    """
+    Read an annotation file with read_anno_file and pack the genome to send it back to the main process
+
+    :param args: Arguments of read_anno_file
+
+    :return: Packed genome and true if there are sequences in the file
+    """
+    genome, has_dna_sequence = read_anno_file(*args)
+    return pack_genome(genome), has_dna_sequence
+
+
+def annotate_organism_packed(*args) -> Dict[str, Any]:
+    """
+    Annotate a genome with annotate_organism and pack it to send it back to the main process
+
+    :param args: Arguments of annotate_organism
+
+    :return: Packed genome
+    """
+    return pack_genome(annotate_organism(*args))
+
+
+def write_genome_timings(
+    timings: List[Tuple[Organism, Path, float]], timings_file: Path
+):
+    """
+    Write the time spent on each genome in a TSV file
+
+    :param timings: Genome, its file and the time spent on it in seconds
+    :param timings_file: Path to the TSV file to write
+    """
+    with open(timings_file, "w") as fout:
+        fout.write("genome\tfile\tfile_size\tcontigs\tgenes\tRNAs\ttime_in_seconds\n")
+        for genome, genome_file, elapsed_time in timings:
+            fout.write(
+                f"{genome.name}\t{genome_file}\t{genome_file.stat().st_size}\t"
+                f"{genome.number_of_contigs}\t{genome.number_of_genes()}\t"
+                f"{genome.number_of_rnas()}\t"
+                f"{elapsed_time:.3f}\n"
+            )
+    logging.getLogger("PPanGGOLiN").info(
+        f"Time spent on each genome written in '{timings_file}'"
+    )
+
+
 def read_annotations(
     pangenome: Pangenome,
     organisms_file: Path,
@@ -1604,6 +2070,7 @@ def read_annotations(
     pseudo: bool = False,
     translation_table: int = 11,
     is_translation_table_specified: bool = False,
+    timings_file: Path = None,
     disable_bar: bool = False,
 ):
     """
@@ -1614,6 +2081,7 @@ def read_annotations(
     :param cpu: number of CPU cores to use
     :param pseudo: allow to read pseudogene
     :param translation_table: Translation table (genetic code) to use when /transl_table is missing from CDS tags.
+    :param timings_file: Path to a TSV file where the time spent reading each genome is written
     :param disable_bar: Disable the progress bar
     """
 
@@ -1646,20 +2114,28 @@ def read_annotations(
         initargs=(contig_counter,),
     ) as executor:
         with tqdm(total=len(args), unit="file", disable=disable_bar) as progress:
-            futures = []
-
-            for fn_args in args:
-                future = executor.submit(read_anno_file, *fn_args)
-                future.add_done_callback(lambda p: progress.update())
-                futures.append(future)
-
-            for future in futures:
-                org, has_dna_sequence = future.result()
+            timings = []
+            for (
+                index,
+                (packed_org, has_dna_sequence),
+                elapsed_time,
+            ) in run_largest_genomes_first(
+                executor,
+                read_anno_file_packed,
+                args,
+                [fn_args[1] for fn_args in args],
+                progress,
+            ):
+                org = unpack_genome(packed_org)
                 pangenome.add_organism(org)
+                timings.append((org, args[index][1], elapsed_time))
 
                 if not has_dna_sequence:
                     pangenome.status["geneSequences"] = "No"
 
+    if timings_file is not None:
+        write_genome_timings(timings, timings_file)
+
     # decide whether we use local ids or ppanggolin ids.
     used_local_identifiers = chose_gene_identifiers(pangenome)
 
@@ -1732,16 +2208,17 @@ def get_gene_sequences_from_fastas(
                 f" This might mean that the genome names between your annotation file and "
                 f"your fasta file are different."
             )
-        with read_compressed_or_not(Path(elements[1])) as currFastaFile:
-            fasta_dict[org] = get_contigs_from_fasta_file(org, currFastaFile)
+        fasta_dict[org] = get_contigs_from_fasta_file(
+            org, read_fasta_buffer(Path(elements[1]))
+        )
 
-            # When dealing with GFF files, some genes may have coordinates extending beyond the actual
-            # length of contigs, especially when they overlap the edges. This usually needs to be split
-            # into two parts to handle the circular genome wrapping.
-            # If the GFF file lacks associated FASTA sequences and it was not possible to determine the
-            # contig length from the GFF file, we must apply this correction while parsing the external FASTA file.
+        # When dealing with GFF files, some genes may have coordinates extending beyond the actual
+        # length of contigs, especially when they overlap the edges. This usually needs to be split
+        # into two parts to handle the circular genome wrapping.
+        # If the GFF file lacks associated FASTA sequences and it was not possible to determine the
+        # contig length from the GFF file, we must apply this correction while parsing the external FASTA file.
 
-            correct_putative_overlaps(org.contigs)
+        correct_putative_overlaps(org.contigs)
 
     if set(pangenome.organisms) > set(fasta_dict.keys()):
         missing = pangenome.number_of_organisms - len(
@@ -1770,10 +2247,11 @@ def get_gene_sequences_from_fastas(
         for org in pangenome.organisms:
             for contig in org.contigs:
                 try:
-                    for gene in contig.genes:
-                        gene.add_sequence(
-                            get_dna_sequence(fasta_dict[org][contig.name], gene)
-                        )
+                    genes = list(contig.genes)
+                    for gene, sequence in zip(
+                        genes, get_dna_sequences(fasta_dict[org][contig.name], genes)
+                    ):
+                        gene.add_sequence(sequence)
                         bar.update()
                     # for rna in contig.RNAs:
                     #     rna.add_sequence(get_dna_sequence(fasta_dict[org][contig.name], rna))
@@ -1790,6 +2268,78 @@ def get_gene_sequences_from_fastas(
     pangenome.status["geneSequences"] = "Computed"
 
 
+def create_training_info_file(
+    training_info_file: Path, genome_files: List[Path], translation_table: int = 11
+):
+    """
+    Train prodigal on reference genomes and save the training information to reuse it for other genomes
+
+    :param training_info_file: Path to the training information file to write
+    :param genome_files: Fasta files of the reference genomes
+    :param translation_table: Translation table (genetic code) to use.
+    """
+    logging.getLogger("PPanGGOLiN").info(
+        f"Training prodigal on {len(genome_files)} reference genomes..."
+    )
+    sequences = [
+        sequence.upper()
+        for genome_file in genome_files
+        for _, sequence in parse_fasta(read_compressed_or_not(genome_file))
+    ]
+    write_training_info(
+        train_prodigal(sequences, translation_table), training_info_file
+    )
+    logging.getLogger("PPanGGOLiN").info(
+        f"Prodigal training written in '{training_info_file}'"
+    )
+
+
+def annotate_rna_in_batches(
+    executor: Executor,
+    genomes: List[Tuple[str, Path]],
+    batch_size: int,
+    tmpdir: str,
+    kingdom: str = "bacteria",
+    cpu: int = 1,
+    disable_bar: bool = False,
+) -> List[Dict[str, List[RNA]]]:
+    """
+    Annotate the RNAs of the genomes by batches, each batch of genomes being annotated by a single run of the RNA tools
+
+    :param executor: Executor running the batches
+    :param genomes: Name and fasta file of each genome
+    :param batch_size: Number of genomes in a batch
+    :param tmpdir: Path to temporary directory
+    :param kingdom: Kingdom to which the prokaryota belongs to, to know which models to use for rRNA annotation.
+    :param cpu: number of CPU cores to use
+    :param disable_bar: Disable the progress bar
+
+    :return: RNAs of each contig of each genome, in the order of the given genomes
+    """
+    batches = [
+        genomes[start : start + batch_size]
+        for start in range(0, len(genomes), batch_size)
+    ]
+    # when there are fewer batches than cpus, the spare cpus are used by cmscan
+    cmscan_cpu = max(1, cpu // len(batches))
+    logging.getLogger("PPanGGOLiN").info(
+        f"Annotating the RNAs of {len(genomes)} genomes in {len(batches)} batches..."
+    )
+    genomes_rnas = []
+    with tqdm(total=len(batches), unit="batch", disable=disable_bar) as progress:
+        futures = []
+        for batch in batches:
+            future = executor.submit(
+                annotate_rna_batch, batch, tmpdir, kingdom, cmscan_cpu
+            )
+            future.add_done_callback(lambda p: progress.update())
+            futures.append(future)
+
+        for future in futures:
+            genomes_rnas.extend(future.result())
+    return genomes_rnas
+
+
 def annotate_pangenome(
     pangenome: Pangenome,
     fasta_list: Path,
@@ -1799,7 +2349,13 @@ def annotate_pangenome(
     kingdom: str = "bacteria",
     norna: bool = False,
     allow_overlap: bool = False,
+    all_overlaps: bool = False,
     procedure: str = None,
+    timings_file: Path = None,
+    training_info_file: Path = None,
+    training_genomes: Path = None,
+    min_coding_density: float = 0.0,
+    rna_batch_size: int = 1,
     disable_bar: bool = False,
 ):
     """
@@ -1813,7 +2369,16 @@ def annotate_pangenome(
     :param kingdom: Kingdom to which the prokaryota belongs to, to know which models to use for rRNA annotation.
     :param norna: Use to avoid annotating RNA features.
     :param allow_overlap: Use to not remove genes overlapping with RNA features
+    :param all_overlaps: Remove the CDS overlapping any RNA gene and not only the RNA genes next to them
     :param procedure: prodigal procedure used
+    :param timings_file: Path to a TSV file where the time spent annotating each genome is written
+    :param training_info_file: Prodigal training information file used for all the genomes.
+                               It is created if it does not exist.
+    :param training_genomes: List of the reference genomes to train prodigal on when creating the training file.
+                             The largest genome is used if not given.
+    :param min_coding_density: With a shared training, train prodigal on the genomes where the genes found
+                               cover less than this fraction of the genome
+    :param rna_batch_size: Number of genomes whose RNAs are annotated together by a single run of the RNA tools
     :param disable_bar: Disable the progress bar
     """
 
@@ -1842,6 +2407,7 @@ def annotate_pangenome(
                 norna,
                 kingdom,
                 allow_overlap,
+                all_overlaps,
                 procedure,
             )
         )
@@ -1849,6 +2415,57 @@ def annotate_pangenome(
     if len(arguments) == 0:
         raise Exception("There are no genomes in the provided file")
 
+    if training_info_file is not None:
+        if not training_info_file.exists():
+            if training_genomes is not None:
+                reference_files = []
+                for line_number, line in enumerate(
+                    read_compressed_or_not(training_genomes), start=1
+                ):
+                    if not line.strip():
+                        continue
+                    elements = line.split("\t")
+                    if len(elements) < 2 or not elements[1].strip():
+                        raise ValueError(
+                            f"Line {line_number} of {training_genomes} does not have a genome name and a file "
+                            f"separated by a tab: '{line.rstrip()}'"
+                        )
+                    reference_path = Path(elements[1].strip())
+                    if not reference_path.exists():
+                        reference_path = training_genomes.parent.joinpath(
+                            reference_path
+                        )
+                    reference_files.append(reference_path)
+            else:
+                reference_files = [
+                    max(
+                        (fn_args[1] for fn_args in arguments),
+                        key=lambda genome_file: genome_file.stat().st_size,
+                    )
+                ]
+            create_training_info_file(
+                training_info_file, reference_files, translation_table
+            )
+        else:
+            if training_genomes is not None:
+                logging.getLogger("PPanGGOLiN").warning(
+                    f"The prodigal training file '{training_info_file}' already exists, so it is used as is "
+                    f"and the genomes listed in '{training_genomes}' are not used."
+                )
+            training_table = read_training_info(training_info_file).translation_table
+            if training_table != translation_table:
+                logging.getLogger("PPanGGOLiN").warning(
+                    f"The prodigal training file '{training_info_file}' was made with the translation table "
+                    f"{training_table} and not {translation_table}."
+                )
+
+    # when there are fewer genomes than cpus, the spare cpus look for genes in the contigs of each genome
+    threads_per_genome = max(1, cpu // len(arguments))
+    arguments = [
+        fn_args + (threads_per_genome, training_info_file, min_coding_density)
+        for fn_args in arguments
+    ]
+
     logging.getLogger("PPanGGOLiN").info(
         f"Annotating {len(arguments)} genomes using {cpu} cpus..."
     )
@@ -1858,16 +2475,36 @@ def annotate_pangenome(
         initializer=init_contig_counter,
         initargs=(contig_counter,),
     ) as executor:
-        with tqdm(total=len(arguments), unit="file", disable=disable_bar) as progress:
-            futures = []
+        if not norna and rna_batch_size > 1:
+            genomes_rnas = annotate_rna_in_batches(
+                executor,
+                [(fn_args[0], fn_args[1]) for fn_args in arguments],
+                rna_batch_size,
+                tmpdir,
+                kingdom,
+                cpu,
+                disable_bar,
+            )
+            arguments = [
+                fn_args + (genome_rnas,)
+                for fn_args, genome_rnas in zip(arguments, genomes_rnas)
+            ]
 
-            for fn_args in arguments:
-                future = executor.submit(annotate_organism, *fn_args)
-                future.add_done_callback(lambda p: progress.update())
-                futures.append(future)
+        with tqdm(total=len(arguments), unit="file", disable=disable_bar) as progress:
+            timings = []
+            for index, packed_org, elapsed_time in run_largest_genomes_first(
+                executor,
+                annotate_organism_packed,
+                arguments,
+                [fn_args[1] for fn_args in arguments],
+                progress,
+            ):
+                org = unpack_genome(packed_org)
+                pangenome.add_organism(org)
+                timings.append((org, arguments[index][1], elapsed_time))
 
-            for future in futures:
-                pangenome.add_organism(future.result())
+    if timings_file is not None:
+        write_genome_timings(timings, timings_file)
 
     logging.getLogger("PPanGGOLiN").info("Done annotating genomes")
     pangenome.status["genomesAnnotated"] = "Computed"  # the pangenome is now annotated.
@@ -1884,6 +2521,7 @@ def annotate_pangenome(
         None if procedure is None else procedure
     )
     pangenome.parameters["annotate"]["allow_overlap"] = allow_overlap
+    pangenome.parameters["annotate"]["all_overlaps"] = all_overlaps
     pangenome.parameters["annotate"]["# read_annotations_from_file"] = False
 
 
@@ -1895,6 +2533,7 @@ def launch(args: argparse.Namespace):
     """
     check_annotate_args(args)
     filename = mk_file_name(args.basename, args.output, args.force)
+    timings_file = args.output / "annotation_timings.tsv" if args.timings else None
     pangenome = Pangenome()
     if args.fasta is not None and args.anno is None:
         annotate_pangenome(
@@ -1907,6 +2546,12 @@ def launch(args: argparse.Namespace):
             kingdom=args.kingdom,
             norna=args.norna,
             allow_overlap=args.allow_overlap,
+            all_overlaps=args.all_overlaps,
+            timings_file=timings_file,
+            training_info_file=args.training_info,
+            training_genomes=args.training_genomes,
+            min_coding_density=args.min_coding_density,
+            rna_batch_size=args.rna_batch_size,
             disable_bar=args.disable_prog_bar,
         )
     elif args.anno is not None:
@@ -1922,6 +2567,7 @@ def launch(args: argparse.Namespace):
             pseudo=args.use_pseudo,
             translation_table=args.translation_table,
             is_translation_table_specified=is_translation_table_specified,
+            timings_file=timings_file,
             disable_bar=args.disable_prog_bar,
         )
 
@@ -2024,6 +2670,14 @@ def parser_annot(parser: argparse.ArgumentParser):
         default=False,
         help="Use to not remove genes overlapping with RNA features.",
     )
+    optional.add_argument(
+        "--all_overlaps",
+        required=False,
+        action="store_true",
+        default=False,
+        help="Remove all the CDS overlapping with RNA features. By default, only the CDS directly before or after "
+        "an RNA feature, when genes are sorted by start position, are removed.",
+    )
     optional.add_argument(
         "--norna",
         required=False,
@@ -2031,6 +2685,14 @@ def parser_annot(parser: argparse.ArgumentParser):
         default=False,
         help="Use to avoid annotating RNA features.",
     )
+    optional.add_argument(
+        "--rna_batch_size",
+        required=False,
+        type=int,
+        default=1,
+        help="Number of genomes whose RNAs are annotated together, by a single run of Aragorn and Infernal. "
+        "Batching many genomes avoids starting the tools and loading the rRNA models for each genome.",
+    )
     optional.add_argument(
         "--kingdom",
         required=False,
@@ -2073,6 +2735,32 @@ def parser_annot(parser: argparse.ArgumentParser):
         help="Allow to force the prodigal procedure. "
         "If nothing given, PPanGGOLiN will decide in function of contig length",
     )
+    optional.add_argument(
+        "--training_info",
+        required=False,
+        type=Path,
+        default=None,
+        help="Prodigal training file used for all the genomes instead of training prodigal on each genome. "
+        "If the file does not exist, prodigal is trained on the genomes given with --training_genomes "
+        "(or on the largest genome) and the training is saved in this file to be reused.",
+    )
+    optional.add_argument(
+        "--training_genomes",
+        required=False,
+        type=Path,
+        default=None,
+        help="A tab-separated file listing the reference genomes used to create --training_info, "
+        "in the same format as --fasta.",
+    )
+    optional.add_argument(
+        "--min_coding_density",
+        required=False,
+        type=restricted_float,
+        default=0.0,
+        help="With --training_info, prodigal is trained on the genomes where the genes found with the shared "
+        "training cover less than this fraction of the genome, as they are likely too divergent from "
+        "the reference genomes. Use 0 to always use the shared training.",
+    )
     optional.add_argument(
         "-c",
         "--cpu",
@@ -2081,6 +2769,13 @@ def parser_annot(parser: argparse.ArgumentParser):
         type=int,
         help="Number of available cpus",
     )
+    optional.add_argument(
+        "--timings",
+        required=False,
+        action="store_true",
+        default=False,
+        help="Write the time spent on each genome in 'annotation_timings.tsv' in the output directory.",
+    )
     optional.add_argument(
         "--tmpdir",
         required=False,
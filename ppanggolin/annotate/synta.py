@@ -8,13 +8,15 @@ from io import TextIOWrapper
 from multiprocessing import Value
 from subprocess import Popen, PIPE
 import ast
+from concurrent.futures import ThreadPoolExecutor
 from collections import defaultdict, Counter
-from typing import Dict, List, Optional, Union, Generator, Tuple
+from typing import Dict, Iterable, List, Optional, Union, Generator, Tuple
 from pathlib import Path
 import shutil
 
 # install libraries
-from pyrodigal import GeneFinder, Sequence
+import numpy as np
+from pyrodigal import GeneFinder, Genes, Sequence, TrainingInfo
 
 # local libraries
 from ppanggolin.genome import Organism, Gene, RNA, Contig
@@ -26,6 +28,12 @@ from ppanggolin.utils import (
 
 contig_counter: Value = Value("i", 0)
 
+# characters removed from the sequences of a FASTA file
+FASTA_DELETED_CHARS = b" \t\r\n"
+
+# separates the index of the genome from the contig name when the contigs of several genomes are annotated together
+BATCH_CONTIG_SEPARATOR = "|"
+
 
 def init_contig_counter(value: Value):
     """Initialize the contig counter for later use"""
@@ -33,6 +41,10 @@ def init_contig_counter(value: Value):
     contig_counter = value
 
 
+# see https://www.bioinformatics.org/sms/iupac.html for the code.
+COMPLEMENT_TABLE = str.maketrans("ACGTNRYSWKMBVDH", "TGCANYRSWMKVBHD")
+
+
 def reverse_complement(seq: str):
     """reverse complement the given dna sequence
 
@@ -40,43 +52,17 @@ def reverse_complement(seq: str):
 
     :return: reverse sequence
     """
-
-    complement = {
-        "A": "T",
-        "C": "G",
-        "G": "C",
-        "T": "A",
-        "N": "N",
-        "R": "Y",
-        "Y": "R",
-        "S": "S",
-        "W": "W",
-        "K": "M",
-        "M": "K",
-        "B": "V",
-        "V": "B",
-        "D": "H",
-        "H": "D",
-    }
-    # see https://www.bioinformatics.org/sms/iupac.html for the code.
-    rcseq = ""
-    for i in reversed(seq):
-        rcseq += complement[i]
-    return rcseq
+    return seq.translate(COMPLEMENT_TABLE)[::-1]
 
 
-def launch_aragorn(
-    fna_file: str, org: Organism, contig_to_length: Dict[str, int]
-) -> defaultdict:
+def run_aragorn(fna_file: str) -> List[str]:
     """
-    Launches Aragorn to annotate tRNAs.
+    Run Aragorn to annotate tRNAs
 
-    :param fna_file: file-like object containing the uncompressed fasta sequences
-    :param org: Organism which will be annotated
+    :param fna_file: Path to the uncompressed fasta file
 
-    :return: Annotated genes in a list of gene objects
+    :return: Lines of the Aragorn output
     """
-    locustag = org.name
     cmd = ["aragorn", "-t", "-gcbact", "-l", "-w", fna_file]
     logging.getLogger("PPanGGOLiN").debug(f"aragorn command : {' '.join(cmd)}")
 
@@ -86,10 +72,23 @@ def launch_aragorn(
         )
 
     p = Popen(cmd, stdout=PIPE)
-    # loading the whole thing, reverting it to 'pop' in order.
-    file_data = p.communicate()[0].decode().split("\n")[::-1]
-    gene_objs = defaultdict(set)
-    c = 0
+    return p.communicate()[0].decode().split("\n")
+
+
+def parse_aragorn_output(
+    aragorn_lines: List[str], contig_to_length: Dict[str, int]
+) -> List[Tuple[str, int, int, str, str]]:
+    """
+    Parse the tRNAs found by Aragorn
+
+    :param aragorn_lines: Lines of the Aragorn output
+    :param contig_to_length: Length of each contig, to ignore tRNAs with invalid coordinates
+
+    :return: Contig, start, stop, strand and product of the tRNAs, in the order of the output
+    """
+    # reverting it to 'pop' in order.
+    file_data = aragorn_lines[::-1]
+    hits = []
     contig_name = ""
     while len(file_data) != 0:
         line = file_data.pop()
@@ -116,24 +115,182 @@ def launch_aragorn(
                 )
                 continue
 
-            c += 1
-            gene = RNA(rna_id=locustag + "_tRNA_" + str(c).zfill(4))
-            gene.fill_annotations(
-                start=start,
-                stop=stop,
-                strand="-" if line_data[2].startswith("c") else "+",
-                gene_type="tRNA",
-                product=line_data[1] + line_data[4],
+            hits.append(
+                (
+                    contig_name,
+                    start,
+                    stop,
+                    "-" if line_data[2].startswith("c") else "+",
+                    line_data[1] + line_data[4],
+                )
             )
-            gene_objs[contig_name].add(gene)
+    return hits
+
+
+def create_rna_genes(
+    hits: List[Tuple[str, int, int, str, str]],
+    locustag: str,
+    rna_type: str,
+) -> defaultdict:
+    """
+    Create the RNA objects of a genome from the hits of an RNA annotation tool.
+    RNAs are numbered following the order of the hits.
+
+    :param hits: Contig, start, stop, strand and product of the RNAs
+    :param locustag: Prefix of the RNA identifiers, the genome name
+    :param rna_type: Type of the RNAs, tRNA or rRNA
+
+    :return: RNA objects of each contig
+    """
+    gene_objs = defaultdict(set)
+    for c, (contig_name, start, stop, strand, product) in enumerate(hits, start=1):
+        gene = RNA(rna_id=locustag + f"_{rna_type}_" + str(c).zfill(4))
+        gene.fill_annotations(
+            start=start,
+            stop=stop,
+            strand=strand,
+            gene_type=rna_type,
+            product=product,
+        )
+        gene_objs[contig_name].add(gene)
     return gene_objs
 
 
+def launch_aragorn(
+    fna_file: str, org: Organism, contig_to_length: Dict[str, int]
+) -> defaultdict:
+    """
+    Launches Aragorn to annotate tRNAs.
+
+    :param fna_file: file-like object containing the uncompressed fasta sequences
+    :param org: Organism which will be annotated
+
+    :return: Annotated genes in a list of gene objects
+    """
+    return create_rna_genes(
+        parse_aragorn_output(run_aragorn(fna_file), contig_to_length),
+        org.name,
+        "tRNA",
+    )
+
+
+def create_gene_finder(
+    use_meta: bool = False, training_info: Optional[TrainingInfo] = None
+) -> GeneFinder:
+    """
+    Create a pyrodigal gene finder with the parameters used by PPanGGOLiN
+
+    :param use_meta: use meta procedure in Prodigal
+    :param training_info: Training information to use in single mode
+
+    :return: Gene finder
+    """
+    return GeneFinder(
+        training_info=training_info,
+        meta=use_meta,  # '-p meta' if meta is true else '-p single'
+        closed=True,  # -c: Closed ends. Do not allow genes to run off edges.
+        mask=True,  # -m: Treat runs of N as masked sequence; don't build genes across them.
+        min_gene=120,  # This is to prevent error with mmseqs translatenucs that cut too short sequences
+        min_mask=9,  # Minimum length of masked sequence to trigger masking (default 50).
+    )
+
+
+def train_prodigal(sequences: Iterable[str], code: int = 11) -> TrainingInfo:
+    """
+    Train prodigal on the given sequences
+
+    :param sequences: Sequences to train prodigal on, the contigs of one or more genomes
+    :param code: Translation table (genetic code) to use.
+
+    :return: Training information
+    """
+    return create_gene_finder().train(
+        *sequences, force_nonsd=False, translation_table=code
+    )  # -g: Specify a translation table to use (default 11).
+
+
+def write_training_info(training_info: TrainingInfo, training_info_file: Path):
+    """
+    Save prodigal training information in a file to reuse it
+
+    :param training_info: Training information
+    :param training_info_file: Path to the file to write
+    """
+    with open(training_info_file, "wb") as fh:
+        training_info.dump(fh)
+
+
+def read_training_info(training_info_file: Path) -> TrainingInfo:
+    """
+    Read prodigal training information saved with write_training_info
+
+    :param training_info_file: Path to the training information file
+
+    :return: Training information
+    """
+    with open(training_info_file, "rb") as fh:
+        return TrainingInfo.load(fh)
+
+
+def coding_density(
+    contig_genes: Dict[str, Genes], contig_sequences: Dict[str, str]
+) -> float:
+    """
+    Compute the fraction of the genome covered by the predicted genes
+
+    :param contig_genes: Predicted genes of each contig
+    :param contig_sequences: Sequence of each contig
+
+    :return: Coding density of the genome
+    """
+    coding_length = sum(
+        pred.end - pred.begin + 1 for genes in contig_genes.values() for pred in genes
+    )
+    return coding_length / sum(len(sequence) for sequence in contig_sequences.values())
+
+
+def find_genes_in_contigs(
+    gene_finder: GeneFinder, sequences: Dict[str, Sequence], threads: int = 1
+) -> Dict[str, Genes]:
+    """
+    Predict the genes of each contig with an already trained gene finder.
+    With several threads, contigs are dispatched to a thread pool, the longest ones first,
+    as pyrodigal releases the GIL while it looks for genes.
+
+    :param gene_finder: Trained pyrodigal gene finder
+    :param sequences: Sequence of each contig
+    :param threads: Number of threads to use
+
+    :return: Predicted genes of each contig, in the order of the given contigs
+    """
+    if threads > 1 and len(sequences) > 1:
+        contig_names = sorted(
+            sequences, key=lambda name: len(sequences[name]), reverse=True
+        )
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            predictions = dict(
+                zip(
+                    contig_names,
+                    executor.map(
+                        gene_finder.find_genes,
+                        (sequences[name] for name in contig_names),
+                    ),
+                )
+            )
+        return {name: predictions[name] for name in sequences}
+    return {
+        name: gene_finder.find_genes(sequence) for name, sequence in sequences.items()
+    }
+
+
 def launch_prodigal(
     contig_sequences: Dict[str, str],
     org: Organism,
     code: int = 11,
     use_meta: bool = False,
+    threads: int = 1,
+    training_info: Optional[TrainingInfo] = None,
+    min_coding_density: float = 0.0,
 ) -> defaultdict:
     """
     Launches Prodigal to annotate CDS. Takes a fna file name and a locustag to give an ID to the pred genes.
@@ -142,6 +299,10 @@ def launch_prodigal(
     :param org: Organism which will be annotated
     :param code: Translation table (genetic code) to use.
     :param use_meta: use meta procedure in Prodigal
+    :param threads: Number of threads used to look for genes in the contigs once the gene finder is trained
+    :param training_info: Training information shared between genomes. If not given, prodigal is trained on the genome.
+    :param min_coding_density: Train prodigal on the genome when the genes found with the shared training information
+                               cover less than this fraction of the genome
 
     :return: Annotated genes in a list of gene objects
     """
@@ -150,25 +311,35 @@ def launch_prodigal(
         contig_name: Sequence(sequence)
         for contig_name, sequence in contig_sequences.items()
     }
-    gene_finder = GeneFinder(
-        meta=use_meta,  # '-p meta' if meta is true else '-p single'
-        closed=True,  # -c: Closed ends. Do not allow genes to run off edges.
-        mask=True,  # -m: Treat runs of N as masked sequence; don't build genes across them.
-        min_gene=120,  # This is to prevent error with mmseqs translatenucs that cut too short sequences
-        min_mask=9,  # Minimum length of masked sequence to trigger masking (default 50).
-    )
 
-    if not use_meta:
-        gene_finder.train(
-            *contig_sequences.values(), force_nonsd=False, translation_table=code
-        )  # -g: Specify a translation table to use (default 11).
+    if use_meta:
+        gene_finder = create_gene_finder(use_meta=True)
+    elif training_info is None:
+        gene_finder = create_gene_finder(
+            training_info=train_prodigal(contig_sequences.values(), code)
+        )
+    else:
+        gene_finder = create_gene_finder(training_info=training_info)
+    contig_genes = find_genes_in_contigs(gene_finder, sequences, threads)
+
+    if not use_meta and training_info is not None and min_coding_density > 0:
+        density = coding_density(contig_genes, contig_sequences)
+        if density < min_coding_density:
+            logging.getLogger("PPanGGOLiN").info(
+                f"Genes found with the shared prodigal training cover {density:.1%} of genome '{org.name}', "
+                f"less than {min_coding_density:.1%}. Prodigal is trained on this genome instead."
+            )
+            gene_finder = create_gene_finder(
+                training_info=train_prodigal(contig_sequences.values(), code)
+            )
+            contig_genes = find_genes_in_contigs(gene_finder, sequences, threads)
+
     gene_counter = 1
 
     genetic_code_count = Counter()
 
-    for contig_name, sequence in sequences.items():
-
-        genes = gene_finder.find_genes(sequence)
+    # genes are numbered following the order of the contigs, whatever the order they were processed in
+    for contig_name, genes in contig_genes.items():
         translation_table = genes.training_info.translation_table
         genetic_code_count[translation_table] += 1
 
@@ -194,20 +365,19 @@ def launch_prodigal(
     return gene_objs
 
 
-def launch_infernal(
-    fna_file: str, org: Organism, tmpdir: str, kingdom: str = "bacteria"
-) -> defaultdict:
+def run_infernal(
+    fna_file: str, tmpdir: str, kingdom: str = "bacteria", cpu: int = 1
+) -> List[str]:
     """
-    Launches Infernal in hmmer-only mode to annotate rRNAs.
+    Run Infernal in hmmer-only mode to annotate rRNAs.
 
-    :param fna_file: file-like object containing the uncompressed fasta sequences
-    :param org: Organism which will be annotated
-    :param kingdom: Kingdom to which the prokaryota belongs to, to know which models to use for rRNA annotation.
+    :param fna_file: Path to the uncompressed fasta file
     :param tmpdir: Path to temporary directory
+    :param kingdom: Kingdom to which the prokaryota belongs to, to know which models to use for rRNA annotation.
+    :param cpu: Number of cpus used by cmscan
 
-    :return: Annotated genes in a list of gene objects.
+    :return: Lines of the table of hits written by cmscan
     """
-    locustag = org.name
     modelfile = ""
     if kingdom == "bacteria":
         modelfile = (
@@ -225,7 +395,7 @@ def launch_infernal(
         tmp_file.name,
         "--hmmonly",
         "--cpu",
-        str(1),
+        str(cpu),
         "--noali",
         modelfile,
         fna_file,
@@ -250,12 +420,24 @@ def launch_infernal(
         )
     # never managed to test what happens if the .cm files are compressed with a 'bad' version of infernal,
     # so if that happens you are on your own.
+    tblout_lines = tmp_file.readlines()
+    tmp_file.close()
+    return tblout_lines
 
-    gene_objs = defaultdict(set)
-    c = 0
-    for line in tmp_file:
+
+def parse_infernal_output(
+    tblout_lines: List[str],
+) -> List[Tuple[str, int, int, str, str]]:
+    """
+    Parse the rRNAs found by Infernal
+
+    :param tblout_lines: Lines of the table of hits written by cmscan
+
+    :return: Contig, start, stop, strand and product of the rRNAs, in the order of the table
+    """
+    hits = []
+    for line in tblout_lines:
         if not line.startswith("#"):
-            c += 1
             line_data = line.split()
             strand = line_data[9]
             start, stop = map(
@@ -266,16 +448,28 @@ def launch_infernal(
                     else (line_data[7], line_data[8])
                 ),
             )
-            gene = RNA(rna_id=locustag + "_rRNA_" + str(c).zfill(4))
-            gene.fill_annotations(
-                start=start,
-                stop=stop,
-                strand=strand,
-                gene_type="rRNA",
-                product=" ".join(line_data[17:]),
-            )
-            gene_objs[line_data[2]].add(gene)
-    return gene_objs
+            hits.append((line_data[2], start, stop, strand, " ".join(line_data[17:])))
+    return hits
+
+
+def launch_infernal(
+    fna_file: str, org: Organism, tmpdir: str, kingdom: str = "bacteria"
+) -> defaultdict:
+    """
+    Launches Infernal in hmmer-only mode to annotate rRNAs.
+
+    :param fna_file: file-like object containing the uncompressed fasta sequences
+    :param org: Organism which will be annotated
+    :param kingdom: Kingdom to which the prokaryota belongs to, to know which models to use for rRNA annotation.
+    :param tmpdir: Path to temporary directory
+
+    :return: Annotated genes in a list of gene objects.
+    """
+    return create_rna_genes(
+        parse_infernal_output(run_infernal(fna_file, tmpdir, kingdom)),
+        org.name,
+        "rRNA",
+    )
 
 
 def check_sequence_tuple(name: str, sequence: str):
@@ -312,22 +506,22 @@ def parse_fasta(
     :raises ValueError: If the file does not contain valid FASTA format.
     """
     name = None
-    sequence = ""
+    sequence_lines = []
 
     for line in fna_file:
         line = line.strip()
 
         if line.startswith(">"):  # New header
             if name:  # Yield previous header and sequence if available
-                yield check_sequence_tuple(name, sequence)
+                yield check_sequence_tuple(name, "".join(sequence_lines))
 
             name = line[1:].split()[
                 0
             ]  # Strip '>' and extract the first word as the name
-            sequence = ""
+            sequence_lines = []
 
         elif line:  # Only append non-empty lines
-            sequence += line
+            sequence_lines.append(line)
 
         else:
             # You can skip or handle empty lines here if required
@@ -335,27 +529,66 @@ def parse_fasta(
 
     # Yield the final contig if exists
     if name:
-        yield check_sequence_tuple(name, sequence)
+        yield check_sequence_tuple(name, "".join(sequence_lines))
 
     # Check if there was any valid data (at least one header and sequence)
     if not name:
         raise ValueError("The file does not contain any valid FASTA content.")
 
 
+def read_fasta_buffer(fasta_path: Path) -> bytes:
+    """Read a FASTA file in memory, decompressing it if needed.
+
+    :param fasta_path: Path to the FASTA file, which can be compressed.
+    :return: Uncompressed content of the file.
+    """
+    with read_compressed_or_not(fasta_path, binary=True) as fasta_file:
+        return fasta_file.read()
+
+
+def parse_fasta_buffer(fasta_buffer: bytes) -> Generator[Tuple[str, str], None, None]:
+    """Yields each sequence name and sequence from the content of a FASTA file as a tuple.
+
+    Records are split on the header lines and the line breaks of each sequence are removed at once,
+    which is much faster than going through the file line by line.
+
+    :param fasta_buffer: Uncompressed content of a FASTA file.
+    :yield: Tuple with contig header (without '>') and sequence.
+    :raises ValueError: If the file does not contain valid FASTA format.
+    """
+    records = (b"\n" + fasta_buffer).split(b"\n>")
+    if len(records) == 1:
+        raise ValueError("The file does not contain any valid FASTA content.")
+
+    # whatever is before the first header is ignored
+    for record in records[1:]:
+        header, _, sequence = record.partition(b"\n")
+        header_fields = header.split()
+        name = header_fields[0].decode() if header_fields else ""
+        yield check_sequence_tuple(
+            name, sequence.translate(None, FASTA_DELETED_CHARS).decode()
+        )
+
+
 def get_contigs_from_fasta_file(
-    org: Organism, fna_file: Union[TextIOWrapper, list]
+    org: Organism, fna_file: Union[TextIOWrapper, list, bytes]
 ) -> Dict[str, str]:
     """Processes contigs from a parsed FASTA generator and stores in a dictionary.
 
     :param org: Organism instance to update with contig info.
-    :param fna_file: Input FASTA file or list of lines as sequences.
+    :param fna_file: Input FASTA file, list of lines as sequences or content of the file read with read_fasta_buffer.
     :return: Dictionary with contig names as keys and sequences as values.
     """
 
     global contig_counter
     contigs = {}
 
-    for contig_name, sequence in parse_fasta(fna_file):
+    if isinstance(fna_file, bytes):
+        sequences = parse_fasta_buffer(fna_file)
+    else:
+        sequences = parse_fasta(fna_file)
+
+    for contig_name, sequence in sequences:
 
         # Retrieve or create the contig
         try:
@@ -378,28 +611,108 @@ def get_contigs_from_fasta_file(
     return contigs
 
 
-def write_tmp_fasta(contigs: dict, tmpdir: str) -> tempfile._TemporaryFileWrapper:
+def write_tmp_fasta(fasta_buffer: bytes, tmpdir: str) -> tempfile._TemporaryFileWrapper:
     """
      Writes a temporary fna formatted file and returns the file-like object. Useful in case of  compressed input file.
      The file will be deleted when close() is called.
 
-    :param contigs: Contigs sequences of each contig
+    :param fasta_buffer: Uncompressed content of the fasta file
     :param tmpdir: path to temporary directory
 
     :return: fasta file
     """
 
-    tmp_file = tempfile.NamedTemporaryFile(mode="w", dir=tmpdir)
-    for header in contigs.keys():
-        tmp_file.write(f">{header}\n")
-        j = 0
-        while j < len(contigs[header]):
-            tmp_file.write(contigs[header][j : j + 60] + "\n")
-            j += 60
+    tmp_file = tempfile.NamedTemporaryFile(mode="wb", dir=tmpdir)
+    tmp_file.write(fasta_buffer)
     tmp_file.flush()  # force write what remains in the buffer.
     return tmp_file
 
 
+def write_fasta_sequence(fasta_file: TextIOWrapper, header: str, sequence: str):
+    """
+    Write a sequence in fasta format, with lines of 60 characters
+
+    :param fasta_file: File-like object to write in
+    :param header: Name of the sequence
+    :param sequence: Sequence to write
+    """
+    fasta_file.write(f">{header}\n")
+    j = 0
+    while j < len(sequence):
+        fasta_file.write(sequence[j : j + 60] + "\n")
+        j += 60
+
+
+def split_batch_hits(
+    hits: List[Tuple[str, int, int, str, str]], number_of_genomes: int
+) -> List[List[Tuple[str, int, int, str, str]]]:
+    """
+    Give back to each genome of a batch its RNA hits, found in contigs named with the index of the genome in the batch
+
+    :param hits: Contig, start, stop, strand and product of the RNAs found in the batch
+    :param number_of_genomes: Number of genomes in the batch
+
+    :return: Hits of each genome with the original contig names, in the order of the batch
+    """
+    genome_hits = [[] for _ in range(number_of_genomes)]
+    for batch_contig_name, *hit in hits:
+        index, contig_name = batch_contig_name.split(BATCH_CONTIG_SEPARATOR, 1)
+        genome_hits[int(index)].append((contig_name, *hit))
+    return genome_hits
+
+
+def annotate_rna_batch(
+    genomes: List[Tuple[str, Path]],
+    tmpdir: str,
+    kingdom: str = "bacteria",
+    cpu: int = 1,
+) -> List[Dict[str, List[RNA]]]:
+    """
+    Annotate the RNAs of several genomes with a single run of Aragorn and Infernal.
+    The contigs of all the genomes are written in one fasta file, their names prefixed with the index of their genome,
+    which avoids starting the tools and loading the rRNA models once per genome.
+
+    :param genomes: Name and fasta file of each genome
+    :param tmpdir: Path to temporary directory
+    :param kingdom: Kingdom to which the prokaryota belongs to, to know which models to use for rRNA annotation.
+    :param cpu: Number of cpus used by cmscan
+
+    :return: RNAs of each contig of each genome, in the order of the given genomes
+    """
+    contig_to_length = {}
+    with tempfile.NamedTemporaryFile(mode="w", dir=tmpdir) as batch_fasta:
+        for index, (_, fasta_path) in enumerate(genomes):
+            for contig_name, sequence in parse_fasta(
+                read_compressed_or_not(fasta_path)
+            ):
+                batch_contig_name = f"{index}{BATCH_CONTIG_SEPARATOR}{contig_name}"
+                contig_to_length[batch_contig_name] = len(sequence)
+                write_fasta_sequence(batch_fasta, batch_contig_name, sequence.upper())
+        batch_fasta.flush()
+
+        trna_hits = parse_aragorn_output(
+            run_aragorn(batch_fasta.name), contig_to_length
+        )
+        rrna_hits = parse_infernal_output(
+            run_infernal(batch_fasta.name, tmpdir, kingdom, cpu)
+        )
+
+    genomes_rnas = []
+    for (name, _), genome_trna_hits, genome_rrna_hits in zip(
+        genomes,
+        split_batch_hits(trna_hits, len(genomes)),
+        split_batch_hits(rrna_hits, len(genomes)),
+    ):
+        rnas = defaultdict(list)
+        for hits, rna_type in [(genome_trna_hits, "tRNA"), (genome_rrna_hits, "rRNA")]:
+            for contig_name, contig_rnas in create_rna_genes(
+                hits, name, rna_type
+            ).items():
+                rnas[contig_name].extend(contig_rnas)
+        genomes_rnas.append(rnas)
+    return genomes_rnas
+
+
 def syntaxic_annotation(
     org: Organism,
     fasta_file: TextIOWrapper,
@@ -409,6 +722,10 @@ def syntaxic_annotation(
     kingdom: str = "bacteria",
     code: int = 11,
     use_meta: bool = False,
+    threads: int = 1,
+    training_info: Optional[TrainingInfo] = None,
+    min_coding_density: float = 0.0,
+    rna_genes: Optional[Dict[str, List[RNA]]] = None,
 ) -> defaultdict:
     """
     Runs the different software for the syntaxic annotation.
@@ -421,6 +738,11 @@ def syntaxic_annotation(
     :param kingdom: Kingdom to which the prokaryota belongs to, to know which models to use for rRNA annotation.
     :param code: Translation table (genetic code) to use.
     :param use_meta: Use meta prodigal procedure
+    :param threads: Number of threads used by prodigal to look for genes
+    :param training_info: Prodigal training information shared between genomes
+    :param min_coding_density: Train prodigal on the genome when the genes found with the shared training information
+                               cover less than this fraction of the genome
+    :param rna_genes: RNAs of each contig already annotated with annotate_rna_batch, so the RNA tools are not launched
 
     :return: list of genes in the organism
     """
@@ -428,10 +750,19 @@ def syntaxic_annotation(
     # launching tools for syntaxic annotation
     genes = defaultdict(list)
     for contig_name, genes_from_contig in launch_prodigal(
-        contig_sequences=contig_sequences, org=org, code=code, use_meta=use_meta
+        contig_sequences=contig_sequences,
+        org=org,
+        code=code,
+        use_meta=use_meta,
+        threads=threads,
+        training_info=training_info,
+        min_coding_density=min_coding_density,
     ).items():
         genes[contig_name].extend(genes_from_contig)
-    if not norna:
+    if not norna and rna_genes is not None:
+        for contig_name, genes_from_contig in rna_genes.items():
+            genes[contig_name].extend(genes_from_contig)
+    elif not norna:
         contig_to_length = {
             contig_name: len(contig_seq)
             for contig_name, contig_seq in contig_sequences.items()
@@ -449,12 +780,54 @@ def syntaxic_annotation(
     return genes
 
 
-def overlap_filter(all_genes: defaultdict, allow_overlap: bool = False) -> defaultdict:
+def find_overlapping_cds(
+    starts: np.ndarray,
+    stops: np.ndarray,
+    is_cds: np.ndarray,
+    all_overlaps: bool = False,
+) -> np.ndarray:
+    """
+    Finds the CDS that overlap with RNA genes among genes sorted by start position.
+
+    By default, only the CDS that are next to an RNA gene in the sorted genes are compared to it.
+    With all_overlaps, the CDS are compared to all the RNA genes using the largest stop of the RNA genes
+    starting before the end of each CDS.
+
+    :param starts: Start position of the genes, in increasing order
+    :param stops: Stop position of the genes
+    :param is_cds: Whether each gene is a CDS
+    :param all_overlaps: Find the CDS overlapping any RNA gene and not only the RNA genes next to them
+
+    :return: Whether each gene is a CDS overlapping with an RNA gene
+    """
+    if all_overlaps:
+        rna_starts = starts[~is_cds]
+        if len(rna_starts) == 0:
+            return np.zeros(len(starts), dtype=bool)
+        rna_max_stops = np.maximum.accumulate(stops[~is_cds])
+        # number of RNA genes starting before the end of each gene
+        nb_rna_before = np.searchsorted(rna_starts, stops, side="left")
+        max_stop_before = rna_max_stops[np.maximum(nb_rna_before - 1, 0)]
+        return is_cds & (nb_rna_before > 0) & (max_stop_before > starts)
+
+    overlap_next = stops[:-1] > starts[1:]
+    overlapping = np.zeros(len(starts), dtype=bool)
+    # CDS following an RNA gene
+    overlapping[1:] |= overlap_next & ~is_cds[:-1] & is_cds[1:]
+    # CDS followed by an RNA gene
+    overlapping[:-1] |= overlap_next & is_cds[:-1] & ~is_cds[1:]
+    return overlapping
+
+
+def overlap_filter(
+    all_genes: defaultdict, allow_overlap: bool = False, all_overlaps: bool = False
+) -> defaultdict:
     """
     Removes the CDS that overlap with RNA genes.
 
     :param all_genes: Dictionary with complete list of genes
     :param allow_overlap: Use to not remove genes overlapping with RNA features
+    :param all_overlaps: Remove the CDS overlapping any RNA gene and not only the RNA genes next to them
 
     :return: Dictionary with genes filtered
     """
@@ -462,26 +835,17 @@ def overlap_filter(all_genes: defaultdict, allow_overlap: bool = False) -> defau
     sorted_genes = defaultdict(list)
     for key, genes in all_genes.items():
         tmp_genes = sorted(genes, key=lambda x: x.start)
-        rm_genes = set()
-        if not allow_overlap:
-            for i, gene_i in enumerate(tmp_genes):
-                if i + 1 < len(tmp_genes):
-                    gene_j = tmp_genes[i + 1]
-                    if (
-                        gene_i.type != "CDS"
-                        and gene_j.type == "CDS"
-                        and gene_i.stop > gene_j.start
-                    ):
-                        rm_genes.add(gene_j)
-                    elif (
-                        gene_i.type == "CDS"
-                        and gene_j.type != "CDS"
-                        and gene_i.stop > gene_j.start
-                    ):
-                        rm_genes.add(gene_i)
-
-        for gene in rm_genes:
-            tmp_genes.remove(gene)
+        if not allow_overlap and len(tmp_genes) > 1:
+            overlapping = find_overlapping_cds(
+                np.fromiter((gene.start for gene in tmp_genes), dtype=np.int64),
+                np.fromiter((gene.stop for gene in tmp_genes), dtype=np.int64),
+                np.fromiter((gene.type == "CDS" for gene in tmp_genes), dtype=bool),
+                all_overlaps,
+            )
+            tmp_genes = [
+                gene for gene, remove in zip(tmp_genes, overlapping) if not remove
+            ]
+
         cds_counter = 0
         for gene in tmp_genes:
             if gene.type == "CDS":
@@ -521,6 +885,50 @@ def get_dna_sequence(contig_seq: str, gene: Union[Gene, RNA]) -> str:
         return reverse_complement(seq)
 
 
+def get_dna_sequences(contig_seq: str, genes: Iterable[Union[Gene, RNA]]) -> List[str]:
+    """Return the sequences of genes of the same contig
+
+    The contig is reverse complemented once, and the sequences of the genes on the reverse strand are read from it.
+
+    :param contig_seq: Contig sequence
+    :param genes: Genes of the contig
+
+    :return: Sequence of each gene, in the order of the genes
+    """
+    contig_length = len(contig_seq)
+    reverse_contig_seq = None
+    sequences = []
+    for gene in genes:
+        # check contig coordinate is in scope of contig seq length
+        highest_position = max((stop for _, stop in gene.coordinates))
+        assert (
+            highest_position <= contig_length
+        ), f"Coordinates of gene {gene} exceed length of the contig. Gene coordinates {gene.coordinates} vs contig length {contig_length}"
+
+        if gene.strand == "+":
+            seq = "".join(
+                [contig_seq[start - 1 : stop] for start, stop in gene.coordinates]
+            )
+        else:
+            if reverse_contig_seq is None:
+                reverse_contig_seq = reverse_complement(contig_seq)
+            # the reverse complement of the joined parts is the joined reverse complements of the parts, in reverse order
+            seq = "".join(
+                [
+                    reverse_contig_seq[contig_length - stop : contig_length - start + 1]
+                    for start, stop in reversed(gene.coordinates)
+                ]
+            )
+
+        # check length of extracted seq
+        assert len(seq) == len(gene), (
+            f"The gene sequence of {gene} extracted from the contig does not have the expected length: "
+            f"extracted seq length {len(seq)}nt vs expected length based on gene coordinates ({gene.coordinates}) {len(gene)}nt "
+        )
+        sequences.append(seq)
+    return sequences
+
+
 def annotate_organism(
     org_name: str,
     file_name: Path,
@@ -530,7 +938,12 @@ def annotate_organism(
     norna: bool = False,
     kingdom: str = "bacteria",
     allow_overlap: bool = False,
+    all_overlaps: bool = False,
     procedure: Optional[str] = None,
+    threads: int = 1,
+    training_info_file: Optional[Path] = None,
+    min_coding_density: float = 0.0,
+    rna_genes: Optional[Dict[str, List[RNA]]] = None,
 ) -> Organism:
     """
     Function to annotate a single organism
@@ -543,7 +956,14 @@ def annotate_organism(
     :param norna: Use to avoid annotating RNA features.
     :param tmpdir: Path to temporary directory
     :param allow_overlap: Use to not remove genes overlapping with RNA features
+    :param all_overlaps: Remove the CDS overlapping any RNA gene and not only the RNA genes next to them
     :param procedure: prodigal procedure used
+    :param threads: Number of threads used by prodigal to look for genes in the contigs
+    :param training_info_file: Prodigal training information file shared between genomes.
+                               If not given, prodigal is trained on the genome.
+    :param min_coding_density: Train prodigal on the genome when the genes found with the shared training information
+                               cover less than this fraction of the genome
+    :param rna_genes: RNAs of each contig already annotated with annotate_rna_batch
 
     :return: Complete organism object for pangenome
     """
@@ -553,11 +973,16 @@ def annotate_organism(
 
     org = Organism(org_name)
 
-    fasta_file = read_compressed_or_not(file_name)
+    fasta_buffer = read_fasta_buffer(file_name)
 
-    contig_sequences = get_contigs_from_fasta_file(org, fasta_file)
-    if is_compressed(file_name):  # TODO simply copy file with shutil.copyfileobj
-        fasta_file = write_tmp_fasta(contig_sequences, tmpdir)
+    contig_sequences = get_contigs_from_fasta_file(org, fasta_buffer)
+    # the RNA annotation tools need an uncompressed fasta file
+    is_file_compressed, _ = is_compressed(file_name)
+    if is_file_compressed and not (norna or rna_genes is not None):
+        fasta_file = write_tmp_fasta(fasta_buffer, tmpdir)
+    else:
+        fasta_file = open(file_name)
+    del fasta_buffer
 
     if procedure is None:  # prodigal procedure is not force by user
         sum_contig_len = sum(len(contig) for contig in org.contigs)
@@ -571,16 +996,35 @@ def annotate_organism(
     else:
         use_meta = True if procedure == "meta" else False
 
+    training_info = None
+    if training_info_file is not None and not use_meta:
+        training_info = read_training_info(training_info_file)
+
     genes = syntaxic_annotation(
-        org, fasta_file, contig_sequences, tmpdir, norna, kingdom, code, use_meta
+        org,
+        fasta_file,
+        contig_sequences,
+        tmpdir,
+        norna,
+        kingdom,
+        code,
+        use_meta,
+        threads,
+        training_info,
+        min_coding_density,
+        rna_genes,
+    )
+    genes = overlap_filter(
+        genes, allow_overlap=allow_overlap, all_overlaps=all_overlaps
     )
-    genes = overlap_filter(genes, allow_overlap=allow_overlap)
 
     for contig_name, genes in genes.items():
         contig = org.get(contig_name)
         contig.is_circular = True if contig.name in circular_contigs else False
-        for gene in genes:
-            gene.add_sequence(get_dna_sequence(contig_sequences[contig.name], gene))
+        for gene, sequence in zip(
+            genes, get_dna_sequences(contig_sequences[contig.name], genes)
+        ):
+            gene.add_sequence(sequence)
             gene.fill_parents(org, contig)
             if isinstance(gene, Gene):
                 contig.add(gene)
@@ -9,11 +9,10 @@ import argparse
 from typing import Tuple, Dict, Set
 from pathlib import Path
 import time
-import gzip
 
 # installed libraries
-from networkx import Graph
 from tqdm import tqdm
+import numpy as np
 import pandas as pd
 
 # local libraries
@@ -31,11 +30,11 @@ from ppanggolin.utils import (
 from ppanggolin.formats.writeBinaries import write_pangenome, erase_pangenome
 from ppanggolin.formats.readBinaries import (
     check_pangenome_info,
-    write_gene_sequences_from_pangenome_file,
+    read_gene_sequences_from_pangenome_file,
 )
 from ppanggolin.formats.writeSequences import (
-    write_gene_sequences_from_annotations,
-    translate_genes,
+    write_mmseqs_db,
+    translate_mmseqs_db,
     create_mmseqs_db,
 )
 
@@ -60,41 +59,42 @@ def check_pangenome_former_clustering(pangenome: Pangenome, force: bool = False)
 # Clustering functions
 def check_pangenome_for_clustering(
     pangenome: Pangenome,
-    sequences: Path,
+    tmpdir: Path,
     force: bool = False,
     disable_bar: bool = False,
-):
+) -> Path:
     """
-    Check the pangenome statuses and write the gene sequences in the provided tmpFile.
+    Check the pangenome statuses and write the gene sequences in a MMseqs2 database.
     (whether they are written in the .h5 file or currently in memory)
 
     :param pangenome: Annotated Pangenome
-    :param sequences: Path to write the sequences
+    :param tmpdir: Temporary directory to write the MMseqs2 database
     :param force: Force to write on existing pangenome information
     :param disable_bar: Allow to disable progress bar
+
+    :return: Path to the MMseqs2 nucleotide database
     """
     check_pangenome_former_clustering(pangenome, force)
+    # we append the gene ids by 'ppanggolin' to avoid crashes from mmseqs when sequence IDs are only numeric.
     if pangenome.status["geneSequences"] in ["Computed", "Loaded"]:
         logging.getLogger("PPanGGOLiN").debug(
             "Write sequences from annotation loaded in pangenome"
         )
-        # we append the gene ids by 'ppanggolin' to avoid crashes from mmseqs when sequence IDs are only numeric.
-        write_gene_sequences_from_annotations(
-            pangenome.genes,
-            sequences,
-            add="ppanggolin_",
-            compress=False,
-            disable_bar=disable_bar,
+        sequences = (
+            (f"ppanggolin_{gene.ID}", gene.dna)
+            for gene in tqdm(
+                pangenome.genes,
+                total=pangenome.number_of_genes,
+                unit="gene",
+                disable=disable_bar,
+            )
+            if gene.type == "CDS"
         )
     elif pangenome.status["geneSequences"] == "inFile":
         logging.getLogger("PPanGGOLiN").debug("Write sequences from pangenome file")
-        write_gene_sequences_from_pangenome_file(
-            pangenome.file,
-            sequences,
-            add="ppanggolin_",
-            compress=False,
-            disable_bar=disable_bar,
-        )  # write CDS sequences to the tmpFile
+        sequences = read_gene_sequences_from_pangenome_file(
+            pangenome.file, add="ppanggolin_", disable_bar=disable_bar
+        )
     else:
         raise Exception(
             "The pangenome does not include gene sequences, thus it is impossible to cluster "
@@ -102,10 +102,11 @@ def check_pangenome_for_clustering(
             "or provide a way to access the gene sequence during the annotation step "
             "(having the fasta in the gff files, or providing the fasta files through the --fasta option)"
         )
+    return write_mmseqs_db(sequences, "nucleotides_db", tmpdir, db_type=2)
 
 
 def first_clustering(
-    sequences: Path,
+    seq_nucdb: Path,
     tmpdir: Path,
     cpu: int = 1,
     code: int = 11,
@@ -116,7 +117,7 @@ def first_clustering(
     """
     Make a first clustering of all sequences in pangenome
 
-    :param sequences: Sequence from pangenome
+    :param seq_nucdb: MMseqs2 database of the pangenome nucleotide sequences
     :param tmpdir: Temporary directory
     :param cpu: number of CPU cores to use
     :param code: Genetic code used
@@ -127,13 +128,7 @@ def first_clustering(
     :return: path to representative sequence file and path to tsv clustering result
     """
 
-    seqdb = translate_genes(
-        sequences=sequences,
-        tmpdir=tmpdir,
-        cpu=cpu,
-        is_single_line_fasta=True,
-        code=code,
-    )
+    seqdb = translate_mmseqs_db(seq_nucdb, tmpdir, cpu, code)
     logging.getLogger("PPanGGOLiN").info("Clustering sequences...")
     cludb = tmpdir / "cluster_db"
     cmd = list(
@@ -316,60 +311,123 @@ def read_tsv(
     return genes2fam, fam2genes
 
 
+def read_rep_alignment(aln_file: Path) -> pd.DataFrame:
+    """
+    Read the alignment of the family representatives
+
+    :param aln_file: Representative alignment result, with query, target, qlen, tlen and bits columns
+
+    :return: Alignments between two different representatives
+    """
+    aln_df = pd.read_csv(
+        aln_file,
+        sep="\t",
+        header=None,
+        names=["query", "target", "qlen", "tlen", "score"],
+        dtype={
+            "query": str,
+            "target": str,
+            "qlen": np.int64,
+            "tlen": np.int64,
+            "score": np.float64,
+        },
+    )
+    for column in ["query", "target"]:
+        # remove the '"' char which protects the fields, and the eventual addition
+        aln_df[column] = (
+            aln_df[column]
+            .str.replace('"', "", regex=False)
+            .str.replace("ppanggolin_", "", regex=False)
+        )
+    return aln_df[aln_df["query"] != aln_df["target"]]
+
+
 def refine_clustering(
     tsv: Path, aln_file: Path, fam_to_seq: dict
 ) -> Tuple[Dict[str, Tuple[str, bool]], Dict[str, str]]:
     """
     Refine clustering by removing fragment
 
+    Each family is merged into the aligned family with the best score among those with a longer representative
+    and at least as many genes. Families are processed in the order of their names, and a family merged into
+    a family that was already merged follows it to its new family.
+
     :param tsv: First clusterin result
     :param aln_file: Reprensentative alignment result
     :param fam_to_seq: Dictionary which link families to sequence
 
     :return: Two dictionary which link genes and families
     """
-    simgraph = Graph()
     genes2fam, fam2genes = read_tsv(tsv)
     logging.getLogger("PPanGGOLiN").info(f"Starting with {len(fam_to_seq)} families")
-    # create the nodes
-    for fam, genes in fam2genes.items():
-        simgraph.add_node(fam, nbgenes=len(genes))
-
-    # add the edges
-    with open(aln_file) as alnfile:
-        for line in alnfile:
-            line = (
-                line.replace('"', "").replace("ppanggolin_", "").split()
-            )  # remove the eventual addition
-
-            if line[0] != line[1]:
-                simgraph.add_edge(line[0], line[1], score=float(line[4]))
-                simgraph.nodes[line[0]]["length"] = int(line[2])
-                simgraph.nodes[line[1]]["length"] = int(line[3])
-
-    for node, nodedata in sorted(simgraph.nodes(data=True)):
-        choice = (None, 0, 0, 0)
-        for neighbor in sorted(simgraph.neighbors(node)):
-            nei = simgraph.nodes[neighbor]
-            score = simgraph[neighbor][node]["score"]
-            if (
-                nei["length"] > nodedata["length"]
-                and nei["nbgenes"] >= nodedata["nbgenes"]
-                and choice[3] < score
-            ):
-                choice = (genes2fam[neighbor][0], nei["length"], nei["nbgenes"], score)
-                # `genes2fam[neighbor]` instead of just neighbor in case that family has been assigned already
-                # (this is for smaller fragments that are closer to other fragments than the actual gene family)
-
-        if choice[0] is not None:
-            genestochange = fam2genes[node]
-            for gene in genestochange:
-                genes2fam[gene] = (str(choice[0]), True)
-                fam2genes[choice[0]].add(gene)
-            del fam2genes[node]
+    fam_names = sorted(fam2genes)
+    fam_index = pd.Index(fam_names)
+    nb_genes = np.array([len(fam2genes[fam]) for fam in fam_names], dtype=np.int64)
+
+    aln_df = read_rep_alignment(aln_file)
+    query = fam_index.get_indexer(aln_df["query"])
+    target = fam_index.get_indexer(aln_df["target"])
+    if (query < 0).any() or (target < 0).any():
+        raise KeyError(
+            f"Representatives of the alignment file {aln_file} are not found in the clustering file {tsv}."
+        )
+
+    # the length of a family is the last one given for its representative
+    nodes = np.column_stack((query, target)).ravel()[::-1]
+    lengths = np.column_stack((aln_df["qlen"], aln_df["tlen"])).ravel()[::-1]
+    fam_length = np.zeros(len(fam_names), dtype=np.int64)
+    uniq_nodes, last_idx = np.unique(nodes, return_index=True)
+    fam_length[uniq_nodes] = lengths[last_idx]
+
+    # alignments are undirected, the score of a pair of families is the last one given
+    low, high = np.minimum(query, target), np.maximum(query, target)
+    _, last_idx = np.unique((low * len(fam_names) + high)[::-1], return_index=True)
+    last_idx = len(low) - 1 - last_idx
+    low, high = low[last_idx], high[last_idx]
+    score = aln_df["score"].to_numpy()[last_idx]
+    node = np.concatenate((low, high))
+    neighbor = np.concatenate((high, low))
+    score = np.concatenate((score, score))
+
+    candidates = (
+        (fam_length[neighbor] > fam_length[node])
+        & (nb_genes[neighbor] >= nb_genes[node])
+        & (score > 0)
+    )
+    node, neighbor, score = node[candidates], neighbor[candidates], score[candidates]
+    # best score first, ties are resolved with the first neighbor in name order
+    order = np.lexsort((neighbor, -score, node))
+    uniq_nodes, first_idx = np.unique(node[order], return_index=True)
+    choice = np.full(len(fam_names), -1, dtype=np.int64)
+    choice[uniq_nodes] = neighbor[order][first_idx]
+
+    # a family chosen as destination may already have been merged into another one
+    destination = np.arange(len(fam_names), dtype=np.int64)
+    is_merged = choice >= 0
+    for fam in uniq_nodes.tolist():
+        dest = int(choice[fam])
+        while dest < fam and is_merged[dest]:
+            dest = int(destination[dest])
+        destination[fam] = dest
+    # and the destination may be merged afterward
+    while True:
+        next_destination = destination[destination]
+        if np.array_equal(next_destination, destination):
+            break
+        destination = next_destination
+
+    merged_fams = set()
+    for fam in uniq_nodes.tolist():
+        fam_name = fam_names[fam]
+        new_fam = fam_names[destination[fam]]
+        for gene in fam2genes[fam_name]:
+            genes2fam[gene] = (new_fam, True)
+        merged_fams.add(fam_name)
+
     new_fam_to_seq = {}
     for fam in fam2genes:
-        new_fam_to_seq[fam] = fam_to_seq[fam]
+        if fam not in merged_fams:
+            new_fam_to_seq[fam] = fam_to_seq[fam]
     logging.getLogger("PPanGGOLiN").info(
         f"Ending with {len(new_fam_to_seq)} gene families"
     )
@@ -472,13 +530,12 @@ def clustering(
     date = time.strftime("_%Y-%m-%d_%H-%M-%S", time.localtime())
     dir_name = f"clustering_tmpdir_{date}_PID{os.getpid()}"
     with create_tmpdir(tmpdir, basename=dir_name, keep_tmp=keep_tmp_files) as tmp_path:
-        sequence_path = tmp_path / "nucleotide_sequences.fna"
-        check_pangenome_for_clustering(
-            pangenome, sequence_path, force, disable_bar=disable_bar
+        seq_nucdb = check_pangenome_for_clustering(
+            pangenome, tmp_path, force, disable_bar=disable_bar
         )
         logging.getLogger("PPanGGOLiN").info("Clustering all of the genes sequences...")
         rep, tsv = first_clustering(
-            sequence_path, tmp_path, cpu, code, coverage, identity, mode
+            seq_nucdb, tmp_path, cpu, code, coverage, identity, mode
         )
 
         fam2seq = read_faa(rep)
@@ -582,28 +639,24 @@ def get_family_representative_sequences(
     tmpdir = Path(tempfile.gettempdir()) if tmpdir is None else tmpdir
     with create_tmpdir(tmpdir, "get_proteins_sequences", keep_tmp) as tmp:
 
-        repres_path = tmp / "representative.fna.gz"
-
-        with gzip.open(repres_path, mode="wt") as repres_seq:
-
-            for family in pangenome.gene_families:
-
-                if family.representative.dna is None:
-                    raise ValueError(
-                        f"DNA sequence of representative gene {family.representative} is None. "
-                        "Sequence may not have been loaded correctly from the pangenome file or the pangenome has no gene sequences."
-                    )
-
-                repres_seq.write(f">{family.name}\n")
-                repres_seq.write(f"{family.representative.dna}\n")
+        for family in pangenome.gene_families:
+            if family.representative.dna is None:
+                raise ValueError(
+                    f"DNA sequence of representative gene {family.representative} is None. "
+                    "Sequence may not have been loaded correctly from the pangenome file or the pangenome has no gene sequences."
+                )
 
-        translate_db = translate_genes(
-            sequences=repres_path,
-            tmpdir=tmp,
-            cpu=cpu,
-            is_single_line_fasta=True,
-            code=code,
+        check_tools_availability(["mmseqs"])
+        repres_db = write_mmseqs_db(
+            (
+                (family.name, family.representative.dna)
+                for family in pangenome.gene_families
+            ),
+            "representative_db",
+            tmp,
+            db_type=2,
         )
+        translate_db = translate_mmseqs_db(repres_db, tmp, cpu, code)
 
         outpath = tmp / "representative_protein_genes.fna"
         cmd = list(map(str, ["mmseqs", "convert2fasta", translate_db, outpath]))
@@ -705,6 +758,73 @@ def read_clustering_file(families_tsv_path: Path) -> Tuple[pd.DataFrame, bool]:
     )
 
 
+def add_clustering_to_pangenome(
+    pangenome: Pangenome, families_df: pd.DataFrame, disable_bar: bool = False
+) -> int:
+    """
+    Create the gene families of a clustering table and add their genes to them.
+
+    Genes are retrieved with their ID, or their local identifier, for all rows at once,
+    and the genes of each family are then added together.
+
+    :param pangenome: Annotated pangenome
+    :param families_df: Clustering table with family, representative, gene and is_frag columns
+    :param disable_bar: Allow to disable progress bar
+
+    :raises KeyError: If a gene or a representative of the clustering table is not in the pangenome
+
+    :return: Number of genes associated to a gene family
+    """
+    # local identifiers are only used for genes not found with their ID
+    id_to_gene = mk_local_to_gene(pangenome)
+    id_to_gene.update((gene.ID, gene) for gene in pangenome.genes)
+
+    genes = families_df["gene"].map(id_to_gene)
+    if genes.isna().any():
+        row = families_df[genes.isna()].iloc[0]
+        raise KeyError(
+            f"The gene {row['gene']} associated to family {row['family']} from the clustering file is not found in pangenome."
+        )
+
+    # family codes follow the order in which families first appear in the table
+    family_codes, family_names = pd.factorize(families_df["family"])
+    first_rows = families_df.drop_duplicates("family")
+    representatives = first_rows["representative"].map(id_to_gene)
+
+    order = np.argsort(family_codes, kind="stable")
+    genes_array = genes.to_numpy()[order]
+    is_frag_array = families_df["is_frag"].to_numpy().astype(bool)[order]
+    bounds = np.searchsorted(
+        family_codes[order], np.arange(len(family_names) + 1), side="left"
+    )
+
+    for code, (fam_id, reprez_id, representative_gene) in tqdm(
+        enumerate(zip(family_names, first_rows["representative"], representatives)),
+        total=len(family_names),
+        unit="gene family",
+        disable=disable_bar,
+    ):
+        try:
+            fam = pangenome.get_gene_family(fam_id)
+        except KeyError:  # Family not found so create and add
+            fam = GeneFamily(pangenome.max_fam_id, fam_id)
+            if pd.isna(representative_gene):
+                raise KeyError(
+                    f"The gene {reprez_id} associated to family {fam_id} from the clustering file is not found in pangenome."
+                )
+            fam.representative = representative_gene
+            pangenome.add_gene_family(fam)
+
+        for gene, is_frag in zip(
+            genes_array[bounds[code] : bounds[code + 1]],
+            is_frag_array[bounds[code] : bounds[code + 1]],
+        ):
+            gene.is_fragment = bool(is_frag)
+            fam.add(gene)
+
+    return len(families_df)
+
+
 def read_clustering(
     pangenome: Pangenome,
     families_tsv_path: Path,
@@ -746,55 +866,9 @@ def read_clustering(
 
     families_df, frag = read_clustering_file(families_tsv_path)
 
-    nb_gene_with_fam = 0
-    local_dict = mk_local_to_gene(pangenome)
-
-    def get_gene_obj(identifier):
-        try:
-            gene_obj = pangenome.get_gene(identifier)
-        except KeyError:
-            gene_obj = local_dict.get(identifier)
-        return gene_obj
-
-    for _, row in tqdm(
-        families_df.iterrows(),
-        total=families_df.shape[0],
-        unit="line",
-        disable=disable_bar,
-    ):
-
-        fam_id, reprez_id, gene_id, is_frag = (
-            str(row["family"]),
-            str(row["representative"]),
-            str(row["gene"]),
-            bool(row["is_frag"]),
-        )
-
-        gene = get_gene_obj(gene_id)
-
-        if gene is not None:
-            nb_gene_with_fam += 1
-
-            try:
-                fam = pangenome.get_gene_family(fam_id)
-
-            except KeyError:  # Family not found so create and add
-                fam = GeneFamily(pangenome.max_fam_id, fam_id)
-                representative_gene = get_gene_obj(reprez_id)
-                if representative_gene is None:
-                    raise KeyError(
-                        f"The gene {reprez_id} associated to family {fam_id} from the clustering file is not found in pangenome."
-                    )
-
-                fam.representative = representative_gene
-
-                pangenome.add_gene_family(fam)
-            gene.is_fragment = is_frag
-            fam.add(gene)
-        else:
-            raise KeyError(
-                f"The gene {gene_id} associated to family {fam_id} from the clustering file is not found in pangenome."
-            )
+    nb_gene_with_fam = add_clustering_to_pangenome(
+        pangenome, families_df, disable_bar=disable_bar
+    )
 
     if (
         nb_gene_with_fam < pangenome.number_of_genes
@@ -6,7 +6,20 @@ import tempfile
 import time
 import logging
 import os
-from typing import Any, List, Dict, Tuple, Iterable, Hashable, Iterator, Set, FrozenSet
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+from typing import (
+    Any,
+    List,
+    Dict,
+    Tuple,
+    Iterable,
+    Hashable,
+    Iterator,
+    Sequence,
+    Set,
+    FrozenSet,
+)
 from itertools import chain
 from collections import defaultdict
 from pathlib import Path
@@ -14,6 +27,7 @@ from pathlib import Path
 # installed libraries
 from tqdm import tqdm
 import networkx as nx
+import numpy as np
 import pandas as pd
 
 # local libraries
@@ -74,6 +88,8 @@ def align_sequences_to_families(
     translation_table: int = 11,
     tmpdir: Path = None,
     keep_tmp: bool = False,
+    target_db_cache: Path = None,
+    index_target_db: bool = False,
     disable_bar=True,
 ) -> Tuple[Set[GeneFamily], Dict[GeneFamily, Set[str]]]:
     """Align sequences to pangenome gene families to get families of interest
@@ -90,6 +106,8 @@ def align_sequences_to_families(
     :param disable_bar: Allow preventing bar progress print
     :param translation_table: The translation table to use when the input sequences are nucleotide sequences.
     :param keep_tmp: If True, keep temporary files.
+    :param target_db_cache: Directory where the database of pangenome sequences is cached, to be reused by later runs.
+    :param index_target_db: If True, precompute the index of the cached database of pangenome sequences.
 
     :return: Set of gene families of interest and dict which link gene families to sequence ID
     """
@@ -124,6 +142,8 @@ def align_sequences_to_families(
                     identity=identity,
                     coverage=coverage,
                     translation_table=translation_table,
+                    target_db_cache=target_db_cache,
+                    index_target_db=index_target_db,
                     disable_bar=disable_bar,
                 )
             else:
@@ -139,6 +159,8 @@ def align_sequences_to_families(
                     identity=identity,
                     coverage=coverage,
                     translation_table=translation_table,
+                    target_db_cache=target_db_cache,
+                    index_target_db=index_target_db,
                     disable_bar=disable_bar,
                 )
 
@@ -163,6 +185,7 @@ def search_gene_context_in_pangenome(
     jaccard_threshold: float = 0.85,
     window_size: int = 1,
     graph_format: str = "graphml",
+    cpu: int = 1,
     disable_bar=True,
     **kwargs,
 ):
@@ -177,6 +200,7 @@ def search_gene_context_in_pangenome(
     :param jaccard_threshold: Jaccard index threshold to filter edges in graph
     :param window_size: Number of genes to consider in the gene context.
     :param graph_format: Write format of the context graph. Can be graphml or gexf
+    :param cpu: Number of core used to align sequences and to search contexts in contigs
     :param disable_bar: Allow preventing bar progress print
     """
     # check statuses and load info
@@ -192,7 +216,12 @@ def search_gene_context_in_pangenome(
     family_2_input_seqid = {}
     if sequence_file is not None:
         fams_of_interest, family_2_input_seqid = align_sequences_to_families(
-            pangenome, output, sequence_file, disable_bar=disable_bar, **kwargs
+            pangenome,
+            output,
+            sequence_file,
+            cpu=cpu,
+            disable_bar=disable_bar,
+            **kwargs,
         )
         families_of_interest |= fams_of_interest
     if families is not None:
@@ -205,14 +234,72 @@ def search_gene_context_in_pangenome(
 
     logging.getLogger("PPanGGOLiN").info("Building the graph...")
 
+    gene_context_graph, out_graph_file, gene_contexts = search_gene_context(
+        families_of_interest,
+        family_2_input_seqid,
+        output,
+        transitive=transitive,
+        jaccard_threshold=jaccard_threshold,
+        window_size=window_size,
+        graph_format=graph_format,
+        cpu=cpu,
+        disable_bar=disable_bar,
+    )
+
+    if len(gene_contexts) != 0:
+        logging.getLogger("PPanGGOLiN").info(
+            f"There are {sum(len(gc) for gc in gene_contexts)} families among {len(gene_contexts)} gene contexts"
+        )
+    else:
+        logging.getLogger("PPanGGOLiN").info("No gene contexts were found")
+
+    logging.getLogger("PPanGGOLiN").info(
+        f"Computing gene contexts took {round(time.time() - start_time, 2)} seconds"
+    )
+
+    return gene_context_graph, out_graph_file
+
+
+def search_gene_context(
+    families_of_interest: Set[GeneFamily],
+    family_2_input_seqid: Dict[GeneFamily, Set[str]],
+    output: Path,
+    transitive: int = 4,
+    jaccard_threshold: float = 0.85,
+    window_size: int = 1,
+    graph_format: str = "graphml",
+    cpu: int = 1,
+    contig_to_families: Dict[Contig, np.ndarray] = None,
+    disable_bar=True,
+) -> Tuple[nx.Graph, Path, Set[GeneContext]]:
+    """
+    Search the gene contexts of a set of families of interest and write them in the output directory
+
+    :param families_of_interest: Families at the origin of the contexts
+    :param family_2_input_seqid: Dictionary which links gene families to the input sequences aligned on them
+    :param output: Path to output directory
+    :param transitive: number of genes to check on both sides of a family aligned with an input sequence
+    :param jaccard_threshold: Jaccard index threshold to filter edges in graph
+    :param window_size: Number of genes to consider in the gene context.
+    :param graph_format: Write format of the context graph. Can be graphml or gexf
+    :param cpu: Number of core used to search contexts in contigs
+    :param contig_to_families: Family IDs of the genes of contigs, shared between searches
+    :param disable_bar: Allow preventing bar progress print
+
+    :return: The writable context graph, the file where it is written and the gene contexts found
+    """
+    start_time = time.time()
+
     gene_context_graph, _ = compute_gene_context_graph(
         families=families_of_interest,
         transitive=transitive,
         window_size=window_size,
+        cpu=cpu,
+        contig_to_families=contig_to_families,
         disable_bar=disable_bar,
     )
 
-    logging.getLogger("PPanGGOLiN").info(
+    logging.getLogger("PPanGGOLiN").debug(
         f"Took {round(time.time() - start_time, 2)} "
         f"seconds to build the graph to find common gene contexts"
     )
@@ -244,23 +331,264 @@ def search_gene_context_in_pangenome(
     out_graph_file = write_graph(gene_context_graph, output, graph_format)
 
     if len(gene_contexts) != 0:
-        logging.getLogger("PPanGGOLiN").info(
-            f"There are {sum(len(gc) for gc in gene_contexts)} families among {len(gene_contexts)} gene contexts"
-        )
-
         output_file = output / "gene_contexts.tsv"
         export_context_to_dataframe(
             gene_contexts, family_2_input_seqid, families_of_interest, output_file
         )
 
+    return gene_context_graph, out_graph_file, gene_contexts
+
+
+def read_query_groups(groups_file: Path) -> Dict[str, List[str]]:
+    """
+    Read the table of query groups
+
+    Each line gives the name of a group and one of its queries, separated by a tab.
+    Empty lines and lines starting with '#' are ignored.
+
+    :param groups_file: Path to the tab-separated file of query groups
+
+    :return: Dictionary which links each group name to its queries, in the order of the file
+
+    :raises ValueError: A line does not have a group name and a query, or its group name is not a valid directory name
+    """
+    groups = defaultdict(list)
+    with read_compressed_or_not(groups_file) as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.rstrip("\n")
+            if line == "" or line.startswith("#"):
+                continue
+            fields = line.split("\t")
+            if len(fields) < 2 or fields[0] == "" or fields[1] == "":
+                raise ValueError(
+                    f"Line {line_number} of {groups_file} does not have a group name and a query "
+                    f"separated by a tab: '{line}'"
+                )
+            if "/" in fields[0] or os.sep in fields[0] or fields[0] in {".", ".."}:
+                raise ValueError(
+                    f"Line {line_number} of {groups_file} has a group name that cannot be used as a directory "
+                    f"name in the output directory: '{fields[0]}'"
+                )
+            groups[fields[0]].append(fields[1])
+    return dict(groups)
+
+
+def init_group_context_worker(
+    groups_data: List[Tuple[str, Set[GeneFamily], Dict[GeneFamily, Set[str]]]],
+    contig_to_families: Dict[Contig, np.ndarray],
+    output: Path,
+    search_args: Dict[str, Any],
+):
+    """
+    Store the data shared by all query groups in the worker process
+
+    :param groups_data: Name, families of interest and aligned sequences of each group
+    :param contig_to_families: Family IDs of the genes of contigs
+    :param output: Path to output directory
+    :param search_args: Arguments given to :func:`search_gene_context`
+    """
+    global group_context_worker_data
+    group_context_worker_data = (groups_data, contig_to_families, output, search_args)
+
+
+def search_group_context_in_worker(group_index: int) -> Tuple[str, int, int]:
+    """
+    Search the gene contexts of a group with the data stored by :func:`init_group_context_worker`
+
+    :param group_index: Index of the group
+
+    :return: The name of the group, its number of families of interest and the number of gene contexts found
+    """
+    groups_data, contig_to_families, output, search_args = group_context_worker_data
+    return search_group_context(
+        *groups_data[group_index], output, contig_to_families, **search_args
+    )
+
+
+def search_group_context(
+    group: str,
+    families_of_interest: Set[GeneFamily],
+    family_2_input_seqid: Dict[GeneFamily, Set[str]],
+    output: Path,
+    contig_to_families: Dict[Contig, np.ndarray],
+    **search_args,
+) -> Tuple[str, int, int]:
+    """
+    Search the gene contexts of a query group and write them in the subdirectory of the group
+
+    :param group: Name of the group
+    :param families_of_interest: Families of interest of the group
+    :param family_2_input_seqid: Dictionary which links gene families to the input sequences of the group
+    :param output: Path to output directory
+    :param contig_to_families: Family IDs of the genes of contigs
+    :param search_args: Arguments given to :func:`search_gene_context`
+
+    :return: The name of the group, its number of families of interest and the number of gene contexts found
+    """
+    group_output = output / group
+    group_output.mkdir(exist_ok=True)
+    _, _, gene_contexts = search_gene_context(
+        families_of_interest,
+        family_2_input_seqid,
+        group_output,
+        contig_to_families=contig_to_families,
+        **search_args,
+    )
+    return group, len(families_of_interest), len(gene_contexts)
+
+
+def search_gene_contexts_of_groups(
+    pangenome: Pangenome,
+    output: Path,
+    groups_file: Path,
+    sequence_file: Path = None,
+    transitive: int = 4,
+    jaccard_threshold: float = 0.85,
+    window_size: int = 1,
+    graph_format: str = "graphml",
+    cpu: int = 1,
+    disable_bar=True,
+    **kwargs,
+) -> Path:
+    """
+    Search the gene contexts of many independent groups of queries with a single load of the pangenome
+
+    Input sequences are aligned all at once. The family IDs of the genes of the contigs are computed once
+    and shared by all the groups, which are searched in parallel. The results of each group are written in
+    a subdirectory named after the group.
+
+    :param pangenome: Pangenome containing GeneFamilies to align with sequence set
+    :param output: Path to output directory
+    :param groups_file: Path to the tab-separated file with a group name and a query per line.
+                        Queries are sequence IDs if a sequence file is given, family names otherwise.
+    :param sequence_file: Path to file containing the sequences
+    :param transitive: number of genes to check on both sides of a family aligned with an input sequence
+    :param jaccard_threshold: Jaccard index threshold to filter edges in graph
+    :param window_size: Number of genes to consider in the gene context.
+    :param graph_format: Write format of the context graph. Can be graphml or gexf
+    :param cpu: Number of core used to align sequences and to search the contexts of groups
+    :param disable_bar: Allow preventing bar progress print
+
+    :return: Path to the summary file of the groups
+    """
+    check_pangenome_for_context_search(
+        pangenome, sequences=True if sequence_file is not None else False
+    )
+    check_pangenome_info(
+        pangenome, need_annotations=True, need_families=True, disable_bar=disable_bar
+    )
+
+    groups = read_query_groups(groups_file)
+    logging.getLogger("PPanGGOLiN").info(
+        f"Searching the gene contexts of {len(groups)} query groups"
+    )
+
+    seqid_2_family = {}
+    if sequence_file is not None:
+        _, family_2_input_seqid = align_sequences_to_families(
+            pangenome,
+            output,
+            sequence_file,
+            cpu=cpu,
+            disable_bar=disable_bar,
+            **kwargs,
+        )
+        seqid_2_family = {
+            seqid: family
+            for family, seqids in family_2_input_seqid.items()
+            for seqid in seqids
+        }
+
+    groups_data = []
+    for group, queries in groups.items():
+        if sequence_file is not None:
+            group_family_2_input_seqid = defaultdict(set)
+            for seqid in queries:
+                if seqid in seqid_2_family:
+                    group_family_2_input_seqid[seqid_2_family[seqid]].add(seqid)
+            families_of_interest = set(group_family_2_input_seqid)
+        else:
+            group_family_2_input_seqid = {}
+            families_of_interest = set()
+            unknown_families = []
+            for fam_name in queries:
+                try:
+                    families_of_interest.add(pangenome.get_gene_family(fam_name))
+                except KeyError:
+                    unknown_families.append(fam_name)
+            if unknown_families:
+                logging.getLogger("PPanGGOLiN").warning(
+                    f"{len(unknown_families)} queries of group {group} are not families of the pangenome: "
+                    f"{', '.join(unknown_families)}"
+                )
+
+        if len(families_of_interest) == 0:
+            logging.getLogger("PPanGGOLiN").warning(
+                f"No pangenome family matches the queries of group {group}. Its gene contexts are not searched."
+            )
+            continue
+        groups_data.append((group, families_of_interest, group_family_2_input_seqid))
+
+    # family IDs of the genes of the contigs are computed once for all the groups
+    contig_to_families = {
+        contig: np.array(
+            [gene.family.ID for gene in contig.get_genes()], dtype=np.int64
+        )
+        for contig in get_contig_to_genes(
+            chain.from_iterable(families for _, families, _ in groups_data)
+        )
+    }
+
+    search_args = {
+        "transitive": transitive,
+        "jaccard_threshold": jaccard_threshold,
+        "window_size": window_size,
+        "graph_format": graph_format,
+    }
+
+    start_time = time.time()
+    if cpu > 1 and len(groups_data) > 1:
+        with ProcessPoolExecutor(
+            max_workers=cpu,
+            mp_context=get_context("fork"),
+            initializer=init_group_context_worker,
+            initargs=(groups_data, contig_to_families, output, search_args),
+        ) as executor:
+            futures = [
+                executor.submit(search_group_context_in_worker, group_index)
+                for group_index in range(len(groups_data))
+            ]
+            results = [
+                future.result()
+                for future in tqdm(
+                    as_completed(futures),
+                    total=len(futures),
+                    unit="group",
+                    disable=disable_bar,
+                )
+            ]
     else:
-        logging.getLogger("PPanGGOLiN").info("No gene contexts were found")
+        results = [
+            search_group_context(*group_data, output, contig_to_families, **search_args)
+            for group_data in tqdm(groups_data, unit="group", disable=disable_bar)
+        ]
 
     logging.getLogger("PPanGGOLiN").info(
-        f"Computing gene contexts took {round(time.time() - start_time, 2)} seconds"
+        f"Computing gene contexts of {len(results)} query groups took {round(time.time() - start_time, 2)} seconds"
     )
 
-    return gene_context_graph, out_graph_file
+    group_order = {group: i for i, group in enumerate(groups)}
+    summary = pd.DataFrame(
+        sorted(results, key=lambda result: group_order[result[0]]),
+        columns=["Group", "Nb_families_of_interest", "Nb_gene_contexts"],
+    )
+    summary_file = output / "query_groups_summary.tsv"
+    summary.to_csv(summary_file, sep="\t", index=False)
+    logging.getLogger("PPanGGOLiN").info(
+        f"Number of gene contexts of each query group are listed in: '{summary_file}'"
+    )
+
+    return summary_file
 
 
 def get_gene_contexts(
@@ -454,6 +782,236 @@ def compute_edge_metrics(
         # data[f'f2_jaccard_gene_partial'] = f2_gene_proportion_partial
 
 
+def get_contig_gene_pairs(
+    contig_families: Sequence[Hashable],
+    contig_windows: List[Tuple[int, int]],
+    transitivity: int,
+    is_circular: bool = False,
+) -> np.ndarray:
+    """
+    Get the pairs of genes of a contig that are linked in the context graph.
+
+    The next genes of all the genes of the windows are computed at once with index arithmetic.
+    A next gene is ignored, along with all the following ones, when it is outside the windows.
+    It is also ignored when it has the same family as the gene, as the two genes refer to the same node.
+
+    :param contig_families: The family of each gene of the contig, ordered by gene position.
+    :param contig_windows: A list of tuples representing the start and end positions of contig windows.
+    :param transitivity: The number of next genes to consider when adding edges.
+    :param is_circular: Flag indicating whether the contig is circular.
+
+    :return: Array with the position of the two genes of each pair and the number of genes found in-between them
+    """
+    contig_families = np.asarray(contig_families)
+    contig_size = len(contig_families)
+
+    in_window = np.zeros(contig_size, dtype=bool)
+    gene_indexes = []
+    for window_start, window_end in contig_windows:
+        in_window[window_start : window_end + 1] = True
+        gene_indexes.append(np.arange(window_start, window_end + 1))
+    if not gene_indexes:
+        return np.empty((0, 3), dtype=np.int64)
+    gene_indexes = np.concatenate(gene_indexes)
+
+    offsets = np.arange(1, transitivity + 2)
+    next_gene_indexes = gene_indexes[:, None] + offsets[None, :]
+    if is_circular:
+        is_next_gene = np.broadcast_to(offsets < contig_size, next_gene_indexes.shape)
+        next_gene_indexes %= contig_size
+    else:
+        is_next_gene = next_gene_indexes < contig_size
+        next_gene_indexes[~is_next_gene] = 0
+
+    # genes following a next gene outside the windows are ignored
+    is_linked = np.logical_and.accumulate(
+        is_next_gene & in_window[next_gene_indexes], axis=1
+    )
+    is_linked &= (
+        contig_families[gene_indexes][:, None] != contig_families[next_gene_indexes]
+    )
+
+    rows, columns = np.nonzero(is_linked)
+    return np.column_stack(
+        (gene_indexes[rows], next_gene_indexes[rows, columns], columns)
+    ).astype(np.int64)
+
+
+def add_gene_pairs_to_context_graph(
+    context_graph: nx.Graph,
+    contig_genes: List[Gene],
+    gene_pairs: Iterable[Tuple[int, int, int]],
+    transitivity: int,
+):
+    """
+    Add the edges between pairs of genes of a contig to the context graph.
+
+    :param context_graph: The context graph to which edges will be added.
+    :param contig_genes: Genes of the contig ordered by position.
+    :param gene_pairs: Position of the two genes of each pair and the number of genes found in-between them.
+    :param transitivity: The number of next genes to consider when adding edges.
+    """
+    for gene_index, next_gene_index, i in gene_pairs:
+        gene = contig_genes[gene_index]
+        next_gene = contig_genes[next_gene_index]
+
+        context_graph.add_edge(gene.family, next_gene.family)
+
+        edge_dict = context_graph.get_edge_data(
+            gene.family, next_gene.family, default={}
+        )
+
+        if i == 0:
+            edge_dict["adjacent_family"] = True
+
+        # Store information of the transitivity used to link the two genes:
+        if "transitivity" not in edge_dict:
+            edge_dict["transitivity"] = {i: 0 for i in range(transitivity + 1)}
+        edge_dict["transitivity"][i] += 1
+
+        # Add node attributes
+        node_gene_dict = context_graph.nodes[gene.family]
+        next_gene_gene_dict = context_graph.nodes[next_gene.family]
+
+        increment_attribute_counter(node_gene_dict, "genes_count")
+        increment_attribute_counter(next_gene_gene_dict, "genes_count")
+
+        add_val_to_dict_attribute(node_gene_dict, "genes", gene)
+        add_val_to_dict_attribute(next_gene_gene_dict, "genes", next_gene)
+
+        # Add edge attributes
+        edge_dict = context_graph[gene.family][next_gene.family]
+        try:
+            genes_edge_dict = edge_dict["genes"]
+        except KeyError:
+            genes_edge_dict = {}
+            edge_dict["genes"] = genes_edge_dict
+
+        add_val_to_dict_attribute(genes_edge_dict, gene.family, gene)
+        add_val_to_dict_attribute(genes_edge_dict, next_gene.family, next_gene)
+
+        add_val_to_dict_attribute(edge_dict, "genomes", gene.organism)
+
+        increment_attribute_counter(edge_dict, "gene_pairs")
+
+        assert gene.organism == next_gene.organism, (
+            f"Gene of the same contig have a different genome. "
+            f"{gene.organism} and {next_gene.organism}"
+        )
+
+
+def build_context_graph(
+    contigs_genes: List[List[Gene]],
+    contigs_families: List[np.ndarray],
+    contigs_gene_pairs: List[np.ndarray],
+    transitivity: int,
+) -> nx.Graph:
+    """
+    Build the context graph from the gene pairs of all the contigs at once.
+
+    The gene pairs are grouped by edge with NumPy, then each node and edge of the graph is added once.
+    The graph and its attributes are the same as when the pairs are added one by one
+    with :func:`add_gene_pairs_to_context_graph`.
+
+    :param contigs_genes: Genes of each contig ordered by position.
+    :param contigs_families: The family ID of each gene of each contig.
+    :param contigs_gene_pairs: Position of the two genes of each pair of each contig
+                               and the number of genes found in-between them.
+    :param transitivity: The number of next genes to consider when adding edges.
+
+    :return: The context graph
+    """
+    context_graph = nx.Graph()
+
+    pairs_counts = [len(gene_pairs) for gene_pairs in contigs_gene_pairs]
+    if sum(pairs_counts) == 0:
+        return context_graph
+
+    genes = list(chain.from_iterable(contigs_genes))
+    families = np.concatenate(contigs_families).astype(np.int64)
+    gene_pairs = np.concatenate(contigs_gene_pairs)
+    genes_offsets = np.cumsum(
+        [0] + [len(contig_genes) for contig_genes in contigs_genes]
+    )
+    pairs_offsets = np.repeat(genes_offsets[:-1], pairs_counts)
+    pairs_contig = np.repeat(np.arange(len(contigs_genes)), pairs_counts)
+
+    gene_a = gene_pairs[:, 0] + pairs_offsets
+    gene_b = gene_pairs[:, 1] + pairs_offsets
+    in_between = gene_pairs[:, 2]
+    family_a = families[gene_a]
+    family_b = families[gene_b]
+
+    # number the edges in the order in which they are first found
+    edge_keys = np.minimum(family_a, family_b) * (families.max() + 1) + np.maximum(
+        family_a, family_b
+    )
+    _, first_pairs, pair_edges = np.unique(
+        edge_keys, return_index=True, return_inverse=True
+    )
+    edges_order = np.argsort(first_pairs)
+    edges_rank = np.empty_like(edges_order)
+    edges_rank[edges_order] = np.arange(len(edges_order))
+    pair_edges = edges_rank[pair_edges.ravel()]
+    first_pairs = first_pairs[edges_order]
+    edges_count = len(first_pairs)
+
+    gene_pairs_counts = np.bincount(pair_edges, minlength=edges_count).tolist()
+    transitivity_counts = (
+        np.bincount(
+            pair_edges * (transitivity + 1) + in_between,
+            minlength=edges_count * (transitivity + 1),
+        )
+        .reshape(edges_count, transitivity + 1)
+        .tolist()
+    )
+
+    # genomes of each edge
+    edges_genomes = [set() for _ in range(edges_count)]
+    _, edge_contig_pairs = np.unique(
+        pair_edges * len(contigs_genes) + pairs_contig, return_index=True
+    )
+    for edge, gene in zip(
+        pair_edges[edge_contig_pairs].tolist(), gene_a[edge_contig_pairs].tolist()
+    ):
+        edges_genomes[edge].add(genes[gene].organism)
+
+    # genes of each family of each edge
+    edges_genes = [{} for _ in range(edges_count)]
+    side_genes = np.concatenate((gene_a, gene_b))
+    side_edges = np.concatenate((pair_edges, pair_edges))
+    edge_genes = np.unique(side_edges * len(genes) + side_genes)
+    for edge, gene in zip(
+        (edge_genes // len(genes)).tolist(), (edge_genes % len(genes)).tolist()
+    ):
+        gene = genes[gene]
+        add_val_to_dict_attribute(edges_genes[edge], gene.family, gene)
+
+    for edge, pair in enumerate(first_pairs.tolist()):
+        edge_dict = {}
+        if transitivity_counts[edge][0] > 0:
+            edge_dict["adjacent_family"] = True
+        edge_dict["transitivity"] = dict(enumerate(transitivity_counts[edge]))
+        edge_dict["genes"] = edges_genes[edge]
+        edge_dict["genomes"] = edges_genomes[edge]
+        edge_dict["gene_pairs"] = gene_pairs_counts[edge]
+        context_graph.add_edge(
+            genes[gene_a[pair]].family, genes[gene_b[pair]].family, **edge_dict
+        )
+
+    # each gene is counted once per pair it belongs to
+    _, side_gene_counts = np.unique(side_genes, return_counts=True)
+    for gene, genes_count in zip(
+        np.unique(side_genes).tolist(), side_gene_counts.tolist()
+    ):
+        gene = genes[gene]
+        node_dict = context_graph.nodes[gene.family]
+        node_dict["genes_count"] = node_dict.get("genes_count", 0) + genes_count
+        add_val_to_dict_attribute(node_dict, "genes", gene)
+
+    return context_graph
+
+
 def add_edges_to_context_graph(
     context_graph: nx.Graph,
     contig: Contig,
@@ -470,80 +1028,104 @@ def add_edges_to_context_graph(
 
     :return: A context graph specific to the contig of interest with edges added
     """
-    contig_graph = nx.Graph()
     contig_genes = contig.get_genes()
-    for window_start, window_end in contig_windows:
-        for gene_index in range(window_start, window_end + 1):
-            gene = contig_genes[gene_index]
-            next_genes = get_n_next_genes_index(
-                gene_index,
-                next_genes_count=transitivity + 1,
-                contig_size=len(contig_genes),
-                is_circular=contig.is_circular,
-            )
-            next_genes = list(next_genes)
-
-            for i, next_gene_index in enumerate(next_genes):
-                # Check if the next gene is within the contig windows
-                if not any(
-                    lower <= next_gene_index <= upper for lower, upper in contig_windows
-                ):
-                    # next_gene_index is not in any range of genes in the context,
-                    # so it is ignored along with all following genes
-                    break
-
-                next_gene = contig_genes[next_gene_index]
-                if next_gene.family == gene.family:
-                    # If the next gene has the same family, the two genes refer to the same node,
-                    # so they are ignored
-                    continue
-
-                context_graph.add_edge(gene.family, next_gene.family)
-                contig_graph.add_edge(gene.family, next_gene.family)
-
-                edge_dict = context_graph.get_edge_data(
-                    gene.family, next_gene.family, default={}
-                )
+    gene_pairs = get_contig_gene_pairs(
+        [gene.family.ID for gene in contig_genes],
+        contig_windows,
+        transitivity,
+        is_circular=contig.is_circular,
+    ).tolist()
+    add_gene_pairs_to_context_graph(
+        context_graph, contig_genes, gene_pairs, transitivity
+    )
 
-                if i == 0:
-                    edge_dict["adjacent_family"] = True
+    contig_graph = nx.Graph()
+    contig_graph.add_edges_from(
+        (contig_genes[gene_index].family, contig_genes[next_gene_index].family)
+        for gene_index, next_gene_index, _ in gene_pairs
+    )
+    return contig_graph
 
-                # Store information of the transitivity used to link the two genes:
-                if "transitivity" not in edge_dict:
-                    edge_dict["transitivity"] = {i: 0 for i in range(transitivity + 1)}
-                edge_dict["transitivity"][i] += 1
 
-                # Add node attributes
-                node_gene_dict = context_graph.nodes[gene.family]
-                next_gene_gene_dict = context_graph.nodes[next_gene.family]
+def get_context_combinations(
+    edges: Iterable[Tuple[Hashable, Hashable]], families_of_interest: Set[Hashable]
+) -> List[FrozenSet[Hashable]]:
+    """
+    Get the combinations of families of interest found in the same context of a contig.
+
+    :param edges: Edges between the families of the contig.
+    :param families_of_interest: Families of interest of the contig.
+
+    :return: The families of interest of each connected component of the contig graph
+    """
+    contig_graph = nx.Graph()
+    contig_graph.add_edges_from(edges)
+    # If gene families are in the same connected component for the contig graph,
+    # they exist in the same context in at least one genome
+    return [
+        frozenset(cc & families_of_interest)
+        for cc in nx.connected_components(contig_graph)
+    ]
 
-                increment_attribute_counter(node_gene_dict, "genes_count")
-                increment_attribute_counter(next_gene_gene_dict, "genes_count")
 
-                add_val_to_dict_attribute(node_gene_dict, "genes", gene)
-                add_val_to_dict_attribute(next_gene_gene_dict, "genes", next_gene)
+def compute_contig_context(
+    contig_families: np.ndarray,
+    contig_windows: List[Tuple[int, int]],
+    transitivity: int,
+    is_circular: bool,
+    families_of_interest: Set[int],
+) -> Tuple[np.ndarray, List[FrozenSet[int]]]:
+    """
+    Compute the gene pairs and the combinations of families of interest of a contig as plain data.
 
-                # Add edge attributes
-                edge_dict = context_graph[gene.family][next_gene.family]
-                try:
-                    genes_edge_dict = edge_dict["genes"]
-                except KeyError:
-                    genes_edge_dict = {}
-                    edge_dict["genes"] = genes_edge_dict
+    :param contig_families: The family ID of each gene of the contig, ordered by gene position.
+    :param contig_windows: A list of tuples representing the start and end positions of contig windows.
+    :param transitivity: The number of next genes to consider when adding edges.
+    :param is_circular: Flag indicating whether the contig is circular.
+    :param families_of_interest: IDs of the families of interest found in the contig.
 
-                add_val_to_dict_attribute(genes_edge_dict, gene.family, gene)
-                add_val_to_dict_attribute(genes_edge_dict, next_gene.family, next_gene)
+    :return: The gene pairs of the contig and the combinations of families of interest found in the same context
+    """
+    gene_pairs = get_contig_gene_pairs(
+        contig_families, contig_windows, transitivity, is_circular
+    )
+    combinations = get_context_combinations(
+        contig_families[gene_pairs[:, :2]].tolist(), families_of_interest
+    )
+    return gene_pairs, combinations
 
-                add_val_to_dict_attribute(edge_dict, "genomes", gene.organism)
 
-                increment_attribute_counter(edge_dict, "gene_pairs")
+def init_context_worker(contigs_data: List[tuple], transitivity: int):
+    """
+    Store the data of the contigs in the worker process
 
-                assert gene.organism == next_gene.organism, (
-                    f"Gene of the same contig have a different genome. "
-                    f"{gene.organism} and {next_gene.organism}"
-                )
+    :param contigs_data: Family IDs, windows, circularity and families of interest of each contig
+    :param transitivity: The number of next genes to consider when adding edges.
+    """
+    global context_worker_data
+    context_worker_data = (contigs_data, transitivity)
 
-    return contig_graph
+
+def compute_contigs_context_in_worker(
+    start: int, stop: int
+) -> List[Tuple[np.ndarray, List[FrozenSet[int]]]]:
+    """
+    Compute the context of a block of contigs with the data stored by :func:`init_context_worker`
+
+    :param start: Index of the first contig of the block
+    :param stop: Index following the last contig of the block
+
+    :return: The gene pairs and the combinations of families of interest of each contig
+    """
+    contigs_data, transitivity = context_worker_data
+    return [
+        compute_contig_context(
+            contig_families, contig_windows, transitivity, is_circular, interest
+        )
+        for contig_families, contig_windows, is_circular, interest in contigs_data[
+            start:stop
+        ]
+    ]
 
 
 def add_val_to_dict_attribute(attr_dict: dict, attribute_key, attribute_value):
@@ -636,54 +1218,107 @@ def compute_gene_context_graph(
     families: Iterable[GeneFamily],
     transitive: int = 4,
     window_size: int = 0,
+    cpu: int = 1,
+    block_size: int = 100,
+    contig_to_families: Dict[Contig, np.ndarray] = None,
     disable_bar: bool = False,
 ) -> Tuple[nx.Graph, Dict[FrozenSet[GeneFamily], Set[Organism]]]:
     """
     Construct the graph of gene contexts between families of the pangenome.
 
+    The gene pairs and family combinations of each contig are computed as plain data, in parallel if several cpus
+    are given. The graph is then built from the gene pairs of all the contigs at once.
+
     :param families: An iterable of gene families.
     :param transitive: Size of the transitive closure used to build the graph.
     :param window_size: Size of the window for extracting gene contexts (default: 0).
+    :param cpu: Number of blocks of contigs processed in parallel (default: 1).
+    :param block_size: Number of contigs processed at once by a worker (default: 100).
+    :param contig_to_families: Family IDs of the genes of contigs, completed with the contigs that are missing.
+                               It allows to share them between several calls.
     :param disable_bar: Flag to disable the progress bar (default: False).
 
     :return: The constructed gene context graph and the combination of gene families corresponding to the context that exist in at least one genome
     """
-    context_graph = nx.Graph()
-
     contig_to_genes_of_interest = get_contig_to_genes(families)
 
-    combs2orgs = defaultdict(set)
-    for contig, genes_of_interest in tqdm(
-        contig_to_genes_of_interest.items(),
-        unit="contig",
-        total=len(contig_to_genes_of_interest),
-        disable=disable_bar,
-    ):
-        genes_count = contig.number_of_genes
-
-        genes_of_interest_positions = [g.position for g in genes_of_interest]
-
+    contigs = list(contig_to_genes_of_interest)
+    if contig_to_families is None:
+        contig_to_families = {}
+    contigs_data = []
+    for contig in contigs:
+        genes_of_interest = contig_to_genes_of_interest[contig]
         contig_windows = extract_contig_window(
-            genes_count,
-            genes_of_interest_positions,
+            contig.number_of_genes,
+            [g.position for g in genes_of_interest],
             window_size=window_size,
             is_circular=contig.is_circular,
         )
-
-        # This part is for PANORAMA
-        contig_graph = add_edges_to_context_graph(
-            context_graph, contig, contig_windows, transitive
+        if contig not in contig_to_families:
+            contig_to_families[contig] = np.array(
+                [gene.family.ID for gene in contig.get_genes()], dtype=np.int64
+            )
+        contigs_data.append(
+            (
+                contig_to_families[contig],
+                contig_windows,
+                contig.is_circular,
+                {gene.family.ID for gene in genes_of_interest},
+            )
         )
 
-        for cc in nx.connected_components(contig_graph):
-            # If gene families are in the same connected component for the contig graph,
-            # they exist in the same context in at least one genome
-            combination = list(
-                cc.intersection({gene.family for gene in genes_of_interest})
+    blocks = [
+        (start, min(start + block_size, len(contigs)))
+        for start in range(0, len(contigs), block_size)
+    ]
+    if cpu > 1 and len(blocks) > 1:
+        with ProcessPoolExecutor(
+            max_workers=cpu,
+            mp_context=get_context("fork"),
+            initializer=init_context_worker,
+            initargs=(contigs_data, transitive),
+        ) as executor:
+            futures = [
+                executor.submit(compute_contigs_context_in_worker, start, stop)
+                for start, stop in blocks
+            ]
+            results = [
+                contig_result
+                for future in tqdm(
+                    futures, total=len(blocks), unit="block", disable=disable_bar
+                )
+                for contig_result in future.result()
+            ]
+    else:
+        results = [
+            compute_contig_context(
+                contig_families, contig_windows, transitive, is_circular, interest
             )
-            # Family here are family of interest for the context and in the same connected component
+            for contig_families, contig_windows, is_circular, interest in tqdm(
+                contigs_data, unit="contig", disable=disable_bar
+            )
+        ]
 
-            combs2orgs[frozenset(combination)].add(contig.organism)
+    context_graph = build_context_graph(
+        [contig.get_genes() for contig in contigs],
+        [contig_families for contig_families, _, _, _ in contigs_data],
+        [gene_pairs for gene_pairs, _ in results],
+        transitive,
+    )
+
+    id_to_family = {
+        gene.family.ID: gene.family
+        for genes_of_interest in contig_to_genes_of_interest.values()
+        for gene in genes_of_interest
+    }
+    combs2orgs = defaultdict(set)
+    for contig, (_, combinations) in zip(contigs, results):
+        # This part is for PANORAMA
+        for combination in combinations:
+            # Family here are family of interest for the context and in the same connected component
+            combs2orgs[
+                frozenset(id_to_family[family_id] for family_id in combination)
+            ].add(contig.organism)
 
     return context_graph, combs2orgs
 
@@ -781,8 +1416,25 @@ def launch(args: argparse.Namespace):
         "translation_table": translation_table,
         "tmpdir": args.tmpdir,
         "keep_tmp": args.keep_tmp,
-        "cpu": args.cpu,
+        "target_db_cache": args.target_db_cache,
+        "index_target_db": args.index_target_db,
     }
+    if args.groups is not None:
+        search_gene_contexts_of_groups(
+            pangenome=pangenome,
+            output=args.output,
+            groups_file=args.groups,
+            sequence_file=args.sequences,
+            transitive=args.transitive,
+            jaccard_threshold=args.jaccard,
+            window_size=args.window_size,
+            graph_format=args.graph_format,
+            cpu=args.cpu,
+            disable_bar=args.disable_prog_bar,
+            **align_args,
+        )
+        return
+
     search_gene_context_in_pangenome(
         pangenome=pangenome,
         output=args.output,
@@ -792,6 +1444,7 @@ def launch(args: argparse.Namespace):
         jaccard_threshold=args.jaccard,
         window_size=args.window_size,
         graph_format=args.graph_format,
+        cpu=args.cpu,
         disable_bar=args.disable_prog_bar,
         **align_args,
     )
@@ -857,6 +1510,16 @@ def parser_context(parser: argparse.ArgumentParser):
         type=Path,
         help="List of family IDs of interest from the pangenome",
     )
+    onereq.add_argument(
+        "-G",
+        "--groups",
+        required=False,
+        type=Path,
+        help="Tab-separated file with a group name and a query per line, to search the contexts "
+        "of many groups of queries at once. Queries are sequence IDs of --sequences if given, "
+        "family IDs of the pangenome otherwise. The results of each group are written in a "
+        "subdirectory named after it.",
+    )
     optional = parser.add_argument_group(title="Optional arguments")
     optional.add_argument(
         "-t",
@@ -949,13 +1612,27 @@ def parser_context(parser: argparse.ArgumentParser):
         action="store_true",
         help="Keeping temporary files (useful for debugging).",
     )
+    align.add_argument(
+        "--target_db_cache",
+        required=False,
+        type=Path,
+        default=None,
+        help="Directory where the MMseqs2 database of the pangenome sequences is cached, "
+        "to be reused by later runs on the same pangenome.",
+    )
+    align.add_argument(
+        "--index_target_db",
+        required=False,
+        action="store_true",
+        help="Precompute the MMseqs2 index of the cached pangenome sequences database (see --target_db_cache).",
+    )
     align.add_argument(
         "-c",
         "--cpu",
         required=False,
         default=1,
         type=int,
-        help="Number of available cpus",
+        help="Number of available cpus. They are also used to search contexts in several contigs at once.",
     )
 
 
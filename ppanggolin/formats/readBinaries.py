@@ -3,7 +3,7 @@
 # default libraries
 import logging
 from pathlib import Path
-from typing import Dict, Any, Iterator, Set, List, Tuple, Optional
+from typing import Dict, Any, Iterator, Set, List, Tuple, Optional, Generator
 from collections import defaultdict
 
 # installed libraries
@@ -292,6 +292,39 @@ def read_sequences(h5f: tables.File) -> dict:
     return seqid2seq
 
 
+def read_non_redundant_gene_sequences_from_file(
+    pangenome_filename: str, add: str = "", disable_bar: bool = False
+) -> Generator[Tuple[str, str], None, None]:
+    """
+    Reads the non-redundant CDS sequences from a .h5 pangenome file, chunk per chunk,
+    and adds the eventual str 'add' in front of the identifiers.
+
+    :param pangenome_filename: Name of the pangenome file
+    :param add: Add a prefix to sequence header
+    :param disable_bar: disable progress bar
+
+    :return: Generator of CDS identifier and sequence
+    """
+    with tables.open_file(pangenome_filename, "r", driver_core_backing_store=0) as h5f:
+
+        # get a dictionary mapping seqid to cds_name
+        # seqid are uniq and can have multiple cds name.
+        # We just want one of the cds name to have non-redundant fasta sequences
+        seqid2cds_name = {}
+        for row in read_chunks(h5f.root.annotations.geneSequences, chunk=20000):
+            # Read the table chunk per chunk otherwise RAM dies on big pangenomes
+            seqid2cds_name[row["seqid"]] = row["gene"].decode()
+
+        table = h5f.root.annotations.sequences
+        for row in tqdm(
+            read_chunks(table, chunk=20000),
+            total=table.nrows,
+            unit="gene",
+            disable=disable_bar,
+        ):
+            yield f"{add}{seqid2cds_name[row['seqid']]}", row["dna"].decode()
+
+
 def get_non_redundant_gene_sequences_from_file(
     pangenome_filename: str, output: Path, add: str = "", disable_bar: bool = False
 ):
@@ -311,27 +344,45 @@ def get_non_redundant_gene_sequences_from_file(
         f" to {output.absolute()}"
     )
 
-    with tables.open_file(pangenome_filename, "r", driver_core_backing_store=0) as h5f:
+    with open(output, "w") as file_obj:
+        for cds_name, sequence in read_non_redundant_gene_sequences_from_file(
+            pangenome_filename, add=add, disable_bar=disable_bar
+        ):
+            file_obj.write(f">{cds_name}\n")
+            file_obj.write(f"{sequence}\n")
 
-        # get a dictionary mapping seqid to cds_name
-        # seqid are uniq and can have multiple cds name.
-        # We just want one of the cds name to have non-redundant fasta sequences
-        seqid2cds_name = {}
-        for row in read_chunks(h5f.root.annotations.geneSequences, chunk=20000):
-            # Read the table chunk per chunk otherwise RAM dies on big pangenomes
-            seqid2cds_name[row["seqid"]] = row["gene"].decode()
 
-        table = h5f.root.annotations.sequences
-        with open(output, "w") as file_obj:
-            for row in tqdm(
-                read_chunks(table, chunk=20000),
-                total=table.nrows,
-                unit="gene",
-                disable=disable_bar,
-            ):
-                cds_name = seqid2cds_name[row["seqid"]]
-                file_obj.write(f">{add}{cds_name}\n")
-                file_obj.write(f'{row["dna"].decode()}\n')
+def read_gene_sequences_from_pangenome_file(
+    pangenome_filename: str,
+    list_cds: Optional[Iterator] = None,
+    add: str = "",
+    disable_bar: bool = False,
+) -> Generator[Tuple[str, str], None, None]:
+    """
+    Reads the CDS sequences from a .h5 pangenome file chunk per chunk, that can be filtered or not by a list of CDS,
+    and adds the eventual str 'add' in front of the identifiers.
+
+    :param pangenome_filename: Name of the pangenome file
+    :param list_cds: An iterable object of CDS
+    :param add: Add a prefix to sequence header
+    :param disable_bar: Prevent to print disable progress bar
+
+    :return: Generator of CDS identifier and sequence
+    """
+    with tables.open_file(pangenome_filename, "r", driver_core_backing_store=0) as h5f:
+        table = h5f.root.annotations.geneSequences
+        list_cds = set(list_cds) if list_cds is not None else None
+        seqid2seq = read_sequences(h5f)
+        for row in tqdm(
+            read_chunks(table, chunk=20000),
+            total=table.nrows,
+            unit="gene",
+            disable=disable_bar,
+        ):
+            # Read the table chunk per chunk otherwise RAM dies on big pangenomes
+            name_cds = row["gene"].decode()
+            if row["type"] == b"CDS" and (list_cds is None or name_cds in list_cds):
+                yield add + name_cds, seqid2seq[row["seqid"]]
 
 
 def write_gene_sequences_from_pangenome_file(
@@ -357,22 +408,12 @@ def write_gene_sequences_from_pangenome_file(
         f"Extracting and writing CDS sequences from a {pangenome_filename} "
         "file to a fasta file..."
     )
-    with tables.open_file(pangenome_filename, "r", driver_core_backing_store=0) as h5f:
-        table = h5f.root.annotations.geneSequences
-        list_cds = set(list_cds) if list_cds is not None else None
-        seqid2seq = read_sequences(h5f)
-        with write_compressed_or_not(output, compress) as file_obj:
-            for row in tqdm(
-                read_chunks(table, chunk=20000),
-                total=table.nrows,
-                unit="gene",
-                disable=disable_bar,
-            ):
-                # Read the table chunk per chunk otherwise RAM dies on big pangenomes
-                name_cds = row["gene"].decode()
-                if row["type"] == b"CDS" and (list_cds is None or name_cds in list_cds):
-                    file_obj.write(">" + add + name_cds + "\n")
-                    file_obj.write(seqid2seq[row["seqid"]] + "\n")
+    with write_compressed_or_not(output, compress) as file_obj:
+        for name_cds, sequence in read_gene_sequences_from_pangenome_file(
+            pangenome_filename, list_cds, add=add, disable_bar=disable_bar
+        ):
+            file_obj.write(">" + name_cds + "\n")
+            file_obj.write(sequence + "\n")
     logging.getLogger("PPanGGOLiN").debug(
         "Gene sequences from pangenome file was written to "
         f"{output.absolute()}{'.gz' if compress else ''}"
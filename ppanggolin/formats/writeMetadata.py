@@ -240,7 +240,8 @@ def get_metadata_len(
             ):
                 if isinstance(value, bytes):
                     value = value.decode("UTF-8")
-                if isinstance(value, float) or isinstance(value, int):
+                if isinstance(value, (float, int, numpy.floating, numpy.integer)):
+                    # values read from a pangenome file are numpy scalars
                     if attr in type_dict:
                         if isinstance(type_dict[attr], type(value)):
                             if isinstance(value, float) and isinstance(
@@ -248,7 +249,7 @@ def get_metadata_len(
                             ):
                                 type_dict[attr] = tables.Float64Col()
                     else:
-                        if isinstance(value, float):
+                        if isinstance(value, (float, numpy.floating)):
                             type_dict[attr] = tables.Float64Col()
                         else:
                             type_dict[attr] = tables.Int64Col()
@@ -4,8 +4,9 @@
 import argparse
 import logging
 import re
+import struct
 from pathlib import Path
-from typing import Dict, Iterable, Union
+from typing import Dict, Iterable, Tuple, Union
 import tempfile
 import shutil
 
@@ -46,6 +47,8 @@ poss_values = [
     module_regex,
 ]
 poss_values_log = f"Possible values are {', '.join(poss_values[:-1])}, module_X with X being a module id."
+# MMseqs2 database types of amino acid, nucleotide and header databases
+mmseqs_dbtypes = {1: 0, 2: 1, "header": 12}
 
 
 def check_write_sequences_args(args: argparse.Namespace) -> None:
@@ -120,6 +123,54 @@ def create_mmseqs_db(
     return seq_nucdb
 
 
+def write_mmseqs_db(
+    sequences: Iterable[Tuple[str, str]],
+    db_name: str,
+    tmpdir: Path,
+    db_type: int = 2,
+) -> Path:
+    """Write a MMseqs2 database from sequences, as `mmseqs createdb` would do with a fasta file of these sequences.
+
+    :param sequences: Identifier and sequence of each entry
+    :param db_name: name of the database
+    :param tmpdir: Temporary directory to save the MMSeqs2 files
+    :param db_type: Database type 1: amino acid 2: nucleotides
+
+    :return: Path to the MMSeqs2 database
+    """
+    assert db_type in [1, 2], f"dbtype must be 1 or 2, given {db_type}"
+
+    seqdb = tmpdir / db_name
+    logging.getLogger("PPanGGOLiN").info("Writing sequence database...")
+    with (
+        open(seqdb, "wb") as seq_data,
+        open(tmpdir / f"{db_name}.index", "w") as seq_index,
+        open(tmpdir / f"{db_name}_h", "wb") as header_data,
+        open(tmpdir / f"{db_name}_h.index", "w") as header_index,
+        open(tmpdir / f"{db_name}.lookup", "w") as lookup,
+    ):
+        seq_offset, header_offset = 0, 0
+        for key, (name, sequence) in enumerate(sequences):
+            # each entry ends with a null byte, which is counted in the entry length of the index
+            seq_entry = f"{sequence}\n\0".encode()
+            seq_data.write(seq_entry)
+            seq_index.write(f"{key}\t{seq_offset}\t{len(seq_entry)}\n")
+            seq_offset += len(seq_entry)
+            header_entry = f"{name}\n\0".encode()
+            header_data.write(header_entry)
+            header_index.write(f"{key}\t{header_offset}\t{len(header_entry)}\n")
+            header_offset += len(header_entry)
+            lookup.write(f"{key}\t{name}\t0\n")
+    (tmpdir / f"{db_name}.source").write_text(f"0\t{db_name}\n")
+    (tmpdir / f"{db_name}.dbtype").write_bytes(
+        struct.pack("<i", mmseqs_dbtypes[db_type])
+    )
+    (tmpdir / f"{db_name}_h.dbtype").write_bytes(
+        struct.pack("<i", mmseqs_dbtypes["header"])
+    )
+    return seqdb
+
+
 def translate_genes(
     sequences: Union[Path, Iterable[Path]],
     tmpdir: Path,
@@ -146,6 +197,21 @@ def translate_genes(
         db_mode=1 if is_single_line_fasta else 0,
         db_type=2,
     )
+    return translate_mmseqs_db(seq_nucdb, tmpdir, cpu, code)
+
+
+def translate_mmseqs_db(
+    seq_nucdb: Path, tmpdir: Path, cpu: int = 1, code: int = 11
+) -> Path:
+    """Translate a MMSeqs2 nucleotide sequences database into a MMSeqs2 amino acid sequences database
+
+    :param seq_nucdb: MMSeqs2 nucleotide sequences database
+    :param tmpdir: Temporary directory to save the MMSeqs2 files
+    :param cpu: Number of available threads to use
+    :param code: Translation code to use
+
+    :return: Path to the MMSeqs2 database
+    """
     logging.getLogger("PPanGGOLiN").debug("Translate sequence ...")
     seqdb = tmpdir / "translate_db"
     cmd = list(
@@ -253,23 +319,18 @@ def read_fasta_or_gff(file_path: Path) -> Dict[str, str]:
     :return: Dictionary with all sequences associated to contig
     """
     sequence_dict = {}
-    seqname = ""
-    seq = ""
-    in_fasta_part = False
     with read_compressed_or_not(file_path) as f:
-        for line in f:
-            if line.startswith(">"):
-                in_fasta_part = True
-            if in_fasta_part:
-                if line.startswith(">"):
-                    if seq != "":
-                        sequence_dict[seqname] = seq
-                        seq = ""
-                    seqname = line[1:].strip().split()[0]
-                else:
-                    seq += line.strip()
+        content = f.read()
+    # sequences of a gff file are at its end, after the annotation lines
+    fasta_start = 0 if content.startswith(">") else content.find("\n>") + 1
+    if fasta_start == 0 and not content.startswith(">"):
+        return sequence_dict
+
+    for record in content[fasta_start + 1 :].split("\n>"):
+        header, _, sequence = record.partition("\n")
+        seq = "".join(sequence.split())
         if seq != "":
-            sequence_dict[seqname] = seq
+            sequence_dict[header.strip().split()[0]] = seq
     return sequence_dict
 
 
@@ -10,6 +10,7 @@ from tqdm import tqdm
 
 # local libraries
 from ppanggolin.pangenome import Pangenome
+from ppanggolin.genome import Organism
 from ppanggolin.formats import read_pangenome, write_pangenome, erase_pangenome
 
 
@@ -84,6 +85,35 @@ def remove_high_copy_number(pangenome, number):
                 fam.removed = True
 
 
+def add_genome_edges(pangenome: Pangenome, organism: Organism):
+    """
+    Adds the edges between the gene families of consecutive genes of a genome to the neighbors graph
+
+    :param pangenome: Pangenome object
+    :param organism: Genome with genes associated to gene families
+    """
+    for contig in organism.contigs:
+        prev = None
+        for gene in contig.genes:
+            try:
+                if not gene.family.removed:
+                    if prev is not None and not (
+                        prev.family == gene.family
+                        and (prev.is_fragment or gene.is_fragment)
+                    ):
+                        pangenome.add_edge(gene, prev)
+                    prev = gene
+            except AttributeError:
+                raise AttributeError(
+                    "a Gene does not have a GeneFamily object associated"
+                )
+            except Exception:
+                raise Exception("Unexpected error. Please report on our github.")
+        if prev is not None and contig.is_circular and contig.number_of_genes > 0:
+            # if prev is None, the contig is entirely made of duplicated genes, so no edges are added
+            pangenome.add_edge(contig[0], prev)
+
+
 def compute_neighbors_graph(
     pangenome: Pangenome,
     remove_copy_number: int = 0,
@@ -114,26 +144,7 @@ def compute_neighbors_graph(
     for org in bar:
         bar.set_description(f"Processing {org.name}")
         bar.refresh()
-        for contig in org.contigs:
-            prev = None
-            for gene in contig.genes:
-                try:
-                    if not gene.family.removed:
-                        if prev is not None and not (
-                            prev.family == gene.family
-                            and (prev.is_fragment or gene.is_fragment)
-                        ):
-                            pangenome.add_edge(gene, prev)
-                        prev = gene
-                except AttributeError:
-                    raise AttributeError(
-                        "a Gene does not have a GeneFamily object associated"
-                    )
-                except Exception:
-                    raise Exception("Unexpected error. Please report on our github.")
-            if prev is not None and contig.is_circular and contig.number_of_genes > 0:
-                # if prev is None, the contig is entirely made of duplicated genes, so no edges are added
-                pangenome.add_edge(contig[0], prev)
+        add_genome_edges(pangenome, org)
     logging.getLogger("PPanGGOLiN").info("Done making the neighbors graph.")
     pangenome.status["neighborsGraph"] = "Computed"
 
@@ -32,6 +32,7 @@ import ppanggolin.RGP
 import ppanggolin.mod
 import ppanggolin.context
 import ppanggolin.workflow
+import ppanggolin.update
 import ppanggolin.meta
 import ppanggolin.utility
 
@@ -180,6 +181,7 @@ def cmd_line() -> argparse.Namespace:
         "module",
         "graph",
         "align",
+        "align_server",
         "context",
         "write_pangenome",
         "write_genomes",
@@ -194,6 +196,7 @@ def cmd_line() -> argparse.Namespace:
         "rgp",
         "projection",
         "metadata",
+        "update",
     ]
     if args.subcommand in cmds_pangenome_required and args.pangenome is None:
         parser.error(
@@ -208,6 +211,22 @@ def cmd_line() -> argparse.Namespace:
             "either through the command line or the config file."
         )
 
+    if (
+        args.subcommand == "context"
+        and args.groups is not None
+        and args.family is not None
+    ):
+        parser.error(
+            "The --groups and --family arguments cannot be used together. "
+            "Give the families of each group in the --groups file."
+        )
+
+    if args.subcommand == "update" and args.fasta is None and args.anno is None:
+        parser.error(
+            "Please provide the genomes to add to the pangenome either with the --fasta or "
+            "the --anno option. Use the command line or the config file."
+        )
+
     if args.subcommand == "projection":
         # check argument correctness and determine input mode (single or multiple files) and add it to args.
         input_mode = ppanggolin.projection.projection.check_projection_arguments(
@@ -264,8 +283,12 @@ def main():
         ppanggolin.metrics.metrics.launch(args)
     elif args.subcommand == "align":
         ppanggolin.align.launch(args)
+    elif args.subcommand == "align_server":
+        ppanggolin.align.alignServer.launch(args)
     elif args.subcommand == "projection":
         ppanggolin.projection.projection.launch(args)
+    elif args.subcommand == "update":
+        ppanggolin.update.launch(args)
     elif args.subcommand == "rgp":
         ppanggolin.RGP.genomicIsland.launch(args)
     elif args.subcommand == "spot":
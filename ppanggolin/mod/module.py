@@ -4,17 +4,26 @@
 import logging
 import argparse
 import time
+from collections import defaultdict
 from pathlib import Path
+from typing import Generator, List, Set, Tuple
 
 # installed libraries
 from tqdm import tqdm
-import networkx as nx
+import numpy as np
+from scipy.sparse import csr_matrix, csgraph
 
 # local libraries
 from ppanggolin.pangenome import Pangenome
+from ppanggolin.geneFamily import GeneFamily
 from ppanggolin.region import Module
 from ppanggolin.formats import check_pangenome_info, write_pangenome, erase_pangenome
-from ppanggolin.utils import restricted_float, add_gene, connected_components
+from ppanggolin.utils import restricted_float
+
+# pairs of gene or family indices are encoded in a single integer as first * FAMILY_KEY + second
+FAMILY_KEY = 1 << 31
+# number of family pair counts kept in memory before summing identical pairs
+MAX_BUFFERED_COUNTS = 10_000_000
 
 
 def check_pangenome_former_modules(pangenome: Pangenome, force: bool = False):
@@ -33,52 +42,199 @@ def check_pangenome_former_modules(pangenome: Pangenome, force: bool = False):
         erase_pangenome(pangenome, modules=True)
 
 
-def compute_mod_graph(pangenome: Pangenome, t: int = 1, disable_bar: bool = False):
+class ModuleGraph:
+    """
+    Graph of the gene families found close to each other in the genomes, stored as integer arrays.
+
+    Families are indexed in the order they are met in the genomes. Each edge links two families having genes
+    within the transitive closure of each other, and stores, for each of the two families,
+    the number of its genes having a gene of the other family in their transitive closure.
+    """
+
+    def __init__(
+        self,
+        families: List[GeneFamily],
+        family_genes: np.ndarray,
+        source: np.ndarray,
+        target: np.ndarray,
+        source_genes: np.ndarray,
+        target_genes: np.ndarray,
+    ):
+        """Constructor method
+
+        :param families: Gene families of the nodes, by index
+        :param family_genes: Number of genes of each family
+        :param source: Index of the first family of each edge
+        :param target: Index of the second family of each edge
+        :param source_genes: Number of genes of the first family linked to the second one
+        :param target_genes: Number of genes of the second family linked to the first one
+        """
+        self.families = families
+        self.family_genes = family_genes
+        self.source = source
+        self.target = target
+        self.source_genes = source_genes
+        self.target_genes = target_genes
+
+    @property
+    def number_of_nodes(self) -> int:
+        return len(self.families)
+
+    @property
+    def number_of_edges(self) -> int:
+        return len(self.source)
+
+    def connected_components(
+        self, removed: Set[GeneFamily], weight: float
+    ) -> Generator[Set[GeneFamily], None, None]:
+        """
+        Yields the connected components of the graph, using only the edges existing for most genes of both families,
+        in the order of their first family.
+
+        :param removed: Families to ignore
+        :param weight: Minimal ratio of genes of each family linked by an edge to use it
+        """
+        kept = np.array([family not in removed for family in self.families], dtype=bool)
+        used = (
+            (self.source != self.target)
+            & (self.source_genes / self.family_genes[self.source] >= weight)
+            & (self.target_genes / self.family_genes[self.target] >= weight)
+            & kept[self.source]
+            & kept[self.target]
+        )
+        adjacency = csr_matrix(
+            (
+                np.ones(used.sum(), dtype=bool),
+                (self.source[used], self.target[used]),
+            ),
+            shape=(self.number_of_nodes, self.number_of_nodes),
+        )
+        _, labels = csgraph.connected_components(adjacency, directed=False)
+        components = defaultdict(set)
+        for index in np.flatnonzero(kept):
+            components[labels[index]].add(self.families[index])
+        # labels are yielded in the order of their first node, as nodes are iterated in order
+        yield from components.values()
+
+
+def _count_neighbor_families(
+    fams: np.ndarray, left: np.ndarray, right: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Count, for each pair of families, the genes of the first family having a gene of the second one as neighbor
+
+    :param fams: Family index of each gene
+    :param left: Gene index of the first gene of each pair of neighbor genes
+    :param right: Gene index of the second gene of each pair of neighbor genes
+
+    :return: Keys of the pairs of families, encoded as first * FAMILY_KEY + second, and their number of genes
+    """
+    # each gene is counted once per family found in its neighbors
+    gene_to_fam = np.unique(
+        np.concatenate(
+            (left * FAMILY_KEY + fams[right], right * FAMILY_KEY + fams[left])
+        )
+    )
+    return np.unique(
+        fams[gene_to_fam // FAMILY_KEY] * FAMILY_KEY + gene_to_fam % FAMILY_KEY,
+        return_counts=True,
+    )
+
+
+def _sum_counts(
+    keys: List[np.ndarray], counts: List[np.ndarray]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Sum the counts of identical keys
+
+    :param keys: Arrays of keys
+    :param counts: Arrays of the counts of the keys
+
+    :return: Sorted unique keys and their summed counts
+    """
+    uniq, inverse = np.unique(np.concatenate(keys), return_inverse=True)
+    return uniq, np.bincount(inverse, weights=np.concatenate(counts)).astype(np.int64)
+
+
+def compute_mod_graph(
+    pangenome: Pangenome, t: int = 1, disable_bar: bool = False
+) -> ModuleGraph:
     """
     Computes a graph using all provided genomes with a transitive closure of size t
 
     :param pangenome: pangenome with organisms to compute the graph
     :param t: the size of the transitive closure
     :param disable_bar: whether to show a progress bar or not
-    """
 
-    g = nx.Graph()
+    :return: The graph of gene families
+    """
+    family_index = {}
+    family_genes = np.zeros(0, dtype=np.int64)
+    keys, counts = [np.zeros(0, dtype=np.int64)], [np.zeros(0, dtype=np.int64)]
+    nb_keys = 0
     for org in tqdm(
         pangenome.organisms,
         total=pangenome.number_of_organisms,
         unit="genome",
         disable=disable_bar,
     ):
+        fams, left, right = [], [], []
         for contig in org.contigs:
             if contig.number_of_genes > 0:
-                start_gene = contig[0]
-                g.add_node(start_gene.family)
-                add_gene(g.nodes[start_gene.family], start_gene, fam_split=False)
-                for i, gene in enumerate(contig.genes):
-                    for j, a_gene in enumerate(
-                        contig.get_genes(i + 1, i + t + 2, outrange_ok=True),
-                        start=i + 1,
-                    ):
-                        g.add_edge(gene.family, a_gene.family)
-                        edge = g[gene.family][a_gene.family]
-                        add_gene(edge, gene)
-                        add_gene(edge, a_gene)
-                        if (
-                            j == i + t + 1 or i == 0
-                        ):  # if it's the last gene of the series, or the first series
-                            add_gene(g.nodes[a_gene.family], a_gene, fam_split=False)
-
-    return g
+                first = len(fams)
+                for gene in contig.genes:
+                    fams.append(family_index.setdefault(gene.family, len(family_index)))
+                positions = np.arange(first, len(fams))
+                for dist in range(1, t + 2):
+                    left.append(positions[:-dist])
+                    right.append(positions[dist:])
+                if contig.number_of_genes >= t + 3:
+                    # the last gene is also paired with the gene t + 2 positions before it
+                    left.append(positions[-t - 3 : -t - 2])
+                    right.append(positions[-1:])
+        if len(fams) == 0:
+            continue
+        fams = np.array(fams, dtype=np.int64)
+        family_genes = np.concatenate(
+            (
+                family_genes,
+                np.zeros(len(family_index) - len(family_genes), dtype=np.int64),
+            )
+        )
+        family_genes += np.bincount(fams, minlength=len(family_index))
+        org_keys, org_counts = _count_neighbor_families(
+            fams, np.concatenate(left), np.concatenate(right)
+        )
+        keys.append(org_keys)
+        counts.append(org_counts)
+        nb_keys += len(org_keys)
+        if nb_keys > MAX_BUFFERED_COUNTS:
+            keys, counts = [[array] for array in _sum_counts(keys, counts)]
+            nb_keys = len(keys[0])
+    keys, counts = _sum_counts(keys, counts)
+
+    # both directions of an edge exist, the count of the other direction is found by binary search
+    source, target = keys // FAMILY_KEY, keys % FAMILY_KEY
+    edges = source <= target
+    reverse = np.searchsorted(keys, target[edges] * FAMILY_KEY + source[edges])
+    return ModuleGraph(
+        families=list(family_index),
+        family_genes=family_genes,
+        source=source[edges],
+        target=target[edges],
+        source_genes=counts[edges],
+        target_genes=counts[reverse],
+    )
 
 
 def compute_modules(
-    g: nx.Graph, multi: set, weight: float = 0.85, min_fam: int = 2, size: int = 3
+    g: ModuleGraph, multi: set, weight: float = 0.85, min_fam: int = 2, size: int = 3
 ):
     """
     Computes modules using a graph built by :func:`ppanggolin.mod.module.compute_mod_graph` and different parameters
     defining how restrictive the modules will be.
 
-    :param g: The networkx graph from :func:`ppanggolin.mod.module.compute_mod_graph`
+    :param g: The graph from :func:`ppanggolin.mod.module.compute_mod_graph`
     :param multi: a set of families :class:`ppanggolin.geneFamily.GeneFamily` considered multigenic
     :param weight: the minimal jaccard under which edges are not considered
     :param min_fam: the minimal number of presence under which the family is not considered
@@ -86,11 +242,11 @@ def compute_modules(
     """
 
     # removing families with low presence
-    removed = {fam for fam in g.nodes if fam.number_of_organisms < min_fam}
+    removed = {fam for fam in g.families if fam.number_of_organisms < min_fam}
 
     modules = set()
     c = 0
-    for comp in connected_components(g, removed, weight):
+    for comp in g.connected_components(removed, weight):
         if len(comp) >= size and not any(
             fam.named_partition == "persistent" and fam not in multi for fam in comp
         ):
@@ -141,7 +297,7 @@ def predict_modules(
         f"Took {round(time.time() - start_time, 2)} seconds to build the graph to find modules in"
     )
     logging.getLogger("PPanGGOLiN").info(
-        f"There are {nx.number_of_nodes(g)} nodes and {nx.number_of_edges(g)} edges"
+        f"There are {g.number_of_nodes} nodes and {g.number_of_edges} edges"
     )
 
     start_time = time.time()
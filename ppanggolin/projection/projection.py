@@ -2,7 +2,7 @@
 
 # default libraries
 import argparse
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ProcessPoolExecutor, Future
 from multiprocessing import get_context, Value
 import logging
 import os
@@ -20,12 +20,19 @@ import networkx as nx
 import yaml
 
 # # local libraries
-from ppanggolin.annotate.synta import get_contigs_from_fasta_file, get_dna_sequence
+from ppanggolin.annotate.synta import (
+    get_contigs_from_fasta_file,
+    get_dna_sequence,
+    get_dna_sequences,
+    read_fasta_buffer,
+)
 from ppanggolin.annotate.annotate import (
     init_contig_counter,
     read_anno_file,
     annotate_organism,
     local_identifiers_are_unique,
+    pack_genome,
+    unpack_genome,
 )
 from ppanggolin.annotate import subparser as annotate_subparser
 from ppanggolin.pangenome import Pangenome
@@ -35,6 +42,7 @@ from ppanggolin.utils import (
     read_compressed_or_not,
     write_compressed_or_not,
     restricted_float,
+    min_one,
     mk_outdir,
     get_config_args,
     parse_config_file,
@@ -54,8 +62,8 @@ from ppanggolin.formats.readBinaries import check_pangenome_info
 from ppanggolin.RGP.genomicIsland import naming_scheme, compute_org_rgp
 from ppanggolin.RGP.spot import (
     make_spot_graph,
-    check_sim,
-    add_new_node_in_spot_graph,
+    BorderIndex,
+    get_border_node_name,
     write_spot_graph,
 )
 from ppanggolin.genome import Organism
@@ -159,41 +167,26 @@ def check_pangenome_for_projection(pangenome: Pangenome, fast_aln: bool):
     return predict_rgp, project_spots, project_modules
 
 
-def manage_input_genomes_annotation(
-    pangenome,
+def get_input_genome_paths(
     input_mode: str,
     anno: str,
     fasta: str,
     organism_name: str,
     circular_contigs: list,
-    pangenome_params,
-    cpu: int,
-    use_pseudo: bool,
-    disable_bar: bool,
-    tmpdir: str,
-    config: dict,
-    translation_table: int,
-):
+) -> Tuple[Dict[str, dict], str, Optional[Dict[str, dict]]]:
     """
-    Manage the input genomes annotation based on the provided mode and parameters.
+    Get the files of the input genomes based on the provided mode.
 
-    :param pangenome: The pangenome object.
     :param input_mode: The input mode, either 'multiple' or 'single'.
     :param anno: The annotation file path or None.
     :param fasta: The FASTA file path or None.
     :param organism_name: The name of the organism.
     :param circular_contigs: List of circular contigs.
-    :param pangenome_params: Parameters for pangenome processing.
-    :param cpu: Number of CPUs to use.
-    :param use_pseudo: Flag to use pseudo annotation.
-    :param disable_bar: Flag to disable progress bar.
-    :param tmpdir: Temporary directory path.
-    :param config: Configuration dictionary.
-    :param translation_table: Translation table (genetic code) to use.
-    :return: A tuple of organisms, genome_name_to_path, and input_type.
+    :return: A tuple of genome_name_to_path, input_type, and the FASTA files of the genomes when annotation files are given with FASTA files.
     """
 
     genome_name_to_path = None
+    genome_name_to_fasta_path = None
     input_type = None
 
     # Determine input type and parse paths based on the input mode
@@ -201,6 +194,8 @@ def manage_input_genomes_annotation(
         if anno:
             input_type = "annotation"
             genome_name_to_path = parse_input_paths_file(anno)
+            if fasta:
+                genome_name_to_fasta_path = parse_input_paths_file(fasta)
         elif fasta:
             input_type = "fasta"
             genome_name_to_path = parse_input_paths_file(fasta)
@@ -211,6 +206,13 @@ def manage_input_genomes_annotation(
             genome_name_to_path = {
                 organism_name: {"path": anno, "circular_contigs": circular_contigs}
             }
+            if fasta:
+                genome_name_to_fasta_path = {
+                    organism_name: {
+                        "path": fasta,
+                        "circular_contigs": circular_contigs,
+                    }
+                }
         elif fasta:
             input_type = "fasta"
             genome_name_to_path = {
@@ -221,6 +223,38 @@ def manage_input_genomes_annotation(
             f"Input mode '{input_mode}' is not valid. Expected 'multiple' or 'single'."
         )
 
+    return genome_name_to_path, input_type, genome_name_to_fasta_path
+
+
+def annotate_input_genomes(
+    pangenome,
+    genome_name_to_path: Dict[str, dict],
+    input_type: str,
+    genome_name_to_fasta_path: Optional[Dict[str, dict]],
+    pangenome_params,
+    cpu: int,
+    use_pseudo: bool,
+    disable_bar: bool,
+    tmpdir: str,
+    config: dict,
+    translation_table: int,
+) -> List[Organism]:
+    """
+    Annotate the input genomes or read their annotations.
+
+    :param pangenome: The pangenome object.
+    :param genome_name_to_path: A dictionary mapping genome names to their files.
+    :param input_type: The input type, either 'annotation' or 'fasta'.
+    :param genome_name_to_fasta_path: FASTA files of the genomes, used when annotation files have no sequences.
+    :param pangenome_params: Parameters for pangenome processing.
+    :param cpu: Number of CPUs to use.
+    :param use_pseudo: Flag to use pseudo annotation.
+    :param disable_bar: Flag to disable progress bar.
+    :param tmpdir: Temporary directory path.
+    :param config: Configuration dictionary.
+    :param translation_table: Translation table (genetic code) to use.
+    :return: The annotated organisms.
+    """
     # Process annotation input type
     if input_type == "annotation":
         check_input_names(pangenome, genome_name_to_path)
@@ -237,16 +271,7 @@ def manage_input_genomes_annotation(
             organisms_with_no_fasta = {
                 org for org, has_fasta in org_2_has_fasta.items() if not has_fasta
             }
-            if fasta:
-                if input_mode == "multiple":
-                    genome_name_to_fasta_path = parse_input_paths_file(fasta)
-                else:
-                    genome_name_to_fasta_path = {
-                        organism_name: {
-                            "path": fasta,
-                            "circular_contigs": circular_contigs,
-                        }
-                    }
+            if genome_name_to_fasta_path is not None:
                 get_gene_sequences_from_fasta_files(
                     organisms_with_no_fasta, genome_name_to_fasta_path
                 )
@@ -264,6 +289,7 @@ def manage_input_genomes_annotation(
             "norna",
             "kingdom",
             "allow_overlap",
+            "all_overlaps",
             "prodigal_procedure",
         ]
         annotate_params = manage_annotate_param(
@@ -279,6 +305,7 @@ def manage_input_genomes_annotation(
             norna=annotate_params.norna,
             kingdom=annotate_params.kingdom,
             allow_overlap=annotate_params.allow_overlap,
+            all_overlaps=annotate_params.all_overlaps,
             procedure=annotate_params.prodigal_procedure,
             disable_bar=disable_bar,
         )
@@ -287,6 +314,60 @@ def manage_input_genomes_annotation(
             f"Input type '{input_type}' is not valid. Expected 'fasta' or 'annotation'."
         )
 
+    return organisms
+
+
+def manage_input_genomes_annotation(
+    pangenome,
+    input_mode: str,
+    anno: str,
+    fasta: str,
+    organism_name: str,
+    circular_contigs: list,
+    pangenome_params,
+    cpu: int,
+    use_pseudo: bool,
+    disable_bar: bool,
+    tmpdir: str,
+    config: dict,
+    translation_table: int,
+):
+    """
+    Manage the input genomes annotation based on the provided mode and parameters.
+
+    :param pangenome: The pangenome object.
+    :param input_mode: The input mode, either 'multiple' or 'single'.
+    :param anno: The annotation file path or None.
+    :param fasta: The FASTA file path or None.
+    :param organism_name: The name of the organism.
+    :param circular_contigs: List of circular contigs.
+    :param pangenome_params: Parameters for pangenome processing.
+    :param cpu: Number of CPUs to use.
+    :param use_pseudo: Flag to use pseudo annotation.
+    :param disable_bar: Flag to disable progress bar.
+    :param tmpdir: Temporary directory path.
+    :param config: Configuration dictionary.
+    :param translation_table: Translation table (genetic code) to use.
+    :return: A tuple of organisms, genome_name_to_path, and input_type.
+    """
+    genome_name_to_path, input_type, genome_name_to_fasta_path = get_input_genome_paths(
+        input_mode, anno, fasta, organism_name, circular_contigs
+    )
+
+    organisms = annotate_input_genomes(
+        pangenome,
+        genome_name_to_path,
+        input_type,
+        genome_name_to_fasta_path,
+        pangenome_params=pangenome_params,
+        cpu=cpu,
+        use_pseudo=use_pseudo,
+        disable_bar=disable_bar,
+        tmpdir=tmpdir,
+        config=config,
+        translation_table=translation_table,
+    )
+
     return organisms, genome_name_to_path, input_type
 
 
@@ -342,13 +423,64 @@ def write_projection_results(
     if write_proksee and input_orgs_to_modules:
         # get module color for proksee
         module_to_colors = manage_module_colors(set(pangenome.modules))
+    else:
+        module_to_colors = {}
+
+    pangenome_stats = get_pangenome_stats_for_summary(pangenome, dup_margin, soft_core)
+
+    summaries = []
+
+    for organism in organisms:
+        org_summary = write_genome_projection_results(
+            pangenome,
+            organism,
+            input_org_rgps=input_org_2_rgps.get(organism, None),
+            input_org_spots=input_org_to_spots.get(organism, None),
+            input_org_modules=input_orgs_to_modules.get(organism, None),
+            singleton_gene_count=input_org_to_lonely_genes_count[organism],
+            pangenome_stats=pangenome_stats,
+            module_to_colors=module_to_colors,
+            write_proksee=write_proksee,
+            write_gff=write_gff,
+            write_table=write_table,
+            add_sequences=add_sequences,
+            genome_path=genome_name_to_path[organism.name]["path"],
+            input_type=input_type,
+            output_dir=output_dir,
+            metadata_sep=metadata_sep,
+            compress=compress,
+            need_regions=need_regions,
+            need_spots=need_spots,
+            need_modules=need_modules,
+        )
+        summaries.append(org_summary)
+
+    output_file = output_dir / "summary_projection.tsv"
+    write_summaries_in_tsv(
+        summaries,
+        output_file=output_file,
+        dup_margin=dup_margin,
+        soft_core=soft_core,
+        compress=compress,
+    )
+
 
-    # single_copy_families = get_single_copy_families(pangenome, dup_margin)
-    # multigenics = pangenome.get_multigenics(pangenome_params.rgp.dup_margin)
+def get_pangenome_stats_for_summary(
+    pangenome: Pangenome, dup_margin: float, soft_core: float
+) -> Tuple[int, Set[GeneFamily], Set[GeneFamily], Set[GeneFamily]]:
+    """
+    Compute the pangenome values used to summarize the projected genomes.
+
+    The dup margin value here is specified in argument and is used to compute completeness.
+    That means it can be different than dup margin used in spot and RGPS.
 
-    # dup margin value here is specified in argument and is used to compute completeness.
-    # That means it can be different than dup margin used in spot and RGPS.
+    :param pangenome: The pangenome onto which the projection is performed.
+    :param dup_margin: The duplication margin used to compute completeness.
+    :param soft_core: Soft core threshold
 
+    :return: The count of persistent families, the single copy persistent families, the soft core families
+             and the exact core families of the pangenome.
+    """
     pangenome_persistent_single_copy_families = (
         pangenome.get_single_copy_persistent_families(
             dup_margin=dup_margin, exclude_fragments=True
@@ -361,95 +493,140 @@ def write_projection_results(
     soft_core_families = pangenome.soft_core_families(soft_core)
     exact_core_families = pangenome.exact_core_families()
 
-    summaries = []
+    return (
+        pangenome_persistent_count,
+        pangenome_persistent_single_copy_families,
+        soft_core_families,
+        exact_core_families,
+    )
 
-    for organism in organisms:
 
-        # summarize projection for all input organisms
-        singleton_gene_count = input_org_to_lonely_genes_count[organism]
+def write_genome_projection_results(
+    pangenome: Pangenome,
+    organism: Organism,
+    input_org_rgps: Optional[Set[Region]],
+    input_org_spots: Optional[Set[Spot]],
+    input_org_modules: Optional[Set[Module]],
+    singleton_gene_count: int,
+    pangenome_stats: Tuple[int, Set[GeneFamily], Set[GeneFamily], Set[GeneFamily]],
+    module_to_colors: Dict[Module, str],
+    write_proksee: bool,
+    write_gff: bool,
+    write_table: bool,
+    add_sequences: bool,
+    genome_path: Path,
+    input_type: str,
+    output_dir: Path,
+    metadata_sep: str,
+    compress: bool,
+    need_regions: bool,
+    need_spots: bool,
+    need_modules: bool,
+) -> Dict[str, Any]:
+    """
+    Write the results of the projection of the pangenome onto one input genome.
 
-        org_summary = summarize_projected_genome(
-            organism,
-            pangenome_persistent_count,
-            pangenome_persistent_single_copy_families,
-            soft_core_families=soft_core_families,
-            exact_core_families=exact_core_families,
-            input_org_rgps=input_org_2_rgps.get(organism, None),
-            input_org_spots=input_org_to_spots.get(organism, None),
-            input_org_modules=input_orgs_to_modules.get(organism, None),
-            pangenome_file=pangenome.file,
-            singleton_gene_count=singleton_gene_count,
-        )
-        summaries.append(org_summary)
+    :param pangenome: The pangenome onto which the projection is performed.
+    :param organism: The input genome.
+    :param input_org_rgps: RGPs of the input genome, None if they have not been predicted.
+    :param input_org_spots: Spots of the input genome, None if they have not been predicted.
+    :param input_org_modules: Modules of the input genome, None if they have not been projected.
+    :param singleton_gene_count: Count of genes of the input genome that do not align to any pangenome family.
+    :param pangenome_stats: Pangenome values used in the summary, as given by get_pangenome_stats_for_summary.
+    :param module_to_colors: Color of the pangenome modules, used in ProkSee files.
+    :param write_proksee: Whether to write ProkSee JSON files.
+    :param write_gff: Whether to write GFF files.
+    :param write_table: Whether to write table files.
+    :param add_sequences: Whether to add sequences to the output files.
+    :param genome_path: Path to the file of the input genome.
+    :param input_type: The type of input data (e.g., "annotation").
+    :param output_dir: The directory where the output files will be written.
+    :param metadata_sep: The separator used to join multiple metadata values.
+    :param compress: Whether to compress the output files.
+    :param need_regions: Whether RGP information is written in the table file.
+    :param need_spots: Whether spot information is written in the table file.
+    :param need_modules: Whether module information is written in the table file.
 
-        yaml_outputfile = output_dir / organism.name / "projection_summary.yaml"
-        write_summary_in_yaml(org_summary, yaml_outputfile)
+    :return: Summary of the projection of the genome.
+    """
+    (
+        pangenome_persistent_count,
+        pangenome_persistent_single_copy_families,
+        soft_core_families,
+        exact_core_families,
+    ) = pangenome_stats
+
+    org_summary = summarize_projected_genome(
+        organism,
+        pangenome_persistent_count,
+        pangenome_persistent_single_copy_families,
+        soft_core_families=soft_core_families,
+        exact_core_families=exact_core_families,
+        input_org_rgps=input_org_rgps,
+        input_org_spots=input_org_spots,
+        input_org_modules=input_org_modules,
+        pangenome_file=pangenome.file,
+        singleton_gene_count=singleton_gene_count,
+    )
 
-        if (write_proksee or write_gff) and add_sequences:
-            genome_sequences = read_genome_file(
-                genome_name_to_path[organism.name]["path"], organism
-            )
-            genome_name_to_path[organism.name]["path"]
-        else:
-            genome_sequences = None
+    yaml_outputfile = output_dir / organism.name / "projection_summary.yaml"
+    write_summary_in_yaml(org_summary, yaml_outputfile)
 
-        if write_proksee:
-            org_module_to_color = {
-                org_mod: module_to_colors[org_mod]
-                for org_mod in input_orgs_to_modules.get(organism, [])
-            }
+    if (write_proksee or write_gff) and add_sequences:
+        genome_sequences = read_genome_file(genome_path, organism)
+    else:
+        genome_sequences = None
 
-            output_file = output_dir / organism.name / f"{organism.name}_proksee.json"
+    if write_proksee:
+        org_module_to_color = {
+            org_mod: module_to_colors[org_mod]
+            for org_mod in (input_org_modules if input_org_modules else [])
+        }
 
-            write_proksee_organism(
-                organism,
-                output_file,
-                features="all",
-                module_to_colors=org_module_to_color,
-                genome_sequences=genome_sequences,
-                compress=compress,
-            )
+        output_file = output_dir / organism.name / f"{organism.name}_proksee.json"
 
-        if write_gff:
-            if (
-                input_type == "annotation"
-            ):  # if the genome has not been annotated by PPanGGOLiN
-                annotation_sources = {
-                    "rRNA": "external",
-                    "tRNA": "external",
-                    "CDS": "external",
-                }
-            else:
-                annotation_sources = {}
-
-            write_gff_file(
-                organism,
-                output_dir / organism.name,
-                annotation_sources=annotation_sources,
-                genome_sequences=genome_sequences,
-                metadata_sep=metadata_sep,
-                compress=compress,
-            )
+        write_proksee_organism(
+            organism,
+            output_file,
+            features="all",
+            module_to_colors=org_module_to_color,
+            genome_sequences=genome_sequences,
+            compress=compress,
+        )
 
-        if write_table:
-            write_tsv_genome_file(
-                organism,
-                output_dir / organism.name,
-                compress=compress,
-                metadata_sep=metadata_sep,
-                need_regions=need_regions,
-                need_spots=need_spots,
-                need_modules=need_modules,
-            )
+    if write_gff:
+        if (
+            input_type == "annotation"
+        ):  # if the genome has not been annotated by PPanGGOLiN
+            annotation_sources = {
+                "rRNA": "external",
+                "tRNA": "external",
+                "CDS": "external",
+            }
+        else:
+            annotation_sources = {}
 
-    output_file = output_dir / "summary_projection.tsv"
-    write_summaries_in_tsv(
-        summaries,
-        output_file=output_file,
-        dup_margin=dup_margin,
-        soft_core=soft_core,
-        compress=compress,
-    )
+        write_gff_file(
+            organism,
+            output_dir / organism.name,
+            annotation_sources=annotation_sources,
+            genome_sequences=genome_sequences,
+            metadata_sep=metadata_sep,
+            compress=compress,
+        )
+
+    if write_table:
+        write_tsv_genome_file(
+            organism,
+            output_dir / organism.name,
+            compress=compress,
+            metadata_sep=metadata_sep,
+            need_regions=need_regions,
+            need_spots=need_spots,
+            need_modules=need_modules,
+        )
+
+    return org_summary
 
 
 def summarize_projected_genome(
@@ -523,6 +700,7 @@ def annotate_fasta_files(
     kingdom: str = "bacteria",
     norna: bool = False,
     allow_overlap: bool = False,
+    all_overlaps: bool = False,
     procedure: str = None,
     disable_bar: bool = False,
 ):
@@ -537,11 +715,14 @@ def annotate_fasta_files(
     :param kingdom: Kingdom to which the prokaryota belongs to, to know which models to use for rRNA annotation.
     :param norna: Use to avoid annotating RNA features.
     :param allow_overlap: Use to not remove genes overlapping with RNA features
+    :param all_overlaps: Remove the CDS overlapping any RNA gene and not only the RNA genes next to them
     :param procedure: prodigal procedure used
     :param disable_bar: Disable the progresse bar
     """
 
     organisms = []
+    # when there are fewer genomes than cpus, the spare cpus look for genes in the contigs of each genome
+    threads_per_genome = max(1, cpu // max(1, len(genome_name_to_fasta_path)))
     arguments = []  # Argument given to annotate organism in same order than prototype
     for org_name, org_info in genome_name_to_fasta_path.items():
         arguments.append(
@@ -554,7 +735,9 @@ def annotate_fasta_files(
                 norna,
                 kingdom,
                 allow_overlap,
+                all_overlaps,
                 procedure,
+                threads_per_genome,
             )
         )
 
@@ -678,8 +861,9 @@ def get_gene_sequences_from_fasta_files(organisms, genome_name_to_annot_path):
 
         org_fasta_file = genome_name_to_annot_path[org.name]["path"]
 
-        with read_compressed_or_not(org_fasta_file) as currFastaFile:
-            org_contig_to_seq = get_contigs_from_fasta_file(org, currFastaFile)
+        org_contig_to_seq = get_contigs_from_fasta_file(
+            org, read_fasta_buffer(org_fasta_file)
+        )
 
         for contig in org.contigs:
             try:
@@ -695,11 +879,11 @@ def get_gene_sequences_from_fasta_files(organisms, genome_name_to_annot_path):
                 )
                 raise KeyError(msg)
 
-            for gene in contig.genes:
-                gene.add_sequence(get_dna_sequence(contig_seq, gene))
-
-            for rna in contig.RNAs:
-                rna.add_sequence(get_dna_sequence(contig_seq, rna))
+            features = list(chain(contig.genes, contig.RNAs))
+            for feature, sequence in zip(
+                features, get_dna_sequences(contig_seq, features)
+            ):
+                feature.add_sequence(sequence)
 
 
 def check_input_names(pangenome, input_names):
@@ -737,7 +921,7 @@ def write_summary_in_yaml(summary_info: Dict[str, Any], output_file: Path):
         flout.write(yaml_string)
 
 
-def annotate_input_genes_with_pangenome_families(
+def align_input_genes_to_families(
     pangenome: Pangenome,
     input_organisms: Iterable[Organism],
     output: Path,
@@ -749,14 +933,16 @@ def annotate_input_genes_with_pangenome_families(
     tmpdir: Path,
     translation_table: int,
     keep_tmp: bool = False,
+    target_db_cache: Path = None,
+    index_target_db: bool = False,
     disable_bar: bool = False,
-):
+) -> Dict[str, GeneFamily]:
     """
-    Annotate input genes with pangenome gene families by associating them to a cluster.
+    Align the genes of the input genomes to the gene families of the pangenome, in a single alignment.
 
     :param pangenome: Pangenome object.
     :param input_organisms: Iterable of input organism objects.
-    :param output: Output directory for generated files.
+    :param output: Output directory where the sequences of the input genes are written.
     :param cpu: Number of CPU cores to use.
     :param no_defrag: Whether to use defragmentation.
     :param use_representatives: Use representative sequences of gene families rather than all sequence to align input genes
@@ -765,9 +951,11 @@ def annotate_input_genes_with_pangenome_families(
     :param tmpdir: Temporary directory for intermediate files.
     :param translation_table: Translation table ID for nucleotide sequences.
     :param keep_tmp: If True, keep temporary files.
+    :param target_db_cache: Directory where the database of pangenome sequences is cached, to be reused by later runs.
+    :param index_target_db: If True, precompute the index of the cached database of pangenome sequences.
     :param disable_bar: Whether to disable progress bar.
 
-    :return: Number of genes that do not cluster with any of the gene families of the pangenome.
+    :return: Dictionary mapping the ID of the input genes to the gene family they align to.
     """
     logging.getLogger("PPanGGOLiN").info("Writing gene sequences of input genomes.")
 
@@ -795,6 +983,8 @@ def annotate_input_genes_with_pangenome_families(
                 identity=identity,
                 coverage=coverage,
                 translation_table=translation_table,
+                target_db_cache=target_db_cache,
+                index_target_db=index_target_db,
                 disable_bar=disable_bar,
             )
         else:
@@ -810,83 +1000,167 @@ def annotate_input_genes_with_pangenome_families(
                 identity=identity,
                 coverage=coverage,
                 translation_table=translation_table,
+                target_db_cache=target_db_cache,
+                index_target_db=index_target_db,
                 disable_bar=disable_bar,
             )
 
-    input_org_to_lonely_genes_count = {}
-    for input_organism in input_organisms:
-        org_outdir = output / input_organism.name
-        mk_outdir(org_outdir, force=True)
+    return seqid_to_gene_family
 
-        seq_set = {
-            gene.ID if gene.local_identifier == "" else gene.local_identifier
-            for gene in input_organism.genes
-        }
 
-        project_and_write_partition(seqid_to_gene_family, seq_set, org_outdir)
+def assign_input_genes_to_families(
+    pangenome: Pangenome,
+    input_organism: Organism,
+    seqid_to_gene_family: Dict[str, GeneFamily],
+    output: Path,
+) -> int:
+    """
+    Add the genes of an input genome to the pangenome gene families they align to.
+    Genes that do not align to any family are put in new cloud families, specific to the input genome.
 
-        write_gene_to_gene_family(seqid_to_gene_family, seq_set, org_outdir)
+    The gene getter of the pangenome is not rebuilt, this is up to the caller once all genomes have been assigned.
 
-        lonely_genes = set()
-        for gene in input_organism.genes:
-            gene_id = gene.ID
-            try:
-                gene_family = seqid_to_gene_family[gene_id]
-            except KeyError:
-                # the seqid is not in the dict so it does not align with any pangenome families
-                # We consider it as cloud gene
-                try:
-                    # in some case a family exists already and has the same name of the gene id
-                    # So gene id cannot be used
-                    _ = pangenome.get_gene_family(gene_id)
-                except KeyError:
-                    gene_family = GeneFamily(pangenome.max_fam_id, gene_id)
-
-                else:
-                    # gene id already exists.
-                    new_name = f"{input_organism.name}_{gene_id}"
-                    logging.getLogger("PPanGGOLiN").warning(
-                        "The input genome as a specific gene that does not align to any "
-                        f"pangenome families with the same id ({gene_id}) than an existing gene family in the pangenome. "
-                        f"The genome name is added to the family name: {new_name}"
-                    )
-                    gene_family = GeneFamily(pangenome.max_fam_id, new_name)
+    :param pangenome: Pangenome object.
+    :param input_organism: Input genome whose genes are assigned to gene families.
+    :param seqid_to_gene_family: Dictionary mapping the ID of the input genes to the gene family they align to.
+    :param output: Output directory for generated files.
+
+    :return: Number of genes that do not cluster with any of the gene families of the pangenome.
+    """
+    org_outdir = output / input_organism.name
+    mk_outdir(org_outdir, force=True)
 
-                pangenome.add_gene_family(gene_family)
+    seq_set = {
+        gene.ID if gene.local_identifier == "" else gene.local_identifier
+        for gene in input_organism.genes
+    }
 
-                gene_family.partition = "Cloud"
-                lonely_genes.add(gene)
+    project_and_write_partition(seqid_to_gene_family, seq_set, org_outdir)
+
+    write_gene_to_gene_family(seqid_to_gene_family, seq_set, org_outdir)
+
+    lonely_genes = set()
+    for gene in input_organism.genes:
+        gene_id = gene.ID
+        try:
+            gene_family = seqid_to_gene_family[gene_id]
+        except KeyError:
+            # the seqid is not in the dict so it does not align with any pangenome families
+            # We consider it as cloud gene
+            try:
+                # in some case a family exists already and has the same name of the gene id
+                # So gene id cannot be used
+                _ = pangenome.get_gene_family(gene_id)
+            except KeyError:
+                gene_family = GeneFamily(pangenome.max_fam_id, gene_id)
 
-            if gene_family.contains_gene_id(gene_id):
+            else:
+                # gene id already exists.
                 new_name = f"{input_organism.name}_{gene_id}"
                 logging.getLogger("PPanGGOLiN").warning(
-                    "The input genome contains a gene that aligns to a pangenome family "
-                    f"which already contains a gene with the same ID ({gene_id}). "
-                    f"The genome name has been appended to the family name: {new_name}"
+                    "The input genome as a specific gene that does not align to any "
+                    f"pangenome families with the same id ({gene_id}) than an existing gene family in the pangenome. "
+                    f"The genome name is added to the family name: {new_name}"
                 )
+                gene_family = GeneFamily(pangenome.max_fam_id, new_name)
 
-                gene.ID = new_name
+            pangenome.add_gene_family(gene_family)
 
-            # Add the gene to the gene family
-            gene_family.add(gene)
+            gene_family.partition = "Cloud"
+            lonely_genes.add(gene)
+
+        if gene_family.contains_gene_id(gene_id):
+            new_name = f"{input_organism.name}_{gene_id}"
+            logging.getLogger("PPanGGOLiN").warning(
+                "The input genome contains a gene that aligns to a pangenome family "
+                f"which already contains a gene with the same ID ({gene_id}). "
+                f"The genome name has been appended to the family name: {new_name}"
+            )
 
-        pangenome._mk_gene_getter()  # re-build the gene getter
+            gene.ID = new_name
+
+        # Add the gene to the gene family
+        gene_family.add(gene)
+
+    logging.getLogger("PPanGGOLiN").info(
+        f"{input_organism.name} has {len(lonely_genes)}/{input_organism.number_of_genes()} "
+        "specific genes that do not align to any gene of the pangenome."
+    )
+    # Write specific gene ids in a file
+    with open(org_outdir / "specific_genes.tsv", "w") as fl:
+        fl.write(
+            "\n".join(
+                gene.ID if gene.local_identifier == "" else gene.local_identifier
+                for gene in lonely_genes
+            )
+            + "\n"
+        )
+
+    return len(lonely_genes)
+
+
+def annotate_input_genes_with_pangenome_families(
+    pangenome: Pangenome,
+    input_organisms: Iterable[Organism],
+    output: Path,
+    cpu: int,
+    use_representatives: bool,
+    no_defrag: bool,
+    identity: float,
+    coverage: float,
+    tmpdir: Path,
+    translation_table: int,
+    keep_tmp: bool = False,
+    target_db_cache: Path = None,
+    index_target_db: bool = False,
+    disable_bar: bool = False,
+):
+    """
+    Annotate input genes with pangenome gene families by associating them to a cluster.
+
+    :param pangenome: Pangenome object.
+    :param input_organisms: Iterable of input organism objects.
+    :param output: Output directory for generated files.
+    :param cpu: Number of CPU cores to use.
+    :param no_defrag: Whether to use defragmentation.
+    :param use_representatives: Use representative sequences of gene families rather than all sequence to align input genes
+    :param identity: Minimum identity threshold for gene clustering.
+    :param coverage: Minimum coverage threshold for gene clustering.
+    :param tmpdir: Temporary directory for intermediate files.
+    :param translation_table: Translation table ID for nucleotide sequences.
+    :param keep_tmp: If True, keep temporary files.
+    :param target_db_cache: Directory where the database of pangenome sequences is cached, to be reused by later runs.
+    :param index_target_db: If True, precompute the index of the cached database of pangenome sequences.
+    :param disable_bar: Whether to disable progress bar.
+
+    :return: Number of genes that do not cluster with any of the gene families of the pangenome.
+    """
+    seqid_to_gene_family = align_input_genes_to_families(
+        pangenome=pangenome,
+        input_organisms=input_organisms,
+        output=output,
+        cpu=cpu,
+        use_representatives=use_representatives,
+        no_defrag=no_defrag,
+        identity=identity,
+        coverage=coverage,
+        tmpdir=tmpdir,
+        translation_table=translation_table,
+        keep_tmp=keep_tmp,
+        target_db_cache=target_db_cache,
+        index_target_db=index_target_db,
+        disable_bar=disable_bar,
+    )
 
-        logging.getLogger("PPanGGOLiN").info(
-            f"{input_organism.name} has {len(lonely_genes)}/{input_organism.number_of_genes()} "
-            "specific genes that do not align to any gene of the pangenome."
-        )
-        # Write specific gene ids in a file
-        with open(org_outdir / "specific_genes.tsv", "w") as fl:
-            fl.write(
-                "\n".join(
-                    gene.ID if gene.local_identifier == "" else gene.local_identifier
-                    for gene in lonely_genes
-                )
-                + "\n"
+    input_org_to_lonely_genes_count = {}
+    for input_organism in input_organisms:
+        input_org_to_lonely_genes_count[input_organism] = (
+            assign_input_genes_to_families(
+                pangenome, input_organism, seqid_to_gene_family, output
             )
+        )
 
-        input_org_to_lonely_genes_count[input_organism] = len(lonely_genes)
+    pangenome._mk_gene_getter()  # re-build the gene getter
 
     return input_org_to_lonely_genes_count
 
@@ -902,6 +1176,7 @@ def predict_RGP(
     output_dir: Path,
     disable_bar: bool,
     compress: bool,
+    name_scheme: Optional[str] = None,
 ) -> Dict[Organism, Set[Region]]:
     """
     Compute Regions of Genomic Plasticity (RGP) for the given input organisms.
@@ -916,13 +1191,15 @@ def predict_RGP(
     :param output_dir: Output directory where predicted rgps are going to be written.
     :param disable_bar: Flag to disable the progress bar.
     :param compress: Flag to compress the rgp table in gz.
+    :param name_scheme: Naming scheme of the RGPs. If None, it is determined from the contigs of the pangenome and input genomes.
 
     :return: Dictionary mapping organism with the set of predicted regions
     """
 
     logging.getLogger("PPanGGOLiN").info("Computing Regions of Genomic Plasticity...")
 
-    name_scheme = naming_scheme(chain(pangenome.organisms, input_organisms))
+    if name_scheme is None:
+        name_scheme = naming_scheme(chain(pangenome.organisms, input_organisms))
     organism_to_rgps = {}
 
     for input_organism in input_organisms:
@@ -1165,6 +1442,49 @@ def predict_spots_in_input_organisms(
     :return: A dictionary mapping input organism RGPs to their predicted spots.
     """
 
+    graph_spot, border_index, new_spot_id_counter = make_projection_spot_graph(
+        initial_spots,
+        initial_regions,
+        multigenics,
+        overlapping_match=overlapping_match,
+        set_size=set_size,
+        exact_match=exact_match,
+    )
+
+    return project_spots_on_input_organisms(
+        graph_spot,
+        border_index,
+        new_spot_id_counter,
+        input_org_2_rgps,
+        multigenics,
+        output,
+        write_graph_flag=write_graph_flag,
+        graph_formats=graph_formats,
+        set_size=set_size,
+        compress=compress,
+    )
+
+
+def make_projection_spot_graph(
+    initial_spots: List[Spot],
+    initial_regions: List[Region],
+    multigenics: Set[GeneFamily],
+    overlapping_match: int = 2,
+    set_size: int = 3,
+    exact_match: int = 1,
+) -> Tuple[nx.Graph, BorderIndex, int]:
+    """
+    Rebuild the spot graph of the pangenome, onto which the RGPs of the input organisms are projected.
+
+    :param initial_spots: List of original spots in the pangenome.
+    :param initial_regions: List of original regions in the pangenome.
+    :param multigenics: Set of pangenome graph multigenic persistent families.
+    :param overlapping_match: Number of missing persistent genes allowed when comparing flanking genes. Default is 2.
+    :param set_size: Number of single copy markers to use as flanking genes for RGP during hotspot computation. Default is 3.
+    :param exact_match: Number of perfectly matching flanking single copy markers required to associate RGPs. Default is 1.
+
+    :return: The spot graph, the index of its border nodes and the ID of the first new spot.
+    """
     logging.getLogger("PPanGGOLiN").debug("Rebuilding original spot graph.")
     graph_spot = make_spot_graph(
         rgps=initial_regions,
@@ -1174,15 +1494,49 @@ def predict_spots_in_input_organisms(
         exact_match=exact_match,
     )
 
-    original_nodes = set(graph_spot.nodes)
-
     # Check congruency with already computed spot and add spot id in node attributes
     check_spots_congruency(graph_spot, initial_spots)
 
+    # The index is only read when predicting spots of an input organism, so it is shared by all of them
+    border_index = BorderIndex.from_spot_graph(
+        graph_spot, overlapping_match, set_size, exact_match
+    )
+
     new_spot_id_counter = (
         max(s.ID for s in initial_spots) + 1 if len(initial_spots) != 0 else 1
     )
 
+    return graph_spot, border_index, new_spot_id_counter
+
+
+def project_spots_on_input_organisms(
+    graph_spot: nx.Graph,
+    border_index: BorderIndex,
+    new_spot_id_counter: int,
+    input_org_2_rgps: Dict[Organism, Set[Region]],
+    multigenics: Set[GeneFamily],
+    output: Path,
+    write_graph_flag: bool = False,
+    graph_formats: List[str] = ["gexf"],
+    set_size: int = 3,
+    compress: bool = False,
+) -> Dict[Organism, Set[Spot]]:
+    """
+    Predict spots for input organism RGPs using the spot graph of the pangenome.
+
+    :param graph_spot: The spot graph of the pangenome, from make_projection_spot_graph.
+    :param border_index: The index of the border nodes of the spot graph.
+    :param new_spot_id_counter: The ID of the first new spot.
+    :param input_org_2_rgps: Dictionary mapping input organisms to their RGPs.
+    :param multigenics: Set of pangenome graph multigenic persistent families.
+    :param output: Output directory to save the spot graph.
+    :param write_graph_flag: If True, writes the spot graph in the specified formats. Default is False.
+    :param graph_formats: List of graph formats to write (default is ['gexf']).
+    :param set_size: Number of single copy markers to use as flanking genes for RGP during hotspot computation. Default is 3.
+    :param compress: Flag to compress output files
+
+    :return: A dictionary mapping input organism RGPs to their predicted spots.
+    """
     input_org_to_spots = {}
     for input_organism, rgps in input_org_2_rgps.items():
 
@@ -1196,22 +1550,18 @@ def predict_spots_in_input_organisms(
             continue
 
         outdir_org = output / input_organism.name
-        # Copy the graph spot, as each input organism are processed independently
-        graph_spot_cp = graph_spot.copy()
 
         input_org_spots = predict_spot_in_one_organism(
-            graph_spot_cp,
+            graph_spot,
+            border_index,
             input_org_rgps=rgps,
-            original_nodes=original_nodes,
             new_spot_id_counter=new_spot_id_counter,
             multigenics=multigenics,
             organism_name=input_organism.name,
             output=outdir_org,
             write_graph_flag=write_graph_flag,
             graph_formats=graph_formats,
-            overlapping_match=overlapping_match,
             set_size=set_size,
-            exact_match=exact_match,
             compress=compress,
         )
 
@@ -1223,36 +1573,85 @@ def predict_spots_in_input_organisms(
     return input_org_to_spots
 
 
+def write_projected_spot_graph(
+    graph_spot: nx.Graph,
+    input_node_to_borders: Dict[str, List[List[GeneFamily]]],
+    input_node_to_rgps: Dict[str, Set[Region]],
+    input_node_to_spots: Dict[str, Set[Spot]],
+    new_edges: List[Tuple[str, str]],
+    output: Path,
+    graph_formats: List[str] = ["gexf"],
+):
+    """
+    Write the spot graph of the pangenome completed with the nodes of an input organism.
+
+    The pangenome spot graph is copied, so it is not modified.
+
+    :param graph_spot: The spot graph of the pangenome, with spot ids in node attributes.
+    :param input_node_to_borders: Flanking gene families of the input organism nodes.
+    :param input_node_to_rgps: RGPs of the input organism in each of its nodes.
+    :param input_node_to_spots: Spots predicted for each of the input organism nodes.
+    :param new_edges: Edges between the input organism nodes and the other nodes.
+    :param output: Output directory to save the spot graph.
+    :param graph_formats: List of graph formats to write (default is ['gexf']).
+    """
+    graph = graph_spot.copy()
+    for node, rgps in input_node_to_rgps.items():
+        if node in graph:
+            graph.nodes[node]["nb_rgp"] += len(rgps)
+            graph.nodes[node]["rgp"] = graph.nodes[node]["rgp"] | rgps
+        else:
+            graph.add_node(
+                node,
+                nb_rgp=len(rgps),
+                border0=input_node_to_borders[node][0],
+                border1=input_node_to_borders[node][1],
+                rgp=set(rgps),
+            )
+        graph.nodes[node]["spot_id"] = ";".join(
+            str(spot) for spot in input_node_to_spots[node]
+        )
+        graph.nodes[node]["includes_RGPs_from_the_input_genome"] = True
+    graph.add_edges_from(new_edges)
+
+    # remove node that would not be writable in graph file
+    for node in graph.nodes:
+        graph.nodes[node].pop("spots", None)
+
+    write_spot_graph(graph, output, graph_formats, file_basename="projected_spotGraph")
+
+
 def predict_spot_in_one_organism(
     graph_spot: nx.Graph,
+    border_index: BorderIndex,
     input_org_rgps: List[Region],
-    original_nodes: Set[int],
     new_spot_id_counter: int,
     multigenics: Set[GeneFamily],
     organism_name: str,
     output: Path,
     write_graph_flag: bool = False,
     graph_formats: List[str] = ["gexf"],
-    overlapping_match: int = 2,
     set_size: int = 3,
-    exact_match: int = 1,
     compress: bool = False,
 ) -> Set[Spot]:
     """
     Predict spots for input organism RGPs.
 
-    :param graph_spot: The spot graph from the pangenome.
+    The spot graph of the pangenome and its border index are only read, so they can be shared between organisms.
+    Nodes of the input organism are linked to the spots of the pangenome nodes they are similar to,
+    and to the other new nodes of the organism they are similar to. Each connected component of this small graph
+    is then equivalent to a connected component of the pangenome spot graph completed with the organism nodes.
+
+    :param graph_spot: The spot graph from the pangenome, with spots in node attributes.
+    :param border_index: Border index of the spot graph nodes.
     :param input_org_rgps: List of RGPs from the input organism to be associated with spots.
-    :param original_nodes: Set of original nodes in the spot graph.
     :param new_spot_id_counter: Counter for new spot IDs.
     :param multigenics: Set of pangenome graph multigenic persistent families.
     :param organism_name: Name of the input organism.
     :param output: Output directory to save the spot graph.
     :param write_graph_flag: If True, writes the spot graph in the specified formats. Default is False.
     :param graph_formats: List of graph formats to write (default is ['gexf']).
-    :param overlapping_match: Number of missing persistent genes allowed when comparing flanking genes. Default is 2.
     :param set_size: Number of single copy markers to use as flanking genes for RGP during hotspot computation. Default is 3.
-    :param exact_match: Number of perfectly matching flanking single copy markers required to associate RGPs. Default is 1.
     :param compress: Flag to compress output files
 
     Returns:
@@ -1263,6 +1662,7 @@ def predict_spot_in_one_organism(
     used = 0
 
     input_org_node_to_rgps = defaultdict(set)
+    input_org_node_to_borders = {}
 
     for rgp in input_org_rgps:
         border = rgp.get_bordering_genes(set_size, multigenics)
@@ -1270,8 +1670,13 @@ def predict_spot_in_one_organism(
             lost += 1
         else:
             used += 1
-            border_node = add_new_node_in_spot_graph(graph_spot, rgp, border)
+            border_node = get_border_node_name(border)
             input_org_node_to_rgps[border_node].add(rgp)
+            if border_node not in input_org_node_to_borders:
+                input_org_node_to_borders[border_node] = [
+                    [gene.family for gene in border[0]],
+                    [gene.family for gene in border[1]],
+                ]
 
     if len(input_org_node_to_rgps) == 0:
         logging.getLogger("PPanGGOLiN").debug(
@@ -1282,8 +1687,13 @@ def predict_spot_in_one_organism(
         )
         return set()
 
-    # remove node that were already in the graph
-    new_nodes = set(input_org_node_to_rgps) - original_nodes
+    # nodes that were not already in the graph
+    new_nodes = [node for node in input_org_node_to_rgps if node not in border_index]
+    new_nodes_index = BorderIndex(
+        border_index.overlapping_match, border_index.set_size, border_index.exact_match
+    )
+    for node in new_nodes:
+        new_nodes_index.add(node, input_org_node_to_borders[node])
 
     logging.getLogger("PPanGGOLiN").debug(
         f"{organism_name}: {lost} RGPs were not used as they are on a contig border (or have"
@@ -1294,43 +1704,41 @@ def predict_spot_in_one_organism(
         f"{organism_name}: {used} RGPs of the input genome will be associated to a spot of insertion"
     )
 
-    # add potential edges from new nodes to the rest of the nodes
-    all_nodes = list(graph_spot.nodes)
-    for nodei in new_nodes:
-        for nodej in all_nodes:
-            if nodei == nodej:
-                continue
-            node_obj_i = graph_spot.nodes[nodei]
-            node_obj_j = graph_spot.nodes[nodej]
-            if check_sim(
-                [node_obj_i["border0"], node_obj_i["border1"]],
-                [node_obj_j["border0"], node_obj_j["border1"]],
-                overlapping_match,
-                set_size,
-                exact_match,
-            ):
-                graph_spot.add_edge(nodei, nodej)
+    # link input nodes to the spots of the pangenome nodes, which stand for their connected components
+    org_graph = nx.Graph()
+    org_graph.add_nodes_from(input_org_node_to_rgps)
+    new_edges = []
+    for node in input_org_node_to_rgps:
+        if node in border_index:
+            for spot in graph_spot.nodes[node]["spots"]:
+                org_graph.add_edge(node, spot)
+            continue
+        borders = input_org_node_to_borders[node]
+        for similar_node in border_index.similar_nodes(borders):
+            new_edges.append((node, similar_node))
+            for spot in graph_spot.nodes[similar_node]["spots"]:
+                org_graph.add_edge(node, spot)
+        for similar_node in new_nodes_index.similar_nodes(borders):
+            if similar_node != node:
+                new_edges.append((node, similar_node))
+                org_graph.add_edge(node, similar_node)
 
     input_rgp_to_spots = {}
-    new_spots = []
+    input_node_to_spots = {}
 
     # determine spot ids of the new nodes and by extension to their rgps
-    for comp in nx.algorithms.components.connected_components(graph_spot):
+    for comp in nx.algorithms.components.connected_components(org_graph):
         # in very rare case one cc can have several original spots
         # that would mean a new nodes from the input organism have connected two old cc
         # in this case we report the two spots in the output
-        spots_of_the_cc = set()
-        for node in comp:
-            if "spots" in graph_spot.nodes[node]:
-                spots_of_the_cc |= set(graph_spot.nodes[node]["spots"])
+        spots_of_the_cc = {node for node in comp if isinstance(node, Spot)}
 
         if len(spots_of_the_cc) == 0:
             # no spot associated with any node of the cc
             # that means this cc is only composed of new nodes
             # let's add a new spot id
             new_spot = NewSpot(new_spot_id_counter)
-            new_spots.append(new_spot)
-            spots_of_the_cc = {new_spot}  # {f"new_spot_{new_spot_id_counter}"}
+            spots_of_the_cc = {new_spot}
             new_spot_id_counter += 1
 
         elif len(spots_of_the_cc) > 1:
@@ -1344,14 +1752,7 @@ def predict_spot_in_one_organism(
         for node in comp:
             if node in input_org_node_to_rgps:
                 input_rgps_of_the_cc |= input_org_node_to_rgps[node]
-
-                if write_graph_flag:
-                    graph_spot.nodes[node]["spots"] = spots_of_the_cc
-
-                    graph_spot.nodes[node]["spot_id"] = ";".join(
-                        str(spot) for spot in spots_of_the_cc
-                    )
-                    graph_spot.nodes[node]["includes_RGPs_from_the_input_genome"] = True
+                input_node_to_spots[node] = spots_of_the_cc
 
         for spot in spots_of_the_cc:
             for region in input_rgps_of_the_cc:
@@ -1362,12 +1763,14 @@ def predict_spot_in_one_organism(
         )
 
     if write_graph_flag:
-        # remove node that would not be writable in graph file
-        for node in graph_spot.nodes:
-            del graph_spot.nodes[node]["spots"]
-
-        write_spot_graph(
-            graph_spot, output, graph_formats, file_basename="projected_spotGraph"
+        write_projected_spot_graph(
+            graph_spot,
+            input_org_node_to_borders,
+            input_org_node_to_rgps,
+            input_node_to_spots,
+            new_edges,
+            output,
+            graph_formats,
         )
 
     write_rgp_to_spot_table(
@@ -1410,7 +1813,7 @@ def project_and_write_modules(
     for input_organism in input_organisms:
         output_file = output / input_organism.name / "modules_in_input_genome.tsv"
 
-        input_organism_families = list(input_organism.families)
+        input_organism_families = set(input_organism.families)
         counter = 0
         modules_in_input_org = []
         with write_compressed_or_not(output_file, compress) as fout:
@@ -1426,7 +1829,7 @@ def project_and_write_modules(
                     modules_in_input_org.append(mod)
 
                     completion = round(
-                        len(set(input_organism.families) & set(mod.families))
+                        len(input_organism_families & set(mod.families))
                         / len(set(mod.families)),
                         2,
                     )
@@ -1447,6 +1850,472 @@ def project_and_write_modules(
     return input_orgs_to_modules
 
 
+def get_input_genome_naming_scheme(
+    input_organism: Organism,
+    pangenome_contig_names: Set[str],
+    pangenome_name_scheme: str,
+) -> str:
+    """
+    Determine the naming scheme of the RGPs of one input genome, as naming_scheme would do with the contigs
+    of the pangenome genomes and of the input genome, without going through the pangenome contigs again.
+
+    :param input_organism: The input genome.
+    :param pangenome_contig_names: Names of the contigs of the pangenome genomes.
+    :param pangenome_name_scheme: Naming scheme of the contigs of the pangenome genomes alone.
+
+    :return: Naming scheme for the contigs ("contig" or "organism").
+    """
+    if pangenome_name_scheme == "organism":
+        return "organism"
+
+    input_contig_names = set()
+    for contig in input_organism.contigs:
+        if contig.name in pangenome_contig_names or contig.name in input_contig_names:
+            logging.getLogger("PPanGGOLiN").warning(
+                "You have contigs with identical identifiers in your "
+                "assemblies. Identifiers will be supplemented with your "
+                "provided organism names."
+            )
+            return "organism"
+        input_contig_names.add(contig.name)
+    return "contig"
+
+
+def project_genome(
+    pangenome: Pangenome,
+    input_organism: Organism,
+    seqid_to_gene_family: Dict[str, GeneFamily],
+    genome_path: Path,
+    input_type: str,
+    output_dir: Path,
+    pangenome_stats: Tuple[int, Set[GeneFamily], Set[GeneFamily], Set[GeneFamily]],
+    rgp_params: Optional[argparse.Namespace] = None,
+    multigenics: Optional[Set[GeneFamily]] = None,
+    pangenome_contig_names: Optional[Set[str]] = None,
+    pangenome_name_scheme: str = "contig",
+    spot_graph: Optional[Tuple[nx.Graph, BorderIndex, int]] = None,
+    spot_set_size: int = 3,
+    write_spot_graph: bool = False,
+    graph_formats: List[str] = ["gexf"],
+    project_modules: bool = False,
+    module_to_colors: Optional[Dict[Module, str]] = None,
+    write_proksee: bool = False,
+    write_gff: bool = False,
+    write_table: bool = False,
+    add_sequences: bool = False,
+    metadata_sep: str = "|",
+    compress: bool = False,
+) -> Dict[str, Any]:
+    """
+    Project the pangenome onto one input genome whose genes have been aligned to the pangenome families,
+    and write the results of the projection.
+
+    The pangenome is modified as in the projection of all input genomes at once,
+    so it is meant to be a copy that is not used afterward, like the one of a projection worker.
+
+    :param pangenome: The pangenome onto which the projection is performed.
+    :param input_organism: The input genome.
+    :param seqid_to_gene_family: Dictionary mapping the ID of the genes of the input genome to the gene family they align to.
+    :param genome_path: Path to the file of the input genome.
+    :param input_type: The type of input data (e.g., "annotation").
+    :param output_dir: The directory where the output files will be written.
+    :param pangenome_stats: Pangenome values used in the summary, as given by get_pangenome_stats_for_summary.
+    :param rgp_params: RGP parameters of the pangenome. RGPs are not predicted if None.
+    :param multigenics: Multigenic families of the pangenome, used to predict RGPs and spots.
+    :param pangenome_contig_names: Names of the contigs of the pangenome genomes, used to name RGPs.
+    :param pangenome_name_scheme: Naming scheme of the contigs of the pangenome genomes alone.
+    :param spot_graph: The spot graph, its border index and the first new spot ID, from make_projection_spot_graph.
+                       Spots are not predicted if None.
+    :param spot_set_size: Number of single copy markers to use as flanking genes for RGP during hotspot computation.
+    :param write_spot_graph: If True, writes the projected spot graph.
+    :param graph_formats: List of graph formats to write.
+    :param project_modules: Whether to project the modules of the pangenome.
+    :param module_to_colors: Color of the pangenome modules, used in ProkSee files.
+    :param write_proksee: Whether to write ProkSee JSON files.
+    :param write_gff: Whether to write GFF files.
+    :param write_table: Whether to write table files.
+    :param add_sequences: Whether to add sequences to the output files.
+    :param metadata_sep: The separator used to join multiple metadata values.
+    :param compress: Whether to compress the output files.
+
+    :return: Summary of the projection of the genome.
+    """
+    singleton_gene_count = assign_input_genes_to_families(
+        pangenome, input_organism, seqid_to_gene_family, output_dir
+    )
+
+    input_org_rgps, input_org_spots, input_org_modules = None, None, None
+    if rgp_params is not None:
+        name_scheme = get_input_genome_naming_scheme(
+            input_organism, pangenome_contig_names, pangenome_name_scheme
+        )
+        input_org_rgps = predict_RGP(
+            pangenome,
+            [input_organism],
+            persistent_penalty=rgp_params.persistent_penalty,
+            variable_gain=rgp_params.variable_gain,
+            min_length=rgp_params.min_length,
+            min_score=rgp_params.min_score,
+            multigenics=multigenics,
+            output_dir=output_dir,
+            disable_bar=True,
+            compress=compress,
+            name_scheme=name_scheme,
+        )[input_organism]
+
+        if spot_graph is not None:
+            graph_spot, border_index, new_spot_id_counter = spot_graph
+            input_org_spots = project_spots_on_input_organisms(
+                graph_spot,
+                border_index,
+                new_spot_id_counter,
+                {input_organism: input_org_rgps},
+                multigenics,
+                output_dir,
+                write_graph_flag=write_spot_graph,
+                graph_formats=graph_formats,
+                set_size=spot_set_size,
+                compress=compress,
+            )[input_organism]
+
+    if project_modules:
+        input_org_modules = project_and_write_modules(
+            pangenome, [input_organism], output_dir, compress=compress
+        )[input_organism]
+
+    return write_genome_projection_results(
+        pangenome,
+        input_organism,
+        input_org_rgps=input_org_rgps,
+        input_org_spots=input_org_spots,
+        input_org_modules=input_org_modules,
+        singleton_gene_count=singleton_gene_count,
+        pangenome_stats=pangenome_stats,
+        module_to_colors=module_to_colors if module_to_colors else {},
+        write_proksee=write_proksee,
+        write_gff=write_gff,
+        write_table=write_table,
+        add_sequences=add_sequences,
+        genome_path=genome_path,
+        input_type=input_type,
+        output_dir=output_dir,
+        metadata_sep=metadata_sep,
+        compress=compress,
+        need_regions=rgp_params is not None,
+        need_spots=spot_graph is not None,
+        need_modules=project_modules,
+    )
+
+
+def init_projection_worker(pangenome: Pangenome, projection_args: Dict[str, Any]):
+    """
+    Store the pangenome and the arguments of the projection in the worker process.
+    With the fork start method, the pangenome is shared with the main process until it is modified.
+
+    :param pangenome: The pangenome onto which the projection is performed.
+    :param projection_args: Keyword arguments of project_genome shared by all input genomes.
+    """
+    global projection_worker_data
+    projection_worker_data = (pangenome, projection_args)
+
+
+def project_genome_in_worker(
+    packed_genome: Dict[str, Any],
+    gene_to_family_name: Dict[str, str],
+    genome_path: Path,
+) -> Dict[str, Any]:
+    """
+    Project the pangenome stored by :func:`init_projection_worker` onto one input genome.
+
+    :param packed_genome: The input genome, packed with pack_genome.
+    :param gene_to_family_name: Dictionary mapping the ID of the genes of the input genome to the name of the family they align to.
+    :param genome_path: Path to the file of the input genome.
+
+    :return: Summary of the projection of the genome.
+    """
+    pangenome, projection_args = projection_worker_data
+    seqid_to_gene_family = {
+        gene_id: pangenome.get_gene_family(family_name)
+        for gene_id, family_name in gene_to_family_name.items()
+    }
+    return project_genome(
+        pangenome,
+        unpack_genome(packed_genome),
+        seqid_to_gene_family,
+        genome_path,
+        **projection_args,
+    )
+
+
+def collect_batch_summaries(
+    executor: ProcessPoolExecutor,
+    batch_futures: Dict[str, Future],
+    genome_to_summary: Dict[str, Dict[str, Any]],
+):
+    """
+    Wait for the projection of a batch of genomes and shut its pool of workers down.
+
+    :param executor: Pool of workers projecting the batch.
+    :param batch_futures: Dictionary mapping the name of the genomes of the batch to the future of their projection.
+    :param genome_to_summary: Dictionary mapping genome names to their projection summary, updated with the batch.
+    """
+    try:
+        for genome_name, future in batch_futures.items():
+            genome_to_summary[genome_name] = future.result()
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+def project_genomes_in_pipeline(
+    pangenome: Pangenome,
+    genome_name_to_path: Dict[str, dict],
+    input_type: str,
+    genome_name_to_fasta_path: Optional[Dict[str, dict]],
+    pangenome_params: argparse.Namespace,
+    output_dir: Path,
+    batch_size: int,
+    predict_rgp: bool,
+    project_spots: bool,
+    project_modules: bool,
+    multigenics: Optional[Set[GeneFamily]],
+    cpu: int,
+    use_pseudo: bool,
+    config: dict,
+    translation_table: int,
+    use_representatives: bool,
+    no_defrag: bool,
+    identity: float,
+    coverage: float,
+    tmpdir: Path,
+    keep_tmp: bool,
+    target_db_cache: Optional[Path],
+    index_target_db: bool,
+    write_spot_graph: bool,
+    graph_formats: List[str],
+    write_proksee: bool,
+    write_gff: bool,
+    write_table: bool,
+    add_sequences: bool,
+    dup_margin: float,
+    soft_core: float,
+    metadata_sep: str,
+    compress: bool,
+    disable_bar: bool,
+):
+    """
+    Project the pangenome onto many input genomes, by batches of genomes.
+
+    Each batch is annotated, and its genes are aligned to the pangenome families in a single alignment.
+    Each genome of the batch is then projected in a pool of workers forked from the loaded pangenome,
+    along with its spot graph and the values used in the summaries, while the next batch is annotated and aligned.
+    The cpus are split between these two steps when they run at the same time.
+    Only two batches of input genomes are kept in memory at once, and the results of each genome
+    are written as soon as it is projected.
+
+    :param pangenome: The pangenome onto which the projection is performed.
+    :param genome_name_to_path: A dictionary mapping genome names to their files.
+    :param input_type: The input type, either 'annotation' or 'fasta'.
+    :param genome_name_to_fasta_path: FASTA files of the genomes, used when annotation files have no sequences.
+    :param pangenome_params: Parameters used to compute the pangenome.
+    :param output_dir: The directory where the output files will be written.
+    :param batch_size: Number of input genomes annotated and aligned together.
+    :param predict_rgp: Whether to predict RGPs in the input genomes.
+    :param project_spots: Whether to predict spots in the input genomes.
+    :param project_modules: Whether to project the modules of the pangenome.
+    :param multigenics: Multigenic families of the pangenome, computed before any input genome is added.
+    :param cpu: Number of CPUs to use.
+    :param use_pseudo: Flag to use pseudo annotation.
+    :param config: Configuration dictionary.
+    :param translation_table: Translation table (genetic code) to use.
+    :param use_representatives: Use representative sequences of gene families rather than all sequence to align input genes
+    :param no_defrag: Whether to use defragmentation.
+    :param identity: Minimum identity threshold for gene clustering.
+    :param coverage: Minimum coverage threshold for gene clustering.
+    :param tmpdir: Temporary directory for intermediate files.
+    :param keep_tmp: If True, keep temporary files.
+    :param target_db_cache: Directory where the database of pangenome sequences is cached.
+                            If None, the database is cached in a temporary directory for the duration of the projection.
+    :param index_target_db: If True, precompute the index of the cached database of pangenome sequences.
+    :param write_spot_graph: If True, writes the projected spot graph of each input genome.
+    :param graph_formats: List of graph formats to write.
+    :param write_proksee: Whether to write ProkSee JSON files.
+    :param write_gff: Whether to write GFF files.
+    :param write_table: Whether to write table files.
+    :param add_sequences: Whether to add sequences to the output files.
+    :param dup_margin: The duplication margin used to compute completeness.
+    :param soft_core: Soft core threshold
+    :param metadata_sep: The separator used to join multiple metadata values.
+    :param compress: Whether to compress the output files.
+    :param disable_bar: Flag to disable progress bar.
+    """
+    logging.getLogger("PPanGGOLiN").info(
+        "Preparing the pangenome data shared by the projection workers."
+    )
+    projection_args = {
+        "input_type": input_type,
+        "output_dir": output_dir,
+        "pangenome_stats": get_pangenome_stats_for_summary(
+            pangenome, dup_margin, soft_core
+        ),
+        "project_modules": project_modules,
+        "write_proksee": write_proksee,
+        "write_gff": write_gff,
+        "write_table": write_table,
+        "add_sequences": add_sequences,
+        "metadata_sep": metadata_sep,
+        "compress": compress,
+    }
+    if predict_rgp:
+        projection_args.update(
+            {
+                "rgp_params": pangenome_params.rgp,
+                "multigenics": multigenics,
+                "pangenome_contig_names": {contig.name for contig in pangenome.contigs},
+                "pangenome_name_scheme": naming_scheme(pangenome.organisms),
+            }
+        )
+        if project_spots:
+            projection_args.update(
+                {
+                    "spot_graph": make_projection_spot_graph(
+                        list(pangenome.spots),
+                        pangenome.regions,
+                        multigenics,
+                        overlapping_match=pangenome_params.spot.overlapping_match,
+                        set_size=pangenome_params.spot.set_size,
+                        exact_match=pangenome_params.spot.exact_match_size,
+                    ),
+                    "spot_set_size": pangenome_params.spot.set_size,
+                    "write_spot_graph": write_spot_graph,
+                    "graph_formats": graph_formats,
+                }
+            )
+    if write_proksee and project_modules:
+        projection_args["module_to_colors"] = manage_module_colors(
+            set(pangenome.modules)
+        )
+
+    genome_names = list(genome_name_to_path)
+    batches = [
+        genome_names[start : start + batch_size]
+        for start in range(0, len(genome_names), batch_size)
+    ]
+    logging.getLogger("PPanGGOLiN").info(
+        f"Projecting the pangenome onto {len(genome_names)} genomes "
+        f"by batches of {batch_size} genomes using {cpu} cpus..."
+    )
+
+    # The projection of a batch runs while the next batch is annotated and aligned, so they share the cpus.
+    # Each step uses all the cpus when nothing else runs: the preparation of the first batch
+    # and the projection of the last one, or every step with a single cpu.
+    projection_cpu = max(1, cpu // 2)
+    preparation_cpu = max(1, cpu - projection_cpu)
+
+    genome_to_summary = {}
+    with create_tmpdir(
+        main_dir=tmpdir, basename="projection_db_cache", keep_tmp=keep_tmp
+    ) as db_cache_tmpdir:
+        if target_db_cache is None:
+            # The database of pangenome sequences is built once and reused by the alignment of every batch
+            target_db_cache = db_cache_tmpdir
+
+        with tqdm(
+            total=len(genome_names), unit="genome", disable=disable_bar
+        ) as progress:
+            previous_batch = None
+            try:
+                for batch_index, batch in enumerate(batches):
+                    batch_cpu = cpu if previous_batch is None else preparation_cpu
+                    organisms = annotate_input_genomes(
+                        pangenome,
+                        {name: genome_name_to_path[name] for name in batch},
+                        input_type,
+                        genome_name_to_fasta_path,
+                        pangenome_params=pangenome_params,
+                        cpu=batch_cpu,
+                        use_pseudo=use_pseudo,
+                        disable_bar=True,
+                        tmpdir=tmpdir,
+                        config=config,
+                        translation_table=translation_table,
+                    )
+
+                    with create_tmpdir(
+                        main_dir=tmpdir, basename="projection_batch", keep_tmp=keep_tmp
+                    ) as batch_tmpdir:
+                        seqid_to_gene_family = align_input_genes_to_families(
+                            pangenome,
+                            input_organisms=organisms,
+                            output=batch_tmpdir,
+                            cpu=batch_cpu,
+                            use_representatives=use_representatives,
+                            no_defrag=no_defrag,
+                            identity=identity,
+                            coverage=coverage,
+                            tmpdir=tmpdir,
+                            translation_table=translation_table,
+                            keep_tmp=keep_tmp,
+                            target_db_cache=target_db_cache,
+                            index_target_db=index_target_db,
+                            disable_bar=True,
+                        )
+
+                    # The previous batch is done before this one is projected, so only one pool runs at once
+                    if previous_batch is not None:
+                        collect_batch_summaries(*previous_batch, genome_to_summary)
+                        previous_batch = None
+
+                    # Workers modify their copy of the pangenome with the genomes they project.
+                    # A new pool is forked from the untouched pangenome for each batch, so they do not grow.
+                    is_last_batch = batch_index == len(batches) - 1
+                    executor = ProcessPoolExecutor(
+                        mp_context=get_context("fork"),
+                        max_workers=(
+                            cpu if is_last_batch or cpu == 1 else projection_cpu
+                        ),
+                        initializer=init_projection_worker,
+                        initargs=(pangenome, projection_args),
+                    )
+                    batch_futures = {}
+                    for organism in organisms:
+                        gene_to_family_name = {
+                            gene.ID: seqid_to_gene_family[gene.ID].name
+                            for gene in organism.genes
+                            if gene.ID in seqid_to_gene_family
+                        }
+                        future = executor.submit(
+                            project_genome_in_worker,
+                            pack_genome(organism),
+                            gene_to_family_name,
+                            genome_name_to_path[organism.name]["path"],
+                        )
+                        future.add_done_callback(lambda p: progress.update())
+                        batch_futures[organism.name] = future
+                    del organisms, seqid_to_gene_family
+
+                    previous_batch = (executor, batch_futures)
+
+                    if cpu == 1:
+                        # no cpu is left to annotate and align the next batch while this one is projected
+                        collect_batch_summaries(*previous_batch, genome_to_summary)
+                        previous_batch = None
+
+                if previous_batch is not None:
+                    collect_batch_summaries(*previous_batch, genome_to_summary)
+                    previous_batch = None
+            finally:
+                if previous_batch is not None:
+                    previous_batch[0].shutdown(cancel_futures=True)
+
+    write_summaries_in_tsv(
+        [genome_to_summary[genome_name] for genome_name in genome_names],
+        output_file=output_dir / "summary_projection.tsv",
+        dup_margin=dup_margin,
+        soft_core=soft_core,
+        compress=compress,
+    )
+
+
 def infer_input_mode(
     input_file: Path, expected_types: List[str], parser: argparse.ArgumentParser
 ) -> str:
@@ -1603,6 +2472,54 @@ def launch(args: argparse.Namespace):
         # and the same multigenics list as when rgp and spot were predicted
         multigenics = pangenome.get_multigenics(pangenome_params.rgp.dup_margin)
 
+    if args.batch_size is not None:
+        genome_name_to_path, input_type, genome_name_to_fasta_path = (
+            get_input_genome_paths(
+                args.input_mode,
+                args.anno,
+                args.fasta,
+                args.genome_name,
+                args.circular_contigs,
+            )
+        )
+        project_genomes_in_pipeline(
+            pangenome,
+            genome_name_to_path,
+            input_type,
+            genome_name_to_fasta_path,
+            pangenome_params=pangenome_params,
+            output_dir=output_dir,
+            batch_size=args.batch_size,
+            predict_rgp=predict_rgp,
+            project_spots=project_spots,
+            project_modules=project_modules,
+            multigenics=multigenics if predict_rgp else None,
+            cpu=args.cpu,
+            use_pseudo=args.use_pseudo,
+            config=args.config,
+            translation_table=translation_table,
+            use_representatives=args.fast,
+            no_defrag=args.no_defrag,
+            identity=args.identity,
+            coverage=args.coverage,
+            tmpdir=args.tmpdir,
+            keep_tmp=args.keep_tmp,
+            target_db_cache=args.target_db_cache,
+            index_target_db=args.index_target_db,
+            write_spot_graph=args.spot_graph,
+            graph_formats=args.graph_formats,
+            write_proksee=args.proksee,
+            write_gff=args.gff,
+            write_table=args.table,
+            add_sequences=args.add_sequences,
+            dup_margin=args.dup_margin,
+            soft_core=args.soft_core,
+            metadata_sep=args.metadata_sep,
+            compress=args.compress,
+            disable_bar=args.disable_prog_bar,
+        )
+        return
+
     organisms, genome_name_to_path, input_type = manage_input_genomes_annotation(
         pangenome=pangenome,
         input_mode=args.input_mode,
@@ -1631,6 +2548,8 @@ def launch(args: argparse.Namespace):
         tmpdir=args.tmpdir,
         translation_table=translation_table,
         keep_tmp=args.keep_tmp,
+        target_db_cache=args.target_db_cache,
+        index_target_db=args.index_target_db,
         disable_bar=args.disable_prog_bar,
     )
 
@@ -1931,6 +2850,33 @@ def parser_projection(parser: argparse.ArgumentParser):
         help="Keeping temporary files (useful for debugging).",
     )
 
+    optional.add_argument(
+        "--target_db_cache",
+        required=False,
+        type=Path,
+        default=None,
+        help="Directory where the MMseqs2 database of the pangenome sequences is cached, "
+        "to be reused by later runs on the same pangenome.",
+    )
+
+    optional.add_argument(
+        "--index_target_db",
+        required=False,
+        action="store_true",
+        help="Precompute the MMseqs2 index of the cached pangenome sequences database (see --target_db_cache).",
+    )
+
+    optional.add_argument(
+        "--batch_size",
+        required=False,
+        type=min_one,
+        default=None,
+        help="Project the pangenome onto the input genomes by batches of this many genomes. "
+        "Each batch is annotated and aligned at once, then its genomes are projected in parallel "
+        "while the next batch is prepared. Results are written as soon as each genome is projected, "
+        "and memory use is bounded by the batch size. Useful to project many genomes.",
+    )
+
     optional.add_argument(
         "--add_metadata",
         required=False,
@@ -0,0 +1,607 @@
+#!/usr/bin/env python3
+
+# default libraries
+import argparse
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Set, Tuple
+
+# installed libraries
+from tqdm import tqdm
+import tables
+
+# local libraries
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.genome import Gene, Organism
+from ppanggolin.geneFamily import GeneFamily
+from ppanggolin.utils import (
+    restricted_float,
+    create_tmpdir,
+    check_tools_availability,
+    check_translation_table_to_use,
+)
+from ppanggolin.align.alignOnPang import get_input_seq_to_family_with_rep
+from ppanggolin.cluster.cluster import (
+    first_clustering,
+    read_faa,
+    read_tsv,
+    align_rep,
+    refine_clustering,
+)
+from ppanggolin.graph.makeGraph import add_genome_edges
+from ppanggolin.projection.projection import manage_input_genomes_annotation
+from ppanggolin.formats.readBinaries import check_pangenome_info
+from ppanggolin.formats.writeBinaries import write_pangenome, write_status
+from ppanggolin.formats.writeMetadata import write_metadata_metatype
+from ppanggolin.formats.writeSequences import (
+    write_gene_sequences_from_annotations,
+    write_mmseqs_db,
+)
+
+# results that depend on the whole set of genomes and cannot be extended with new genomes
+DOWNSTREAM_STEPS = {
+    "partitioned": "partition",
+    "predictedRGP": "rgp",
+    "spots": "spot",
+    "modules": "module",
+}
+# metadata of these elements are kept, the ones of RGPs, spots and modules are removed with them
+KEPT_METATYPES = ["families", "genomes", "contigs", "genes"]
+
+
+def check_pangenome_for_update(pangenome: Pangenome) -> bool:
+    """
+    Check that the pangenome can be updated with new genomes
+
+    :param pangenome: Pangenome object
+
+    :return: Whether the neighbors graph of the pangenome can be extended with the new genomes
+    """
+    if pangenome.status["genesClustered"] == "No":
+        raise AttributeError(
+            "The pangenome has no gene families. Build them with 'ppanggolin cluster' before adding new genomes."
+        )
+    if pangenome.status["geneFamilySequences"] == "No":
+        raise AttributeError(
+            "The pangenome has no sequences for its gene families, "
+            "so new genes cannot be aligned to the gene families."
+        )
+
+    computed_steps = [
+        step
+        for status, step in DOWNSTREAM_STEPS.items()
+        if pangenome.status[status] != "No"
+    ]
+    if computed_steps:
+        logging.getLogger("PPanGGOLiN").warning(
+            f"The following results depend on all genomes and will be removed from the pangenome: "
+            f"{', '.join(computed_steps)}. Run these steps again once the genomes are added."
+        )
+
+    if pangenome.status["neighborsGraph"] == "No":
+        return False
+    if pangenome.parameters.get("graph", {}).get("remove_high_copy_number", 0) > 0:
+        logging.getLogger("PPanGGOLiN").warning(
+            "The neighbors graph has been built without high copy number families. "
+            "It will be removed as these families may change with the new genomes."
+        )
+        return False
+    return True
+
+
+def add_genomes_to_pangenome(pangenome: Pangenome, organisms: Iterable[Organism]):
+    """
+    Add new genomes to the pangenome, giving their contigs identifiers that follow the ones of the pangenome.
+
+    :param pangenome: Pangenome object with its annotations
+    :param organisms: New genomes to add
+
+    :raises KeyError: If a gene of a new genome has the identifier of a gene of the pangenome
+    """
+    contig_id = max((contig.ID for contig in pangenome.contigs), default=-1) + 1
+    known_gene_ids = {gene.ID for gene in pangenome.genes}
+    for organism in organisms:
+        for contig in sorted(organism.contigs, key=lambda x: x.ID):
+            contig.ID = contig_id
+            contig_id += 1
+        duplicated_ids = {gene.ID for gene in organism.genes} & known_gene_ids
+        if duplicated_ids:
+            raise KeyError(
+                f"{len(duplicated_ids)} gene identifiers of genome {organism.name} are already used in the "
+                f"pangenome: {', '.join(sorted(duplicated_ids)[:10])}. All gene identifiers must be unique."
+            )
+        pangenome.add_organism(organism)
+    pangenome._mk_gene_getter()  # re-build the gene getter
+
+
+def cluster_unassigned_genes(
+    genes: List[Gene],
+    tmpdir: Path,
+    cpu: int = 1,
+    defrag: bool = True,
+    code: int = 11,
+    coverage: float = 0.8,
+    identity: float = 0.8,
+    mode: int = 1,
+    disable_bar: bool = False,
+) -> Tuple[Dict[str, Tuple[str, bool]], Dict[str, str]]:
+    """
+    Cluster the genes that do not align to any gene family of the pangenome among themselves
+
+    :param genes: Genes with no gene family
+    :param tmpdir: Temporary directory
+    :param cpu: number of CPU cores to use
+    :param defrag: Allow to link fragments to their original gene family
+    :param code: Genetic code used
+    :param coverage: minimal coverage threshold for the alignment
+    :param identity: minimal identity threshold for the alignment
+    :param mode: MMseqs2 clustering mode
+    :param disable_bar: Allow to disable progress bar
+
+    :return: Dictionary which link genes to new families and dictionary which link new families to their sequence
+    """
+    seq_nucdb = write_mmseqs_db(
+        (
+            (f"ppanggolin_{gene.ID}", gene.dna)
+            for gene in tqdm(genes, unit="gene", disable=disable_bar)
+            if gene.type == "CDS"
+        ),
+        "unassigned_nucleotides_db",
+        tmpdir,
+        db_type=2,
+    )
+    rep, tsv = first_clustering(seq_nucdb, tmpdir, cpu, code, coverage, identity, mode)
+    fam2seq = read_faa(rep)
+    if not defrag:
+        genes2fam, _ = read_tsv(tsv)
+    else:
+        aln = align_rep(rep, tmpdir, cpu, coverage, identity)
+        genes2fam, fam2seq = refine_clustering(tsv, aln, fam2seq)
+    return genes2fam, fam2seq
+
+
+def add_genes_to_families(
+    pangenome: Pangenome,
+    genes: Iterable[Gene],
+    gene_to_family: Dict[str, GeneFamily],
+    genes2fam: Dict[str, Tuple[str, bool]],
+    fam2seq: Dict[str, str],
+) -> Tuple[Set[GeneFamily], Set[GeneFamily]]:
+    """
+    Add new genes to the gene families they align to, and create the families of the genes clustered together
+
+    :param pangenome: Pangenome object with gene families
+    :param genes: New genes
+    :param gene_to_family: Gene family of the pangenome of each gene aligning to one
+    :param genes2fam: New family of each gene that does not align to the pangenome, and whether it is a fragment
+    :param fam2seq: Protein sequence of each new family
+
+    :return: Families of the pangenome that received new genes, and the new families
+    """
+    name_to_family = {}
+    for family_name, protein in fam2seq.items():
+        representative = pangenome.get_gene(family_name)
+        new_name = family_name
+        try:
+            pangenome.get_gene_family(family_name)
+        except KeyError:
+            pass
+        else:
+            new_name = f"{representative.organism.name}_{family_name}"
+            logging.getLogger("PPanGGOLiN").warning(
+                f"A new gene family has the same name ({family_name}) than an existing gene family "
+                f"of the pangenome. The genome name is added to the family name: {new_name}"
+            )
+        family = GeneFamily(pangenome.max_fam_id, new_name)
+        family.representative = representative
+        family.add_sequence(protein)
+        pangenome.add_gene_family(family)
+        name_to_family[family_name] = family
+
+    updated_families, new_families = set(), set(name_to_family.values())
+    for gene in genes:
+        if gene.ID in gene_to_family:
+            family = gene_to_family[gene.ID]
+            updated_families.add(family)
+        else:
+            family_name, is_frag = genes2fam[gene.ID]
+            family = name_to_family[family_name]
+            gene.is_fragment = is_frag
+        family.add(gene)
+    return updated_families, new_families
+
+
+def update_pangenome(
+    pangenome: Pangenome,
+    organisms: List[Organism],
+    tmpdir: Path,
+    cpu: int = 1,
+    defrag: bool = True,
+    code: int = 11,
+    coverage: float = 0.8,
+    identity: float = 0.8,
+    mode: int = 1,
+    extend_graph: bool = False,
+    keep_tmp: bool = False,
+    disable_bar: bool = False,
+) -> Tuple[Set[GeneFamily], Set[GeneFamily]]:
+    """
+    Add new genomes to a pangenome without clustering again the genes of the pangenome.
+
+    Genes of the new genomes are aligned to the representative sequences of the gene families,
+    and the remaining genes are clustered among themselves into new gene families.
+
+    :param pangenome: Pangenome object with its annotations and gene families
+    :param organisms: New genomes
+    :param tmpdir: Temporary directory
+    :param cpu: number of CPU cores to use
+    :param defrag: Allow to link fragments to their original gene family
+    :param code: Genetic code used
+    :param coverage: minimal coverage threshold for the alignment
+    :param identity: minimal identity threshold for the alignment
+    :param mode: MMseqs2 clustering mode
+    :param extend_graph: Add the edges of the new genomes to the neighbors graph
+    :param keep_tmp: Keep temporary files (useful for debugging).
+    :param disable_bar: Allow to disable progress bar
+
+    :return: Families of the pangenome that received new genes, and the new families
+    """
+    check_tools_availability(["mmseqs"])
+
+    add_genomes_to_pangenome(pangenome, organisms)
+    new_genes = [gene for organism in organisms for gene in organism.genes]
+
+    date = time.strftime("_%Y-%m-%d_%H-%M-%S", time.localtime())
+    dir_name = f"update_tmpdir_{date}_PID{os.getpid()}"
+    with create_tmpdir(tmpdir, basename=dir_name, keep_tmp=keep_tmp) as tmp_path:
+        sequences = tmp_path / "new_genes.fna"
+        write_gene_sequences_from_annotations(
+            new_genes,
+            sequences,
+            add="ppanggolin_",
+            compress=False,
+            disable_bar=disable_bar,
+        )
+        logging.getLogger("PPanGGOLiN").info(
+            f"Aligning {len(new_genes):,} new genes to the gene family representatives..."
+        )
+        _, gene_to_family = get_input_seq_to_family_with_rep(
+            pangenome=pangenome,
+            sequence_files=sequences,
+            output=tmp_path,
+            tmpdir=tmp_path,
+            input_type="nucleotide",
+            is_input_slf=True,
+            cpu=cpu,
+            no_defrag=not defrag,
+            identity=identity,
+            coverage=coverage,
+            translation_table=code,
+            disable_bar=disable_bar,
+        )
+
+        unassigned_genes = [gene for gene in new_genes if gene.ID not in gene_to_family]
+        genes2fam, fam2seq = {}, {}
+        if unassigned_genes:
+            logging.getLogger("PPanGGOLiN").info(
+                f"Clustering the {len(unassigned_genes):,} genes that do not align to any gene family..."
+            )
+            unassigned_dir = tmp_path / "unassigned_genes"
+            unassigned_dir.mkdir()
+            genes2fam, fam2seq = cluster_unassigned_genes(
+                unassigned_genes,
+                unassigned_dir,
+                cpu,
+                defrag,
+                code,
+                coverage,
+                identity,
+                mode,
+                disable_bar=disable_bar,
+            )
+
+    updated_families, new_families = add_genes_to_families(
+        pangenome, new_genes, gene_to_family, genes2fam, fam2seq
+    )
+    logging.getLogger("PPanGGOLiN").info(
+        f"{len(updated_families):,} gene families of the pangenome received new genes "
+        f"and {len(new_families):,} new gene families were created."
+    )
+
+    if extend_graph:
+        logging.getLogger("PPanGGOLiN").info(
+            "Adding the new genomes to the neighbors graph..."
+        )
+        for organism in tqdm(organisms, unit="genome", disable=disable_bar):
+            add_genome_edges(pangenome, organism)
+
+    # everything is rewritten from memory, as annotations and families of the file are completed
+    pangenome.status["genomesAnnotated"] = "Computed"
+    if pangenome.status["geneSequences"] != "No":
+        pangenome.status["geneSequences"] = "Computed"
+    pangenome.status["genesClustered"] = "Computed"
+    pangenome.status["geneFamilySequences"] = "Computed"
+    if pangenome.parameters.get("cluster", {}).get("# defragmentation", False):
+        pangenome.status["defragmented"] = "Computed"
+    pangenome.status["neighborsGraph"] = "Computed" if extend_graph else "No"
+    for status in DOWNSTREAM_STEPS:
+        pangenome.status[status] = "No"
+    for metatype in pangenome.status["metadata"]:
+        if metatype not in KEPT_METATYPES:
+            pangenome.status["metadata"][metatype] = "No"
+            pangenome.status["metasources"][metatype] = []
+
+    for step in ["partition", "rarefaction", "rgp", "spot", "module"] + (
+        [] if extend_graph else ["graph"]
+    ):
+        pangenome.parameters.pop(step, None)
+    pangenome.parameters["update"] = {
+        "# added_genomes": len(organisms),
+        "# updated_families": len(updated_families),
+        "# new_families": len(new_families),
+        "coverage": coverage,
+        "identity": identity,
+        "mode": mode,
+        "no_defrag": not defrag,
+        "translation_table": code,
+    }
+
+    return updated_families, new_families
+
+
+def write_kept_metadata(
+    pangenome: Pangenome, h5f: tables.File, disable_bar: bool = False
+):
+    """
+    Write all the sources of metadata of the genomes, contigs, genes and gene families of the pangenome
+
+    :param pangenome: Updated pangenome object
+    :param h5f: HDF5 file of the updated pangenome
+    :param disable_bar: Allow to disable progress bar
+    """
+    for metatype in KEPT_METATYPES:
+        sources = set()
+        for element in pangenome.select_elem(metatype):
+            sources |= set(element.sources)
+        for source in sorted(sources):
+            write_metadata_metatype(
+                h5f,
+                source,
+                metatype,
+                list(pangenome.get_elem_by_source(source, metatype)),
+                disable_bar,
+            )
+        pangenome.status["metadata"][metatype] = "Loaded" if sources else "No"
+        pangenome.status["metasources"][metatype] = sorted(sources)
+
+
+def write_updated_pangenome(pangenome: Pangenome, disable_bar: bool = False):
+    """
+    Write the updated pangenome in a new file that replaces the pangenome file once completely written
+
+    :param pangenome: Updated pangenome object
+    :param disable_bar: Allow to disable progress bar
+    """
+    pangenome_file = Path(pangenome.file)
+    updated_file = pangenome_file.parent / f".{pangenome_file.name}.update"
+    write_pangenome(pangenome, updated_file, disable_bar=disable_bar)
+    with tables.open_file(updated_file, "a") as h5f:
+        write_kept_metadata(pangenome, h5f, disable_bar=disable_bar)
+        write_status(pangenome, h5f)
+    os.replace(updated_file, pangenome_file)
+    logging.getLogger("PPanGGOLiN").info(
+        f"The updated pangenome replaced the former one: {pangenome_file}"
+    )
+
+
+def launch(args: argparse.Namespace):
+    """
+    Command launcher
+
+    :param args: All arguments provide by user
+    """
+    pangenome = Pangenome()
+    pangenome.add_file(args.pangenome)
+
+    specified_args = getattr(args, "specified_args", set())
+    translation_table = check_translation_table_to_use(
+        pangenome,
+        "translation_table" in specified_args,
+        args.translation_table,
+    )
+    # clustering parameters of the pangenome are used unless the user specified them
+    cluster_params = pangenome.parameters.get("cluster", {})
+    for param in ["identity", "coverage", "mode"]:
+        if param not in specified_args and param in cluster_params:
+            setattr(args, param, cluster_params[param])
+
+    extend_graph = check_pangenome_for_update(pangenome)
+    metatypes = {
+        metatype
+        for metatype in KEPT_METATYPES
+        if pangenome.status["metadata"][metatype] != "No"
+    }
+    check_pangenome_info(
+        pangenome,
+        need_annotations=True,
+        need_families=True,
+        need_graph=extend_graph,
+        need_gene_sequences=pangenome.status["geneSequences"] != "No",
+        need_metadata=len(metatypes) > 0,
+        metatypes=metatypes,
+        disable_bar=args.disable_prog_bar,
+    )
+
+    organisms, _, _ = manage_input_genomes_annotation(
+        pangenome=pangenome,
+        input_mode="multiple",
+        anno=args.anno,
+        fasta=args.fasta,
+        organism_name=None,
+        circular_contigs=None,
+        pangenome_params=argparse.Namespace(
+            **{
+                step: argparse.Namespace(**k_v)
+                for step, k_v in pangenome.parameters.items()
+            }
+        ),
+        cpu=args.cpu,
+        use_pseudo=args.use_pseudo,
+        disable_bar=args.disable_prog_bar,
+        tmpdir=args.tmpdir,
+        config=args.config,
+        translation_table=translation_table,
+    )
+
+    update_pangenome(
+        pangenome,
+        organisms,
+        args.tmpdir,
+        args.cpu,
+        defrag=not args.no_defrag,
+        code=translation_table,
+        coverage=args.coverage,
+        identity=args.identity,
+        mode=args.mode,
+        extend_graph=extend_graph,
+        keep_tmp=args.keep_tmp,
+        disable_bar=args.disable_prog_bar,
+    )
+    write_updated_pangenome(pangenome, disable_bar=args.disable_prog_bar)
+
+
+def subparser(sub_parser: argparse._SubParsersAction) -> argparse.ArgumentParser:
+    """
+    Subparser to launch PPanGGOLiN in Command line
+
+    :param sub_parser : sub_parser for update command
+
+    :return : parser arguments for update command
+    """
+    parser = sub_parser.add_parser(
+        "update", formatter_class=argparse.RawTextHelpFormatter
+    )
+    parser.description = "Add new genomes to the gene families of a pangenome"
+    parser.category = "Expert"
+    parser_update(parser)
+    return parser
+
+
+def parser_update(parser: argparse.ArgumentParser):
+    """
+    Parser for specific argument of update command
+
+    :param parser: parser for update argument
+    """
+    required = parser.add_argument_group(
+        title="Required arguments",
+        description="The pangenome and one of the following arguments are required :",
+    )
+    required.add_argument(
+        "-p", "--pangenome", required=False, type=Path, help="The pangenome .h5 file"
+    )
+    required.add_argument(
+        "--fasta",
+        required=False,
+        type=Path,
+        help="A tab-separated file listing the genome names, and the fasta filepath of its genomic "
+        "sequence(s) (the fastas can be compressed with gzip). One line per genome.",
+    )
+    required.add_argument(
+        "--anno",
+        required=False,
+        type=Path,
+        help="A tab-separated file listing the genome names, and the gff/gbff filepath of its "
+        "annotations (the files can be compressed with gzip). One line per genome. "
+        "If this is provided, those annotations will be used.",
+    )
+    clust = parser.add_argument_group(
+        title="Clustering arguments",
+        description="If not specified, the values used to cluster the genes of the pangenome are used.",
+    )
+    clust.add_argument(
+        "--identity",
+        required=False,
+        type=restricted_float,
+        default=0.8,
+        help="Minimal identity percent for two proteins to be in the same cluster",
+    )
+    clust.add_argument(
+        "--coverage",
+        required=False,
+        type=restricted_float,
+        default=0.8,
+        help="Minimal coverage of the alignment for two proteins to be in the same cluster",
+    )
+    clust.add_argument(
+        "--mode",
+        required=False,
+        default="1",
+        choices=["0", "1", "2", "3"],
+        help="the cluster mode of MMseqs2 used to cluster the genes that do not align to the gene families. "
+        "0: Setcover, 1: single linkage (or connected component), 2: CD-HIT-like, 3: CD-HIT-like (lowmem)",
+    )
+    clust.add_argument(
+        "--no_defrag",
+        required=False,
+        default=False,
+        action="store_true",
+        help="DO NOT Use the defragmentation strategy to link potential fragments "
+        "with their original gene family.",
+    )
+    optional = parser.add_argument_group(title="Optional arguments")
+    optional.add_argument(
+        "--translation_table",
+        required=False,
+        default=11,
+        type=int,
+        help="Translation table (genetic code) to use. "
+        "If not specified, the translation table used when building the pangenome will be used. "
+        "This can be accessed using 'ppanggolin info'.",
+    )
+    optional.add_argument(
+        "--use_pseudo",
+        required=False,
+        action="store_true",
+        help="In the context of provided annotation, use this option to read pseudogenes. "
+        "(Default behavior is to ignore them)",
+    )
+    optional.add_argument(
+        "-c",
+        "--cpu",
+        required=False,
+        default=1,
+        type=int,
+        help="Number of available cpus",
+    )
+    optional.add_argument(
+        "--tmpdir",
+        required=False,
+        type=Path,
+        default=Path(tempfile.gettempdir()),
+        help="directory for storing temporary files",
+    )
+    optional.add_argument(
+        "--keep_tmp",
+        required=False,
+        default=False,
+        action="store_true",
+        help="Keeping temporary files (useful for debugging).",
+    )
+
+
+if __name__ == "__main__":
+    """To test local change and allow using debugger"""
+    from ppanggolin.utils import set_verbosity_level, add_common_arguments
+
+    main_parser = argparse.ArgumentParser(
+        description="Depicting microbial species diversity via a Partitioned PanGenome Graph Of Linked Neighbors",
+        formatter_class=argparse.RawTextHelpFormatter,
+    )
+    parser_update(main_parser)
+    add_common_arguments(main_parser)
+    set_verbosity_level(main_parser.parse_args())
+    launch(main_parser.parse_args())
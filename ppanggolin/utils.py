@@ -22,7 +22,6 @@ from typing import (
     Set,
     Iterable,
     Dict,
-    Any,
     Optional,
 )
 from contextlib import contextmanager
@@ -33,7 +32,6 @@ import re
 import subprocess
 import shutil
 
-import networkx as nx
 from importlib.metadata import distribution
 from numpy import repeat
 from collections.abc import Callable
@@ -318,6 +316,7 @@ def is_compressed(
 
 def read_compressed_or_not(
     file_or_file_path: Union[Path, BinaryIO, TextIOWrapper, TextIO],
+    binary: bool = False,
 ) -> Union[TextIOWrapper, BinaryIO, TextIO]:
     """
     Opens and reads a file, decompressing it if necessary.
@@ -325,6 +324,7 @@ def read_compressed_or_not(
     Parameters:
     file (pathlib.Path, io.BytesIO, io.TextIOWrapper, io.TextIOBase): The file to read.
     It can be a Path object from the pathlib module, a BytesIO object, a TextIOWrapper, or TextIOBase object.
+    binary (bool): Open the file in binary mode rather than in text mode.
 
     Returns:
     str: The contents of the file, decompressed if it was a recognized compressed format.
@@ -332,12 +332,13 @@ def read_compressed_or_not(
     Raises:
     TypeError: If the file type is not supported.
     """
+    mode = "rb" if binary else "rt"
     is_comp, comp_type = is_compressed(file_or_file_path)
     if is_comp:
         if comp_type == "gzip":
-            return gzip.open(file_or_file_path, "rt")
+            return gzip.open(file_or_file_path, mode)
         elif comp_type == "bz2":
-            return bz2.open(file_or_file_path, "rt")
+            return bz2.open(file_or_file_path, mode)
         elif comp_type == "xz":
             raise NotImplementedError(
                 "Unfortunately PPanGGOLiN does not support xz compressed files. "
@@ -350,10 +351,12 @@ def read_compressed_or_not(
                 )
                 file_list = z.namelist()
                 if file_list:
+                    if binary:
+                        return z.open(file_list[0], "r")
                     return TextIOWrapper(z.open(file_list[0], "r"))
     else:  # Non-compressed file
         if isinstance(file_or_file_path, Path):
-            return open(file_or_file_path)
+            return open(file_or_file_path, mode)
         else:
             return file_or_file_path
 
@@ -498,75 +501,6 @@ def min_one(x) -> int:
     return x
 
 
-def connected_components(g: nx.Graph, removed: set, weight: float):
-    """
-    Yields subgraphs of each connected component you get when filtering edges based on the given weight.
-
-    :param g: Subgraph
-    :param removed: removed node
-    :param weight: threshold to remove node or not
-    """
-    for v in g.nodes:
-        if v not in removed:
-            c = set(_plain_bfs(g, v, removed, weight))
-            yield c
-            removed.update(c)
-
-
-def _plain_bfs(g: nx.Graph, source: Any, removed: set, weight: float):
-    """
-    A fast BFS node generator, copied from networkx then adapted to the current use case
-
-    :param g: graph with the nodes
-    :param source: current node
-    :param removed: set of removed nodes
-    :param weight: threshold to remove node or not
-
-    """
-
-    nextlevel = {source}
-    while nextlevel:
-        thislevel = nextlevel
-        nextlevel = set()
-        for v in thislevel:
-            if v not in removed:
-                yield v
-                removed.add(v)
-
-                for n in g.neighbors(v):
-                    if n not in removed:
-                        edge_genes_v = g[v][n]["genes"][v]
-                        edge_genes_n = g[v][n]["genes"][n]
-                        # if the edge is indeed existent for most genes of both families, we use it
-                        if (
-                            len(edge_genes_n) / len(g.nodes[n]["genes"]) >= weight
-                            and len(edge_genes_v) / len(g.nodes[v]["genes"]) >= weight
-                        ):
-                            nextlevel.add(n)
-
-
-def add_gene(obj, gene, fam_split: bool = True):
-    """
-
-    :param obj:
-    :param gene:
-    :param fam_split:
-    """
-    if fam_split:
-        try:
-            obj["genes"][gene.family].add(gene)
-        except KeyError:
-            try:
-                obj["genes"][gene.family] = {gene}
-            except KeyError:
-                obj["genes"] = {gene.family: {gene}}
-    else:
-        try:
-            obj["genes"].add(gene)
-        except KeyError:
-            obj["genes"] = {gene}
-
-
 def check_option_workflow(args):
     """
     Check if the given argument to a workflow command is usable
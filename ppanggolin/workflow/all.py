@@ -66,6 +66,9 @@ def launch_workflow(
     pangenome = Pangenome()
 
     filename = mk_file_name(args.basename, args.output, args.force)
+    timings_file = (
+        args.output / "annotation_timings.tsv" if args.annotate.timings else None
+    )
 
     writing_time, anno_time, clust_time, mod_time, desc_time = (
         None,
@@ -85,6 +88,7 @@ def launch_workflow(
             cpu=args.annotate.cpu,
             translation_table=args.annotate.translation_table,
             is_translation_table_specified=is_translation_table_specified,
+            timings_file=timings_file,
             disable_bar=args.disable_prog_bar,
         )
         anno_time = time.time() - start_anno
@@ -157,6 +161,12 @@ def launch_workflow(
             kingdom=args.annotate.kingdom,
             norna=args.annotate.norna,
             allow_overlap=args.annotate.allow_overlap,
+            all_overlaps=args.annotate.all_overlaps,
+            timings_file=timings_file,
+            training_info_file=args.annotate.training_info,
+            training_genomes=args.annotate.training_genomes,
+            min_coding_density=args.annotate.min_coding_density,
+            rna_batch_size=args.annotate.rna_batch_size,
         )
         anno_time = time.time() - start_anno
 
@@ -177,3 +177,27 @@ def test_projection_pyrodigal_gbk(gbff_wf_pangenome, tmp_path):
         f"-o {outdir}"
     )
     run_ppanggolin_command(cmd)
+
+
+def test_projection_from_list_of_fasta_by_batches(
+    gbff_wf_pangenome, make_head_list, tmp_path, num_cpus
+):
+    head_file = make_head_list("testingDataset/genomes.fasta.list", n=5)
+    outdir = tmp_path / "projection_from_list_of_fasta_by_batches"
+
+    cmd = (
+        f"ppanggolin projection --pangenome {gbff_wf_pangenome} "
+        f"-o {outdir} --fasta {head_file} --batch_size 2 --table --cpu {num_cpus}"
+    )
+    run_ppanggolin_command(cmd)
+
+    with open(outdir / "summary_projection.tsv") as fin:
+        summary_lines = [
+            line for line in fin.read().splitlines() if not line.startswith("#")
+        ]
+    with open(head_file) as fin:
+        genome_names = [line.split("\t")[0] for line in fin]
+
+    assert [line.split("\t")[0] for line in summary_lines[1:]] == genome_names
+    for genome_name in genome_names:
+        assert (outdir / genome_name / "projection_summary.yaml").exists()
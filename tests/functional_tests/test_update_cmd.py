@@ -0,0 +1,43 @@
+import shutil
+
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.formats.readBinaries import (
+    check_pangenome_info,
+    get_number_of_organisms,
+)
+from tests.utils.run_ppanggolin import run_ppanggolin_command
+from tests.functional_tests.test_fasta_all_wf import fasta_all_wf_pangenome
+from tests.functional_tests.test_projection import make_head_list
+
+"""
+cp mybasicpangenome/pangenome.h5 updated_pangenome.h5
+head -n 2 genomes.gbff.list | sed 's/^/new_genome_/g' > genomes.gbff.head.list
+ppanggolin update -p updated_pangenome.h5 --anno genomes.gbff.head.list --cpu $NUM_CPUS
+"""
+
+
+def test_update_with_gbff(fasta_all_wf_pangenome, make_head_list, tmp_path, num_cpus):
+    pangenome_file = tmp_path / "pangenome.h5"
+    shutil.copy(fasta_all_wf_pangenome, pangenome_file)
+    head_file = make_head_list(
+        "testingDataset/genomes.gbff.list", prefix="new_genome_", n=2
+    )
+
+    cmd = f"ppanggolin update -p {pangenome_file} --anno {head_file} --cpu {num_cpus}"
+    run_ppanggolin_command(cmd)
+
+    initial_pangenome = Pangenome()
+    initial_pangenome.add_file(fasta_all_wf_pangenome)
+    pangenome = Pangenome()
+    pangenome.add_file(pangenome_file)
+    check_pangenome_info(
+        pangenome, need_annotations=True, need_families=True, disable_bar=True
+    )
+
+    assert pangenome.number_of_organisms == (
+        get_number_of_organisms(initial_pangenome) + 2
+    )
+    assert all(gene.family is not None for gene in pangenome.genes)
+    assert pangenome.status["neighborsGraph"] == "inFile"
+    assert pangenome.status["partitioned"] == "No"
+    assert pangenome.status["predictedRGP"] == "No"
@@ -1,8 +1,21 @@
+import json
+import threading
 import pytest
+from pathlib import Path
 from typing import List
 from random import choice, randint
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
 
-from ppanggolin.align.alignOnPang import get_seq_ids
+from ppanggolin.align.alignOnPang import (
+    get_seq_ids,
+    get_target_db,
+    split_sequence_file,
+    search_chunks,
+)
+from ppanggolin.align.alignServer import AlignmentService, make_server
+from ppanggolin.geneFamily import GeneFamily
+from ppanggolin.pangenome import Pangenome
 
 
 @pytest.fixture
@@ -86,3 +99,120 @@ def test_get_seq_ids_multi_line_aa(multi_line_fasta_aa):
     assert seq_set == {"Gene_1", "Gene_2"}
     assert not is_nucleotide
     assert not single_line_fasta
+
+
+@pytest.fixture
+def pangenome_with_sequences(tmp_path) -> Pangenome:
+    pangenome_file = tmp_path / "pangenome.h5"
+    pangenome_file.write_bytes(b"pangenome content")
+    pangenome = Pangenome()
+    pangenome.file = pangenome_file.as_posix()
+    for i, sequence in enumerate(["MKLV", "MKKA"]):
+        family = GeneFamily(i, f"family_{i}")
+        family.add_sequence(sequence)
+        pangenome.add_gene_family(family)
+    return pangenome
+
+
+def test_get_target_db_from_cache(pangenome_with_sequences, tmp_path):
+    cache = tmp_path / "cache"
+    target_db = get_target_db(
+        pangenome_with_sequences,
+        tmp_path,
+        use_representatives=True,
+        target_db_cache=cache,
+        disable_bar=True,
+    )
+    assert target_db.parent.parent == cache
+    assert target_db.read_bytes() == b"MKLV\n\0MKKA\n\0"
+
+    # the database is not written again when the pangenome is unchanged
+    pangenome_with_sequences.get_gene_family("family_0").add_sequence("MAAA")
+    assert (
+        get_target_db(
+            pangenome_with_sequences,
+            tmp_path,
+            use_representatives=True,
+            target_db_cache=cache,
+            disable_bar=True,
+        )
+        == target_db
+    )
+    assert target_db.read_bytes() == b"MKLV\n\0MKKA\n\0"
+
+    # but a new one is when the pangenome file changes
+    Path(pangenome_with_sequences.file).write_bytes(b"updated pangenome content")
+    new_target_db = get_target_db(
+        pangenome_with_sequences,
+        tmp_path,
+        use_representatives=True,
+        target_db_cache=cache,
+        disable_bar=True,
+    )
+    assert new_target_db != target_db
+    assert new_target_db.read_bytes() == b"MAAA\n\0MKKA\n\0"
+
+
+def test_split_sequence_file(multi_line_fasta_nt, tmp_path):
+    sequence_file = tmp_path / "sequences.fasta"
+    sequence_file.write_text("".join(multi_line_fasta_nt * 3))
+    outdir = tmp_path / "chunks"
+    outdir.mkdir()
+
+    chunk_files = list(split_sequence_file(sequence_file, 4, outdir))
+
+    assert [chunk_file.parent.name for chunk_file in chunk_files] == [
+        "chunk_0",
+        "chunk_1",
+    ]
+    assert chunk_files[0].read_text() == (
+        ">Gene_1 seq_description\nATGCGTTGTCGTTG\n>Gene_2\nTGTGACCTGCT\n" * 2
+    )
+    assert chunk_files[1].read_text() == (
+        ">Gene_1 seq_description\nATGCGTTGTCGTTG\n>Gene_2\nTGTGACCTGCT\n"
+    )
+
+
+def test_search_chunks(single_line_fasta_nt, single_line_fasta_aa, tmp_path):
+    chunk_files = []
+    for i, lines in enumerate(
+        [single_line_fasta_nt, single_line_fasta_aa, single_line_fasta_nt]
+    ):
+        chunk_file = tmp_path / f"chunk_{i}.fasta"
+        chunk_file.write_text("".join(lines))
+        chunk_files.append(chunk_file)
+
+    def search(chunk_file, input_type):
+        return tmp_path / f"{chunk_file.stem}_{input_type}.tsv"
+
+    results = list(search_chunks(chunk_files, search, search_jobs=2))
+
+    # results keep the chunk order, and the sequence type is guessed from the first chunk
+    assert results == [
+        ({"Gene_1", "Gene_2"}, tmp_path / f"chunk_{i}_nucleotide.tsv") for i in range(3)
+    ]
+
+
+def test_alignment_server(pangenome_with_sequences, tmp_path):
+    service = AlignmentService(
+        pangenome_with_sequences, tmp_path, use_representatives=True, disable_bar=True
+    )
+    assert service.describe("Gene_1", None)["partition"] == "cloud"
+
+    server = make_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    url = f"http://127.0.0.1:{server.server_port}"
+    try:
+        with urlopen(f"{url}/status") as response:
+            status = json.load(response)
+        assert status["gene_families"] == 2
+        assert status["target"] == "representatives"
+
+        # a request without any sequence is rejected
+        with pytest.raises(HTTPError) as error:
+            urlopen(Request(f"{url}/align", data=b"", method="POST"))
+        assert error.value.code == 400
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -1,12 +1,23 @@
 import pytest
+import random
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-from ppanggolin.genome import Contig
+from tqdm import tqdm
+
+from ppanggolin.genome import Contig, Gene, Organism, RNA
+from ppanggolin.pangenome import Pangenome
 from ppanggolin.annotate.annotate import (
     extract_positions,
     read_anno_file,
+    pack_genome,
+    unpack_genome,
     parse_contig_header_lines,
     parse_gbff_by_contig,
+    read_gbff_records,
+    read_gff_sections,
+    run_largest_genomes_first,
     parse_feature_lines,
     parse_dna_seq_lines,
     read_org_gbff,
@@ -14,9 +25,26 @@ from ppanggolin.annotate.annotate import (
     fix_partial_gene_coordinates,
     shift_start_coordinates,
     shift_end_coordinates,
+    create_training_info_file,
+    annotate_pangenome,
 )
 
-from ppanggolin.annotate.synta import check_sequence_tuple, parse_fasta
+from ppanggolin.annotate.synta import (
+    check_sequence_tuple,
+    create_rna_genes,
+    get_dna_sequence,
+    get_dna_sequences,
+    launch_prodigal,
+    overlap_filter,
+    parse_aragorn_output,
+    parse_fasta,
+    parse_fasta_buffer,
+    parse_infernal_output,
+    read_training_info,
+    reverse_complement,
+    split_batch_hits,
+)
+from ppanggolin.utils import read_compressed_or_not
 
 
 @pytest.mark.parametrize(
@@ -193,6 +221,55 @@ def test_read_anno_file_with_pseudo_enable(genome_data):
     assert genome.number_of_contigs == 1
 
 
+def test_pack_and_unpack_genome(genome_data_with_joined_genes):
+    """
+    Test that a genome sent between processes in its packed form is built back identically.
+    """
+    genome_name, genome_path, circular_contigs = genome_data_with_joined_genes
+    genome, _ = read_anno_file(genome_name, genome_path, circular_contigs, True)
+
+    unpacked = unpack_genome(pack_genome(genome))
+
+    assert unpacked.name == genome.name
+    assert list(unpacked.metadata) == list(genome.metadata)
+    assert unpacked.number_of_rnas() == genome.number_of_rnas() > 0
+    for contig, unpacked_contig in zip(genome.contigs, unpacked.contigs):
+        assert (unpacked_contig.ID, unpacked_contig.name, unpacked_contig.length) == (
+            contig.ID,
+            contig.name,
+            contig.length,
+        )
+        assert unpacked_contig.is_circular == contig.is_circular
+        assert list(unpacked_contig.metadata) == list(contig.metadata)
+        assert {rna.ID for rna in unpacked_contig.RNAs} == {
+            rna.ID for rna in contig.RNAs
+        }
+        for gene, unpacked_gene in zip(contig.genes, unpacked_contig.genes):
+            assert unpacked_gene.organism is unpacked
+            assert unpacked_gene.contig is unpacked_contig
+            assert unpacked_contig[gene.position] is unpacked_gene
+            for attribute in [
+                "ID",
+                "type",
+                "name",
+                "product",
+                "local_identifier",
+                "start",
+                "stop",
+                "strand",
+                "coordinates",
+                "is_fragment",
+                "position",
+                "genetic_code",
+                "frame",
+                "is_partial",
+                "dna",
+            ]:
+                assert getattr(unpacked_gene, attribute) == getattr(gene, attribute)
+    assert unpacked.number_of_genes() == genome.number_of_genes()
+    assert any(len(gene.coordinates) > 1 for gene in unpacked.genes)
+
+
 def test_with_joined_genes(genome_data_with_joined_genes):
     genome_name, genome_path, circular_contigs = genome_data_with_joined_genes
     use_pseudogene = True
@@ -304,6 +381,55 @@ def test_parse_gbff_by_contig(sample_gbff_path):
     assert sequence_2 == "AAACCGGGTTCCAAATTTGGGGCCCCTTTT"
 
 
+def test_read_gbff_records_across_blocks(sample_gbff_path):
+    records = list(read_gbff_records(sample_gbff_path, block_size=7))
+    assert records == list(read_gbff_records(sample_gbff_path))
+    assert len(records) == 2
+    assert records[0].startswith(b"LOCUS       NC_022109")
+    assert records[1].strip().startswith(b"LOCUS       NC_022110")
+
+
+def test_parse_gbff_by_contig_selected_features(tmp_path):
+    gbff_file_path = tmp_path / "sample.gbff"
+    gbff_file_path.write_text(
+        """LOCUS       contig_1                  20 bp    DNA     linear
+FEATURES             Location/Qualifiers
+     gene            1..9
+                     /locus_tag="ABC_1"
+     CDS             join(1..3,
+                     7..9)
+                     /locus_tag="ABC_1"
+                     /product="a product written
+                     on two lines"
+                     /db_xref="GI:1"
+                     /db_xref="GeneID:2"
+                     /pseudo
+                     /translation="MKLVAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA
+                     AAAAAAAAA"
+ORIGIN
+        1 aaaccgggtt ccaaatttgg
+"""
+    )
+    features_to_parse = {"CDS": {"locus_tag", "product", "db_xref", "pseudo"}}
+
+    ((header, features, sequence),) = parse_gbff_by_contig(
+        gbff_file_path, features_to_parse
+    )
+
+    assert header == {"LOCUS": "contig_1                  20 bp    DNA     linear"}
+    assert list(features) == [
+        {
+            "feature_type": "CDS",
+            "location": "join(1..3, 7..9)",
+            "locus_tag": "ABC_1",
+            "product": "a product written on two lines",
+            "db_xref": {"GI:1", "GeneID:2"},
+            "pseudo": "pseudo",
+        }
+    ]
+    assert sequence == "AAACCGGGTTCCAAATTTGG"
+
+
 # Define test cases
 @pytest.mark.parametrize(
     "input_lines, expected_output",
@@ -569,3 +695,346 @@ def test_parse_fasta_no_header():
     fasta_data = "seq1\nATGC\nseq2\nGCTA".split("\n")
     with pytest.raises(ValueError):
         list(parse_fasta(fasta_data))
+
+
+def test_parse_fasta_buffer_valid():
+    fasta_data = b">seq1 description\nAT\nGC\r\n>seq2\r\nGCTA\n\n"
+
+    result = list(parse_fasta_buffer(fasta_data))
+
+    assert result == [("seq1", "ATGC"), ("seq2", "GCTA")]
+
+
+def test_parse_fasta_buffer_empty_sequence():
+    with pytest.raises(ValueError):
+        list(parse_fasta_buffer(b">seq1\n>seq2\nGCTA"))
+
+
+def test_parse_fasta_buffer_no_header():
+    with pytest.raises(ValueError):
+        list(parse_fasta_buffer(b"seq1\nATGC\nseq2\nGCTA"))
+
+
+def test_reverse_complement():
+    assert reverse_complement("ATGCNRYKM") == "KMRYNGCAT"
+
+
+def test_get_dna_sequences():
+    """
+    Test that the sequences of the genes of a contig are the same as when they are extracted one by one.
+    """
+    contig_seq = "ATGCGTACGTTAGCCGATCGATCGGCTAGCTAGGCTTACG"
+    genes = []
+    for i, (strand, coordinates) in enumerate(
+        [
+            ("+", [(1, 9)]),
+            ("-", [(4, 15)]),
+            ("-", [(31, 40), (1, 5)]),
+            ("+", [(35, 40), (1, 3)]),
+            ("-", [(10, 18), (25, 33)]),
+        ]
+    ):
+        gene = Gene(f"gene_{i}")
+        gene.fill_annotations(
+            start=coordinates[0][0],
+            stop=coordinates[-1][1],
+            strand=strand,
+            coordinates=coordinates,
+        )
+        genes.append(gene)
+
+    sequences = get_dna_sequences(contig_seq, genes)
+
+    assert sequences == [get_dna_sequence(contig_seq, gene) for gene in genes]
+    assert sequences[1] == reverse_complement(contig_seq[3:15])
+    assert sequences[2] == reverse_complement(contig_seq[30:40] + contig_seq[0:5])
+
+
+def test_read_gff_sections(tmp_path):
+    gff_file_path = tmp_path / "sample.gff"
+    gff_file_path.write_text(
+        "##gff-version 3\n"
+        "contig_1\tsource\tCDS\t1\t9\t.\t+\t0\tID=cds_1\n"
+        "##FASTA\n"
+        ">contig_1\n"
+        "ATGCCCTAA\n"
+    )
+    gff_lines, fasta_lines = read_gff_sections(gff_file_path)
+    assert gff_lines == [
+        "##gff-version 3",
+        "contig_1\tsource\tCDS\t1\t9\t.\t+\t0\tID=cds_1",
+        "",
+    ]
+    assert fasta_lines == [">contig_1", "ATGCCCTAA", ""]
+
+    gff_file_path.write_text("##gff-version 3\n##FASTA\n")
+    assert read_gff_sections(gff_file_path) == (["##gff-version 3", ""], [])
+
+
+def test_run_largest_genomes_first(tmp_path):
+    genome_files = []
+    for name, size in [("small", 10), ("large", 1000), ("medium", 100)]:
+        genome_file = tmp_path / f"{name}.fasta"
+        genome_file.write_text("A" * size)
+        genome_files.append(genome_file)
+
+    processed = []
+
+    def process(name):
+        processed.append(name)
+        return name.upper()
+
+    with ThreadPoolExecutor(max_workers=1) as executor, tqdm(disable=True) as progress:
+        results = list(
+            run_largest_genomes_first(
+                executor,
+                process,
+                [("small",), ("large",), ("medium",)],
+                genome_files,
+                progress,
+            )
+        )
+
+    assert processed == ["large", "medium", "small"]
+    # results are given in input order
+    assert [(index, result) for index, result, _ in results] == [
+        (0, "SMALL"),
+        (1, "LARGE"),
+        (2, "MEDIUM"),
+    ]
+    assert all(elapsed_time >= 0 for _, _, elapsed_time in results)
+
+
+@pytest.fixture
+def fragmented_genome_fasta():
+    """
+    Fixture providing a fasta file of a genome in 34 contigs
+    """
+    return (
+        Path(__file__).resolve().parent.parent.parent.parent
+        / "testingDataset/FASTA/GCF_000092685.1_ASM9268v1_genomic_MANUALLY_FRAGMENTED_top34_contigs.fna.gz"
+    )
+
+
+def test_annotate_pangenome_malformed_training_genomes(
+    fragmented_genome_fasta, tmp_path
+):
+    """
+    Test that a line of the training genomes file without a genome file gives a clear error
+    """
+    fasta_list = tmp_path / "genomes.tsv"
+    fasta_list.write_text(f"genome\t{fragmented_genome_fasta}\n")
+    training_genomes = tmp_path / "training_genomes.tsv"
+    training_genomes.write_text(f"reference\t{fragmented_genome_fasta}\nother\n")
+
+    with pytest.raises(ValueError, match="Line 2"):
+        annotate_pangenome(
+            Pangenome(),
+            fasta_list,
+            tmpdir=str(tmp_path),
+            training_info_file=tmp_path / "training.trn",
+            training_genomes=training_genomes,
+        )
+    assert not (tmp_path / "training.trn").exists()
+
+
+def predicted_genes(contig_sequences, **kwargs):
+    """
+    Get the coordinates of the genes predicted by prodigal in each contig
+    """
+    return {
+        contig_name: sorted(
+            (gene.ID, gene.start, gene.stop, gene.strand) for gene in genes
+        )
+        for contig_name, genes in launch_prodigal(
+            contig_sequences, Organism("genome"), **kwargs
+        ).items()
+    }
+
+
+def test_launch_prodigal_with_threads(fragmented_genome_fasta):
+    """
+    Test that looking for genes in several threads gives the same genes, with the same identifiers.
+    """
+    contig_sequences = {
+        name: sequence.upper()
+        for name, sequence in parse_fasta(
+            read_compressed_or_not(fragmented_genome_fasta)
+        )
+    }
+
+    genes = predicted_genes(contig_sequences, threads=1)
+    assert len(genes) > 1
+    assert predicted_genes(contig_sequences, threads=4) == genes
+
+
+def test_launch_prodigal_with_training_file(fragmented_genome_fasta, tmp_path):
+    """
+    Test that prodigal gives the same genes with a saved training made on the genome as when it trains on it,
+    and that a genome too different from the reference genomes is trained on.
+    """
+    contig_sequences = {
+        name: sequence.upper()
+        for name, sequence in parse_fasta(
+            read_compressed_or_not(fragmented_genome_fasta)
+        )
+    }
+    genes = predicted_genes(contig_sequences)
+
+    training_info_file = tmp_path / "training.trn"
+    create_training_info_file(training_info_file, [fragmented_genome_fasta], 11)
+    training_info = read_training_info(training_info_file)
+    assert training_info.translation_table == 11
+    assert predicted_genes(contig_sequences, training_info=training_info) == genes
+
+    other_training_info_file = tmp_path / "other_training.trn"
+    create_training_info_file(
+        other_training_info_file,
+        [fragmented_genome_fasta.parent / "GCF_000026905.1_ASM2690v1_genomic.fna.gz"],
+        11,
+    )
+    other_training_info = read_training_info(other_training_info_file)
+    assert predicted_genes(contig_sequences, training_info=other_training_info) != genes
+    assert (
+        predicted_genes(
+            contig_sequences, training_info=other_training_info, min_coding_density=1.0
+        )
+        == genes
+    )
+
+
+def test_parse_rna_tools_output_of_a_batch():
+    """
+    Test that the RNAs found by Aragorn and Infernal in a batch of genomes are given back to their genome.
+    """
+    aragorn_lines = [
+        ">0|contig_A",
+        "2 genes found",
+        "1   tRNA-Ala                [1000,1075]      35  (tgc)",
+        "2   tRNA-Gly               c[2000,2074]      34  (gcc)",
+        ">1|contig_A",
+        "1 gene found",
+        "1   tRNA-Met                [10,86]      35  (cat)",
+        ">1|contig|B",
+        "1 gene found",
+        "1   tRNA-Ser                [40,5000]      35  (gct)",
+        "",
+    ]
+    contig_to_length = {"0|contig_A": 3000, "1|contig_A": 100, "1|contig|B": 100}
+    infernal_lines = [
+        "#target name  accession query name  accession mdl mdl from   mdl to seq from   seq to strand trunc pass   gc  bias  score   E-value inc description of target",
+        "16S_rRNA  -  1|contig|B  -  hmm  1  1500  90  20  -  no  1  0.55  0.0  1500.2  1e-300  !  16S ribosomal RNA",
+    ]
+
+    trna_hits = parse_aragorn_output(aragorn_lines, contig_to_length)
+    rrna_hits = parse_infernal_output(infernal_lines)
+
+    # the tRNA exceeding the contig length is ignored
+    assert split_batch_hits(trna_hits, 2) == [
+        [
+            ("contig_A", 1000, 1075, "+", "tRNA-Ala(tgc)"),
+            ("contig_A", 2000, 2074, "-", "tRNA-Gly(gcc)"),
+        ],
+        [("contig_A", 10, 86, "+", "tRNA-Met(cat)")],
+    ]
+    assert split_batch_hits(rrna_hits, 2) == [
+        [],
+        [("contig|B", 20, 90, "-", "16S ribosomal RNA")],
+    ]
+
+    rnas = create_rna_genes(split_batch_hits(trna_hits, 2)[0], "genome", "tRNA")
+    assert sorted((rna.ID, rna.start, rna.type) for rna in rnas["contig_A"]) == [
+        ("genome_tRNA_0001", 1000, "tRNA"),
+        ("genome_tRNA_0002", 2000, "tRNA"),
+    ]
+
+
+def make_overlap_filter_genes(features):
+    genes = []
+    for i, (gene_type, start, stop) in enumerate(features):
+        gene = Gene(f"gene_{i}") if gene_type == "CDS" else RNA(f"gene_{i}")
+        gene.fill_annotations(start=start, stop=stop, strand="+", gene_type=gene_type)
+        genes.append(gene)
+    return genes
+
+
+def adjacent_overlap_filter(genes):
+    """Reference implementation of the filter comparing each gene to the next one only"""
+    genes = sorted(genes, key=lambda x: x.start)
+    removed = set()
+    for gene_i, gene_j in zip(genes, genes[1:]):
+        if gene_i.stop > gene_j.start:
+            if gene_i.type != "CDS" and gene_j.type == "CDS":
+                removed.add(gene_j)
+            elif gene_i.type == "CDS" and gene_j.type != "CDS":
+                removed.add(gene_i)
+    return [gene for gene in genes if gene not in removed]
+
+
+@pytest.mark.parametrize(
+    "features, all_overlaps, expected_kept",
+    [
+        # CDS before and after an RNA, and a CDS touching the RNA without overlapping it
+        (
+            [("CDS", 1, 110), ("tRNA", 100, 180), ("CDS", 170, 300), ("CDS", 180, 400)],
+            False,
+            [1, 3],
+        ),
+        # a long CDS spanning a CDS and an RNA is kept if it is not next to the RNA
+        ([("CDS", 1, 500), ("CDS", 10, 50), ("rRNA", 100, 200)], False, [0, 1, 2]),
+        ([("CDS", 1, 500), ("CDS", 10, 50), ("rRNA", 100, 200)], True, [1, 2]),
+        # a CDS overlapping an RNA that starts before the previous RNA ends
+        (
+            [("tRNA", 1, 400), ("tRNA", 10, 50), ("CDS", 60, 100), ("CDS", 450, 600)],
+            False,
+            [0, 1, 2, 3],
+        ),
+        (
+            [("tRNA", 1, 400), ("tRNA", 10, 50), ("CDS", 60, 100), ("CDS", 450, 600)],
+            True,
+            [0, 1, 3],
+        ),
+        ([("CDS", 1, 100), ("CDS", 50, 150)], True, [0, 1]),
+    ],
+)
+def test_overlap_filter(features, all_overlaps, expected_kept):
+    genes = make_overlap_filter_genes(features)
+
+    filtered = overlap_filter({"contig": genes}, all_overlaps=all_overlaps)
+
+    assert filtered["contig"] == [genes[i] for i in expected_kept]
+    assert [gene.position for gene in filtered["contig"] if gene.type == "CDS"] == list(
+        range(sum(genes[i].type == "CDS" for i in expected_kept))
+    )
+    assert overlap_filter({"contig": genes}, allow_overlap=True)["contig"] == genes
+
+
+def test_overlap_filter_parity_with_adjacent_genes_comparison():
+    """
+    Test that the default filter removes the same genes as comparing each gene to the next one,
+    and that removing all the overlaps removes at least these genes.
+    """
+    rng = random.Random(42)
+    all_genes = defaultdict(list)
+    for contig in range(20):
+        features = []
+        for _ in range(rng.randint(1, 200)):
+            start = rng.randint(1, 50000)
+            gene_type = "CDS" if rng.random() < 0.8 else rng.choice(["tRNA", "rRNA"])
+            features.append((gene_type, start, start + rng.randint(50, 3000)))
+        all_genes[f"contig_{contig}"] = make_overlap_filter_genes(features)
+
+    expected = {
+        contig: adjacent_overlap_filter(genes) for contig, genes in all_genes.items()
+    }
+
+    assert overlap_filter(all_genes) == expected
+    for contig, genes in overlap_filter(all_genes, all_overlaps=True).items():
+        assert set(genes) <= set(expected[contig])
+        rnas = [gene for gene in genes if gene.type != "CDS"]
+        assert not any(
+            rna.start < cds.stop and cds.start < rna.stop
+            for cds in genes
+            if cds.type == "CDS"
+            for rna in rnas
+        )
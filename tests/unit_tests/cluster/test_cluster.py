@@ -0,0 +1,93 @@
+#! /usr/bin/env python3
+
+import pandas as pd
+import pytest
+
+from ppanggolin.cluster.cluster import add_clustering_to_pangenome, refine_clustering
+from ppanggolin.genome import Gene, Contig, Organism
+from ppanggolin.pangenome import Pangenome
+
+
+@pytest.fixture
+def pangenome() -> Pangenome:
+    """Create an annotated pangenome with one genome of ten genes"""
+    pangenome = Pangenome()
+    organism = Organism("organism")
+    contig = Contig(0, "contig")
+    organism.add(contig)
+    for i in range(10):
+        gene = Gene(f"gene_{i}")
+        gene.fill_annotations(
+            start=10 * i + 1, stop=10 * (i + 1), strand="+", position=i
+        )
+        gene.local_identifier = f"local_{i}"
+        contig.add(gene)
+    pangenome.add_organism(organism)
+    pangenome.parameters["annotate"] = {"# read_annotations_from_file": True}
+    return pangenome
+
+
+def test_add_clustering_to_pangenome(pangenome):
+    """Tests that families, representatives and fragments are set from the clustering table"""
+    families_df = pd.DataFrame(
+        {
+            "family": ["famB", "famA", "famB", "famA", "famB"],
+            "representative": ["gene_0", "gene_1", "gene_0", "gene_1", "gene_0"],
+            "gene": ["gene_0", "gene_1", "gene_2", "local_3", "gene_4"],
+            "is_frag": [False, False, True, False, False],
+        }
+    )
+
+    assert add_clustering_to_pangenome(pangenome, families_df, disable_bar=True) == 5
+
+    fam_b, fam_a = pangenome.get_gene_family("famB"), pangenome.get_gene_family("famA")
+    assert (fam_b.ID, fam_a.ID) == (0, 1)
+    assert {gene.ID for gene in fam_b.genes} == {"gene_0", "gene_2", "gene_4"}
+    assert {gene.ID for gene in fam_a.genes} == {"gene_1", "gene_3"}
+    assert fam_b.representative.ID == "gene_0"
+    assert fam_a.representative.ID == "gene_1"
+    assert [gene.ID for gene in pangenome.genes if gene.is_fragment] == ["gene_2"]
+
+
+def test_add_clustering_to_pangenome_with_unknown_gene(pangenome):
+    """Tests that a KeyError is raised when a gene of the clustering table is not in the pangenome"""
+    families_df = pd.DataFrame(
+        {
+            "family": ["famA", "famA"],
+            "representative": ["gene_0", "gene_0"],
+            "gene": ["gene_0", "unknown"],
+            "is_frag": [False, False],
+        }
+    )
+
+    with pytest.raises(KeyError):
+        add_clustering_to_pangenome(pangenome, families_df, disable_bar=True)
+
+
+def test_refine_clustering(tmp_path):
+    """Tests that fragment families are merged, following the families in which their destination was merged"""
+    tsv = tmp_path / "families.tsv"
+    tsv.write_text(
+        "famA\tfamA\nfamB\tfamB\nfamB\tb2\nfamC\tfamC\nfamC\tc2\nfamD\tfamD\n"
+    )
+    aln = tmp_path / "rep_families.tsv"
+    aln.write_text(
+        "famA\tfamA\t50\t50\t100\n"
+        "ppanggolin_famA\tfamB\t50\t60\t30\n"
+        "famA\tfamC\t50\t70\t20\n"
+        "famC\tfamB\t70\t60\t10\n"
+        "famD\tfamC\t40\t70\t0\n"
+    )
+    fam_to_seq = {fam: f"{fam}_seq" for fam in ["famA", "famB", "famC", "famD"]}
+
+    genes2fam, new_fam_to_seq = refine_clustering(tsv, aln, fam_to_seq)
+
+    assert genes2fam == {
+        "famA": ("famC", True),
+        "famB": ("famC", True),
+        "b2": ("famC", True),
+        "famC": ("famC", False),
+        "c2": ("famC", False),
+        "famD": ("famD", False),
+    }
+    assert new_fam_to_seq == {"famC": "famC_seq", "famD": "famD_seq"}
@@ -6,7 +6,14 @@ from ppanggolin.context.searchGeneContext import (
     get_n_next_genes_index,
     add_edges_to_context_graph,
     compute_gene_context_graph,
+    get_contig_gene_pairs,
+    get_contig_to_genes,
+    read_query_groups,
+    search_group_context,
+    search_gene_contexts_of_groups,
 )
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.utils import extract_contig_window
 
 from ppanggolin.geneFamily import GeneFamily
 from ppanggolin.genome import Gene, Contig, Organism
@@ -278,3 +285,213 @@ def test_compute_gene_context_graph(simple_contig):
 
     assert nodes == ["A", "B", "C", "D", "E"]
     assert edges == {("A", "B"), ("B", "C"), ("C", "D"), ("D", "E")}
+
+
+def test_get_contig_gene_pairs():
+
+    #    genes : 0-1-2-3-4-5
+    # families : A-B-B-D-E-F
+    #  windows : _______ [(0,3)]
+
+    gene_pairs = get_contig_gene_pairs(
+        ["A", "B", "B", "D", "E", "F"], contig_windows=[(0, 3)], transitivity=1
+    )
+
+    # genes 1 and 2 are in the same family so they are not paired
+    assert gene_pairs.tolist() == [[0, 1, 0], [0, 2, 1], [1, 3, 1], [2, 3, 0]]
+
+
+def test_get_contig_gene_pairs_circular():
+    gene_pairs = get_contig_gene_pairs(
+        ["A", "B", "C", "D", "E", "F"],
+        contig_windows=[(4, 5), (0, 2)],
+        transitivity=0,
+        is_circular=True,
+    )
+
+    assert gene_pairs.tolist() == [[4, 5, 0], [5, 0, 0], [0, 1, 0], [1, 2, 0]]
+
+
+@pytest.fixture()
+def several_contigs():
+    families = {name: GeneFamily(i, name) for i, name in enumerate("ABCDEFG")}
+    contigs_families = ["ABCDEF", "GABCDE", "ACBDFE", "CCAGBA"]
+    contigs = []
+    for contig_index, contig_families in enumerate(contigs_families):
+        organism = Organism(f"organism_{contig_index}")
+        contig = Contig(
+            identifier=contig_index,
+            name=f"contig{contig_index}",
+            is_circular=contig_index % 2 == 1,
+        )
+        contig.organism = organism
+        for i, family_name in enumerate(contig_families):
+            gene = Gene(f"{contig_index}_{i}")
+            gene.fill_annotations(start=i + 1, stop=i + 2, strand="+", position=i)
+            gene.fill_parents(organism, contig)
+            contig.add(gene)
+            families[family_name].add(gene)
+        contigs.append(contig)
+
+    return families
+
+
+def test_compute_gene_context_graph_in_parallel(several_contigs):
+    families_of_interest = {several_contigs["A"], several_contigs["C"]}
+
+    context_graph, combs2orgs = compute_gene_context_graph(
+        families_of_interest, transitive=1, window_size=2
+    )
+    parallel_context_graph, parallel_combs2orgs = compute_gene_context_graph(
+        families_of_interest, transitive=1, window_size=2, cpu=2, block_size=1
+    )
+
+    assert list(parallel_context_graph.nodes(data=True)) == list(
+        context_graph.nodes(data=True)
+    )
+    assert list(parallel_context_graph.edges(data=True)) == list(
+        context_graph.edges(data=True)
+    )
+    assert parallel_combs2orgs == combs2orgs
+
+
+def test_compute_gene_context_graph_same_as_adding_edges(several_contigs):
+    families_of_interest = {several_contigs["A"], several_contigs["C"]}
+
+    expected_graph = nx.Graph()
+    for contig, genes_of_interest in get_contig_to_genes(families_of_interest).items():
+        contig_windows = extract_contig_window(
+            contig.number_of_genes,
+            [gene.position for gene in genes_of_interest],
+            window_size=2,
+            is_circular=contig.is_circular,
+        )
+        add_edges_to_context_graph(
+            expected_graph, contig, contig_windows, transitivity=2
+        )
+
+    context_graph, _ = compute_gene_context_graph(
+        families_of_interest, transitive=2, window_size=2
+    )
+
+    assert list(context_graph.nodes(data=True)) == list(expected_graph.nodes(data=True))
+    assert list(context_graph.edges(data=True)) == list(expected_graph.edges(data=True))
+
+
+def test_read_query_groups(tmp_path):
+    groups_file = tmp_path / "groups.tsv"
+    groups_file.write_text(
+        "# group\tquery\ngroup_2\tfamA\ngroup_1\tfamB\n\ngroup_2\tfamC\n"
+    )
+
+    assert read_query_groups(groups_file) == {
+        "group_2": ["famA", "famC"],
+        "group_1": ["famB"],
+    }
+
+
+def test_read_query_groups_missing_query(tmp_path):
+    groups_file = tmp_path / "groups.tsv"
+    groups_file.write_text("group_1\tfamA\ngroup_2\n")
+
+    with pytest.raises(ValueError):
+        read_query_groups(groups_file)
+
+
+@pytest.mark.parametrize("group_name", ["sub/dir", "../group_1", ".."])
+def test_read_query_groups_invalid_group_name(tmp_path, group_name):
+    groups_file = tmp_path / "groups.tsv"
+    groups_file.write_text(f"group_1\tfamA\n{group_name}\tfamB\n")
+
+    with pytest.raises(ValueError, match="Line 2"):
+        read_query_groups(groups_file)
+
+
+def test_search_group_context(several_contigs, tmp_path):
+    for family in several_contigs.values():
+        family.partition = "S"
+    contig_to_families = {}
+
+    group, families_count, contexts_count = search_group_context(
+        "group_1",
+        {several_contigs["A"], several_contigs["C"]},
+        {},
+        tmp_path,
+        contig_to_families,
+        transitive=1,
+        jaccard_threshold=0.5,
+        window_size=2,
+    )
+
+    assert (group, families_count) == ("group_1", 2)
+    assert contexts_count > 0
+    assert (tmp_path / "group_1" / "graph_context.graphml").exists()
+    assert (tmp_path / "group_1" / "gene_contexts.tsv").exists()
+
+    # the family IDs of the contigs are kept for the next groups
+    assert len(contig_to_families) == 4
+
+
+@pytest.mark.parametrize("cpu", [1, 2])
+def test_search_gene_contexts_of_groups(several_contigs, tmp_path, cpu):
+    pangenome = Pangenome()
+    for family in several_contigs.values():
+        family.partition = "S"
+        pangenome.add_gene_family(family)
+    pangenome.status["genomesAnnotated"] = "Computed"
+    pangenome.status["genesClustered"] = "Computed"
+
+    groups_file = tmp_path / "groups.tsv"
+    groups_file.write_text("group_2\tA\ngroup_2\tC\ngroup_1\tG\n")
+    output = tmp_path / "output"
+    output.mkdir()
+
+    summary_file = search_gene_contexts_of_groups(
+        pangenome,
+        output,
+        groups_file,
+        transitive=1,
+        jaccard_threshold=0.5,
+        window_size=2,
+        cpu=cpu,
+    )
+
+    assert summary_file.read_text().splitlines() == [
+        "Group\tNb_families_of_interest\tNb_gene_contexts",
+        "group_2\t2\t1",
+        "group_1\t1\t1",
+    ]
+    for group in ["group_1", "group_2"]:
+        assert (output / group / "gene_contexts.tsv").exists()
+
+
+def test_search_gene_contexts_of_groups_unknown_family(several_contigs, tmp_path):
+    pangenome = Pangenome()
+    for family in several_contigs.values():
+        family.partition = "S"
+        pangenome.add_gene_family(family)
+    pangenome.status["genomesAnnotated"] = "Computed"
+    pangenome.status["genesClustered"] = "Computed"
+
+    groups_file = tmp_path / "groups.tsv"
+    groups_file.write_text(
+        "group_2\tA\ngroup_2\tNOT_A_FAMILY\ngroup_2\tC\ngroup_1\tNOT_A_FAMILY\n"
+    )
+    output = tmp_path / "output"
+    output.mkdir()
+
+    summary_file = search_gene_contexts_of_groups(
+        pangenome,
+        output,
+        groups_file,
+        transitive=1,
+        jaccard_threshold=0.5,
+        window_size=2,
+    )
+
+    # the unknown query is ignored and group_1, with no known query, is skipped
+    assert summary_file.read_text().splitlines() == [
+        "Group\tNb_families_of_interest\tNb_gene_contexts",
+        "group_2\t2\t1",
+    ]
+    assert not (output / "group_1").exists()
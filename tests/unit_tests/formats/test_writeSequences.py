@@ -0,0 +1,60 @@
+#! /usr/bin/env python3
+
+import struct
+
+from ppanggolin.formats.writeSequences import write_mmseqs_db, read_fasta_or_gff
+
+
+def test_write_mmseqs_db(tmp_path):
+    """Tests that the MMseqs2 database files are written as mmseqs createdb does"""
+    sequences = [("ppanggolin_gene_1", "ATGAAATAA"), ("ppanggolin_gene_2", "ATGTGA")]
+
+    seqdb = write_mmseqs_db(sequences, "nucleotides_db", tmp_path, db_type=2)
+
+    assert seqdb == tmp_path / "nucleotides_db"
+    assert seqdb.read_bytes() == b"ATGAAATAA\n\0ATGTGA\n\0"
+    assert (tmp_path / "nucleotides_db.index").read_text() == "0\t0\t11\n1\t11\t8\n"
+    assert (
+        tmp_path / "nucleotides_db_h"
+    ).read_bytes() == b"ppanggolin_gene_1\n\0ppanggolin_gene_2\n\0"
+    assert (tmp_path / "nucleotides_db_h.index").read_text() == "0\t0\t19\n1\t19\t19\n"
+    assert (
+        tmp_path / "nucleotides_db.lookup"
+    ).read_text() == "0\tppanggolin_gene_1\t0\n1\tppanggolin_gene_2\t0\n"
+    assert struct.unpack("<i", (tmp_path / "nucleotides_db.dbtype").read_bytes()) == (
+        1,
+    )
+    assert struct.unpack("<i", (tmp_path / "nucleotides_db_h.dbtype").read_bytes()) == (
+        12,
+    )
+
+
+def test_write_mmseqs_db_amino_acid(tmp_path):
+    """Tests that amino acid databases have the MMseqs2 amino acid type"""
+    seqdb = write_mmseqs_db([("fam", "MK*")], "target_db", tmp_path, db_type=1)
+
+    assert seqdb.read_bytes() == b"MK*\n\0"
+    assert struct.unpack("<i", (tmp_path / "target_db.dbtype").read_bytes()) == (0,)
+
+
+def test_read_fasta_or_gff(tmp_path):
+    """Tests that contig sequences are read from the FASTA part of a gff file or from a fasta file"""
+    gff_file_path = tmp_path / "genome.gff"
+    gff_file_path.write_text(
+        "##gff-version 3\n"
+        "contig_1\tsource\tCDS\t1\t9\t.\t+\t0\tID=cds_1\n"
+        "##FASTA\n"
+        ">contig_1 description\n"
+        "ATGCCC\n"
+        "TAA\n"
+        ">contig_2\n"
+        "GGG\n"
+    )
+    assert read_fasta_or_gff(gff_file_path) == {
+        "contig_1": "ATGCCCTAA",
+        "contig_2": "GGG",
+    }
+
+    fasta_file_path = tmp_path / "genome.fasta"
+    fasta_file_path.write_text(">contig_1\nATG\n")
+    assert read_fasta_or_gff(fasta_file_path) == {"contig_1": "ATG"}
@@ -0,0 +1,82 @@
+import pytest
+
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.genome import Gene, Contig, Organism
+from ppanggolin.geneFamily import GeneFamily
+from ppanggolin.mod.module import compute_mod_graph
+
+
+@pytest.fixture
+def families():
+    return {name: GeneFamily(i, name) for i, name in enumerate("ABCD")}
+
+
+@pytest.fixture
+def pangenome(families) -> Pangenome:
+    """Pangenome with one contig whose genes belong to families A, B, C, A and D"""
+    pangenome = Pangenome()
+    organism = Organism("organism")
+    pangenome.add_organism(organism)
+    contig = Contig(0, "contig")
+    organism.add(contig)
+    for position, name in enumerate("ABCAD"):
+        gene = Gene(f"gene_{position}")
+        gene.fill_annotations(
+            start=10 * position + 1,
+            stop=10 * (position + 1),
+            strand="+",
+            position=position,
+        )
+        contig.add(gene)
+        gene.fill_parents(organism, contig)
+        families[name].add(gene)
+    return pangenome
+
+
+def get_edges(graph):
+    return {
+        (graph.families[s].name, graph.families[t].name): (s_genes, t_genes)
+        for s, t, s_genes, t_genes in zip(
+            graph.source, graph.target, graph.source_genes, graph.target_genes
+        )
+    }
+
+
+def test_compute_mod_graph(pangenome):
+    graph = compute_mod_graph(pangenome, t=0, disable_bar=True)
+    assert [family.name for family in graph.families] == ["A", "B", "C", "D"]
+    assert graph.family_genes.tolist() == [2, 1, 1, 1]
+    # the last gene is also linked to the gene t + 2 positions before it, as when iterating over contig.get_genes
+    assert get_edges(graph) == {
+        ("A", "B"): (1, 1),
+        ("B", "C"): (1, 1),
+        ("A", "C"): (1, 1),
+        ("A", "D"): (1, 1),
+        ("C", "D"): (1, 1),
+    }
+
+
+def test_compute_mod_graph_transitive(pangenome):
+    graph = compute_mod_graph(pangenome, t=1, disable_bar=True)
+    edges = get_edges(graph)
+    # both genes of A have a gene of B and of C in their transitive closure
+    assert edges[("A", "B")] == (2, 1)
+    assert edges[("A", "C")] == (2, 1)
+    assert edges[("A", "D")] == (1, 1)
+    assert edges[("B", "D")] == (1, 1)
+    assert graph.number_of_edges == 6
+
+
+def test_module_graph_connected_components(pangenome, families):
+    graph = compute_mod_graph(pangenome, t=0, disable_bar=True)
+    # only one of the two genes of A is linked to the other families
+    assert list(graph.connected_components(set(), weight=1)) == [
+        {families["A"]},
+        {families["B"], families["C"], families["D"]},
+    ]
+    assert list(graph.connected_components(set(), weight=0.5)) == [
+        set(families.values())
+    ]
+    assert list(graph.connected_components({families["C"]}, weight=0.5)) == [
+        {families["A"], families["B"], families["D"]}
+    ]
@@ -0,0 +1,357 @@
+#! /usr/bin/env python3
+
+import argparse
+import re
+from itertools import chain
+from pathlib import Path
+from typing import Dict, List
+
+import networkx as nx
+import pytest
+
+import ppanggolin.projection.projection as projection
+from ppanggolin.geneFamily import GeneFamily
+from ppanggolin.genome import Contig, Gene, Organism
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.region import Module, Spot
+from ppanggolin.RGP.genomicIsland import compute_org_rgp, naming_scheme
+from ppanggolin.RGP.spot import make_spot_graph
+
+GENE_LENGTH = 1000
+
+PERSISTENT_FAMILIES = [f"P{i}" for i in range(12)]
+
+# Families inserted after a persistent family, for each genome.
+# The X families are not in the pangenome, so their genes are specific to the input genomes.
+PANGENOME_GENOMES = {
+    "ref_0": {"P3": ["S0", "S1", "S2", "S3"]},
+    "ref_1": {"P3": ["S0", "S1", "S2", "S4"]},
+    "ref_2": {},
+    "ref_3": {},
+}
+INPUT_GENOMES = {
+    "input_0": {"P3": ["S0", "S1", "S2", "S3"]},
+    "input_1": {"P3": ["S0", "S4", "X1", "X2"], "P8": ["X3", "X4", "X5", "X6"]},
+    "input_2": {"P8": ["S1", "S2", "X7", "X8"]},
+}
+
+RGP_PARAMS = argparse.Namespace(
+    persistent_penalty=3, variable_gain=1, min_length=3000, min_score=4, dup_margin=0.05
+)
+SPOT_PARAMS = argparse.Namespace(set_size=3, overlapping_match=2, exact_match_size=1)
+
+
+def make_genome(name: str, insertions: Dict[str, List[str]]) -> Organism:
+    """Make a genome with one contig of persistent families and the given insertions"""
+    families = []
+    for persistent_family in PERSISTENT_FAMILIES:
+        families.append(persistent_family)
+        families += insertions.get(persistent_family, [])
+
+    genome = Organism(name)
+    contig = Contig(0, f"{name}_contig")
+    genome.add(contig)
+    for position, family_name in enumerate(families):
+        gene = Gene(f"{name}_gene_{position}_{family_name}")
+        gene.fill_annotations(
+            start=position * GENE_LENGTH + 1,
+            stop=(position + 1) * GENE_LENGTH,
+            strand="+",
+            position=position,
+            genetic_code=11,
+        )
+        gene.fill_parents(genome, contig)
+        gene.add_sequence("ATG" * (GENE_LENGTH // 3))
+        contig.add(gene)
+    contig.length = len(families) * GENE_LENGTH
+    return genome
+
+
+def family_of_gene(gene: Gene) -> str:
+    return gene.ID.split("_")[-1]
+
+
+def make_pangenome() -> Pangenome:
+    """Make a pangenome with RGPs in one spot of insertion and one module"""
+    pangenome = Pangenome()
+    pangenome.file = "pangenome.h5"
+    for name, insertions in PANGENOME_GENOMES.items():
+        genome = make_genome(name, insertions)
+        pangenome.add_organism(genome)
+        for gene in genome.genes:
+            try:
+                family = pangenome.get_gene_family(family_of_gene(gene))
+            except KeyError:
+                family = GeneFamily(pangenome.max_fam_id, family_of_gene(gene))
+                family.partition = "P" if family.name.startswith("P") else "S"
+                pangenome.add_gene_family(family)
+            family.add(gene)
+
+    for genome in pangenome.organisms:
+        for region in compute_org_rgp(
+            genome,
+            set(),
+            RGP_PARAMS.persistent_penalty,
+            RGP_PARAMS.variable_gain,
+            RGP_PARAMS.min_length,
+            RGP_PARAMS.min_score,
+        ):
+            pangenome.add_region(region)
+
+    graph_spot = make_spot_graph(pangenome.regions, set())
+    for spot_id, comp in enumerate(nx.connected_components(graph_spot)):
+        spot = Spot(spot_id)
+        for node in comp:
+            for region in graph_spot.nodes[node]["rgp"]:
+                spot.add(region)
+        pangenome.add_spot(spot)
+
+    pangenome.add_module(
+        Module(0, {pangenome.get_gene_family(name) for name in ["S0", "S1", "S2"]})
+    )
+    return pangenome
+
+
+def align_genes(pangenome: Pangenome, genomes: List[Organism]) -> Dict[str, GeneFamily]:
+    """Associate the genes of input genomes to their family, as the alignment would do"""
+    seqid_to_gene_family = {}
+    for gene in chain.from_iterable(genome.genes for genome in genomes):
+        try:
+            seqid_to_gene_family[gene.ID] = pangenome.get_gene_family(
+                family_of_gene(gene)
+            )
+        except KeyError:
+            pass
+    return seqid_to_gene_family
+
+
+def read_genome_outputs(output: Path, genome_name: str) -> Dict[str, List[str]]:
+    """Read the RGP, spot and module files of a projected genome"""
+    outputs = {}
+    for filename in [
+        "regions_of_genomic_plasticity.tsv",
+        "input_genome_rgp_to_spot.tsv",
+        "modules_in_input_genome.tsv",
+        "gene_to_gene_family.tsv",
+        "specific_genes.tsv",
+    ]:
+        text = (output / genome_name / filename).read_text()
+        # new spots are numbered independently for each genome in batch mode
+        text = re.sub(r"(new_)?spot_[1-9]\d*", "new_spot", text)
+        outputs[filename] = sorted(text.splitlines())
+    return outputs
+
+
+def read_projection_summary(output: Path) -> Dict[str, Dict[str, str]]:
+    """Read the RGP, spot and module counts of the projection summary of each genome"""
+    lines = [
+        line.split("\t")
+        for line in (output / "summary_projection.tsv").read_text().splitlines()
+        if not line.startswith("#")
+    ]
+    header = lines[0]
+    return {
+        fields[0]: {
+            column: value
+            for column, value in zip(header, fields)
+            if column in {"RGPs", "Spots", "Modules", "New_spots"}
+        }
+        for fields in lines[1:]
+    }
+
+
+@pytest.mark.parametrize(
+    "pangenome_contigs, input_contigs",
+    [
+        (["contig_1", "contig_2"], ["contig_3", "contig_4"]),
+        (["contig_1", "contig_2"], ["contig_2", "contig_3"]),
+        (["contig_1", "contig_2"], ["contig_1", "contig_2"]),
+        (["contig_1", "contig_1"], ["contig_3", "contig_4"]),
+    ],
+)
+def test_get_input_genome_naming_scheme(pangenome_contigs, input_contigs):
+    pangenome_genomes = []
+    for index, contig_name in enumerate(pangenome_contigs):
+        genome = Organism(f"genome_{index}")
+        genome.add(Contig(index, contig_name))
+        pangenome_genomes.append(genome)
+    input_genome = Organism("input")
+    for index, contig_name in enumerate(input_contigs):
+        input_genome.add(Contig(index, contig_name))
+
+    assert projection.get_input_genome_naming_scheme(
+        input_genome,
+        {contig.name for genome in pangenome_genomes for contig in genome.contigs},
+        naming_scheme(pangenome_genomes),
+    ) == naming_scheme(chain(pangenome_genomes, [input_genome]))
+
+
+def test_project_genome(tmp_path):
+    pangenome = make_pangenome()
+    genome = make_genome("input_1", INPUT_GENOMES["input_1"])
+    multigenics = pangenome.get_multigenics(RGP_PARAMS.dup_margin)
+
+    summary = projection.project_genome(
+        pangenome,
+        genome,
+        align_genes(pangenome, [genome]),
+        genome_path=Path("input_1.gff"),
+        input_type="annotation",
+        output_dir=tmp_path,
+        pangenome_stats=projection.get_pangenome_stats_for_summary(
+            pangenome, 0.05, 0.95
+        ),
+        rgp_params=RGP_PARAMS,
+        multigenics=multigenics,
+        pangenome_contig_names={contig.name for contig in pangenome.contigs},
+        pangenome_name_scheme="contig",
+        spot_graph=projection.make_projection_spot_graph(
+            list(pangenome.spots), pangenome.regions, multigenics
+        ),
+        project_modules=True,
+    )
+
+    assert summary["Genome_name"] == "input_1"
+    assert summary["Cloud"]["specific families"] == 6
+    assert (summary["RGPs"], summary["Spots"], summary["New_spots"]) == (2, 2, 1)
+    assert summary["Modules"] == 1
+
+    outputs = read_genome_outputs(tmp_path, "input_1")
+    assert outputs["input_genome_rgp_to_spot.tsv"] == [
+        "input_1_contig_RGP_0\tnew_spot",
+        "input_1_contig_RGP_1\tspot_0",
+        "region\tspot_id",
+    ]
+    assert outputs["modules_in_input_genome.tsv"] == [
+        "module_0\tinput_1\t0.33",
+        "module_id\tgenome\tcompletion",
+    ]
+    assert (tmp_path / "input_1" / "projection_summary.yaml").exists()
+
+
+def test_projection_by_batches_same_as_default(tmp_path, monkeypatch):
+    monkeypatch.setattr(
+        projection,
+        "align_input_genes_to_families",
+        lambda pangenome, input_organisms, **kwargs: align_genes(
+            pangenome, input_organisms
+        ),
+    )
+    monkeypatch.setattr(
+        projection,
+        "annotate_input_genomes",
+        lambda pangenome, genome_name_to_path, *args, **kwargs: [
+            make_genome(name, INPUT_GENOMES[name]) for name in genome_name_to_path
+        ],
+    )
+    genome_name_to_path = {
+        name: {"path": Path(f"{name}.gff"), "circular_contigs": []}
+        for name in INPUT_GENOMES
+    }
+    output_args = dict(
+        write_proksee=False,
+        write_gff=False,
+        write_table=True,
+        add_sequences=False,
+        input_type="annotation",
+        dup_margin=0.05,
+        soft_core=0.95,
+        metadata_sep="|",
+        compress=False,
+    )
+
+    # default mode, as in launch
+    pangenome = make_pangenome()
+    multigenics = pangenome.get_multigenics(RGP_PARAMS.dup_margin)
+    default_output = tmp_path / "default"
+    default_output.mkdir()
+    genomes = projection.annotate_input_genomes(pangenome, genome_name_to_path)
+    lonely_genes_count = projection.annotate_input_genes_with_pangenome_families(
+        pangenome,
+        input_organisms=genomes,
+        output=default_output,
+        cpu=1,
+        use_representatives=False,
+        no_defrag=False,
+        identity=0.8,
+        coverage=0.8,
+        tmpdir=tmp_path,
+        translation_table=11,
+    )
+    genome_to_rgps = projection.predict_RGP(
+        pangenome,
+        genomes,
+        persistent_penalty=RGP_PARAMS.persistent_penalty,
+        variable_gain=RGP_PARAMS.variable_gain,
+        min_length=RGP_PARAMS.min_length,
+        min_score=RGP_PARAMS.min_score,
+        multigenics=multigenics,
+        output_dir=default_output,
+        disable_bar=True,
+        compress=False,
+    )
+    genome_to_spots = projection.predict_spots_in_input_organisms(
+        initial_spots=list(pangenome.spots),
+        initial_regions=pangenome.regions,
+        input_org_2_rgps=genome_to_rgps,
+        multigenics=multigenics,
+        output=default_output,
+    )
+    genome_to_modules = projection.project_and_write_modules(
+        pangenome, genomes, default_output
+    )
+    projection.write_projection_results(
+        pangenome,
+        genomes,
+        genome_to_rgps,
+        genome_to_spots,
+        genome_to_modules,
+        lonely_genes_count,
+        genome_name_to_path=genome_name_to_path,
+        output_dir=default_output,
+        need_regions=True,
+        need_spots=True,
+        need_modules=True,
+        **output_args,
+    )
+
+    # batch mode, on a pangenome that does not have the input genomes
+    pangenome = make_pangenome()
+    batch_output = tmp_path / "batches"
+    batch_output.mkdir()
+    projection.project_genomes_in_pipeline(
+        pangenome,
+        genome_name_to_path,
+        genome_name_to_fasta_path=None,
+        pangenome_params=argparse.Namespace(rgp=RGP_PARAMS, spot=SPOT_PARAMS),
+        output_dir=batch_output,
+        batch_size=2,
+        predict_rgp=True,
+        project_spots=True,
+        project_modules=True,
+        multigenics=pangenome.get_multigenics(RGP_PARAMS.dup_margin),
+        cpu=2,
+        use_pseudo=False,
+        config={},
+        translation_table=11,
+        use_representatives=False,
+        no_defrag=False,
+        identity=0.8,
+        coverage=0.8,
+        tmpdir=tmp_path,
+        keep_tmp=False,
+        target_db_cache=None,
+        index_target_db=False,
+        write_spot_graph=False,
+        graph_formats=["gexf"],
+        disable_bar=True,
+        **output_args,
+    )
+
+    for genome_name in INPUT_GENOMES:
+        assert read_genome_outputs(batch_output, genome_name) == read_genome_outputs(
+            default_output, genome_name
+        )
+    assert list(read_projection_summary(batch_output).items()) == list(
+        read_projection_summary(default_output).items()
+    )
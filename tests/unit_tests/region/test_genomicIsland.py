@@ -3,6 +3,9 @@ from ppanggolin.utils import (
     find_region_border_position,
     get_consecutive_region_positions,
 )
+from ppanggolin.RGP.genomicIsland import init_matrices, mk_regions
+from ppanggolin.genome import Gene, Contig, Organism
+from ppanggolin.geneFamily import GeneFamily
 import pytest
 
 
@@ -85,3 +88,86 @@ def test_get_consecutive_region_positions_all_genes():
     assert get_consecutive_region_positions(region_positions, contig_length) == [
         [0, 1, 2, 3, 4, 5, 6, 7]
     ]
+
+
+def make_contig(partitions, is_circular=False):
+    """Create a contig whose genes belong to one family per partition letter"""
+    organism = Organism("organism")
+    contig = Contig(0, "contig", is_circular=is_circular)
+    contig.length = 100 * len(partitions)
+    organism.add(contig)
+    families = {}
+    for position, partition in enumerate(partitions):
+        gene = Gene(f"gene_{position}")
+        gene.fill_annotations(
+            start=100 * position + 1,
+            stop=100 * (position + 1),
+            strand="+",
+            position=position,
+        )
+        contig.add(gene)
+        gene.fill_parents(organism, contig)
+        if partition not in families:
+            families[partition] = GeneFamily(len(families), partition)
+            families[partition].partition = partition
+        families[partition].add(gene)
+    return contig
+
+
+def test_init_matrices_scores():
+    contig = make_contig("PPCCCCCPP")
+    matrix = init_matrices(contig, set(), persistent_penalty=3, variable_gain=1)
+    assert matrix.scores.tolist() == [0, 0, 1, 2, 3, 4, 5, 4, 1]
+    assert matrix.states.tolist() == [0, 0, 1, 1, 1, 1, 1, 1, 1]
+    assert not matrix.loop
+
+
+def test_init_matrices_multigenic_persistent_is_not_penalized():
+    contig = make_contig("PPCCCCCPP")
+    multi = {contig[0].family}
+    matrix = init_matrices(contig, multi, persistent_penalty=3, variable_gain=1)
+    assert matrix.scores.tolist() == list(range(1, 10))
+
+
+def test_init_matrices_large_penalty_does_not_overflow():
+    contig = make_contig("C" + "P" * 100 + "CC")
+    matrix = init_matrices(contig, set(), persistent_penalty=10, variable_gain=1)
+    assert matrix.scores.tolist() == [1] + [0] * 100 + [1, 2]
+
+
+def test_init_matrices_circular_second_pass():
+    contig = make_contig("CCPPPCCC", is_circular=True)
+    matrix = init_matrices(contig, set(), persistent_penalty=3, variable_gain=1)
+    assert matrix.scores.tolist() == [4, 5, 4, 1, 0, 1, 2, 3]
+    assert matrix.loop
+
+
+def test_mk_regions():
+    contig = make_contig("PPCCCCCPP")
+    matrix = init_matrices(contig, set(), persistent_penalty=3, variable_gain=1)
+    regions = mk_regions(contig, matrix, set(), min_length=0, min_score=4)
+    assert len(regions) == 1
+    region = regions.pop()
+    assert region.name == "contig_RGP_0"
+    assert region.score == 5
+    assert [gene.position for gene in region.genes] == [2, 3, 4, 5, 6]
+    assert not matrix.states.any()
+
+
+def test_mk_regions_overlapping_contig_edge():
+    contig = make_contig("CCPPPCCC", is_circular=True)
+    matrix = init_matrices(contig, set(), persistent_penalty=3, variable_gain=1)
+    regions = mk_regions(contig, matrix, set(), min_length=0, min_score=4)
+    assert len(regions) == 1
+    region = regions.pop()
+    assert region.score == 5
+    assert region.overlaps_contig_edge
+    assert sorted(gene.position for gene in region.genes) == [0, 1, 5, 6, 7]
+
+
+def test_mk_regions_too_short():
+    contig = make_contig("PPCCCCCPP")
+    matrix = init_matrices(contig, set(), persistent_penalty=3, variable_gain=1)
+    regions = mk_regions(contig, matrix, set(), min_length=3000, min_score=4)
+    assert regions == set()
+    assert all(gene.RGP is None for gene in contig.genes)
@@ -1,6 +1,7 @@
 #! /usr/bin/env python3
 
 import pytest
+from itertools import combinations
 from random import randint
 from typing import Generator, Set
 from ppanggolin.RGP import rgp_cluster
@@ -234,3 +235,28 @@ def test_compute_rgp_metric(genes, families):
 
     # max grr is below cutoff so None is returned
     assert rgp_cluster.compute_rgp_metric(RGP_a, RGP_b, 1000, "max_grr") is None
+
+
+@pytest.mark.parametrize("grr_metric", ["incomplete_aware_grr", "min_grr", "max_grr"])
+@pytest.mark.parametrize("cpu", [1, 2])
+def test_compute_grr_edges(genes, families, grr_metric, cpu):
+    """Tests that compute_grr_edges gives the same edges as compute_rgp_metric on each pair of RGP"""
+    list_genes = sorted(genes, key=lambda x: x.position)
+    rgps = []
+    for i, (start, stop) in enumerate([(0, 8), (3, 7), (5, 10), (9, 11)]):
+        rgp = Region(f"RGP_{i}")
+        rgp.ID = i
+        for g in list_genes[start:stop]:
+            rgp[g.position] = g
+        rgps.append(rgp)
+
+    for grr_cutoff in [0, 0.5, 1]:
+        expected_edges = [
+            rgp_cluster.compute_rgp_metric(rgp_a, rgp_b, grr_cutoff, grr_metric)
+            for rgp_a, rgp_b in combinations(rgps, 2)
+            if set(rgp_a.families) & set(rgp_b.families)
+        ]
+        edges = rgp_cluster.compute_grr_edges(
+            rgps, grr_cutoff, grr_metric, cpu=cpu, block_size=3, disable_bar=True
+        )
+        assert sorted(edges) == sorted(edge for edge in expected_edges if edge)
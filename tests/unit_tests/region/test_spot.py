@@ -0,0 +1,57 @@
+#! /usr/bin/env python3
+
+import pytest
+from random import Random
+
+from ppanggolin.geneFamily import GeneFamily
+from ppanggolin.RGP.spot import BorderIndex, check_sim, comp_border
+
+
+@pytest.fixture
+def families():
+    return [GeneFamily(i, f"family_{i}") for i in range(10)]
+
+
+def test_border_index_exact_match(families):
+    index = BorderIndex(overlapping_match=2, set_size=3, exact_match=1)
+    index.add("node", [families[0:3], families[3:6]])
+    assert index.matching_nodes([families[3], families[9], families[8]]) == {"node"}
+    assert index.matching_nodes([families[9], families[3], families[8]]) == set()
+
+
+def test_border_index_overlapping_match(families):
+    index = BorderIndex(overlapping_match=2, set_size=3, exact_match=1)
+    index.add("node", [families[0:3], families[3:6]])
+    # border shifted by one family in both directions
+    assert index.matching_nodes([families[1], families[2], families[9]]) == {"node"}
+    assert index.matching_nodes([families[9], families[0], families[1]]) == {"node"}
+    # overlapping by a single family is not enough
+    assert index.matching_nodes([families[2], families[8], families[9]]) == set()
+
+
+def test_border_index_similar_nodes_in_insertion_order(families):
+    index = BorderIndex(overlapping_match=2, set_size=3, exact_match=1)
+    index.add("second", [families[0:3], families[3:6]])
+    index.add("first", [families[3:6], families[0:3]])
+    index.add("other", [families[0:3], families[6:9]])
+    assert index.similar_nodes([families[0:3], families[3:6]]) == ["second", "first"]
+
+
+def test_border_index_same_result_as_check_sim(families):
+    rng = Random(42)
+    nodes = {
+        i: [[rng.choice(families[:5]) for _ in range(3)] for _ in range(2)]
+        for i in range(50)
+    }
+    index = BorderIndex(overlapping_match=2, set_size=3, exact_match=1)
+    for node, borders in nodes.items():
+        index.add(node, borders)
+    for node, borders in nodes.items():
+        assert index.matching_nodes(borders[0]) == {
+            other
+            for other, other_borders in nodes.items()
+            if any(comp_border(border, borders[0]) for border in other_borders)
+        }
+        assert index.similar_nodes(borders) == [
+            other for other in nodes if check_sim(borders, nodes[other])
+        ]
@@ -0,0 +1,86 @@
+import pytest
+
+from ppanggolin.pangenome import Pangenome
+from ppanggolin.genome import Gene, Contig, Organism
+from ppanggolin.geneFamily import GeneFamily
+from ppanggolin.update.update import add_genomes_to_pangenome, add_genes_to_families
+
+
+def make_organism(name: str, contig_ids: list, nb_genes: int = 3) -> Organism:
+    """Genome whose contigs have the given identifiers and the same number of genes"""
+    organism = Organism(name)
+    for contig_id in contig_ids:
+        contig = Contig(contig_id, f"{name}_contig_{contig_id}")
+        organism.add(contig)
+        for position in range(nb_genes):
+            gene = Gene(f"{contig.name}_gene_{position}")
+            gene.fill_annotations(
+                start=10 * position + 1,
+                stop=10 * (position + 1),
+                strand="+",
+                position=position,
+            )
+            contig.add(gene)
+            gene.fill_parents(organism, contig)
+    return organism
+
+
+@pytest.fixture
+def pangenome() -> Pangenome:
+    """Pangenome with one genome of two contigs, whose genes all belong to the same family"""
+    pangenome = Pangenome()
+    organism = make_organism("organism", [0, 1])
+    pangenome.add_organism(organism)
+    family = GeneFamily(pangenome.max_fam_id, "family")
+    pangenome.add_gene_family(family)
+    for gene in organism.genes:
+        family.add(gene)
+    return pangenome
+
+
+def test_add_genomes_to_pangenome(pangenome):
+    # contig identifiers of new genomes start again from 0 when they are annotated
+    new_organisms = [make_organism("new_1", [0]), make_organism("new_2", [1, 2])]
+    add_genomes_to_pangenome(pangenome, new_organisms)
+
+    assert pangenome.number_of_organisms == 3
+    assert sorted(contig.ID for contig in pangenome.contigs) == [0, 1, 2, 3, 4]
+    assert pangenome.get_gene("new_2_contig_2_gene_0").organism.name == "new_2"
+
+
+def test_add_genomes_with_known_gene_ids(pangenome):
+    new_organism = make_organism("organism", [0])
+    new_organism.name = "new"
+    with pytest.raises(KeyError):
+        add_genomes_to_pangenome(pangenome, [new_organism])
+
+
+def test_add_genes_to_families(pangenome):
+    new_organism = make_organism("new", [0], nb_genes=4)
+    add_genomes_to_pangenome(pangenome, [new_organism])
+    family = pangenome.get_gene_family("family")
+    genes = list(new_organism.genes)
+
+    updated_families, new_families = add_genes_to_families(
+        pangenome,
+        genes,
+        gene_to_family={genes[0].ID: family},
+        genes2fam={
+            genes[1].ID: (genes[1].ID, False),
+            genes[2].ID: (genes[1].ID, True),
+            genes[3].ID: (genes[3].ID, False),
+        },
+        fam2seq={genes[1].ID: "MA", genes[3].ID: "MC"},
+    )
+
+    assert updated_families == {family}
+    assert {new_family.name for new_family in new_families} == {
+        genes[1].ID,
+        genes[3].ID,
+    }
+    assert pangenome.number_of_gene_families == 3
+    assert genes[0].family == family
+    assert genes[2].family == genes[1].family
+    assert genes[2].is_fragment
+    assert genes[1].family.representative == genes[1]
+    assert genes[3].family.sequence == "MC"